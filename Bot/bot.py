@@ -8,23 +8,35 @@ Wersja: 6.3.0
 """
 
 import json
-import logging
+import math
 import os
 import platform
 import random
 import sys
 import time
 import asyncio
+import collections
 from datetime import datetime, UTC, date as date_obj, timedelta, timezone, time as time_obj
 import typing
 
 import aiosqlite
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ext.commands import Context
 from dotenv import load_dotenv
 
 from database import ZarzadcaBazyDanych
+from database.bufor_xp import INDEKSY_KOLUMN
+from database.cooldowny import BramkaCooldownow
+from database.harmonogram import Harmonogram
+from database.kolejka_xp import KolejkaZdarzenXP, ZdarzenieXP
+from database.osiagniecia import TierOsiagniecia, WARUNKI_ZE_STANU
+from database.migrator import MigratorBazy, BladMigracji, KATALOG_MIGRACJI
+from database.pula_polaczen import PulaPolaczen
+from database.sesje_glosowe import SesjeGlosowe
+from database.wygasanie import WpisWygasania
+from logowanie import skonfiguruj_logowanie
+from database.skrzynka_powiadomien import SkrzynkaPowiadomien, Powiadomienie, Przesylka, Cel, PonowPozniej, CelNiedostepny, PRIORYTET_WYSOKI, PRIORYTET_NORMALNY, PRIORYTET_NISKI
 import config
 
 load_dotenv()
@@ -40,6 +52,22 @@ API_KEY_ENV = os.getenv("API_KEY")
 MAIN_SERVER_ID_ENV = os.getenv("MAIN_SERVER_ID")
 # --- Koniec Konfiguracji Zmiennych ---
 
+# Typ zdarzenia XP -> (opis do logów, XP min, XP max, pole znacznika cooldownu, cooldown w sekundach, licznik)
+RODZAJE_ZDARZEN_XP = {
+    "wiadomosc": ("napisanie wiadomości", config.XP_ZA_WIADOMOSC_MIN, config.XP_ZA_WIADOMOSC_MAX, "ostatnia_wiadomosc_timestamp", config.COOLDOWN_XP_WIADOMOSC_SEKUNDY, "wiadomosc"),
+    "reakcja": ("dodanie reakcji", config.XP_ZA_REAKCJE_MIN, config.XP_ZA_REAKCJE_MAX, "ostatnia_reakcja_timestamp", config.COOLDOWN_XP_REAKCJE_SEKUNDY, "reakcja"),
+    "glos": ("aktywność na kanale głosowym", config.XP_ZA_GLOS_ILOSC_MIN, config.XP_ZA_GLOS_ILOSC_MAX, None, 0, None),
+}
+# Pole znacznika w doswiadczenie_uzytkownika -> cooldown XP (klucze bramki cooldownów)
+COOLDOWNY_XP = {rodzaj[3]: rodzaj[4] for rodzaj in RODZAJE_ZDARZEN_XP.values() if rodzaj[3]}
+
+# Typ akcji misji -> klucz, który musi się zgadzać w warunku misji i w dodatkowych danych akcji
+FILTRY_WARUNKOW_MISJI = {
+    "uzycie_komendy_kategorii_od_resetu": "kategoria_komendy",
+    "uzycie_komendy": "nazwa_komendy",
+    "uzyj_przedmiotu_ze_sklepu_od_resetu": "id_przedmiotu",
+}
+
 
 intencje = discord.Intents.default()
 intencje.members = True
@@ -47,33 +75,7 @@ intencje.voice_states = True
 intencje.reactions = True
 intencje.message_content = True
 
-class FormatterLogowania(logging.Formatter):
-    czarny = "\x1b[30m"; czerwony = "\x1b[31m"; zielony = "\x1b[32m"; zolty = "\x1b[33m"
-    niebieski = "\x1b[34m"; szary = "\x1b[38m"; reset = "\x1b[0m"; pogrubienie = "\x1b[1m"
-    KOLORY = {
-        logging.DEBUG: szary + pogrubienie, logging.INFO: niebieski + pogrubienie,
-        logging.WARNING: zolty + pogrubienie, logging.ERROR: czerwony,
-        logging.CRITICAL: czerwony + pogrubienie,
-    }
-    def format(self, record):
-        kolor_logu = self.KOLORY.get(record.levelno, self.szary + self.pogrubienie)
-        format_str = "(czarny){asctime}(reset) (kolor_poziomu){levelname:<8}(reset) (zielony){name}(reset) {message}"
-        format_str = format_str.replace("(czarny)", self.czarny + self.pogrubienie).replace("(reset)", self.reset)
-        format_str = format_str.replace("(kolor_poziomu)", kolor_logu).replace("(zielony)", self.zielony + self.pogrubienie)
-        formatter = logging.Formatter(format_str, "%Y-%m-%d %H:%M:%S", style="{")
-        return formatter.format(record)
-
-logger = logging.getLogger("discord_bot")
-logger.setLevel(logging.INFO)
-handler_konsoli = logging.StreamHandler()
-handler_konsoli.setFormatter(FormatterLogowania())
-handler_pliku = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
-formatter_handler_pliku = logging.Formatter(
-    "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
-)
-handler_pliku.setFormatter(formatter_handler_pliku)
-logger.addHandler(handler_konsoli)
-logger.addHandler(handler_pliku)
+logger = skonfiguruj_logowanie("discord_bot", "discord.log", max_bajtow=config.LOG_PLIK_MAX_BAJTOW, liczba_kopii=config.LOG_PLIK_LICZBA_KOPII, probkowanie=config.LOG_PROBKOWANIE)
 
 class BotDiscord(commands.Bot):
     def __init__(self) -> None:
@@ -92,10 +94,15 @@ class BotDiscord(commands.Bot):
         self.api_key = API_KEY_ENV
         self.main_server_id = int(MAIN_SERVER_ID_ENV) if MAIN_SERVER_ID_ENV and MAIN_SERVER_ID_ENV.isdigit() else None
 
-        self.aktywni_na_glosowym_start_time: dict[int, dict[int, float]] = {}
+        self.sesje_glosowe = SesjeGlosowe()
         self.konfiguracja_xp_serwera: dict[int, dict] = {}
         self.DEFINICJE_OSIAGNIEC = config.DEFINICJE_OSIAGNIEC
         self.DEFINICJE_MISJI = config.DEFINICJE_MISJI
+        self.misje_wg_typu_akcji = self._indeksuj_misje(self.DEFINICJE_MISJI)
+        self.bramka_cooldownow = BramkaCooldownow(config.BRAMKA_COOLDOWNOW_ROZMIAR) if config.BRAMKA_COOLDOWNOW_ROZMIAR > 0 else None
+        self.kolejka_xp: KolejkaZdarzenXP | None = None
+        self.skrzynka_powiadomien: SkrzynkaPowiadomien | None = None
+        self.harmonogram = Harmonogram(zapisz_termin=self._zapisz_termin_zadania, logger=self.logger)
 
         self.ostatni_reset_misji_dziennych_ts: int = 0
         self.ostatni_reset_misji_tygodniowych_ts: int = 0
@@ -126,48 +133,36 @@ class BotDiscord(commands.Bot):
 
     async def inicjalizuj_bd(self) -> None:
         db_path = f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db"
-        schema_path = f"{os.path.realpath(os.path.dirname(__file__))}/database/schema.sql"
 
         self.logger.info(f"Ścieżka do bazy danych: {db_path}")
-        self.logger.info(f"Ścieżka do pliku schematu: {schema_path}")
+        self.logger.info(f"Katalog migracji: {KATALOG_MIGRACJI}")
 
-        if not os.path.exists(schema_path):
-            self.logger.critical(f"KRYTYCZNY BŁĄD: Nie znaleziono pliku schematu bazy danych w: {schema_path}")
+        if not os.path.isdir(KATALOG_MIGRACJI):
+            self.logger.critical(f"KRYTYCZNY BŁĄD: Nie znaleziono katalogu migracji bazy danych: {KATALOG_MIGRACJI}")
             self.logger.critical("Bot nie może kontynuować bez schematu bazy danych. Zamykanie...")
             await self.close()
-            sys.exit("Brak pliku schema.sql")
+            sys.exit("Brak katalogu migracji")
             return
 
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-        self.logger.info("Próba połączenia z bazą danych i wykonania skryptu schematu...")
         async with aiosqlite.connect(db_path) as db:
             try:
-                with open(schema_path, "r", encoding="utf-8") as plik_schematu:
-                    schema_content = plik_schematu.read()
-                    self.logger.debug(f"Zawartość pliku schematu (pierwsze 500 znaków):\n{schema_content[:500]}")
-                    self.logger.info("Rozpoczynam wykonywanie skryptu schematu...")
-                    await db.executescript(schema_content)
-                    self.logger.info("Pomyślnie ZAKOŃCZONO wykonywanie skryptu schematu bazy danych dla Kronik Elary.")
-            except FileNotFoundError:
-                self.logger.error(f"Nie znaleziono pliku schematu: {schema_path}")
-            except aiosqlite.Error as e_sqlite:
-                self.logger.error(f"Błąd SQLite podczas wykonywania skryptu schematu bazy danych: {e_sqlite}", exc_info=True)
-                self.logger.critical("Bot nie może kontynuować z powodu błędu bazy danych. Sprawdź plik schema.sql. Zamykanie...")
+                migrator = MigratorBazy(db, rozmiar_partii=config.DB_MIGRACJE_ROZMIAR_PARTII, logger=self.logger)
+                await migrator.migruj()
+            except (BladMigracji, aiosqlite.Error) as e:
+                self.logger.error(f"Błąd podczas migracji bazy danych: {e}", exc_info=True)
+                self.logger.critical("Bot nie może kontynuować z powodu błędu bazy danych. Sprawdź pliki w database/migracje. Zamykanie...")
                 await self.close()
-                sys.exit(f"Błąd SQLite w schema.sql: {e_sqlite}")
+                sys.exit(f"Błąd migracji bazy danych: {e}")
                 return
             except Exception as e:
-                self.logger.error(f"Ogólny błąd podczas wykonywania skryptu schematu bazy danych: {e}", exc_info=True)
+                self.logger.error(f"Ogólny błąd podczas migracji bazy danych: {e}", exc_info=True)
                 self.logger.critical("Bot nie może kontynuować z powodu błędu bazy danych. Zamykanie...")
                 await self.close()
-                sys.exit(f"Ogólny błąd w schema.sql: {e}")
+                sys.exit(f"Ogólny błąd migracji bazy danych: {e}")
                 return
 
-            self.logger.info("Próba wykonania db.commit()...")
-            await db.commit()
-            self.logger.info("db.commit() wykonany pomyślnie.")
-
     async def zaladuj_kapsuly(self) -> None:
         cogs_dir = f"{os.path.realpath(os.path.dirname(__file__))}/cogs"
         if not os.path.exists(cogs_dir):
@@ -189,7 +184,6 @@ class BotDiscord(commands.Bot):
                 except Exception as e:
                     self.logger.error(f"Błąd ładowania kapsuły {rozszerzenie}: {type(e).__name__}: {e}", exc_info=True)
 
-    @tasks.loop(minutes=1.0)
     async def zadanie_statusu(self) -> None:
         statusy = [
             "słucha szeptów Aethelgardu...", f"pomaga Elarze katalogować anime!",
@@ -200,9 +194,27 @@ class BotDiscord(commands.Bot):
         ]
         await self.change_presence(activity=discord.Game(random.choice(statusy)))
 
-    @zadanie_statusu.before_loop
-    async def przed_zadaniem_statusu(self) -> None:
+    # --- Harmonogram ---
+    def _zarejestruj_zadania(self) -> None:
+        """Wszystkie okresowe zadania bota w jednym harmonogramie - interwały z rozrzutem, terminy kalendarzowe co do minuty."""
+        rozrzut = config.HARMONOGRAM_ROZRZUT_SEKUNDY
+        h = self.harmonogram
+        h.dodaj("status", lambda termin: self.zadanie_statusu(), co_ile_s=60, rozrzut_s=rozrzut)
+        h.dodaj("xp_za_glos", lambda termin: self.zadanie_xp_za_glos(), co_ile_s=config.XP_ZA_GLOS_CO_ILE_MINUT * 60)
+        h.dodaj("live_ranking", lambda termin: self.zadanie_live_ranking(), co_ile_s=5 * 60, rozrzut_s=rozrzut)
+        h.dodaj("reset_misji_dziennych", lambda termin: self.zadanie_resetowania_misji(),
+                cron=f"0 {config.RESET_MISJI_DZIENNYCH_GODZINA_UTC} * * *", nadrabiaj=1)
+        h.dodaj("reset_misji_tygodniowych", lambda termin: self.zadanie_resetowania_misji(),
+                cron=f"0 {config.RESET_MISJI_TYGODNIOWYCH_GODZINA_UTC} * * {config.RESET_MISJI_TYGODNIOWYCH_DZIEN_TYGODNIA}", nadrabiaj=1)
+        h.dodaj("koniec_sezonu", self.zadanie_konca_sezonu_miesiecznego, cron="0 0 1 * *", nadrabiaj=config.HARMONOGRAM_MAKS_NADROBIEN_SEZONU)
+
+    async def _przed_harmonogramem(self) -> None:
         await self.wait_until_ready()
+        await self._przywroc_sesje_glosowe()
+
+    async def _zapisz_termin_zadania(self, nazwa: str, termin_ts: int) -> None:
+        if self.baza_danych is not None: await self.baza_danych.zapisz_termin_zadania(nazwa, termin_ts)
+
 
     async def setup_hook(self) -> None:
         self.logger.info(f"Zalogowano jako {self.user.name} (ID: {self.user.id}) - Witaj w Kronikach Elary!") # type: ignore
@@ -222,8 +234,36 @@ class BotDiscord(commands.Bot):
 
         db_connection_path = f"{os.path.realpath(os.path.dirname(__file__))}/database/database.db"
         try:
-            db_connection = await aiosqlite.connect(db_connection_path)
-            self.baza_danych = ZarzadcaBazyDanych(connection=db_connection)
+            pula = await PulaPolaczen.otworz(db_connection_path, liczba_czytelnikow=config.DB_LICZBA_POLACZEN_ODCZYTU, busy_timeout_ms=config.DB_BUSY_TIMEOUT_MS)
+            self.baza_danych = ZarzadcaBazyDanych(connection=pula.zapis, pula=pula)
+            self.logger.info(f"Baza danych w trybie WAL: 1 połączenie zapisujące, {len(pula.czytelnicy)} połączeń do odczytu.")
+            if config.XP_BUFOR_WLACZONY:
+                self.baza_danych.wlacz_bufor_xp(config.XP_BUFOR_ZRZUT_CO_ILE_MS, config.XP_BUFOR_MAX_WIERSZY, logger=self.logger)
+                self.logger.info(f"Bufor zapisu XP włączony (zrzut co {config.XP_BUFOR_ZRZUT_CO_ILE_MS} ms lub po {config.XP_BUFOR_MAX_WIERSZY} wierszach).")
+            if config.RANKINGI_PAMIECIOWE_WLACZONE:
+                rankingi = await self.baza_danych.wlacz_rankingi_pamieciowe()
+                statystyki_rankingow = rankingi.statystyki()
+                self.logger.info(f"Rankingi w pamięci zbudowane: {statystyki_rankingow['liczba_rankingow']} rankingów, {statystyki_rankingow['liczba_wpisow']} wpisów w {statystyki_rankingow['czas_budowy_ms']:.0f} ms.")
+            if config.PAMIEC_UZYTKOWNIKOW_ROZMIAR > 0:
+                self.baza_danych.wlacz_pamiec_uzytkownikow(config.PAMIEC_UZYTKOWNIKOW_ROZMIAR)
+                self.logger.info(f"Pamięć podręczna użytkowników włączona (do {config.PAMIEC_UZYTKOWNIKOW_ROZMIAR} wpisów).")
+            if self.bramka_cooldownow is not None:
+                teraz_ts = int(time.time())
+                znaczniki = await self.baza_danych.pobierz_znaczniki_zdarzen_xp(teraz_ts - max(COOLDOWNY_XP.values()))
+                zasiane = sum(self.bramka_cooldownow.zasiej(pole, ((s_id, u_id, wiersz[indeks]) for s_id, u_id, *wiersz in znaczniki), cooldown, teraz_ts)
+                              for indeks, (pole, cooldown) in enumerate(COOLDOWNY_XP.items()))
+                self.logger.info(f"Bramka cooldownów XP włączona (do {config.BRAMKA_COOLDOWNOW_ROZMIAR} wpisów, {zasiane} z bazy).")
+            if config.XP_KOLEJKA_LICZBA_WORKEROW > 0:
+                self.kolejka_xp = KolejkaZdarzenXP(self._obsluz_partie_xp, liczba_workerow=config.XP_KOLEJKA_LICZBA_WORKEROW, pojemnosc=config.XP_KOLEJKA_POJEMNOSC, okno_ms=config.XP_KOLEJKA_OKNO_MS, logger=self.logger)
+                self.kolejka_xp.uruchom()
+                self.logger.info(f"Kolejka zdarzeń XP włączona ({config.XP_KOLEJKA_LICZBA_WORKEROW} workerów, do {config.XP_KOLEJKA_POJEMNOSC} zdarzeń, okno partii {config.XP_KOLEJKA_OKNO_MS} ms).")
+            wygasanie = self.baza_danych.wlacz_wygasanie(
+                self._zdejmij_role_czasowa, horyzont_s=config.WYGASANIE_HORYZONT_GODZIN * 3600, rownoleglosc=config.WYGASANIE_ROWNOLEGLOSC,
+                limit_na_serwer=config.WYGASANIE_LIMIT_NA_SERWER, okres_limitu_s=config.WYGASANIE_OKRES_LIMITU_S, logger=self.logger)
+            wygasanie.uruchom(self.wait_until_ready)
+            self.logger.info(f"Wygasanie ról czasowych i przedmiotów włączone (horyzont {config.WYGASANIE_HORYZONT_GODZIN} h, {config.WYGASANIE_ROWNOLEGLOSC} naraz, {config.WYGASANIE_LIMIT_NA_SERWER} ról/{config.WYGASANIE_OKRES_LIMITU_S:g} s na serwer).")
+            indeks_osiagniec = self.baza_danych.ustaw_definicje_osiagniec(self.DEFINICJE_OSIAGNIEC)
+            self.logger.info(f"Indeks osiągnięć: {len(indeks_osiagniec)} tierów.")
             self.logger.info("Połączono z bazą danych i zainicjowano Zarządcę.")
         except aiosqlite.Error as e:
             self.logger.critical(f"Nie udało się połączyć z bazą danych {db_connection_path} dla Zarządcy: {e}", exc_info=True)
@@ -251,14 +291,39 @@ class BotDiscord(commands.Bot):
 
         self.logger.info(f"Inicjalizacja timestampów resetu misji: Dzienny: {datetime.fromtimestamp(self.ostatni_reset_misji_dziennych_ts, UTC)}, Tygodniowy: {datetime.fromtimestamp(self.ostatni_reset_misji_tygodniowych_ts, UTC)}")
 
+        if config.POWIADOMIENIA_WLACZONE:
+            self.skrzynka_powiadomien = SkrzynkaPowiadomien(
+                self._wyslij_przesylki, okno_laczenia_ms=config.POWIADOMIENIA_OKNO_LACZENIA_MS, limit_na_cel=config.POWIADOMIENIA_LIMIT_NA_CEL,
+                okres_limitu_s=config.POWIADOMIENIA_OKRES_LIMITU_S, limit_globalny_na_s=config.POWIADOMIENIA_LIMIT_GLOBALNY_NA_S,
+                rownoleglosc=config.POWIADOMIENIA_ROWNOLEGLOSC, pojemnosc=config.POWIADOMIENIA_POJEMNOSC, logger=self.logger)
+            self.skrzynka_powiadomien.uruchom()
+            self.logger.info(f"Skrzynka powiadomień włączona (łączenie w oknie {config.POWIADOMIENIA_OKNO_LACZENIA_MS} ms, {config.POWIADOMIENIA_LIMIT_NA_CEL} wiad./{config.POWIADOMIENIA_OKRES_LIMITU_S:g} s na kanał/DM).")
+
+        self._zarejestruj_zadania()
         await self.zaladuj_kapsuly()
-        self.zadanie_statusu.start()
-        self.zadanie_xp_za_glos.start()
-        self.zadanie_live_ranking.start()
-        self.zadanie_czyszczenia_bonusow.start()
-        self.zadanie_sprawdzania_rol_czasowych.start()
-        self.zadanie_resetowania_misji.start()
-        self.zadanie_konca_sezonu_miesiecznego.start()
+        self.harmonogram.uruchom(self._przed_harmonogramem, ostatnie_terminy=await self.baza_danych.pobierz_terminy_zadan())
+        self.logger.info(f"Harmonogram uruchomiony: {len(self.harmonogram.zadania)} zadań ({', '.join(self.harmonogram.zadania)}).")
+
+    async def close(self) -> None:
+        await self.harmonogram.zamknij()
+        if self.kolejka_xp is not None:
+            await self.kolejka_xp.zamknij()
+            self.logger.info(f"Kolejka zdarzeń XP zatrzymana: {self.kolejka_xp.statystyki()}")
+            self.kolejka_xp = None
+        if self.skrzynka_powiadomien is not None:
+            await self.skrzynka_powiadomien.zamknij()
+            self.logger.info(f"Skrzynka powiadomień zatrzymana: {self.skrzynka_powiadomien.statystyki()}")
+            self.skrzynka_powiadomien = None
+        if self.baza_danych is not None:
+            try:
+                await self.baza_danych.zapisz_punkt_kontrolny_sesji(self.sesje_glosowe.do_zapisu(), int(time.time()))
+                if self.baza_danych.bufor_xp is not None:
+                    self.logger.info(f"Zapisywanie bufora XP przed zamknięciem: {self.baza_danych.bufor_xp.statystyki()}")
+                await self.baza_danych.zamknij()
+            except Exception as e:
+                self.logger.error(f"Błąd podczas zamykania bazy danych: {e}", exc_info=True)
+            self.baza_danych = None
+        await super().close()
 
     async def _create_bot_embed(self, context: typing.Optional[Context], title: str, description: str = "", color: discord.Color = config.KOLOR_BOT_GLOWNY) -> discord.Embed:
         embed = discord.Embed(title=title, description=description, color=color, timestamp=datetime.now(UTC))
@@ -270,6 +335,77 @@ class BotDiscord(commands.Bot):
         embed.set_footer(text="Kroniki Elary", icon_url=guild_icon_url)
         return embed
 
+    # --- Powiadomienia ---
+    @staticmethod
+    def _cele_kanalu(guild: discord.Guild) -> list[Cel]:
+        kanal = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
+        return [("kanal", kanal.id)] if kanal else []
+
+    async def _powiadom(self, member: discord.Member, guild: discord.Guild, priorytet: int, cele: list[Cel], embed: discord.Embed, wzmianka: str | None = None) -> None:
+        """Powiadomienie przez skrzynkę (łączone z innymi powiadomieniami użytkownika) albo od razu, gdy skrzynka jest wyłączona."""
+        if not cele: return
+        if self.skrzynka_powiadomien is not None:
+            self.skrzynka_powiadomien.wstaw(priorytet, cele, (wzmianka, embed), klucz_laczenia=(guild.id, member.id))
+            return
+        przesylka = Przesylka([Powiadomienie(priorytet, tuple(cele), (wzmianka, embed), None, time.monotonic())], 0)
+        while przesylka.cele:
+            try:
+                await self._wyslij_przesylki(przesylka.cele[0], [przesylka])
+                return
+            except CelNiedostepny:
+                przesylka.cele = przesylka.cele[1:]
+            except Exception as e:
+                self.logger.error(f"Błąd wysyłania powiadomienia dla {member.display_name}: {e}", exc_info=True)
+                return
+        self.logger.warning(f"Nie można dostarczyć powiadomienia do {member.display_name} (brak uprawnień lub zablokowane DM).")
+
+    @staticmethod
+    def _polacz_embedy(przesylka: Przesylka) -> discord.Embed:
+        """Jeden embed z powiadomień przesyłki: najważniejsze jest bazą, pozostałe dochodzą jako pola."""
+        embedy = [powiadomienie.tresc[1] for powiadomienie in przesylka.powiadomienia]
+        if len(embedy) == 1: return embedy[0]
+        embed = embedy[0].copy()
+        for numer, dolaczany in enumerate(embedy[1:], start=1):
+            tresc = "\n".join([dolaczany.description or ""] + [f"**{pole.name}**\n{pole.value}" for pole in dolaczany.fields]).strip()
+            nazwa, wartosc = (dolaczany.title or "\u200b")[:256], (tresc or "\u200b")[:1024]
+            if len(embed.fields) >= 24 or len(embed) + len(nazwa) + len(wartosc) > 5800:
+                embed.add_field(name="\u200b", value=f"…i jeszcze {len(embedy) - numer} powiadomień.", inline=False)
+                break
+            embed.add_field(name=nazwa, value=wartosc, inline=False)
+        return embed
+
+    async def _wyslij_przesylki(self, cel: Cel, przesylki: list[Przesylka]) -> None:
+        """
+        Wysyła przesyłki na kanał lub DM - do 10 embedów (łącznie do 6000 znaków) w jednej wiadomości.
+        Błąd po części wiadomości niesie liczbę już wysłanych przesyłek, żeby skrzynka nie wysłała ich ponownie.
+        """
+        rodzaj, cel_id = cel
+        embedy = [self._polacz_embedy(przesylka) for przesylka in przesylki]
+        wzmianki = " ".join(dict.fromkeys(p.tresc[0] for przesylka in przesylki for p in przesylka.powiadomienia if p.tresc[0]))
+        wyslane = 0
+        try:
+            if rodzaj == "dm":
+                odbiorca = self.get_user(cel_id) or await self.fetch_user(cel_id)
+                wzmianki = ""
+            else:
+                odbiorca = self.get_channel(cel_id)
+                if odbiorca is None: raise CelNiedostepny(f"brak kanału {cel_id}")
+            partia, znaki = [], 0
+            for embed in embedy:
+                if partia and (len(partia) == 10 or znaki + len(embed) > 6000):
+                    await odbiorca.send(content=wzmianki or None, embeds=partia)
+                    wyslane += len(partia)
+                    partia, znaki = [], 0
+                partia.append(embed)
+                znaki += len(embed)
+            await odbiorca.send(content=wzmianki or None, embeds=partia)
+        except (discord.Forbidden, discord.NotFound) as e:
+            raise CelNiedostepny(str(e), wyslane=wyslane) from e
+        except discord.HTTPException as e:
+            # discord.py sam ponawia po 429 - tu trafia dopiero limit, którego nie przeczekał
+            if e.status == 429: raise PonowPozniej(float(getattr(e, "retry_after", None) or 1.0), wyslane) from e
+            raise
+
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         if not self.welcome_channel_id: return
@@ -303,284 +439,256 @@ class BotDiscord(commands.Bot):
         if poziom == 0: return 100
         return 5 * (poziom ** 2) + (50 * poziom) + 100
 
-    async def wyslij_wiadomosc_o_awansie(self, member: discord.Member, guild: discord.Guild, nowy_poziom: int, dukaty_za_poziom: int, nowe_saldo_dukatow: int):
-        kanal_do_wyslania = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
-        if kanal_do_wyslania:
-            try:
-                embed = await self._create_bot_embed(
-                    None, title="✨ Awans w Kronikach! ✨",
-                    description=f"Gratulacje, {member.mention}! Twoja legenda rośnie w siłę!",
-                    color=config.KOLOR_BOT_SUKCES
-                )
-                if member.display_avatar: embed.set_thumbnail(url=member.display_avatar.url)
-                embed.add_field(name="🌟 Nowy Poziom Opowieści", value=f"**{nowy_poziom}**", inline=True)
-                embed.add_field(name="💰 Nagroda", value=f"Otrzymujesz **{dukaty_za_poziom}** ✨ Gwiezdnych Dukatów!", inline=True)
-                embed.add_field(name="🪙 Twoje Saldo", value=f"**{nowe_saldo_dukatow}** ✨ Gwiezdnych Dukatów", inline=False)
-                if guild.icon: embed.set_footer(text="Niech Twoje opowieści będą wieczne!", icon_url=guild.icon.url)
-                else: embed.set_footer(text="Niech Twoje opowieści będą wieczne!")
-                await kanal_do_wyslania.send(embed=embed)
-            except discord.Forbidden: self.logger.warning(f"Brak uprawnień do wysłania wiad. o awansie na {kanal_do_wyslania.name}.")
-
-    async def sprawdz_i_awansuj(self, member: discord.Member, guild: discord.Guild, _processed_level_missions: typing.Optional[set[int]] = None):
-        if _processed_level_missions is None:
-            _processed_level_missions = set()
-
+    def oblicz_poziom_dla_xp(self, xp: int) -> int:
+        """
+        Odwrotność oblicz_xp_dla_poziomu: najmniejszy poziom, dla którego próg awansu > xp.
+        5p² + 50p + 100 > xp  <=>  5(p + 5)² > xp + 25, więc p = isqrt((xp + 25) // 5) - 4.
+        """
+        return max(0, math.isqrt(max(0, int(xp) + 25) // 5) - 4)
+
+    async def wyslij_wiadomosc_o_awansie(self, member: discord.Member, guild: discord.Guild, nowy_poziom: int, dukaty_za_poziom: int, nowe_saldo_dukatow: int, poprzedni_poziom: int | None = None, role_za_poziomy: list[tuple[int, discord.Role]] | None = None):
+        cele = self._cele_kanalu(guild)
+        if not cele: return
+        embed = await self._create_bot_embed(
+            None, title="✨ Awans w Kronikach! ✨",
+            description=f"Gratulacje, {member.mention}! Twoja legenda rośnie w siłę!",
+            color=config.KOLOR_BOT_SUKCES
+        )
+        if member.display_avatar: embed.set_thumbnail(url=member.display_avatar.url)
+        opis_poziomu = f"**{poprzedni_poziom}** ➜ **{nowy_poziom}**" if poprzedni_poziom is not None and nowy_poziom - poprzedni_poziom > 1 else f"**{nowy_poziom}**"
+        embed.add_field(name="🌟 Nowy Poziom Opowieści", value=opis_poziomu, inline=True)
+        embed.add_field(name="💰 Nagroda", value=f"Otrzymujesz **{dukaty_za_poziom}** ✨ Gwiezdnych Dukatów!", inline=True)
+        embed.add_field(name="🪙 Twoje Saldo", value=f"**{nowe_saldo_dukatow}** ✨ Gwiezdnych Dukatów", inline=False)
+        if role_za_poziomy:
+            embed.add_field(name="🎖️ Nowa Godność!", value="\n".join(f"Poziom {poziom}: **{rola.name}**" for poziom, rola in role_za_poziomy), inline=False)
+        if guild.icon: embed.set_footer(text="Niech Twoje opowieści będą wieczne!", icon_url=guild.icon.url)
+        else: embed.set_footer(text="Niech Twoje opowieści będą wieczne!")
+        await self._powiadom(member, guild, PRIORYTET_WYSOKI, cele, embed)
+
+    async def sprawdz_i_awansuj(self, member: discord.Member, guild: discord.Guild):
+        """
+        Awansuje od razu na poziom wynikający z XP (także o wiele poziomów): jeden zapis poziomu i sumy dukatów,
+        nagrody-role za wszystkie przekroczone poziomy jednym zapytaniem i jedno ogłoszenie.
+        """
         if self.baza_danych is None: return
         user_id, server_id = member.id, guild.id
         dane_uzytkownika_pelne = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
         aktualne_xp, aktualny_poziom = dane_uzytkownika_pelne[2], dane_uzytkownika_pelne[3]
-        xp_do_nastepnego_poziomu = self.oblicz_xp_dla_poziomu(aktualny_poziom)
-
-        if aktualne_xp >= xp_do_nastepnego_poziomu:
-            nowy_poziom_po_awansie = aktualny_poziom + 1
+        nowy_poziom_po_awansie = self.oblicz_poziom_dla_xp(aktualne_xp)
+        if nowy_poziom_po_awansie <= aktualny_poziom: return
+
+        async with self.baza_danych.transakcja():
+            # Ponowny odczyt pod blokadą zapisu - równoległy awans tego użytkownika (kolejka XP, głos, misje, osiągnięcia)
+            # mógł już zapisać poziom i wypłacić dukaty; wtedy ten kończy się bez wypłaty i ogłoszenia
+            dane_uzytkownika_pelne = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
+            aktualne_xp, aktualny_poziom = dane_uzytkownika_pelne[2], dane_uzytkownika_pelne[3]
+            nowy_poziom_po_awansie = self.oblicz_poziom_dla_xp(aktualne_xp)
+            if nowy_poziom_po_awansie <= aktualny_poziom: return
+            dukaty_za_poziom = config.DUKATY_ZA_POZIOM * (nowy_poziom_po_awansie - aktualny_poziom)
             await self.baza_danych.aktualizuj_doswiadczenie(user_id, server_id, nowy_poziom=nowy_poziom_po_awansie)
-            dukaty_za_poziom = config.DUKATY_ZA_POZIOM
-
             _, nowe_saldo_dukatow_val = await self.baza_danych.aktualizuj_portfel(user_id, server_id, ilosc_dukatow_do_dodania=dukaty_za_poziom)
 
-            await self.wyslij_wiadomosc_o_awansie(member, guild, nowy_poziom_po_awansie, dukaty_za_poziom, nowe_saldo_dukatow_val)
-            await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "poziom_xp", nowy_poziom_po_awansie)
-            
-            if nowy_poziom_po_awansie not in _processed_level_missions:
-                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "osiagniecie_poziomu_xp", nowy_poziom_po_awansie)
-                _processed_level_missions.add(nowy_poziom_po_awansie)
+        role_za_poziomy = []
+        for poziom_nagrody, rola_id in await self.baza_danych.pobierz_nagrody_za_poziomy(server_id, aktualny_poziom, nowy_poziom_po_awansie):
+            rola = guild.get_role(int(rola_id))
+            if rola: role_za_poziomy.append((poziom_nagrody, rola))
+            else: self.logger.warning(f"Nie znaleziono roli o ID {rola_id} (nagroda za poziom).")
+        if role_za_poziomy:
+            try:
+                await member.add_roles(*(rola for _, rola in role_za_poziomy), reason=f"Nagroda za Poziom {nowy_poziom_po_awansie}")
+            except discord.Forbidden:
+                self.logger.warning(f"Brak uprawnień do nadania ról {', '.join(rola.name for _, rola in role_za_poziomy)}.")
+                role_za_poziomy = []
 
+        await self.wyslij_wiadomosc_o_awansie(member, guild, nowy_poziom_po_awansie, dukaty_za_poziom, nowe_saldo_dukatow_val, aktualny_poziom, role_za_poziomy)
 
-            nagroda_rola_dane = await self.baza_danych.pobierz_nagrode_za_poziom(server_id, nowy_poziom_po_awansie)
-            if nagroda_rola_dane:
-                rola_id_int = int(nagroda_rola_dane[0])
-                rola = guild.get_role(rola_id_int)
-                if rola:
-                    try:
-                        await member.add_roles(rola, reason=f"Nagroda za Poziom {nowy_poziom_po_awansie}")
-                        kanal_do_wyslania_rola = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
-                        if kanal_do_wyslania_rola:
-                            embed_rola = await self._create_bot_embed(None, title="🎖️ Nowa Godność!", description=f"{member.mention}, za Poziom {nowy_poziom_po_awansie} otrzymałeś/aś **{rola.name}**!", color=config.KOLOR_BOT_SUKCES)
-                            await kanal_do_wyslania_rola.send(embed=embed_rola)
-                    except discord.Forbidden: self.logger.warning(f"Brak uprawnień do nadania roli '{rola.name}'.")
-                else: self.logger.warning(f"Nie znaleziono roli o ID {rola_id_int} (nagroda za poziom).")
-            await self.sprawdz_i_awansuj(member, guild, _processed_level_missions) # Przekazanie zbioru dalej
+        # Osiągnięcia dają jeden tier na sprawdzenie - sprawdzenie przy każdym przekroczonym progu, jak przy awansie po jednym poziomie
+        if self.baza_danych.indeks_osiagniec is not None:
+            for prog in self.baza_danych.indeks_osiagniec.progi_w_zakresie("poziom_xp", aktualny_poziom, nowy_poziom_po_awansie):
+                await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "poziom_xp", prog)
+        await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "poziom_xp", nowy_poziom_po_awansie)
+        await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "osiagniecie_poziomu_xp", nowy_poziom_po_awansie)
 
     async def sprawdz_i_przyznaj_osiagniecia(self, member: discord.Member, guild: discord.Guild, typ_sprawdzanego_warunku: typing.Optional[str] = None, aktualna_wartosc_warunku: typing.Optional[typing.Any] = None, dodatkowe_dane: typing.Optional[dict] = None):
-        if self.baza_danych is None: return
-
-        user_id_str, server_id_str = str(member.id), str(guild.id)
-        dane_xp_krotka = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(member.id, guild.id)
+        """
+        Przyznaje osiągnięcia, których próg przekroczyła wartość warunku. Bez `typ_sprawdzanego_warunku`
+        sprawdza wszystkie warunki wynikające ze stanu użytkownika (WARUNKI_ZE_STANU).
+        """
+        if self.baza_danych is None or self.baza_danych.indeks_osiagniec is None: return
+        indeks_osiagniec = self.baza_danych.indeks_osiagniec
+        typy_warunkow = WARUNKI_ZE_STANU if typ_sprawdzanego_warunku is None else (typ_sprawdzanego_warunku,)
+        typy_warunkow = [typ for typ in typy_warunkow if typ in indeks_osiagniec.typy_warunkow]
+        if not typy_warunkow: return
 
-        poziom_uzytkownika = dane_xp_krotka[3]
-        liczba_wiadomosci_uzytkownika = dane_xp_krotka[10]
-        liczba_reakcji_uzytkownika = dane_xp_krotka[11]
-        streak_uzytkownika = dane_xp_krotka[8]
-
-        ilosc_dukatow_uzytkownika = 0
-        dane_portfela = await self.baza_danych.pobierz_portfel(member.id, guild.id)
-        if dane_portfela: ilosc_dukatow_uzytkownika = dane_portfela[2]
-
-        liczba_wygranych_konkursow_val = await self.baza_danych.pobierz_liczbe_wygranych_konkursow(user_id_str, server_id_str)
-
-        for os_bazowe_id, os_bazowe_dane in self.DEFINICJE_OSIAGNIEC.items():
-            typ_warunku_dla_bazowego = os_bazowe_dane.get("typ_warunku_bazowy")
-
-            for tier_dane in os_bazowe_dane.get("tiery", []):
-                tier_id = tier_dane["id"]
-
-                if await self.baza_danych.czy_uzytkownik_zdobyl_osiagniecie(user_id_str, server_id_str, tier_id):
-                    continue
-
-                warunek_spelniony = False
-                wartosc_warunku_tieru = tier_dane["wartosc_warunku"]
-
-                if typ_warunku_dla_bazowego == "liczba_wiadomosci" and (typ_sprawdzanego_warunku == "liczba_wiadomosci" or typ_sprawdzanego_warunku is None):
-                    if liczba_wiadomosci_uzytkownika >= wartosc_warunku_tieru: warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "liczba_reakcji" and (typ_sprawdzanego_warunku == "liczba_reakcji" or typ_sprawdzanego_warunku is None):
-                    if liczba_reakcji_uzytkownika >= wartosc_warunku_tieru: warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "poziom_xp" and (typ_sprawdzanego_warunku == "poziom_xp" or typ_sprawdzanego_warunku is None):
-                    sprawdzany_poziom = int(aktualna_wartosc_warunku) if typ_sprawdzanego_warunku == "poziom_xp" and aktualna_wartosc_warunku is not None else poziom_uzytkownika
-                    if sprawdzany_poziom >= wartosc_warunku_tieru: warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "dlugosc_streaka" and (typ_sprawdzanego_warunku == "dlugosc_streaka" or typ_sprawdzanego_warunku is None):
-                    sprawdzany_streak = int(aktualna_wartosc_warunku) if typ_sprawdzanego_warunku == "dlugosc_streaka" and aktualna_wartosc_warunku is not None else streak_uzytkownika
-                    if sprawdzany_streak >= wartosc_warunku_tieru: warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "ilosc_dukatow" and (typ_sprawdzanego_warunku == "ilosc_dukatow" or typ_sprawdzanego_warunku is None):
-                    sprawdzane_dukaty = int(aktualna_wartosc_warunku) if typ_sprawdzanego_warunku == "ilosc_dukatow" and aktualna_wartosc_warunku is not None else ilosc_dukatow_uzytkownika
-                    if sprawdzane_dukaty is not None and sprawdzane_dukaty >= wartosc_warunku_tieru: warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "zakup_krysztalow" and (typ_sprawdzanego_warunku == "zakup_krysztalow" or typ_sprawdzanego_warunku is None):
-                    if aktualna_wartosc_warunku is not None and int(aktualna_wartosc_warunku) >= wartosc_warunku_tieru:
-                        warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "odkrycie_sekretu_biblioteki" and (typ_sprawdzanego_warunku == "odkrycie_sekretu_biblioteki" or typ_sprawdzanego_warunku is None):
-                    if aktualna_wartosc_warunku is not None and int(aktualna_wartosc_warunku) >= wartosc_warunku_tieru:
-                        warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "uzycie_specjalnej_komendy" and (typ_sprawdzanego_warunku == "uzycie_specjalnej_komendy" or typ_sprawdzanego_warunku is None):
-                    if aktualna_wartosc_warunku is not None and int(aktualna_wartosc_warunku) >= wartosc_warunku_tieru:
-                        warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "liczba_wiadomosci_na_kanale" and (typ_sprawdzanego_warunku == "liczba_wiadomosci_na_kanale" or typ_sprawdzanego_warunku is None):
-                    id_kanalu_warunku_osiagniecia = os_bazowe_dane.get("id_kanalu_warunku")
-                    if id_kanalu_warunku_osiagniecia and dodatkowe_dane and str(dodatkowe_dane.get("kanal_id")) == str(id_kanalu_warunku_osiagniecia):
-                        if aktualna_wartosc_warunku is not None and int(aktualna_wartosc_warunku) >= wartosc_warunku_tieru:
-                            warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "liczba_wygranych_konkursow" and (typ_sprawdzanego_warunku == "liczba_wygranych_konkursow" or typ_sprawdzanego_warunku is None):
-                    sprawdzana_liczba_wygranych = int(aktualna_wartosc_warunku) if typ_sprawdzanego_warunku == "liczba_wygranych_konkursow" and aktualna_wartosc_warunku is not None else liczba_wygranych_konkursow_val
-                    if sprawdzana_liczba_wygranych >= wartosc_warunku_tieru:
-                        warunek_spelniony = True
-                elif typ_warunku_dla_bazowego == "liczba_uzyc_komend_kategorii" and (typ_sprawdzanego_warunku == "liczba_uzyc_komend_kategorii" or typ_sprawdzanego_warunku is None):
-                    kategoria_komendy_warunku_osiagniecia = os_bazowe_dane.get("kategoria_komendy_warunku")
-                    if kategoria_komendy_warunku_osiagniecia and dodatkowe_dane and dodatkowe_dane.get("kategoria_komendy") == kategoria_komendy_warunku_osiagniecia:
-                        if aktualna_wartosc_warunku is not None and int(aktualna_wartosc_warunku) >= wartosc_warunku_tieru:
-                            warunek_spelniony = True
-
-                if warunek_spelniony:
-                    czy_nowo_zdobyte = await self.baza_danych.oznacz_osiagniecie_jako_zdobyte(user_id_str, server_id_str, tier_id)
-                    if czy_nowo_zdobyte:
-                        nazwa_wyswietlana_osiagniecia = tier_dane.get("nazwa_tieru", os_bazowe_dane.get("nazwa_bazowa", "Nieznane Osiągnięcie"))
-                        opis_wyswietlany_osiagniecia = tier_dane.get("opis_tieru", os_bazowe_dane.get("opis_bazowy", "Zdobyłeś/aś osiągnięcie!"))
-                        ikona_osiagniecia = os_bazowe_dane.get("ikona", "🏆")
-
-                        self.logger.info(f"Użytkownik {member.display_name} ({member.id}) zdobył osiągnięcie '{nazwa_wyswietlana_osiagniecia}' (ID tieru: {tier_id}) na serwerze {guild.name}.")
-
-                        nagroda_xp = tier_dane.get("nagroda_xp", 0)
-                        nagroda_dukaty_val = tier_dane.get("nagroda_dukaty", 0)
-                        nagroda_krysztaly_val = tier_dane.get("nagroda_krysztaly", 0)
-                        nagroda_rola_id_str = tier_dane.get("nagroda_rola_id")
-
-                        embed_title = f"{ikona_osiagniecia} Nowe Osiągnięcie!"
-                        embed_description = f"Gratulacje {member.mention}! **{nazwa_wyswietlana_osiagniecia}**!\n\n_{opis_wyswietlany_osiagniecia}_"
-
-                        if nagroda_xp > 0: embed_description += f"\n\n🎁 +**{nagroda_xp}** XP!"
-                        if nagroda_dukaty_val > 0: embed_description += f"\n💰 +**{nagroda_dukaty_val}** ✨ Dukatów!"
-                        if nagroda_krysztaly_val > 0: embed_description += f"\n💠 +**{nagroda_krysztaly_val}** {config.SYMBOL_WALUTY_PREMIUM} {config.NAZWA_WALUTY_PREMIUM}!"
-
-
-                        if nagroda_rola_id_str:
-                            try:
-                                rola_id_int = int(nagroda_rola_id_str)
-                                rola_do_nadania = guild.get_role(rola_id_int)
-                                if rola_do_nadania and rola_do_nadania not in member.roles:
-                                    await member.add_roles(rola_do_nadania, reason=f"Osiągnięcie: {nazwa_wyswietlana_osiagniecia}")
-                                    embed_description += f"\n🛡️ Godność: **{rola_do_nadania.name}**!"
-                            except Exception as e_role: self.logger.error(f"Błąd przyznawania roli za osiągnięcie {tier_id}: {e_role}", exc_info=True)
-
-                        embed_osiagniecie = await self._create_bot_embed(None, title=embed_title, description=embed_description, color=config.KOLOR_XP_OSIAGNIECIE)
-                        if member.display_avatar: embed_osiagniecie.set_thumbnail(url=member.display_avatar.url)
-
-                        if nagroda_xp > 0:
-                            await self.baza_danych.aktualizuj_doswiadczenie(member.id, guild.id, xp_dodane=nagroda_xp)
-                            await self.sprawdz_i_awansuj(member, guild)
-                        if nagroda_dukaty_val > 0 or nagroda_krysztaly_val > 0:
-                            await self.baza_danych.aktualizuj_portfel(member.id, guild.id, ilosc_dukatow_do_dodania=nagroda_dukaty_val, ilosc_krysztalow_do_dodania=nagroda_krysztaly_val)
-                            dane_portfela_po_nagrodzie = await self.baza_danych.pobierz_portfel(member.id, guild.id)
-                            if dane_portfela_po_nagrodzie:
-                                await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "ilosc_dukatow", dane_portfela_po_nagrodzie[2])
-
-                        kanal_do_powiadomien = guild.system_channel or (guild.text_channels[0] if guild.text_channels else None)
-                        if kanal_do_powiadomien:
-                            try: await kanal_do_powiadomien.send(embed=embed_osiagniecie)
-                            except discord.Forbidden: self.logger.warning(f"Brak uprawnień do wysłania wiadomości o osiągnięciu na kanale {kanal_do_powiadomien.name}.")
-                            except Exception as e_send: self.logger.error(f"Nieoczekiwany błąd podczas wysyłania wiadomości o osiągnięciu: {e_send}", exc_info=True)
-                        else:
-                            try: await member.send(embed=embed_osiagniecie)
-                            except discord.Forbidden: self.logger.warning(f"Nie można wysłać DM o osiągnięciu do {member.display_name} (DM zablokowane lub brak uprawnień).")
-                            except Exception as e_dm: self.logger.error(f"Nieoczekiwany błąd podczas wysyłania DM o osiągnięciu: {e_dm}", exc_info=True)
-                        break
-
-
-    async def przyznaj_xp(self, member: discord.Member, guild: discord.Guild, kanal: typing.Optional[discord.abc.GuildChannel | discord.Thread], bazowe_xp_min: int, bazowe_xp_max: int, cooldown_ts_field: typing.Optional[str], cooldown_value: int, event_type: str, inkrementuj_licznik_typ: typing.Optional[str] = None, dodatkowe_dane_dla_osiagniec: typing.Optional[dict] = None):
-        if self.baza_danych is None or member.bot or not guild: return
+        user_id, server_id = member.id, guild.id
+        zdobyte_osiagniecia = await self.baza_danych.pobierz_maske_osiagniec(user_id, server_id)
+        do_przyznania = []
+        for typ_warunku in typy_warunkow:
+            wartosc = aktualna_wartosc_warunku if typ_sprawdzanego_warunku is not None else None
+            if wartosc is None and typ_warunku in WARUNKI_ZE_STANU:
+                wartosc = await self._wartosc_warunku_osiagniecia(typ_warunku, user_id, server_id)
+            if wartosc is None: continue
+            klucz = indeks_osiagniec.klucz_podindeksu(typ_warunku, dodatkowe_dane)
+            do_przyznania.extend(indeks_osiagniec.nowo_spelnione(typ_warunku, int(wartosc), zdobyte_osiagniecia, klucz))
+
+        for tier in do_przyznania:
+            await self._przyznaj_osiagniecie(member, guild, tier)
+
+    async def _wartosc_warunku_osiagniecia(self, typ_warunku: str, user_id: int, server_id: int) -> int:
+        if typ_warunku == "ilosc_dukatow":
+            dane_portfela = await self.baza_danych.pobierz_portfel(user_id, server_id)
+            return dane_portfela[2] if dane_portfela else 0
+        if typ_warunku == "liczba_wygranych_konkursow":
+            return await self.baza_danych.pobierz_liczbe_wygranych_konkursow(user_id, server_id)
+        dane_xp_krotka = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
+        return dane_xp_krotka[{"liczba_wiadomosci": 10, "liczba_reakcji": 11, "poziom_xp": 3, "dlugosc_streaka": 8}[typ_warunku]]
+
+    async def _przyznaj_osiagniecie(self, member: discord.Member, guild: discord.Guild, tier: TierOsiagniecia):
+        if not await self.baza_danych.oznacz_osiagniecie_jako_zdobyte(member.id, guild.id, tier.id): return
+        tier_id, tier_dane, os_bazowe_dane = tier.id, tier.dane, tier.bazowe_dane
+        nazwa_wyswietlana_osiagniecia = tier_dane.get("nazwa_tieru", os_bazowe_dane.get("nazwa_bazowa", "Nieznane Osiągnięcie"))
+        opis_wyswietlany_osiagniecia = tier_dane.get("opis_tieru", os_bazowe_dane.get("opis_bazowy", "Zdobyłeś/aś osiągnięcie!"))
+        ikona_osiagniecia = os_bazowe_dane.get("ikona", "🏆")
+
+        self.logger.info(f"Użytkownik {member.display_name} ({member.id}) zdobył osiągnięcie '{nazwa_wyswietlana_osiagniecia}' (ID tieru: {tier_id}) na serwerze {guild.name}.")
+
+        nagroda_xp = tier_dane.get("nagroda_xp", 0)
+        nagroda_dukaty_val = tier_dane.get("nagroda_dukaty", 0)
+        nagroda_krysztaly_val = tier_dane.get("nagroda_krysztaly", 0)
+        nagroda_rola_id_str = tier_dane.get("nagroda_rola_id")
+
+        embed_title = f"{ikona_osiagniecia} Nowe Osiągnięcie!"
+        embed_description = f"Gratulacje {member.mention}! **{nazwa_wyswietlana_osiagniecia}**!\n\n_{opis_wyswietlany_osiagniecia}_"
+
+        if nagroda_xp > 0: embed_description += f"\n\n🎁 +**{nagroda_xp}** XP!"
+        if nagroda_dukaty_val > 0: embed_description += f"\n💰 +**{nagroda_dukaty_val}** ✨ Dukatów!"
+        if nagroda_krysztaly_val > 0: embed_description += f"\n💠 +**{nagroda_krysztaly_val}** {config.SYMBOL_WALUTY_PREMIUM} {config.NAZWA_WALUTY_PREMIUM}!"
+
+
+        if nagroda_rola_id_str:
+            try:
+                rola_id_int = int(nagroda_rola_id_str)
+                rola_do_nadania = guild.get_role(rola_id_int)
+                if rola_do_nadania and rola_do_nadania not in member.roles:
+                    await member.add_roles(rola_do_nadania, reason=f"Osiągnięcie: {nazwa_wyswietlana_osiagniecia}")
+                    embed_description += f"\n🛡️ Godność: **{rola_do_nadania.name}**!"
+            except Exception as e_role: self.logger.error(f"Błąd przyznawania roli za osiągnięcie {tier_id}: {e_role}", exc_info=True)
+
+        embed_osiagniecie = await self._create_bot_embed(None, title=embed_title, description=embed_description, color=config.KOLOR_XP_OSIAGNIECIE)
+        if member.display_avatar: embed_osiagniecie.set_thumbnail(url=member.display_avatar.url)
+
+        if nagroda_xp > 0:
+            await self.baza_danych.aktualizuj_doswiadczenie(member.id, guild.id, xp_dodane=nagroda_xp)
+            await self.sprawdz_i_awansuj(member, guild)
+        if nagroda_dukaty_val > 0 or nagroda_krysztaly_val > 0:
+            await self.baza_danych.aktualizuj_portfel(member.id, guild.id, ilosc_dukatow_do_dodania=nagroda_dukaty_val, ilosc_krysztalow_do_dodania=nagroda_krysztaly_val)
+            dane_portfela_po_nagrodzie = await self.baza_danych.pobierz_portfel(member.id, guild.id)
+            if dane_portfela_po_nagrodzie:
+                await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "ilosc_dukatow", dane_portfela_po_nagrodzie[2])
+
+        await self._powiadom(member, guild, PRIORYTET_NORMALNY, self._cele_kanalu(guild) + [("dm", member.id)], embed_osiagniecie)
+
+
+    @staticmethod
+    def _oblicz_streak(dane_uzytkownika: tuple, dzisiaj_utc: date_obj) -> tuple[int, date_obj, int] | None:
+        """Streak po aktywności w dniu `dzisiaj_utc`: (dni, dzień, bonus XP) albo None, gdy ten dzień jest już zaliczony."""
+        ostatni_dzien_str = dane_uzytkownika[9]
+        ostatni_dzien = date_obj.fromisoformat(ostatni_dzien_str) if ostatni_dzien_str else None
+        if ostatni_dzien is not None and ostatni_dzien >= dzisiaj_utc: return None
+        nowy_streak_dni = dane_uzytkownika[8] + 1 if ostatni_dzien == dzisiaj_utc - timedelta(days=1) else 1
+        return nowy_streak_dni, dzisiaj_utc, min(nowy_streak_dni, config.MAX_DNI_STREAKA_DLA_BONUSU) * config.XP_BONUS_ZA_DZIEN_STREAKA
+
+    async def przyznaj_xp(self, member: discord.Member, guild: discord.Guild, zdarzenia: list[ZdarzenieXP], dane_uzytkownika: typing.Optional[tuple] = None):
+        """
+        Przyznaje XP za partię zdarzeń jednego użytkownika (typy z RODZAJE_ZDARZEN_XP). Blokady kanałów i cooldowny
+        są sprawdzane dla każdego zdarzenia, ale XP, liczniki i streak zapisywane są raz, a awans, osiągnięcia i misje
+        sprawdzane raz na partię.
+        """
+        if self.baza_danych is None or member.bot or not guild or not zdarzenia: return
 
         konfiguracja_serwera = self.pobierz_konfiguracje_xp_serwera(guild.id)
         if konfiguracja_serwera["xp_zablokowane"]: return
 
         user_id, server_id = member.id, guild.id
-        aktualny_czas_ts = int(time.time())
-        dzisiaj_utc = datetime.now(UTC).date()
 
-        dane_uzytkownika_pelne = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
+        # dane_uzytkownika - wiersz pobrany wcześniej zbiorczo (np. w zadaniu XP za głos)
+        dane_uzytkownika_pelne = dane_uzytkownika or await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
         if dane_uzytkownika_pelne[7]: return
 
-        mnoznik_bonus_kanalu = 0.0
-        if kanal:
-            konfiguracja_kanalu = await self.baza_danych.pobierz_konfiguracje_xp_kanalu(str(server_id), str(kanal.id))
-            if konfiguracja_kanalu:
-                if konfiguracja_kanalu[0]: return
-                mnoznik_bonus_kanalu = konfiguracja_kanalu[1] - 1.0
-
-        if cooldown_ts_field:
-            ostatni_event_ts_index = -1
-            if cooldown_ts_field == "ostatnia_wiadomosc_timestamp": ostatni_event_ts_index = 5
-            elif cooldown_ts_field == "ostatnia_reakcja_timestamp": ostatni_event_ts_index = 6
-            if ostatni_event_ts_index != -1 and aktualny_czas_ts - dane_uzytkownika_pelne[ostatni_event_ts_index] < cooldown_value:
-                return
+        polityka_xp = await self.baza_danych.pobierz_polityke_xp(server_id)
+        ostatnie_znaczniki = {pole: dane_uzytkownika_pelne[INDEKSY_KOLUMN[pole]] or 0 for pole in COOLDOWNY_XP}
+        zaliczone: list[ZdarzenieXP] = []
+        for zdarzenie in zdarzenia:
+            pole_cooldownu, cooldown = RODZAJE_ZDARZEN_XP[zdarzenie.typ][3:5]
+            if zdarzenie.kanal and polityka_xp.czy_kanal_zablokowany(zdarzenie.kanal.id): continue
+            if pole_cooldownu:
+                if zdarzenie.czas_ts - ostatnie_znaczniki[pole_cooldownu] < cooldown: continue
+                ostatnie_znaczniki[pole_cooldownu] = zdarzenie.czas_ts
+            zaliczone.append(zdarzenie)
+        if self.bramka_cooldownow is not None:
+            # Kolejne zdarzenia w cooldownie odrzuci już listener, bez kolejki i bazy
+            for pole, ostatni_ts in ostatnie_znaczniki.items():
+                self.bramka_cooldownow.zablokuj(pole, server_id, user_id, ostatni_ts + COOLDOWNY_XP[pole], zdarzenia[-1].czas_ts)
+        if not zaliczone: return
 
-        xp_bazowe = random.randint(bazowe_xp_min, bazowe_xp_max)
         mnoznik_bonus_eventu = konfiguracja_serwera["mnoznik_xp"] - 1.0
-        mnoznik_bonus_rol = 0.0
-        bonusy_rol_serwera = await self.baza_danych.pobierz_bonusy_xp_rol_serwera(str(server_id))
-        for rola_id_str, mnoznik_roli_db in bonusy_rol_serwera:
-            if any(r.id == int(rola_id_str) for r in member.roles):
-                mnoznik_bonus_rol += (mnoznik_roli_db - 1.0)
+        mnoznik_bonus_rol = polityka_xp.bonus_rol(r.id for r in member.roles)
 
         mnoznik_bonus_zakupiony = 0.0
-        aktywne_zakupione_bonusy = await self.baza_danych.pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(str(user_id), str(server_id))
+        aktywne_zakupione_bonusy = await self.baza_danych.pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(user_id, server_id)
         for typ_b, wartosc_b, _ in aktywne_zakupione_bonusy:
             if typ_b == "xp_mnoznik": mnoznik_bonus_zakupiony += wartosc_b
 
-        finalny_mnoznik = 1.0 + mnoznik_bonus_eventu + mnoznik_bonus_rol + mnoznik_bonus_kanalu + mnoznik_bonus_zakupiony
-        if finalny_mnoznik < 0: finalny_mnoznik = 0
-        xp_po_mnoznikach = int(xp_bazowe * finalny_mnoznik)
-
-        obecny_streak_dni_db = dane_uzytkownika_pelne[8]
-        ostatni_dzien_aktywnosci_streak_db_str = dane_uzytkownika_pelne[9]
-        ostatni_dzien_aktywnosci_streak_db = date_obj.fromisoformat(ostatni_dzien_aktywnosci_streak_db_str) if ostatni_dzien_aktywnosci_streak_db_str else None
-
-        nowy_streak_dni_do_zapisu = obecny_streak_dni_db
-        nowy_ostatni_dzien_streaka_do_zapisu_obj = ostatni_dzien_aktywnosci_streak_db
-        xp_bonus_streaka = 0
-        czy_aktualizowac_streak_w_bazie = False
-
-        if ostatni_dzien_aktywnosci_streak_db is None or ostatni_dzien_aktywnosci_streak_db < dzisiaj_utc:
-            if ostatni_dzien_aktywnosci_streak_db is None or ostatni_dzien_aktywnosci_streak_db < (dzisiaj_utc - timedelta(days=1)):
-                nowy_streak_dni_do_zapisu = 1
-            elif ostatni_dzien_aktywnosci_streak_db == (dzisiaj_utc - timedelta(days=1)):
-                nowy_streak_dni_do_zapisu = obecny_streak_dni_db + 1
-            nowy_ostatni_dzien_streaka_do_zapisu_obj = dzisiaj_utc
-            czy_aktualizowac_streak_w_bazie = True
-            bonus_za_dzien_streaka = min(nowy_streak_dni_do_zapisu, config.MAX_DNI_STREAKA_DLA_BONUSU) * config.XP_BONUS_ZA_DZIEN_STREAKA
-            xp_bonus_streaka = bonus_za_dzien_streaka
+        xp_po_mnoznikach = 0
+        for zdarzenie in zaliczone:
+            bazowe_xp_min, bazowe_xp_max = RODZAJE_ZDARZEN_XP[zdarzenie.typ][1:3]
+            mnoznik_bonus_kanalu = polityka_xp.bonus_kanalu(zdarzenie.kanal.id) if zdarzenie.kanal else 0.0
+            finalny_mnoznik = 1.0 + mnoznik_bonus_eventu + mnoznik_bonus_rol + mnoznik_bonus_kanalu + mnoznik_bonus_zakupiony
+            if finalny_mnoznik < 0: finalny_mnoznik = 0
+            xp_po_mnoznikach += int(random.randint(bazowe_xp_min, bazowe_xp_max) * finalny_mnoznik)
+
+        streak = self._oblicz_streak(dane_uzytkownika_pelne, datetime.fromtimestamp(zaliczone[-1].czas_ts, UTC).date())
+        czy_aktualizowac_streak_w_bazie = streak is not None
+        nowy_streak_dni_do_zapisu, nowy_ostatni_dzien_streaka_do_zapisu_obj, xp_bonus_streaka = streak or (dane_uzytkownika_pelne[8], None, 0)
 
+        liczniki = collections.Counter(RODZAJE_ZDARZEN_XP[zdarzenie.typ][5] for zdarzenie in zaliczone)
         xp_finalne_do_dodania = xp_po_mnoznikach + xp_bonus_streaka
         kwargs_aktualizacji: dict[str, typing.Any] = {}
         if xp_finalne_do_dodania > 0: kwargs_aktualizacji["xp_dodane"] = xp_finalne_do_dodania
         if czy_aktualizowac_streak_w_bazie:
             kwargs_aktualizacji["nowy_streak_dni"] = nowy_streak_dni_do_zapisu
             kwargs_aktualizacji["nowy_ostatni_dzien_streaka_iso"] = nowy_ostatni_dzien_streaka_do_zapisu_obj.isoformat() if nowy_ostatni_dzien_streaka_do_zapisu_obj else None
-        if cooldown_ts_field == "ostatnia_wiadomosc_timestamp": kwargs_aktualizacji["nowy_timestamp_wiadomosci"] = aktualny_czas_ts
-        elif cooldown_ts_field == "ostatnia_reakcja_timestamp": kwargs_aktualizacji["nowy_timestamp_reakcji"] = aktualny_czas_ts
-        if inkrementuj_licznik_typ == "wiadomosc": kwargs_aktualizacji["inkrementuj_wiadomosci"] = 1
-        elif inkrementuj_licznik_typ == "reakcja": kwargs_aktualizacji["inkrementuj_reakcje"] = 1
+        if liczniki["wiadomosc"]:
+            kwargs_aktualizacji["nowy_timestamp_wiadomosci"] = ostatnie_znaczniki["ostatnia_wiadomosc_timestamp"]
+            kwargs_aktualizacji["inkrementuj_wiadomosci"] = liczniki["wiadomosc"]
+        if liczniki["reakcja"]:
+            kwargs_aktualizacji["nowy_timestamp_reakcji"] = ostatnie_znaczniki["ostatnia_reakcja_timestamp"]
+            kwargs_aktualizacji["inkrementuj_reakcje"] = liczniki["reakcja"]
 
         if kwargs_aktualizacji:
             await self.baza_danych.aktualizuj_doswiadczenie(user_id, server_id, **kwargs_aktualizacji)
 
 
         if xp_finalne_do_dodania > 0:
-            self.logger.info(f"Przyznano {xp_finalne_do_dodania} XP dla {member.display_name} za {event_type}.")
+            opisy = collections.Counter(RODZAJE_ZDARZEN_XP[zdarzenie.typ][0] for zdarzenie in zaliczone)
+            self.logger.info("Przyznano %d XP dla %s za %s.", xp_finalne_do_dodania, member.display_name, ", ".join(opis if ile == 1 else f"{opis} (x{ile})" for opis, ile in opisy.items()), extra={"probka": "przyznanie_xp"})
             await self.sprawdz_i_awansuj(member, guild)
-            if czy_aktualizowac_streak_w_bazie:
-                await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "dlugosc_streaka", nowy_streak_dni_do_zapisu)
-                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "osiagnij_x_streaka", nowy_streak_dni_do_zapisu)
-        elif czy_aktualizowac_streak_w_bazie:
+        if czy_aktualizowac_streak_w_bazie:
             await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "dlugosc_streaka", nowy_streak_dni_do_zapisu)
             await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "osiagnij_x_streaka", nowy_streak_dni_do_zapisu)
 
-        if inkrementuj_licznik_typ:
+        if liczniki["wiadomosc"] or liczniki["reakcja"]:
             dane_po_inkrementacji_full = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
-            if inkrementuj_licznik_typ == "wiadomosc":
+            if liczniki["wiadomosc"]:
                 await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "liczba_wiadomosci", dane_po_inkrementacji_full[10])
-                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "liczba_wiadomosci_od_resetu", 1)
-                if kanal and dodatkowe_dane_dla_osiagniec and "kanal_id" in dodatkowe_dane_dla_osiagniec:
-                    nowa_liczba_na_kanale = await self.baza_danych.inkrementuj_liczbe_wiadomosci_na_kanale(str(user_id), str(server_id), str(kanal.id))
-                    await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "liczba_wiadomosci_na_kanale", nowa_liczba_na_kanale, dodatkowe_dane={"kanal_id": kanal.id})
-            elif inkrementuj_licznik_typ == "reakcja":
+                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "liczba_wiadomosci_od_resetu", liczniki["wiadomosc"])
+                wiadomosci_na_kanalach = collections.Counter(zdarzenie.kanal.id for zdarzenie in zaliczone if zdarzenie.typ == "wiadomosc" and zdarzenie.kanal)
+                for kanal_id, ilosc in wiadomosci_na_kanalach.items():
+                    nowa_liczba_na_kanale = await self.baza_danych.inkrementuj_liczbe_wiadomosci_na_kanale(user_id, server_id, kanal_id, ilosc)
+                    await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "liczba_wiadomosci_na_kanale", nowa_liczba_na_kanale, dodatkowe_dane={"kanal_id": kanal_id})
+            if liczniki["reakcja"]:
                 await self.sprawdz_i_przyznaj_osiagniecia(member, guild, "liczba_reakcji", dane_po_inkrementacji_full[11])
-                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "liczba_reakcji_od_resetu", 1)
+                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "liczba_reakcji_od_resetu", liczniki["reakcja"])
 
         dane_portfela_po_zmianie = await self.baza_danych.pobierz_portfel(user_id, server_id)
         if dane_portfela_po_zmianie:
@@ -593,68 +701,91 @@ class BotDiscord(commands.Bot):
             return self.ostatni_reset_misji_tygodniowych_ts
         return 0
 
+    @staticmethod
+    def _indeksuj_misje(definicje_misji: dict) -> dict[str, list[tuple[str, dict]]]:
+        """Typ akcji -> misje, które mają warunek tego typu (w kolejności z konfiguracji)."""
+        indeks: dict[str, list[tuple[str, dict]]] = {}
+        for misja_id, misja_def in definicje_misji.items():
+            for typ_warunku in dict.fromkeys(warunek_def["typ_warunku"] for warunek_def in misja_def["warunki"]):
+                indeks.setdefault(typ_warunku, []).append((misja_id, misja_def))
+        return indeks
+
+    @staticmethod
+    def _czy_akcja_dotyczy_warunku(warunek_def: dict, typ_akcji: str, dodatkowe_dane: typing.Optional[dict]) -> bool:
+        if warunek_def["typ_warunku"] != typ_akcji: return False
+        klucz_filtru = FILTRY_WARUNKOW_MISJI.get(typ_akcji)
+        return klucz_filtru is None or bool(dodatkowe_dane and dodatkowe_dane.get(klucz_filtru) == warunek_def.get(klucz_filtru))
+
     async def aktualizuj_i_sprawdz_misje_po_akcji(self, member: discord.Member, guild: discord.Guild, typ_akcji: str, wartosc_akcji: int = 1, dodatkowe_dane: typing.Optional[dict] = None):
         if self.baza_danych is None or member.bot: return
+        misje_akcji = self.misje_wg_typu_akcji.get(typ_akcji)
+        if not misje_akcji: return
 
-        user_id_str, server_id_str = str(member.id), str(guild.id)
+        user_id, server_id = member.id, guild.id
         teraz_ts = int(time.time())
+        ukonczone_misje = await self.baza_danych.pobierz_ukonczone_misje(user_id, server_id)
 
-        for misja_id, misja_def in self.DEFINICJE_MISJI.items():
+        misje_do_sprawdzenia = []
+        for misja_id, misja_def in misje_akcji:
             typ_misji = misja_def["typ_misji"]
             ostatni_reset_dla_tej_misji_ts = self._get_mission_reset_timestamp(typ_misji)
 
-            if typ_misji == "jednorazowa" and await self.baza_danych.czy_misja_jednorazowa_ukonczona(user_id_str, server_id_str, misja_id):
+            if typ_misji == "jednorazowa" and misja_id in ukonczone_misje:
                 continue
-            if typ_misji in ["dzienna", "tygodniowa"] and await self.baza_danych.czy_misja_ukonczona_w_cyklu(user_id_str, server_id_str, misja_id, ostatni_reset_dla_tej_misji_ts):
+            if typ_misji in ["dzienna", "tygodniowa"] and ukonczone_misje.get(misja_id, -1) >= ostatni_reset_dla_tej_misji_ts:
                 continue
+            # Akcja niepasująca do filtra warunku (kategoria, komenda, przedmiot) nie zmienia misji - bez zapytań
+            if not any(self._czy_akcja_dotyczy_warunku(warunek_def, typ_akcji, dodatkowe_dane) for warunek_def in misja_def["warunki"]):
+                continue
+            misje_do_sprawdzenia.append((misja_id, misja_def, typ_misji, ostatni_reset_dla_tej_misji_ts))
 
+        # Postęp wszystkich warunków dotyczących akcji jednym commitem (poziom XP nie jest zapisywany - liczy się bieżący)
+        zmiany_postepu = [] if typ_akcji == "osiagniecie_poziomu_xp" else [
+            (misja_id, warunek_def["typ_warunku"], ostatni_reset_ts, wartosc_akcji)
+            for misja_id, misja_def, _, ostatni_reset_ts in misje_do_sprawdzenia
+            for warunek_def in misja_def["warunki"] if self._czy_akcja_dotyczy_warunku(warunek_def, typ_akcji, dodatkowe_dane)
+        ]
+        nowe_wartosci = await self.baza_danych.aktualizuj_postep_misji_wielu(user_id, server_id, zmiany_postepu, maksimum=typ_akcji == "osiagnij_x_streaka") if zmiany_postepu else []
+        postep_po_akcji = {(misja_id, typ_warunku): wartosc for (misja_id, typ_warunku, _, _), wartosc in zip(zmiany_postepu, nowe_wartosci)}
+
+        for misja_id, misja_def, typ_misji, ostatni_reset_dla_tej_misji_ts in misje_do_sprawdzenia:
             wszystkie_warunki_spelnione = True
             for warunek_def in misja_def["warunki"]:
                 typ_warunku_misji = warunek_def["typ_warunku"]
                 wymagana_wartosc_warunku = warunek_def["wartosc"]
 
-                _, _, _, _, _, aktualny_postep_warunku, _ = await self.baza_danych.pobierz_lub_stworz_postep_misji(
-                    user_id_str, server_id_str, misja_id, typ_warunku_misji, ostatni_reset_dla_tej_misji_ts
-                )
-                nowy_postep_warunku = aktualny_postep_warunku
-
-                if typ_warunku_misji == typ_akcji:
-                    if typ_akcji == "uzycie_komendy_kategorii_od_resetu":
-                        if dodatkowe_dane and dodatkowe_dane.get("kategoria_komendy") == warunek_def.get("kategoria_komendy"):
-                            nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, wartosc_do_dodania=wartosc_akcji)
-                    elif typ_akcji == "uzycie_komendy":
-                        if dodatkowe_dane and dodatkowe_dane.get("nazwa_komendy") == warunek_def.get("nazwa_komendy"):
-                            nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, wartosc_do_dodania=wartosc_akcji)
-                    elif typ_akcji == "osiagniecie_poziomu_xp":
-                        nowy_postep_warunku = wartosc_akcji
-                    elif typ_akcji == "wygraj_konkurs_od_resetu":
-                        nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, wartosc_do_dodania=wartosc_akcji)
-                    elif typ_akcji == "uzyj_przedmiotu_ze_sklepu_od_resetu":
-                        if dodatkowe_dane and dodatkowe_dane.get("id_przedmiotu") == warunek_def.get("id_przedmiotu"):
-                            nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, wartosc_do_dodania=wartosc_akcji)
-                    elif typ_akcji == "osiagnij_x_streaka":
-                        if wartosc_akcji > aktualny_postep_warunku:
-                             nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, ustaw_wartosc=wartosc_akcji)
-                        else:
-                            nowy_postep_warunku = aktualny_postep_warunku
-                    else:
-                        nowy_postep_warunku = await self.baza_danych.aktualizuj_postep_misji(user_id_str, server_id_str, misja_id, typ_warunku_misji, wartosc_do_dodania=wartosc_akcji)
+                if not self._czy_akcja_dotyczy_warunku(warunek_def, typ_akcji, dodatkowe_dane):
+                    # Warunek innego typu - tylko odczyt postępu, bez tworzenia wiersza
+                    nowy_postep_warunku = await self.baza_danych.pobierz_postep_misji(user_id, server_id, misja_id, typ_warunku_misji, ostatni_reset_dla_tej_misji_ts)
+                elif typ_akcji == "osiagniecie_poziomu_xp":
+                    nowy_postep_warunku = wartosc_akcji
+                else:
+                    nowy_postep_warunku = postep_po_akcji[(misja_id, typ_warunku_misji)]
 
                 if nowy_postep_warunku < wymagana_wartosc_warunku:
-                    wszystkie_warunki_spelnione = False; break
+                    wszystkie_warunki_spelnione = False
 
             if wszystkie_warunki_spelnione:
                 nagrody = misja_def.get("nagrody", {})
+                # Nagrody i oznaczenie misji jednym commitem - misja nie zostanie ukończona bez nagrody ani nagrodzona dwa razy
+                async with self.baza_danych.transakcja():
+                    if typ_misji == "jednorazowa":
+                        juz_ukonczona = await self.baza_danych.czy_misja_jednorazowa_ukonczona(user_id, server_id, misja_id)
+                    else:
+                        juz_ukonczona = await self.baza_danych.czy_misja_ukonczona_w_cyklu(user_id, server_id, misja_id, ostatni_reset_dla_tej_misji_ts)
+                    if not juz_ukonczona:
+                        if nagrody.get("xp", 0) > 0:
+                            await self.baza_danych.aktualizuj_doswiadczenie(member.id, guild.id, xp_dodane=nagrody["xp"])
+
+                        dukaty_do_dodania = nagrody.get("gwiezdne_dukaty", 0)
+                        krysztaly_do_dodania = nagrody.get("gwiezdne_krysztaly", 0)
+                        if dukaty_do_dodania > 0 or krysztaly_do_dodania > 0:
+                            await self.baza_danych.aktualizuj_portfel(member.id, guild.id, ilosc_dukatow_do_dodania=dukaty_do_dodania, ilosc_krysztalow_do_dodania=krysztaly_do_dodania)
+
+                        await self.baza_danych.oznacz_misje_jako_ukonczona(user_id, server_id, misja_id, teraz_ts)
+                if juz_ukonczona: continue
                 if nagrody.get("xp", 0) > 0:
-                    await self.baza_danych.aktualizuj_doswiadczenie(member.id, guild.id, xp_dodane=nagrody["xp"])
                     await self.sprawdz_i_awansuj(member, guild)
-
-                dukaty_do_dodania = nagrody.get("gwiezdne_dukaty", 0)
-                krysztaly_do_dodania = nagrody.get("gwiezdne_krysztaly", 0)
-                if dukaty_do_dodania > 0 or krysztaly_do_dodania > 0:
-                    await self.baza_danych.aktualizuj_portfel(member.id, guild.id, ilosc_dukatow_do_dodania=dukaty_do_dodania, ilosc_krysztalow_do_dodania=krysztaly_do_dodania)
-
-                await self.baza_danych.oznacz_misje_jako_ukonczona(user_id_str, server_id_str, misja_id, teraz_ts)
                 self.logger.info(f"Użytkownik {member.display_name} ukończył misję '{misja_def['nazwa']}'.")
 
                 embed_misja = await self._create_bot_embed(None, title=f"{misja_def.get('ikona', '🎯')} Misja Ukończona!",
@@ -662,23 +793,13 @@ class BotDiscord(commands.Bot):
                     color=config.KOLOR_BOT_SUKCES)
                 nagrody_opis = [f"**{v}** {k.replace('_', ' ').capitalize()}" for k, v in nagrody.items() if v > 0]
                 if nagrody_opis: embed_misja.add_field(name="Nagrody:", value="\n".join(nagrody_opis), inline=False)
-                try:
-                    await member.send(embed=embed_misja)
-                    self.logger.info(f"Wysłano powiadomienie o ukończeniu misji '{misja_def['nazwa']}' do {member.display_name}.")
-                except discord.Forbidden:
-                    self.logger.warning(f"Nie można wysłać DM o ukończeniu misji do {member.display_name} (DM zablokowane).")
-                    kanal_systemowy = guild.system_channel
-                    if kanal_systemowy and kanal_systemowy.permissions_for(guild.me).send_messages:
-                        try:
-                            await kanal_systemowy.send(content=f"{member.mention}", embed=embed_misja)
-                            self.logger.info(f"Wysłano powiadomienie o ukończeniu misji '{misja_def['nazwa']}' na kanał systemowy dla {member.display_name}.")
-                        except Exception as e_sys_chan:
-                             self.logger.error(f"Błąd wysyłania powiadomienia o misji na kanał systemowy: {e_sys_chan}")
-                except Exception as e_dm:
-                    self.logger.error(f"Błąd wysyłania DM o ukończeniu misji do {member.display_name}: {e_dm}")
+                # DM, a przy zablokowanych DM - kanał systemowy
+                cele_misji: list[Cel] = [("dm", member.id)]
+                kanal_systemowy = guild.system_channel
+                if kanal_systemowy and kanal_systemowy.permissions_for(guild.me).send_messages: cele_misji.append(("kanal", kanal_systemowy.id))
+                await self._powiadom(member, guild, PRIORYTET_NISKI, cele_misji, embed_misja, wzmianka=member.mention)
 
 
-    @tasks.loop(minutes=30)
     async def zadanie_resetowania_misji(self):
         if self.baza_danych is None: return
 
@@ -713,147 +834,152 @@ class BotDiscord(commands.Bot):
             self.logger.info(f"Resetowanie misji tygodniowych. Poprzedni reset: {datetime.fromtimestamp(self.ostatni_reset_misji_tygodniowych_ts, UTC)}, Nowy reset: {datetime.fromtimestamp(timestamp_ostatniego_mozliwego_resetu_tygodniowego, UTC)}")
             self.ostatni_reset_misji_tygodniowych_ts = timestamp_ostatniego_mozliwego_resetu_tygodniowego
 
-
-    @zadanie_resetowania_misji.before_loop
-    async def przed_zadaniem_resetowania_misji(self):
-        await self.wait_until_ready()
-        self.logger.info("Pętla resetowania misji gotowa do startu.")
-
-    @tasks.loop(minutes=config.SPRAWDZANIE_ROL_CZASOWYCH_CO_ILE_MINUT)
-    async def zadanie_sprawdzania_rol_czasowych(self):
-        if self.baza_danych is None: return
+        # Reset to tylko nowy id_cyklu - wiersze postępu z poprzednich cykli są usuwane partiami w tle
+        aktualne_cykle = {misja_id: self._get_mission_reset_timestamp(misja_def["typ_misji"]) for misja_id, misja_def in self.DEFINICJE_MISJI.items() if misja_def["typ_misji"] in ["dzienna", "tygodniowa"]}
         try:
-            wygasle_role_db = await self.baza_danych.pobierz_wygasle_role_czasowe()
-            if not wygasle_role_db: return
-
-            for wpis_id, user_id_str, server_id_str, rola_id_str, _ in wygasle_role_db:
-                try:
-                    guild = self.get_guild(int(server_id_str))
-                    if not guild: await self.baza_danych.usun_aktywna_role_czasowa_po_id_wpisu(wpis_id); continue
-                    member = guild.get_member(int(user_id_str))
-                    rola_obj = guild.get_role(int(rola_id_str))
-                    if not member or not rola_obj: await self.baza_danych.usun_aktywna_role_czasowa_po_id_wpisu(wpis_id); continue
-                    if rola_obj in member.roles:
-                        try: await member.remove_roles(rola_obj, reason="Rola czasowa wygasła.")
-                        except: self.logger.error(f"Błąd usuwania roli {rola_obj.name} od {member.display_name}.")
-                    await self.baza_danych.usun_aktywna_role_czasowa_po_id_wpisu(wpis_id)
-                except Exception as e_inner: self.logger.error(f"Błąd przetwarzania wygasłej roli (wpis {wpis_id}): {e_inner}", exc_info=True); await self.baza_danych.usun_aktywna_role_czasowa_po_id_wpisu(wpis_id)
-        except Exception as e: self.logger.error(f"Błąd w pętli ról czasowych: {e}", exc_info=True)
-
-    @zadanie_sprawdzania_rol_czasowych.before_loop
-    async def przed_zadaniem_sprawdzania_rol_czasowych(self): await self.wait_until_ready()
-
-    @tasks.loop(hours=1)
-    async def zadanie_konca_sezonu_miesiecznego(self):
+            usuniete = await self.baza_danych.usun_stare_cykle_misji(aktualne_cykle)
+            if usuniete: self.logger.info(f"Usunięto {usuniete} wierszy postępu misji z poprzednich cykli.")
+        except Exception as e:
+            self.logger.error(f"Błąd podczas usuwania postępu misji z poprzednich cykli: {e}", exc_info=True)
+
+    async def _zdejmij_role_czasowa(self, wpis: WpisWygasania) -> None:
+        """Zdejmuje wygasłą rolę czasową. Brak serwera, członka albo roli - nie ma czego zdejmować; 429 i błędy serwera Discorda - ponowienie."""
+        guild = self.get_guild(wpis.server_id)
+        member = guild.get_member(wpis.user_id) if guild else None
+        rola_obj = guild.get_role(wpis.rola_id) if guild and wpis.rola_id else None
+        if not member or not rola_obj or rola_obj not in member.roles: return
+        try:
+            await member.remove_roles(rola_obj, reason="Rola czasowa wygasła.")
+        except (discord.Forbidden, discord.NotFound) as e:
+            self.logger.error(f"Błąd usuwania roli {rola_obj.name} od {member.display_name}: {e}")
+        except discord.HTTPException as e:
+            if e.status == 429 or e.status >= 500: raise PonowPozniej(float(getattr(e, "retry_after", None) or 5.0)) from e
+            self.logger.error(f"Błąd usuwania roli {rola_obj.name} od {member.display_name}: {e}")
+
+    async def zadanie_konca_sezonu_miesiecznego(self, termin: datetime | None = None):
+        """Koniec sezonu za miesiąc poprzedzający `termin` (harmonogram: 1. dnia miesiąca o 00:00 UTC, z nadrabianiem po przerwie)."""
         if self.baza_danych is None:
             self.logger.warning("Baza danych niedostępna, pomijam zadanie końca sezonu.")
             return
 
         teraz = datetime.now(UTC)
-        if teraz.day == 1 and teraz.hour == 0 and teraz.minute < 5: 
-            self.logger.info(f"Rozpoczynam zadanie końca sezonu miesięcznego dla {teraz.year}-{teraz.month-1 if teraz.month > 1 else 12}.")
+        poprzedni_miesiac_dt = (termin or teraz) - timedelta(days=1)
+        rok_sezonu = poprzedni_miesiac_dt.year
+        miesiac_sezonu = poprzedni_miesiac_dt.month
+
+        self.logger.info(f"Rozpoczynam zadanie końca sezonu miesięcznego - przetwarzanie rankingu miesięcznego XP za {rok_sezonu}-{miesiac_sezonu}.")
 
-            poprzedni_miesiac_dt = teraz - timedelta(days=1)
-            rok_sezonu = poprzedni_miesiac_dt.year
-            miesiac_sezonu = poprzedni_miesiac_dt.month
+        for guild in self.guilds:
+            try:
+                ranking_miesieczny = await self.baza_danych.pobierz_ranking_miesiecznego_xp(guild.id, rok_sezonu, miesiac_sezonu, limit=5)
+                if not ranking_miesieczny:
+                    self.logger.info(f"Brak danych rankingowych dla serwera {guild.name} ({guild.id}) za {rok_sezonu}-{miesiac_sezonu}.")
+                    continue
 
-            self.logger.info(f"Przetwarzanie rankingu miesięcznego XP za {rok_sezonu}-{miesiac_sezonu}.")
+                self.logger.info(f"Ranking miesięczny XP dla {guild.name} ({rok_sezonu}-{miesiac_sezonu}): {ranking_miesieczny}")
 
-            for guild in self.guilds:
-                try:
-                    ranking_miesieczny = await self.baza_danych.pobierz_ranking_miesiecznego_xp(str(guild.id), rok_sezonu, miesiac_sezonu, limit=5)
-                    if not ranking_miesieczny:
-                        self.logger.info(f"Brak danych rankingowych dla serwera {guild.name} ({guild.id}) za {rok_sezonu}-{miesiac_sezonu}.")
-                        continue
-
-                    self.logger.info(f"Ranking miesięczny XP dla {guild.name} ({rok_sezonu}-{miesiac_sezonu}): {ranking_miesieczny}")
-
-                    embed_wyniki = discord.Embed(
-                        title=f"🏆 Zakończenie Sezonu Rankingu XP - {miesiac_sezonu}/{rok_sezonu} 🏆",
-                        description=f"Oto najlepsi Kronikarze serwera **{guild.name}** w minionym miesiącu!",
-                        color=config.KOLOR_RANKINGU_SEZONOWEGO,
-                        timestamp=teraz
-                    )
-                    if guild.icon:
-                        embed_wyniki.set_thumbnail(url=guild.icon.url)
-
-                    medale = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
-                    opisy_zwyciezcow = []
-
-                    for i, (user_id_str, xp_miesieczne_val) in enumerate(ranking_miesieczny):
-                        miejsce = i + 1
-                        member = guild.get_member(int(user_id_str))
-                        nazwa_uzytkownika = ""
-                        if not member:
-                            try:
-                                user_obj = await self.fetch_user(int(user_id_str))
-                                nazwa_uzytkownika = user_obj.display_name if user_obj else f"Nieznany ({user_id_str})"
-                            except discord.NotFound:
-                                nazwa_uzytkownika = f"Nieznany ({user_id_str})"
-                        else:
-                            nazwa_uzytkownika = member.display_name
-
-                        opisy_zwyciezcow.append(f"{medale[i] if i < len(medale) else f'**{miejsce}.**'} {nazwa_uzytkownika} - **{xp_miesieczne_val} XP**")
-
-                        if miejsce in config.NAGRODY_RANKINGU_XP_MIESIECZNEGO:
-                            nagroda_def = config.NAGRODY_RANKINGU_XP_MIESIECZNEGO[miejsce]
-                            opis_nagrody_czesci = []
-
-                            if nagroda_def.get("dukaty", 0) > 0 and self.baza_danych:
-                                await self.baza_danych.aktualizuj_portfel(int(user_id_str), guild.id, ilosc_dukatow_do_dodania=nagroda_def["dukaty"])
-                                opis_nagrody_czesci.append(f"{nagroda_def['dukaty']} ✨")
-                            if nagroda_def.get("krysztaly", 0) > 0 and self.baza_danych:
-                                await self.baza_danych.aktualizuj_portfel(int(user_id_str), guild.id, ilosc_krysztalow_do_dodania=nagroda_def["krysztaly"])
-                                opis_nagrody_czesci.append(f"{nagroda_def['krysztaly']} {config.SYMBOL_WALUTY_PREMIUM}")
-
-                            rola_id_nagrody = nagroda_def.get("rola_id")
-                            if rola_id_nagrody and member and isinstance(member, discord.Member):
-                                rola_do_nadania = guild.get_role(rola_id_nagrody)
-                                if rola_do_nadania:
-                                    try:
-                                        await member.add_roles(rola_do_nadania, reason=f"Nagroda za Top {miejsce} w rankingu miesięcznym XP ({miesiac_sezonu}/{rok_sezonu})")
-                                        opis_nagrody_czesci.append(f"Rola: {rola_do_nadania.mention}")
-                                    except discord.Forbidden:
-                                        self.logger.warning(f"Brak uprawnień do nadania roli nagrody {rola_do_nadania.name} użytkownikowi {member.display_name} na serwerze {guild.name}.")
-                                    except Exception as e_role:
-                                        self.logger.error(f"Błąd nadawania roli nagrody: {e_role}", exc_info=True)
-                                else:
-                                    self.logger.warning(f"Nie znaleziono roli nagrody o ID {rola_id_nagrody} na serwerze {guild.name}.")
-                            
-                            if nagroda_def.get("opis_dodatkowy"):
-                                opis_nagrody_czesci.append(nagroda_def["opis_dodatkowy"])
-
-                            if opis_nagrody_czesci:
-                                opisy_zwyciezcow[-1] += f" (Nagroda: {', '.join(opis_nagrody_czesci)})"
-
-                    embed_wyniki.add_field(name="🏆 Najlepsi Kronikarze Miesiąca:", value="\n".join(opisy_zwyciezcow), inline=False)
-                    embed_wyniki.set_footer(text=f"Gratulacje! Nowy sezon rankingowy właśnie się rozpoczął! | Kroniki Elary")
-
-                    kanal_ogloszen_id = config.ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO
-                    if kanal_ogloszen_id:
-                        kanal_ogloszen = guild.get_channel(kanal_ogloszen_id)
-                        if kanal_ogloszen and isinstance(kanal_ogloszen, discord.TextChannel):
-                            try:
-                                await kanal_ogloszen.send(embed=embed_wyniki)
-                                self.logger.info(f"Ogłoszono wyniki rankingu miesięcznego XP dla {guild.name} na kanale {kanal_ogloszen.name}.")
-                            except discord.Forbidden:
-                                self.logger.warning(f"Brak uprawnień do wysłania ogłoszenia rankingu na kanale {kanal_ogloszen.name} ({guild.name}).")
-                            except Exception as e_send:
-                                self.logger.error(f"Błąd wysyłania ogłoszenia rankingu: {e_send}", exc_info=True)
-                        else:
-                            self.logger.warning(f"Nie znaleziono kanału ogłoszeń rankingu ({kanal_ogloszen_id}) na serwerze {guild.name} lub nie jest to kanał tekstowy.")
+                embed_wyniki = discord.Embed(
+                    title=f"🏆 Zakończenie Sezonu Rankingu XP - {miesiac_sezonu}/{rok_sezonu} 🏆",
+                    description=f"Oto najlepsi Kronikarze serwera **{guild.name}** w minionym miesiącu!",
+                    color=config.KOLOR_RANKINGU_SEZONOWEGO,
+                    timestamp=teraz
+                )
+                if guild.icon:
+                    embed_wyniki.set_thumbnail(url=guild.icon.url)
+
+                # Nagrody walutowe całego serwera jednym commitem razem ze znacznikiem wypłaty - przerwane zadanie nie zostawi
+                # wypłaty w połowie, a nadrobienie terminu po restarcie pomija serwery już wypłacone (z rolami i ogłoszeniem)
+                nagrody_walutowe: dict[int, tuple[int, int]] = {}
+                for miejsce, (user_id, _) in enumerate(ranking_miesieczny, 1):
+                    nagroda_def = config.NAGRODY_RANKINGU_XP_MIESIECZNEGO.get(miejsce, {})
+                    dukaty_nagrody, krysztaly_nagrody = max(nagroda_def.get("dukaty", 0), 0), max(nagroda_def.get("krysztaly", 0), 0)
+                    if dukaty_nagrody or krysztaly_nagrody:
+                        nagrody_walutowe[user_id] = (dukaty_nagrody, krysztaly_nagrody)
+                if not await self.baza_danych.wyplac_nagrody_sezonu(guild.id, rok_sezonu, miesiac_sezonu, nagrody_walutowe):
+                    self.logger.info(f"Sezon {rok_sezonu}-{miesiac_sezonu} serwera {guild.name} ({guild.id}) był już wypłacony - pomijam.")
+                    continue
+
+                medale = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
+                opisy_zwyciezcow = []
+
+                for i, (user_id, xp_miesieczne_val) in enumerate(ranking_miesieczny):
+                    miejsce = i + 1
+                    member = guild.get_member(user_id)
+                    nazwa_uzytkownika = ""
+                    if not member:
+                        try:
+                            user_obj = await self.fetch_user(user_id)
+                            nazwa_uzytkownika = user_obj.display_name if user_obj else f"Nieznany ({user_id})"
+                        except discord.NotFound:
+                            nazwa_uzytkownika = f"Nieznany ({user_id})"
+                    else:
+                        nazwa_uzytkownika = member.display_name
+
+                    opisy_zwyciezcow.append(f"{medale[i] if i < len(medale) else f'**{miejsce}.**'} {nazwa_uzytkownika} - **{xp_miesieczne_val} XP**")
+
+                    if miejsce in config.NAGRODY_RANKINGU_XP_MIESIECZNEGO:
+                        nagroda_def = config.NAGRODY_RANKINGU_XP_MIESIECZNEGO[miejsce]
+                        opis_nagrody_czesci = []
+
+                        if nagroda_def.get("dukaty", 0) > 0:
+                            opis_nagrody_czesci.append(f"{nagroda_def['dukaty']} ✨")
+                        if nagroda_def.get("krysztaly", 0) > 0:
+                            opis_nagrody_czesci.append(f"{nagroda_def['krysztaly']} {config.SYMBOL_WALUTY_PREMIUM}")
+
+                        rola_id_nagrody = nagroda_def.get("rola_id")
+                        if rola_id_nagrody and member and isinstance(member, discord.Member):
+                            rola_do_nadania = guild.get_role(rola_id_nagrody)
+                            if rola_do_nadania:
+                                try:
+                                    await member.add_roles(rola_do_nadania, reason=f"Nagroda za Top {miejsce} w rankingu miesięcznym XP ({miesiac_sezonu}/{rok_sezonu})")
+                                    opis_nagrody_czesci.append(f"Rola: {rola_do_nadania.mention}")
+                                except discord.Forbidden:
+                                    self.logger.warning(f"Brak uprawnień do nadania roli nagrody {rola_do_nadania.name} użytkownikowi {member.display_name} na serwerze {guild.name}.")
+                                except Exception as e_role:
+                                    self.logger.error(f"Błąd nadawania roli nagrody: {e_role}", exc_info=True)
+                            else:
+                                self.logger.warning(f"Nie znaleziono roli nagrody o ID {rola_id_nagrody} na serwerze {guild.name}.")
+                        
+                        if nagroda_def.get("opis_dodatkowy"):
+                            opis_nagrody_czesci.append(nagroda_def["opis_dodatkowy"])
+
+                        if opis_nagrody_czesci:
+                            opisy_zwyciezcow[-1] += f" (Nagroda: {', '.join(opis_nagrody_czesci)})"
+
+                embed_wyniki.add_field(name="🏆 Najlepsi Kronikarze Miesiąca:", value="\n".join(opisy_zwyciezcow), inline=False)
+                embed_wyniki.set_footer(text=f"Gratulacje! Nowy sezon rankingowy właśnie się rozpoczął! | Kroniki Elary")
+
+                kanal_ogloszen_id = config.ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO
+                if kanal_ogloszen_id:
+                    kanal_ogloszen = guild.get_channel(kanal_ogloszen_id)
+                    if kanal_ogloszen and isinstance(kanal_ogloszen, discord.TextChannel):
+                        try:
+                            await kanal_ogloszen.send(embed=embed_wyniki)
+                            self.logger.info(f"Ogłoszono wyniki rankingu miesięcznego XP dla {guild.name} na kanale {kanal_ogloszen.name}.")
+                        except discord.Forbidden:
+                            self.logger.warning(f"Brak uprawnień do wysłania ogłoszenia rankingu na kanale {kanal_ogloszen.name} ({guild.name}).")
+                        except Exception as e_send:
+                            self.logger.error(f"Błąd wysyłania ogłoszenia rankingu: {e_send}", exc_info=True)
                     else:
-                        self.logger.warning(f"ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO nie jest skonfigurowane.")
+                        self.logger.warning(f"Nie znaleziono kanału ogłoszeń rankingu ({kanal_ogloszen_id}) na serwerze {guild.name} lub nie jest to kanał tekstowy.")
+                else:
+                    self.logger.warning(f"ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO nie jest skonfigurowane.")
 
-                except Exception as e:
-                    self.logger.error(f"Błąd podczas przetwarzania końca sezonu dla serwera {guild.name} ({guild.id}): {e}", exc_info=True)
-            self.logger.info("Zakończono zadanie końca sezonu miesięcznego.")
+            except Exception as e:
+                self.logger.error(f"Błąd podczas przetwarzania końca sezonu dla serwera {guild.name} ({guild.id}): {e}", exc_info=True)
+        self.logger.info("Zakończono zadanie końca sezonu miesięcznego.")
 
-    @zadanie_konca_sezonu_miesiecznego.before_loop
-    async def przed_zadaniem_konca_sezonu_miesiecznego(self):
-        await self.wait_until_ready()
-        self.logger.info("Pętla końca sezonu miesięcznego gotowa do startu.")
 
+    def _czy_w_cooldownie_xp(self, pole_cooldownu: str, server_id: int, user_id: int) -> bool:
+        return self.bramka_cooldownow is not None and self.bramka_cooldownow.czy_zablokowane(pole_cooldownu, server_id, user_id, int(time.time()))
+
+    async def _zglos_zdarzenie_xp(self, typ: str, member: discord.Member, guild: discord.Guild, kanal: discord.abc.GuildChannel | discord.Thread) -> None:
+        zdarzenie = ZdarzenieXP(typ, member, guild, kanal, int(time.time()), time.monotonic())
+        if self.kolejka_xp is not None: self.kolejka_xp.wstaw(zdarzenie)
+        else: await self.przyznaj_xp(member, guild, [zdarzenie])
+
+    async def _obsluz_partie_xp(self, zdarzenia: list[ZdarzenieXP]) -> None:
+        await self.przyznaj_xp(zdarzenia[0].member, zdarzenia[0].guild, zdarzenia)
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
@@ -862,13 +988,9 @@ class BotDiscord(commands.Bot):
         if not isinstance(message.author, discord.Member):
              return
 
-        await self.przyznaj_xp(
-            message.author, message.guild, message.channel,
-            config.XP_ZA_WIADOMOSC_MIN, config.XP_ZA_WIADOMOSC_MAX,
-            "ostatnia_wiadomosc_timestamp", config.COOLDOWN_XP_WIADOMOSC_SEKUNDY,
-            "napisanie wiadomości", inkrementuj_licznik_typ="wiadomosc",
-            dodatkowe_dane_dla_osiagniec={"kanal_id": message.channel.id}
-        )
+        # Wiadomość w cooldownie XP - odrzucona bez zapytań do bazy; pozostałe XP obsługuje kolejka, komendy nie czekają
+        if not self._czy_w_cooldownie_xp("ostatnia_wiadomosc_timestamp", message.guild.id, message.author.id):
+            await self._zglos_zdarzenie_xp("wiadomosc", message.author, message.guild, message.channel)
         if self.intents.message_content: await self.process_commands(message)
 
     @commands.Cog.listener()
@@ -878,78 +1000,130 @@ class BotDiscord(commands.Bot):
         if not guild: return
         member = payload.member
         if member.bot: return
+        if self._czy_w_cooldownie_xp("ostatnia_reakcja_timestamp", guild.id, member.id): return
         channel = guild.get_channel(payload.channel_id)
         if not channel or not isinstance(channel, (discord.TextChannel, discord.Thread)): return
-        await self.przyznaj_xp(
-            member, guild, channel,
-            config.XP_ZA_REAKCJE_MIN, config.XP_ZA_REAKCJE_MAX,
-            "ostatnia_reakcja_timestamp", config.COOLDOWN_XP_REAKCJE_SEKUNDY,
-            "dodanie reakcji", inkrementuj_licznik_typ="reakcja"
-        )
+        await self._zglos_zdarzenie_xp("reakcja", member, guild, channel)
+
+    @staticmethod
+    def _czy_aktywny_na_glosowym(stan: discord.VoiceState | None, z_wyciszeniem_serwera: bool = False) -> bool:
+        """Na kanale (nie AFK), bez samowyciszenia; z `z_wyciszeniem_serwera` także bez wyciszenia przez serwer."""
+        return (stan is not None and stan.channel is not None and
+                (stan.channel.guild.afk_channel is None or stan.channel.guild.afk_channel.id != stan.channel.id) and
+                not stan.self_deaf and not stan.self_mute and
+                not (z_wyciszeniem_serwera and (stan.deaf or stan.mute)))
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.bot or self.baza_danych is None or not member.guild: return
         server_id, user_id = member.guild.id, member.id
-        if server_id not in self.aktywni_na_glosowym_start_time:
-            self.aktywni_na_glosowym_start_time[server_id] = {}
-
-        def jest_aktywny(state: discord.VoiceState) -> bool:
-            return (state.channel is not None and
-                    (state.channel.guild.afk_channel is None or state.channel.guild.afk_channel.id != state.channel.id) and
-                    not state.self_deaf and not state.self_mute)
-
-        teraz_aktywny, byl_aktywny = jest_aktywny(after), jest_aktywny(before)
-
-        if teraz_aktywny and not byl_aktywny:
-            self.aktywni_na_glosowym_start_time[server_id][user_id] = time.time()
-        elif not teraz_aktywny and byl_aktywny and user_id in self.aktywni_na_glosowym_start_time.get(server_id, {}):
-            czas_startu = self.aktywni_na_glosowym_start_time[server_id].pop(user_id)
-            czas_spedzony_sek = int(time.time() - czas_startu)
-            if czas_spedzony_sek > 0:
-                konfiguracja_serwera = self.pobierz_konfiguracje_xp_serwera(server_id)
+
+        if self._czy_aktywny_na_glosowym(after):
+            # Przejście między kanałami nie przerywa sesji - zmienia się tylko jej kanał
+            if (server_id, user_id) in self.sesje_glosowe:
+                self.sesje_glosowe.rozpocznij(server_id, user_id, after.channel.id) # type: ignore
+            else:
+                sesja = self.sesje_glosowe.rozpocznij(server_id, user_id, after.channel.id) # type: ignore
+                await self.baza_danych.rozpocznij_sesje_glosowa(server_id, user_id, sesja.kanal_id, sesja.poczatek_ts)
+        else:
+            zakonczona = self.sesje_glosowe.zakoncz(server_id, user_id)
+            if zakonczona is not None:
+                sesja, czas_spedzony_sek = zakonczona
+                await self._rozlicz_sesje_glosowa(member.guild, server_id, user_id, sesja.kanal_id, czas_spedzony_sek)
+
+    async def _rozlicz_sesje_glosowa(self, guild: discord.Guild | None, server_id: int, user_id: int, kanal_id: int, czas_spedzony_sek: int) -> None:
+        """Zamknięta sesja: usunięcie punktu kontrolnego i czas na kanale (o ile XP nie jest zablokowane) jednym commitem, potem misje."""
+        if self.baza_danych is None: return
+        zaliczona = False
+        async with self.baza_danych.transakcja():
+            await self.baza_danych.usun_sesje_glosowa(server_id, user_id)
+            if czas_spedzony_sek > 0 and not self.pobierz_konfiguracje_xp_serwera(server_id)["xp_zablokowane"]:
                 dane_xp_pelne = await self.baza_danych.pobierz_lub_stworz_doswiadczenie(user_id, server_id)
-                indywidualnie_zablokowane = dane_xp_pelne[7]
-                kanal_zablokowany_xp = False
-                if before.channel:
-                    konfig_kanalu = await self.baza_danych.pobierz_konfiguracje_xp_kanalu(str(server_id), str(before.channel.id))
-                    if konfig_kanalu and konfig_kanalu[0]: kanal_zablokowany_xp = True
-                if not konfiguracja_serwera["xp_zablokowane"] and not indywidualnie_zablokowane and not kanal_zablokowany_xp:
+                kanal_zablokowany_xp = (await self.baza_danych.pobierz_polityke_xp(server_id)).czy_kanal_zablokowany(kanal_id)
+                if not dane_xp_pelne[7] and not kanal_zablokowany_xp:
                     await self.baza_danych.aktualizuj_doswiadczenie(user_id, server_id, czas_dodany_glosowy=czas_spedzony_sek)
-                    await self.aktualizuj_i_sprawdz_misje_po_akcji(member, member.guild, "czas_na_glosowym_od_resetu_sekundy", czas_spedzony_sek)
+                    zaliczona = True
+        member = guild.get_member(user_id) if guild else None
+        if zaliczona and member is not None:
+            await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild, "czas_na_glosowym_od_resetu_sekundy", czas_spedzony_sek) # type: ignore
 
-            if not self.aktywni_na_glosowym_start_time[server_id]: del self.aktywni_na_glosowym_start_time[server_id]
+    async def _przywroc_sesje_glosowe(self) -> None:
+        """Po starcie: sesje z punktów kontrolnych, zamknięcie tych, które skończyły się w trakcie przerwy, i sesje dla aktywnych bez zapisu."""
+        if self.baza_danych is None: return
+
+        def kanal_aktywnosci(server_id: int, user_id: int) -> int | None:
+            guild = self.get_guild(server_id)
+            member = guild.get_member(user_id) if guild else None
+            return member.voice.channel.id if member and not member.bot and self._czy_aktywny_na_glosowym(member.voice) else None # type: ignore
+
+        zapisane = await self.baza_danych.pobierz_sesje_glosowe()
+        zamkniete = self.sesje_glosowe.przywroc(zapisane, kanal_aktywnosci, maks_przerwa_s=2 * 60 * config.XP_ZA_GLOS_CO_ILE_MINUT)
+        for guild in self.guilds:
+            for kanal in (*guild.voice_channels, *guild.stage_channels):
+                for member in kanal.members:
+                    if not member.bot and (guild.id, member.id) not in self.sesje_glosowe and self._czy_aktywny_na_glosowym(member.voice):
+                        self.sesje_glosowe.rozpocznij(guild.id, member.id, kanal.id)
+        for server_id, user_id, kanal_id, czas_spedzony_sek in zamkniete:
+            await self._rozlicz_sesje_glosowa(self.get_guild(server_id), server_id, user_id, kanal_id, czas_spedzony_sek)
+        await self.baza_danych.zapisz_punkt_kontrolny_sesji(self.sesje_glosowe.do_zapisu(), int(time.time()))
+        self.logger.info(f"Sesje głosowe: {len(zapisane) - len(zamkniete)} wznowionych, {len(zamkniete)} rozliczonych po przerwie, {len(self.sesje_glosowe)} otwartych.")
 
-    @tasks.loop(minutes=config.XP_ZA_GLOS_CO_ILE_MINUT)
     async def zadanie_xp_za_glos(self):
+        """
+        Tick XP za głos dla wszystkich otwartych sesji naraz: odczyt danych i bonusów zbiorczo na serwer, XP wszystkich
+        uprawnionych i punkt kontrolny sesji jednym commitem. Awans, streak i misje tylko dla tych, których dotyczą.
+        """
         if self.baza_danych is None: return
-        for guild_obj in self.guilds:
-            if guild_obj.id in self.aktywni_na_glosowym_start_time:
-                for user_id in list(self.aktywni_na_glosowym_start_time[guild_obj.id].keys()):
-                    member = guild_obj.get_member(user_id)
-                    if not member or member.bot:
-                        if user_id in self.aktywni_na_glosowym_start_time[guild_obj.id]:
-                            del self.aktywni_na_glosowym_start_time[guild_obj.id][user_id]
-                        continue
-                    if member.voice and member.voice.channel and \
-                       (member.voice.channel.guild.afk_channel is None or member.voice.channel.guild.afk_channel.id != member.voice.channel.id) and \
-                       not member.voice.self_deaf and not member.voice.self_mute and \
-                       not member.voice.deaf and not member.voice.mute:
-                        await self.przyznaj_xp(
-                            member, guild_obj, member.voice.channel,
-                            config.XP_ZA_GLOS_ILOSC_MIN, config.XP_ZA_GLOS_ILOSC_MAX,
-                            None, 0, "aktywność na kanale głosowym"
-                        )
-                    else:
-                        if user_id in self.aktywni_na_glosowym_start_time[guild_obj.id]:
-                            del self.aktywni_na_glosowym_start_time[guild_obj.id][user_id]
-            if guild_obj.id in self.aktywni_na_glosowym_start_time and not self.aktywni_na_glosowym_start_time[guild_obj.id]:
-                del self.aktywni_na_glosowym_start_time[guild_obj.id]
-
-    @zadanie_xp_za_glos.before_loop
-    async def przed_zadaniem_xp_za_glos(self): await self.wait_until_ready()
+        opis, xp_min, xp_max = RODZAJE_ZDARZEN_XP["glos"][:3]
+        teraz_ts = int(time.time())
+        dzisiaj_utc = datetime.fromtimestamp(teraz_ts, UTC).date()
+        przyznane: list[tuple[discord.Member, discord.Guild, tuple, int, tuple[int, date_obj, int] | None]] = []
+
+        for server_id in self.sesje_glosowe.serwery():
+            guild_obj = self.get_guild(server_id)
+            uprawnieni: list[discord.Member] = []
+            for user_id in list(self.sesje_glosowe.uzytkownicy(server_id)):
+                member = guild_obj.get_member(user_id) if guild_obj else None
+                if member and not member.bot and self._czy_aktywny_na_glosowym(member.voice, z_wyciszeniem_serwera=True):
+                    uprawnieni.append(member)
+                else:
+                    self.sesje_glosowe.zakoncz(server_id, user_id)
+            konfiguracja_serwera = self.pobierz_konfiguracje_xp_serwera(server_id)
+            if not uprawnieni or konfiguracja_serwera["xp_zablokowane"]: continue
+
+            # Dane XP i zakupione bonusy wszystkich uprawnionych - po jednym zapytaniu na serwer
+            dane_xp = await self.baza_danych.pobierz_lub_stworz_doswiadczenie_wielu((m.id for m in uprawnieni), server_id)
+            bonusy_zakupione = await self.baza_danych.pobierz_mnozniki_bonusow_xp_wielu((m.id for m in uprawnieni), server_id)
+            polityka_xp = await self.baza_danych.pobierz_polityke_xp(server_id)
+            mnoznik_bonus_eventu = konfiguracja_serwera["mnoznik_xp"] - 1.0
+            for member in uprawnieni:
+                dane_uzytkownika = dane_xp[member.id]
+                kanal_id = member.voice.channel.id # type: ignore
+                if dane_uzytkownika[7] or polityka_xp.czy_kanal_zablokowany(kanal_id): continue
+                finalny_mnoznik = max(0.0, 1.0 + mnoznik_bonus_eventu + polityka_xp.bonus_rol(r.id for r in member.roles) + polityka_xp.bonus_kanalu(kanal_id) + bonusy_zakupione.get(member.id, 0.0))
+                streak = self._oblicz_streak(dane_uzytkownika, dzisiaj_utc)
+                xp_dodane = int(random.randint(xp_min, xp_max) * finalny_mnoznik) + (streak[2] if streak else 0)
+                przyznane.append((member, guild_obj, dane_uzytkownika, xp_dodane, streak)) # type: ignore
+
+        async with self.baza_danych.transakcja():
+            for member, guild_obj, _, xp_dodane, streak in przyznane:
+                kwargs_aktualizacji: dict[str, typing.Any] = {"xp_dodane": xp_dodane}
+                if streak: kwargs_aktualizacji.update(nowy_streak_dni=streak[0], nowy_ostatni_dzien_streaka_iso=streak[1].isoformat())
+                if xp_dodane > 0 or streak: await self.baza_danych.aktualizuj_doswiadczenie(member.id, guild_obj.id, **kwargs_aktualizacji)
+            await self.baza_danych.zapisz_punkt_kontrolny_sesji(self.sesje_glosowe.do_zapisu(), teraz_ts)
+        if przyznane:
+            self.logger.info(f"Przyznano {sum(p[3] for p in przyznane)} XP za {opis} {len(przyznane)} użytkownikom.")
+
+        for member, guild_obj, dane_uzytkownika, xp_dodane, streak in przyznane:
+            if self.oblicz_poziom_dla_xp(dane_uzytkownika[2] + xp_dodane) > dane_uzytkownika[3]:
+                await self.sprawdz_i_awansuj(member, guild_obj)
+                dane_portfela_po_zmianie = await self.baza_danych.pobierz_portfel(member.id, guild_obj.id)
+                if dane_portfela_po_zmianie:
+                    await self.sprawdz_i_przyznaj_osiagniecia(member, guild_obj, "ilosc_dukatow", dane_portfela_po_zmianie[2])
+            if streak:
+                await self.sprawdz_i_przyznaj_osiagniecia(member, guild_obj, "dlugosc_streaka", streak[0])
+                await self.aktualizuj_i_sprawdz_misje_po_akcji(member, guild_obj, "osiagnij_x_streaka", streak[0])
 
-    @tasks.loop(minutes=5)
     async def zadanie_live_ranking(self):
         if self.baza_danych is None: return
         teraz = datetime.now(UTC)
@@ -987,132 +1161,6 @@ class BotDiscord(commands.Bot):
                 try: await message.edit(embed=embed)
                 except discord.HTTPException: pass
 
-    @zadanie_live_ranking.before_loop
-    async def przed_zadaniem_live_ranking(self): await self.wait_until_ready()
-
-    @tasks.loop(hours=config.CZYSZCZENIE_BONUSOW_CO_ILE_GODZIN)
-    async def zadanie_czyszczenia_bonusow(self):
-        if self.baza_danych is None: return
-        try:
-            liczba_usunietych = await self.baza_danych.usun_wygasle_posiadane_przedmioty()
-            if liczba_usunietych > 0: self.logger.info(f"Usunięto {liczba_usunietych} wygasłych przedmiotów/bonusów.")
-        except Exception as e: self.logger.error(f"Błąd czyszczenia bonusów: {e}", exc_info=True)
-
-    @zadanie_czyszczenia_bonusow.before_loop
-    async def przed_zadaniem_czyszczenia_bonusow(self): await self.wait_until_ready()
-
-    @tasks.loop(hours=1)
-    async def zadanie_konca_sezonu_miesiecznego(self):
-        if self.baza_danych is None:
-            self.logger.warning("Baza danych niedostępna, pomijam zadanie końca sezonu.")
-            return
-
-        teraz = datetime.now(UTC)
-        if teraz.day == 1 and teraz.hour == 0 and teraz.minute < 5: 
-            self.logger.info(f"Rozpoczynam zadanie końca sezonu miesięcznego dla {teraz.year}-{teraz.month-1 if teraz.month > 1 else 12}.")
-
-            poprzedni_miesiac_dt = teraz - timedelta(days=1)
-            rok_sezonu = poprzedni_miesiac_dt.year
-            miesiac_sezonu = poprzedni_miesiac_dt.month
-
-            self.logger.info(f"Przetwarzanie rankingu miesięcznego XP za {rok_sezonu}-{miesiac_sezonu}.")
-
-            for guild in self.guilds:
-                try:
-                    ranking_miesieczny = await self.baza_danych.pobierz_ranking_miesiecznego_xp(str(guild.id), rok_sezonu, miesiac_sezonu, limit=5)
-                    if not ranking_miesieczny:
-                        self.logger.info(f"Brak danych rankingowych dla serwera {guild.name} ({guild.id}) za {rok_sezonu}-{miesiac_sezonu}.")
-                        continue
-
-                    self.logger.info(f"Ranking miesięczny XP dla {guild.name} ({rok_sezonu}-{miesiac_sezonu}): {ranking_miesieczny}")
-
-                    embed_wyniki = discord.Embed(
-                        title=f"🏆 Zakończenie Sezonu Rankingu XP - {miesiac_sezonu}/{rok_sezonu} 🏆",
-                        description=f"Oto najlepsi Kronikarze serwera **{guild.name}** w minionym miesiącu!",
-                        color=config.KOLOR_RANKINGU_SEZONOWEGO,
-                        timestamp=teraz
-                    )
-                    if guild.icon:
-                        embed_wyniki.set_thumbnail(url=guild.icon.url)
-
-                    medale = ["🥇", "🥈", "🥉", "4️⃣", "5️⃣"]
-                    opisy_zwyciezcow = []
-
-                    for i, (user_id_str, xp_miesieczne_val) in enumerate(ranking_miesieczny):
-                        miejsce = i + 1
-                        member = guild.get_member(int(user_id_str))
-                        nazwa_uzytkownika = ""
-                        if not member:
-                            try:
-                                user_obj = await self.fetch_user(int(user_id_str))
-                                nazwa_uzytkownika = user_obj.display_name if user_obj else f"Nieznany ({user_id_str})"
-                            except discord.NotFound:
-                                nazwa_uzytkownika = f"Nieznany ({user_id_str})"
-                        else:
-                            nazwa_uzytkownika = member.display_name
-
-                        opisy_zwyciezcow.append(f"{medale[i] if i < len(medale) else f'**{miejsce}.**'} {nazwa_uzytkownika} - **{xp_miesieczne_val} XP**")
-
-                        if miejsce in config.NAGRODY_RANKINGU_XP_MIESIECZNEGO:
-                            nagroda_def = config.NAGRODY_RANKINGU_XP_MIESIECZNEGO[miejsce]
-                            opis_nagrody_czesci = []
-
-                            if nagroda_def.get("dukaty", 0) > 0 and self.baza_danych:
-                                await self.baza_danych.aktualizuj_portfel(int(user_id_str), guild.id, ilosc_dukatow_do_dodania=nagroda_def["dukaty"])
-                                opis_nagrody_czesci.append(f"{nagroda_def['dukaty']} ✨")
-                            if nagroda_def.get("krysztaly", 0) > 0 and self.baza_danych:
-                                await self.baza_danych.aktualizuj_portfel(int(user_id_str), guild.id, ilosc_krysztalow_do_dodania=nagroda_def["krysztaly"])
-                                opis_nagrody_czesci.append(f"{nagroda_def['krysztaly']} {config.SYMBOL_WALUTY_PREMIUM}")
-
-                            rola_id_nagrody = nagroda_def.get("rola_id")
-                            if rola_id_nagrody and member and isinstance(member, discord.Member):
-                                rola_do_nadania = guild.get_role(rola_id_nagrody)
-                                if rola_do_nadania:
-                                    try:
-                                        await member.add_roles(rola_do_nadania, reason=f"Nagroda za Top {miejsce} w rankingu miesięcznym XP ({miesiac_sezonu}/{rok_sezonu})")
-                                        opis_nagrody_czesci.append(f"Rola: {rola_do_nadania.mention}")
-                                    except discord.Forbidden:
-                                        self.logger.warning(f"Brak uprawnień do nadania roli nagrody {rola_do_nadania.name} użytkownikowi {member.display_name} na serwerze {guild.name}.")
-                                    except Exception as e_role:
-                                        self.logger.error(f"Błąd nadawania roli nagrody: {e_role}", exc_info=True)
-                                else:
-                                    self.logger.warning(f"Nie znaleziono roli nagrody o ID {rola_id_nagrody} na serwerze {guild.name}.")
-                            
-                            if nagroda_def.get("opis_dodatkowy"):
-                                opis_nagrody_czesci.append(nagroda_def["opis_dodatkowy"])
-
-                            if opis_nagrody_czesci:
-                                opisy_zwyciezcow[-1] += f" (Nagroda: {', '.join(opis_nagrody_czesci)})"
-
-                    embed_wyniki.add_field(name="🏆 Najlepsi Kronikarze Miesiąca:", value="\n".join(opisy_zwyciezcow), inline=False)
-                    embed_wyniki.set_footer(text=f"Gratulacje! Nowy sezon rankingowy właśnie się rozpoczął! | Kroniki Elary")
-
-                    kanal_ogloszen_id = config.ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO
-                    if kanal_ogloszen_id:
-                        kanal_ogloszen = guild.get_channel(kanal_ogloszen_id)
-                        if kanal_ogloszen and isinstance(kanal_ogloszen, discord.TextChannel):
-                            try:
-                                await kanal_ogloszen.send(embed=embed_wyniki)
-                                self.logger.info(f"Ogłoszono wyniki rankingu miesięcznego XP dla {guild.name} na kanale {kanal_ogloszen.name}.")
-                            except discord.Forbidden:
-                                self.logger.warning(f"Brak uprawnień do wysłania ogłoszenia rankingu na kanale {kanal_ogloszen.name} ({guild.name}).")
-                            except Exception as e_send:
-                                self.logger.error(f"Błąd wysyłania ogłoszenia rankingu: {e_send}", exc_info=True)
-                        else:
-                            self.logger.warning(f"Nie znaleziono kanału ogłoszeń rankingu ({kanal_ogloszen_id}) na serwerze {guild.name} lub nie jest to kanał tekstowy.")
-                    else:
-                        self.logger.warning(f"ID_KANALU_OGLOSZEN_RANKINGU_MIESIECZNEGO nie jest skonfigurowane.")
-
-                except Exception as e:
-                    self.logger.error(f"Błąd podczas przetwarzania końca sezonu dla serwera {guild.name} ({guild.id}): {e}", exc_info=True)
-            self.logger.info("Zakończono zadanie końca sezonu miesięcznego.")
-
-    @zadanie_konca_sezonu_miesiecznego.before_loop
-    async def przed_zadaniem_konca_sezonu_miesiecznego(self):
-        await self.wait_until_ready()
-        self.logger.info("Pętla końca sezonu miesięcznego gotowa do startu.")
-
-
     @commands.Cog.listener()
     async def on_command_completion(self, context: Context) -> None:
         if not context.command or not context.guild or not isinstance(context.author, discord.Member): return
@@ -1124,7 +1172,7 @@ class BotDiscord(commands.Bot):
             kategoria_komendy_lower = context.command.cog_name.lower()
             await self.aktualizuj_i_sprawdz_misje_po_akcji(context.author, context.guild, "uzycie_komendy_kategorii_od_resetu", 1, dodatkowe_dane={"kategoria_komendy": kategoria_komendy_lower})
             if self.baza_danych:
-                nowa_liczba_uzyc_kategorii = await self.baza_danych.inkrementuj_uzycia_komend_kategorii(str(context.author.id), str(context.guild.id), kategoria_komendy_lower)
+                nowa_liczba_uzyc_kategorii = await self.baza_danych.inkrementuj_uzycia_komend_kategorii(context.author.id, context.guild.id, kategoria_komendy_lower)
                 await self.sprawdz_i_przyznaj_osiagniecia(context.author, context.guild, "liczba_uzyc_komend_kategorii", nowa_liczba_uzyc_kategorii, dodatkowe_dane={"kategoria_komendy": kategoria_komendy_lower})
 
 
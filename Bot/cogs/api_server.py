@@ -9,6 +9,7 @@ import uuid # Do generowania unikalnych ID transakcji dla symulacji
 from datetime import datetime, date as date_obj, UTC, timedelta
 
 import config 
+from database import ZAKUP_BRAK_PRZEDMIOTU, ZAKUP_BRAK_SRODKOW, ZAKUP_WYPRZEDANY
 
 if typing.TYPE_CHECKING:
     from bot import BotDiscord # Zakładamy, że bot.py jest w głównym katalogu
@@ -57,11 +58,13 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         # Istniejące endpointy
         app.router.add_get("/api/user_stats/{discord_user_id}", self.get_user_stats_handler)
         app.router.add_get("/api/server_stats", self.get_server_stats_handler)
+        app.router.add_get("/api/metrics/storage", self.get_storage_metrics_handler)
         app.router.add_get("/api/ranking/xp", self.get_xp_ranking_handler)
         app.router.add_get("/api/ranking/currency", self.get_currency_ranking_handler) 
         app.router.add_get("/api/ranking/premium_currency", self.get_premium_currency_ranking_handler)
         app.router.add_get("/api/ranking/messages", self.get_messages_ranking_handler)
         app.router.add_get("/api/ranking/voicetime", self.get_voicetime_ranking_handler)
+        app.router.add_get("/api/ranking/position/{discord_user_id}", self.get_ranking_position_handler)
         
         # Zaktualizowany endpoint dla sklepu (teraz pobiera z DB bota)
         app.router.add_get("/api/shop/items", self.get_shop_items_handler)
@@ -183,7 +186,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             total_members = guild.member_count
             online_members = sum(1 for m in guild.members if m.status != discord.Status.offline)
             total_messages = await self.bot.baza_danych.pobierz_sume_wszystkich_wiadomosci(self.bot.main_server_id)
-            active_giveaways = await self.bot.baza_danych.pobierz_liczbe_aktywnych_konkursow(str(self.bot.main_server_id))
+            active_giveaways = await self.bot.baza_danych.pobierz_liczbe_aktywnych_konkursow(self.bot.main_server_id)
             stats = {
                 "total_members": total_members, "online_members": online_members,
                 "total_messages": total_messages, "active_giveaways": active_giveaways
@@ -193,7 +196,38 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             self.bot.logger.error(f"Błąd w API (get_server_stats_handler): {e}", exc_info=True)
             return web.json_response({"error": "Wewnętrzny błąd API przy statystykach serwera."}, status=500)
 
-    async def _get_ranking_data(self, db_method_name: str, value_key_in_response: str, limit: int = 10, typ_waluty_ranking: str | None = None):
+    async def get_storage_metrics_handler(self, request: web.Request):
+        """Zwraca metryki warstwy zapisu (bufor XP: czasy zrzutów, rozmiary partii)."""
+        if self.bot.baza_danych is None: return web.json_response({"error": "Baza danych niedostępna"}, status=503)
+        bufor = self.bot.baza_danych.bufor_xp
+        rankingi = self.bot.baza_danych.rankingi
+        pamiec = self.bot.baza_danych.pamiec
+        return web.json_response({
+            "bufor_xp": bufor.statystyki() if bufor is not None else None,
+            "rankingi_pamieciowe": rankingi.statystyki() if rankingi is not None else None,
+            "transakcje": self.bot.baza_danych.koordynator.statystyki(),
+            "pamiec_uzytkownikow": pamiec.statystyki() if pamiec is not None else None,
+            "bramka_cooldownow": self.bot.bramka_cooldownow.statystyki() if self.bot.bramka_cooldownow is not None else None,
+            "kolejka_xp": self.bot.kolejka_xp.statystyki() if self.bot.kolejka_xp is not None else None,
+            "skrzynka_powiadomien": self.bot.skrzynka_powiadomien.statystyki() if self.bot.skrzynka_powiadomien is not None else None,
+            "harmonogram": self.bot.harmonogram.statystyki(),
+            "wygasanie": self.bot.baza_danych.wygasanie.statystyki() if self.bot.baza_danych.wygasanie is not None else None,
+        })
+
+    @staticmethod
+    def _get_keyset_params(request: web.Request) -> dict[str, int | None]:
+        """Odczytuje kursor stronicowania rankingu (?after_score=&after_user_id= z ostatniego wpisu poprzedniej strony)."""
+        after_score = request.query.get("after_score")
+        after_user_id = request.query.get("after_user_id")
+        try:
+            return {
+                "po_wyniku": int(after_score) if after_score is not None else None,
+                "po_user_id": int(after_user_id) if after_user_id is not None and after_score is not None else None,
+            }
+        except ValueError:
+            raise web.HTTPBadRequest(text="Parametry 'after_score' i 'after_user_id' muszą być liczbami.")
+
+    async def _get_ranking_data(self, db_method_name: str, value_key_in_response: str, limit: int = 10, typ_waluty_ranking: str | None = None, po_wyniku: int | None = None, po_user_id: int | None = None):
         """Pomocnicza funkcja do pobierania danych rankingowych."""
         if self.bot.baza_danych is None: raise web.HTTPServiceUnavailable(text="Baza danych niedostępna")
         server_id = self.bot.main_server_id
@@ -203,16 +237,16 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         db_method = getattr(self.bot.baza_danych, db_method_name)
         
         if typ_waluty_ranking:
-             raw_ranking_data = await db_method(server_id, limit, typ_waluty_ranking)
+             raw_ranking_data = await db_method(server_id, limit, typ_waluty_ranking, po_wyniku=po_wyniku, po_user_id=po_user_id)
         else:
-             raw_ranking_data = await db_method(server_id, limit)
+             raw_ranking_data = await db_method(server_id, limit, po_wyniku=po_wyniku, po_user_id=po_user_id)
         
         ranking_response = []
         for entry in raw_ranking_data:
             user_id = entry[0]
             score = entry[1]
             user_details = await self._get_user_details(guild, user_id) # Przekazujemy potencjalnie None guild
-            user_data = {"user_id": user_id, "username": user_details["username"], "avatar_url": user_details["avatar_url"], value_key_in_response: score}
+            user_data = {"user_id": str(user_id), "username": user_details["username"], "avatar_url": user_details["avatar_url"], value_key_in_response: score}
             if db_method_name == "pobierz_ranking_xp" and len(entry) > 2: user_data["level"] = entry[2]
             ranking_response.append(user_data)
         return ranking_response
@@ -222,8 +256,10 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             limit = int(request.query.get("limit", 10))
             if not (1 <= limit <= 50): limit = 10
-            ranking_data = await self._get_ranking_data("pobierz_ranking_xp", "xp_total", limit=limit)
+            ranking_data = await self._get_ranking_data("pobierz_ranking_xp", "xp_total", limit=limit, **self._get_keyset_params(request))
             return web.json_response(ranking_data)
+        except web.HTTPException:
+            raise
         except Exception as e:
             self.bot.logger.error(f"Błąd w API (get_xp_ranking_handler): {e}", exc_info=True)
             return web.json_response({"error": f"Wewnętrzny błąd serwera API przy pobieraniu rankingu XP: {str(e)}"}, status=500)
@@ -233,8 +269,10 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             limit = int(request.query.get("limit", 10))
             if not (1 <= limit <= 50): limit = 10
-            ranking_data = await self._get_ranking_data("pobierz_ranking_waluta", "currency_balance", limit=limit, typ_waluty_ranking="dukaty")
+            ranking_data = await self._get_ranking_data("pobierz_ranking_waluta", "currency_balance", limit=limit, typ_waluty_ranking="dukaty", **self._get_keyset_params(request))
             return web.json_response(ranking_data)
+        except web.HTTPException:
+            raise
         except Exception as e:
             self.bot.logger.error(f"Błąd w API (get_currency_ranking_handler - dukaty): {e}", exc_info=True)
             return web.json_response({"error": f"Wewnętrzny błąd API przy rankingu Gwiezdnych Dukatów: {str(e)}"}, status=500)
@@ -244,8 +282,10 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             limit = int(request.query.get("limit", 10))
             if not (1 <= limit <= 50): limit = 10
-            ranking_data = await self._get_ranking_data("pobierz_ranking_waluta", "premium_currency_balance", limit=limit, typ_waluty_ranking="krysztaly")
+            ranking_data = await self._get_ranking_data("pobierz_ranking_waluta", "premium_currency_balance", limit=limit, typ_waluty_ranking="krysztaly", **self._get_keyset_params(request))
             return web.json_response(ranking_data)
+        except web.HTTPException:
+            raise
         except Exception as e:
             self.bot.logger.error(f"Błąd w API (get_premium_currency_ranking_handler - krysztaly): {e}", exc_info=True)
             return web.json_response({"error": f"Wewnętrzny błąd API przy rankingu {config.NAZWA_WALUTY_PREMIUM}: {str(e)}"}, status=500)
@@ -256,8 +296,10 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             limit = int(request.query.get("limit", 10))
             if not (1 <= limit <= 50): limit = 10
-            ranking_data = await self._get_ranking_data("pobierz_ranking_wiadomosci", "message_count", limit=limit)
+            ranking_data = await self._get_ranking_data("pobierz_ranking_wiadomosci", "message_count", limit=limit, **self._get_keyset_params(request))
             return web.json_response(ranking_data)
+        except web.HTTPException:
+            raise
         except Exception as e:
             self.bot.logger.error(f"Błąd w API (get_messages_ranking_handler): {e}", exc_info=True)
             return web.json_response({"error": f"Wewnętrzny błąd API przy rankingu wiadomości: {str(e)}"}, status=500)
@@ -267,12 +309,55 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             limit = int(request.query.get("limit", 10))
             if not (1 <= limit <= 50): limit = 10
-            ranking_data = await self._get_ranking_data("pobierz_ranking_czas_glosowy", "voice_time_seconds", limit=limit)
+            ranking_data = await self._get_ranking_data("pobierz_ranking_czas_glosowy", "voice_time_seconds", limit=limit, **self._get_keyset_params(request))
             return web.json_response(ranking_data)
+        except web.HTTPException:
+            raise
         except Exception as e:
             self.bot.logger.error(f"Błąd w API (get_voicetime_ranking_handler): {e}", exc_info=True)
             return web.json_response({"error": f"Wewnętrzny błąd API przy rankingu czasu głosowego: {str(e)}"}, status=500)
 
+    # Nazwy metryk w API -> metryki rankingów w pamięci
+    RANKING_METRICS = {
+        "xp": "xp", "currency": "dukaty", "premium_currency": "krysztaly",
+        "messages": "wiadomosci", "voicetime": "czas_glosowy", "monthly_xp": "miesieczne_xp",
+    }
+
+    async def get_ranking_position_handler(self, request: web.Request):
+        """Zwraca miejsce użytkownika w rankingu (?metric=xp) i sąsiadów wokół niego (?around=2)."""
+        if self.bot.baza_danych is None: return web.json_response({"error": "Baza danych niedostępna"}, status=503)
+        rankingi = self.bot.baza_danych.rankingi
+        if rankingi is None: return web.json_response({"error": "Rankingi w pamięci są wyłączone"}, status=503)
+        server_id = self.bot.main_server_id
+        if not server_id: return web.json_response({"error": "MAIN_SERVER_ID nie skonfigurowany"}, status=500)
+
+        discord_user_id_str = request.match_info.get("discord_user_id")
+        if not discord_user_id_str or not discord_user_id_str.isdigit():
+            return web.json_response({"error": "Nieprawidłowe ID użytkownika"}, status=400)
+        metric = request.query.get("metric", "xp")
+        if metric not in self.RANKING_METRICS:
+            return web.json_response({"error": f"Nieznana metryka. Dostępne: {', '.join(self.RANKING_METRICS)}"}, status=400)
+        try:
+            around = max(0, min(int(request.query.get("around", 2)), 25))
+        except ValueError:
+            return web.json_response({"error": "Parametr 'around' musi być liczbą."}, status=400)
+
+        user_id = int(discord_user_id_str)
+        metryka = self.RANKING_METRICS[metric]
+        miejsce = rankingi.pozycja(server_id, metryka, user_id)
+        if miejsce is None:
+            return web.json_response({"error": "Użytkownik nie występuje w tym rankingu"}, status=404)
+
+        guild = self.bot.get_guild(server_id)
+        neighbours = []
+        for rank, uid, score in rankingi.sasiedzi(server_id, metryka, user_id, around):
+            user_details = await self._get_user_details(guild, uid)
+            neighbours.append({"rank": rank, "user_id": str(uid), "username": user_details["username"], "avatar_url": user_details["avatar_url"], "score": score})
+        return web.json_response({
+            "user_id": str(user_id), "metric": metric, "rank": miejsce[0], "total": miejsce[1],
+            "score": rankingi.ranking(server_id, metryka).wyniki.get(user_id, 0), "neighbours": neighbours,
+        })
+
     async def get_shop_items_handler(self, request: web.Request):
         """
         Obsługuje żądanie pobrania listy przedmiotów ze sklepu (dla użytkowników).
@@ -294,7 +379,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                     "item_type": item_tuple[6],
                     "bonus_value": item_tuple[7],
                     "duration_seconds": item_tuple[8],
-                    "role_id_to_grant": item_tuple[9],
+                    "role_id_to_grant": str(item_tuple[9]) if item_tuple[9] is not None else None,
                     "stock": item_tuple[10]
                 })
             return web.json_response(shop_items_processed)
@@ -336,105 +421,69 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             "role_id_to_grant": item_data_tuple[9], "stock": item_data_tuple[10]
         }
 
+        # Wybór waluty; cenę ustala kup_przedmiot z bazy
         koszt_dukaty = item_data.get("cost_dukaty")
         koszt_krysztaly = item_data.get("cost_krysztaly")
-        
-        koszt_finalny = 0
-        waluta_do_odjecia = "" 
 
         if currency_type_from_request == "dukaty" and koszt_dukaty is not None:
-            koszt_finalny = koszt_dukaty
             waluta_do_odjecia = "dukaty"
         elif currency_type_from_request == "krysztaly" and koszt_krysztaly is not None:
-            koszt_finalny = koszt_krysztaly
             waluta_do_odjecia = "krysztaly"
-        elif koszt_dukaty is not None: 
-            koszt_finalny = koszt_dukaty
+        elif koszt_dukaty is not None:
             waluta_do_odjecia = "dukaty"
-        elif koszt_krysztaly is not None: 
-            koszt_finalny = koszt_krysztaly
+        elif koszt_krysztaly is not None:
             waluta_do_odjecia = "krysztaly"
         else:
             return web.json_response({"error": f"Przedmiot '{item_data['name']}' nie ma ustalonej ceny w wybranej walucie lub w ogóle."}, status=400)
 
-        # Sprawdzenie stanu magazynowego
-        if item_data["stock"] != -1 and item_data["stock"] <= 0:
-            return web.json_response({"error": f"Przedmiot '{item_data['name']}' jest wyprzedany."}, status=409) # Conflict
+        # Rola dla timed_role ustalana przed transakcją; bez członka/roli przedmiot trafia do ekwipunku
+        member, rola_obj = None, None
+        if item_data["item_type"] == "timed_role":
+            rola_id = item_data.get("role_id_to_grant")
+            if not rola_id:
+                return web.json_response({"error": f"Przedmiot '{item_data['name']}' jest błędnie skonfigurowany (brak roli)."}, status=500)
+            guild_obj = self.bot.get_guild(server_id_to_check)
+            member = guild_obj.get_member(discord_user_id) if guild_obj else None
+            rola_obj = guild_obj.get_role(int(rola_id)) if guild_obj else None
+            if not (member and rola_obj):
+                self.bot.logger.warning(f"API: Nie można nadać roli {rola_id} użytkownikowi {discord_user_id} po zakupie. Member lub rola nie znaleziona.")
+                member, rola_obj = None, None
 
         try:
-            portfel_dane = await self.bot.baza_danych.pobierz_lub_stworz_portfel(discord_user_id, server_id_to_check)
-            aktualne_dukaty = portfel_dane[2]
-            aktualne_krysztaly = portfel_dane[3]
-
-            posiadana_ilosc_waluty = aktualne_dukaty if waluta_do_odjecia == "dukaty" else aktualne_krysztaly
+            # Warunkowe obciążenie, zapas i wpis w kup_przedmiot (własny commit); rola nadawana dopiero po nim, poza blokadą zapisu
+            wynik = await self.bot.baza_danych.kup_przedmiot(
+                discord_user_id, server_id_to_check, item_id_str, waluta_do_odjecia,
+                rola_id=rola_obj.id if rola_obj else None
+            )
 
-            if posiadana_ilosc_waluty < koszt_finalny:
+            if wynik.status == ZAKUP_BRAK_SRODKOW:
                 nazwa_waluty_braku = "Gwiezdnych Dukatów" if waluta_do_odjecia == "dukaty" else config.NAZWA_WALUTY_PREMIUM
                 return web.json_response({
                     "error": f"Niewystarczająca ilość {nazwa_waluty_braku}.",
-                    "current_balance": posiadana_ilosc_waluty, "item_cost": koszt_finalny
+                    "current_balance": wynik.dukaty if waluta_do_odjecia == "dukaty" else wynik.krysztaly, "item_cost": wynik.koszt
                 }, status=402) # Payment Required
-
-            nowe_saldo_dukatow, nowe_saldo_krysztalow = aktualne_dukaty, aktualne_krysztaly
-            if waluta_do_odjecia == "dukaty":
-                nowe_saldo_dukatow, nowe_saldo_krysztalow = await self.bot.baza_danych.aktualizuj_portfel(discord_user_id, server_id_to_check, ilosc_dukatow_do_dodania=-koszt_finalny)
-            else: 
-                nowe_saldo_dukatow, nowe_saldo_krysztalow = await self.bot.baza_danych.aktualizuj_portfel(discord_user_id, server_id_to_check, ilosc_krysztalow_do_dodania=-koszt_finalny)
-            
-            # Zmniejsz stan magazynowy, jeśli nie jest nieskończony
-            if item_data["stock"] != -1:
-                await self.bot.baza_danych.dodaj_lub_zaktualizuj_przedmiot_sklepu(
-                    item_data["id"], item_data["name"], item_data["description"],
-                    item_data["cost_dukaty"], item_data["cost_krysztaly"], item_data["emoji"],
-                    item_data["item_type"], item_data["bonus_value"], item_data["duration_seconds"],
-                    item_data["role_id_to_grant"], item_data["stock"] - 1 # Zmniejsz stock
-                )
-
-            czas_zakupu_ts = int(time.time())
-            czas_wygasniecia_ts = None
-            if item_data.get("duration_seconds"):
-                czas_wygasniecia_ts = czas_zakupu_ts + item_data["duration_seconds"]
-            
-            typ_bonusu_przedmiotu = item_data.get("item_type", "unknown")
-            wartosc_bonusu_do_zapisu = item_data.get("bonus_value", 0.0)
-
-            # Specjalna obsługa dla timed_role
-            if typ_bonusu_przedmiotu == "timed_role":
-                rola_id_str = item_data.get("role_id_to_grant")
-                if not rola_id_str:
-                    raise ValueError("Brak role_id_to_grant dla przedmiotu typu timed_role.")
-                
-                guild_obj = self.bot.get_guild(server_id_to_check)
-                member = guild_obj.get_member(discord_user_id) if guild_obj else None
-                rola_obj = guild_obj.get_role(int(rola_id_str)) if guild_obj and rola_id_str.isdigit() else None
-
-                if member and rola_obj:
+            if wynik.status == ZAKUP_WYPRZEDANY:
+                return web.json_response({"error": f"Przedmiot '{item_data['name']}' jest wyprzedany."}, status=409) # Conflict
+            if wynik.status == ZAKUP_BRAK_PRZEDMIOTU:
+                return web.json_response({"error": f"Przedmiot '{item_id_str}' nie istnieje"}, status=404)
+            if not wynik.ok:
+                return web.json_response({"error": f"Przedmiot '{item_data['name']}' nie ma ustalonej ceny w wybranej walucie lub w ogóle."}, status=400)
+
+            if member and rola_obj:
+                try:
                     await member.add_roles(rola_obj, reason=f"Zakup przedmiotu w sklepie (API): {item_data['name']}")
-                    await self.bot.baza_danych.dodaj_aktywna_role_czasowa(
-                        str(discord_user_id), str(server_id_to_check), str(rola_obj.id),
-                        czas_zakupu_ts, czas_wygasniecia_ts, item_id_str
-                    )
-                    self.bot.logger.info(f"API: Przyznano rolę '{rola_obj.name}' użytkownikowi {member.display_name} po zakupie '{item_data['name']}'.")
-                else:
-                    self.bot.logger.warning(f"API: Nie można nadać roli {rola_id_str} użytkownikowi {discord_user_id} po zakupie. Member lub rola nie znaleziona.")
-                    # Nadal dodajemy przedmiot do posiadanych, nawet jeśli rola nie została nadana
-                    await self.bot.baza_danych.dodaj_przedmiot_uzytkownika(
-                        str(discord_user_id), str(server_id_to_check), item_id_str,
-                        czas_zakupu_ts, czas_wygasniecia_ts,
-                        typ_bonusu_przedmiotu, wartosc_bonusu_do_zapisu
-                    )
-            else:
-                await self.bot.baza_danych.dodaj_przedmiot_uzytkownika(
-                    str(discord_user_id), str(server_id_to_check), item_id_str,
-                    czas_zakupu_ts, czas_wygasniecia_ts,
-                    typ_bonusu_przedmiotu, wartosc_bonusu_do_zapisu
-                )
-
-            self.bot.logger.info(f"API: Użytkownik {discord_user_id} zakupił '{item_data['name']}' za {koszt_finalny} ({waluta_do_odjecia}).")
+                except Exception as e:
+                    # Nieudane nadanie roli wycofuje zakup osobnym zwrotem
+                    self.bot.logger.error(f"API: Nie udało się nadać roli '{rola_obj.name}' użytkownikowi {discord_user_id} po zakupie '{item_id_str}': {e}", exc_info=True)
+                    await self.bot.baza_danych.cofnij_zakup_roli(discord_user_id, server_id_to_check, item_id_str, waluta_do_odjecia, wynik, rola_obj.id)
+                    return web.json_response({"error": "Nie udało się nadać roli. Zakup został wycofany, a waluta zwrócona."}, status=500)
+                self.bot.logger.info(f"API: Przyznano rolę '{rola_obj.name}' użytkownikowi {member.display_name} po zakupie '{item_data['name']}'.")
+
+            self.bot.logger.info(f"API: Użytkownik {discord_user_id} zakupił '{item_data['name']}' za {wynik.koszt} ({waluta_do_odjecia}).")
             return web.json_response({
                 "success": True, "message": f"Pomyślnie zakupiono: {item_data['name']}!",
-                "new_balance_dukaty": nowe_saldo_dukatow, "new_balance_krysztaly": nowe_saldo_krysztalow,
-                "item_purchased": item_id_str
+                "new_balance_dukaty": wynik.dukaty, "new_balance_krysztaly": wynik.krysztaly,
+                "item_purchased": item_id_str, "stock_left": wynik.pozostalo_sztuk
             })
         except Exception as e:
             self.bot.logger.error(f"API: Błąd zakupu '{item_id_str}' przez {discord_user_id}: {e}", exc_info=True)
@@ -484,7 +533,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             
             # Logowanie transakcji
             db_transaction_id = await self.bot.baza_danych.log_transakcje_premium(
-                str(discord_user_id), str(server_id_to_check), package_id_str, 
+                discord_user_id, server_id_to_check, package_id_str, 
                 ilosc_krysztalow_do_dodania, cena_pln_pakietu, 
                 transaction_id, 
                 "zrealizowana" 
@@ -644,7 +693,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                 
                 warnings_list.append({
                     "warn_id": warn_id,
-                    "moderator_id": moderator_id_db,
+                    "moderator_id": str(moderator_id_db),
                     "moderator_username": moderator_details["username"],
                     "reason": reason_db,
                     "created_at_utc": created_at_dt.isoformat() if created_at_dt else None
@@ -772,7 +821,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                     else:
                         poczatek_cyklu_ts = int((reset_time_today - timedelta(days=1)).timestamp())
                     
-                    if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(str(user_id), str(guild_id), misja_id, poczatek_cyklu_ts):
+                    if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(user_id, guild_id, misja_id, poczatek_cyklu_ts):
                         ukonczona_w_tym_cyklu = True
                 
                 elif typ_misji == "tygodniowa":
@@ -791,11 +840,11 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                         # Otherwise, last reset was on the reset day of this week
                         poczatek_cyklu_ts = int(reset_datetime_this_week.timestamp())
                     
-                    if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(str(user_id), str(guild_id), misja_id, poczatek_cyklu_ts):
+                    if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(user_id, guild_id, misja_id, poczatek_cyklu_ts):
                         ukonczona_w_tym_cyklu = True
 
                 elif typ_misji == "jednorazowa":
-                    if await self.bot.baza_danych.czy_misja_jednorazowa_ukonczona(str(user_id), str(guild_id), misja_id):
+                    if await self.bot.baza_danych.czy_misja_jednorazowa_ukonczona(user_id, guild_id, misja_id):
                         ukonczona_w_tym_cyklu = True 
 
                 mission_status = "aktywna"
@@ -807,12 +856,10 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                     typ_warunku_misji = warunek_def["typ_warunku"]
                     wymagana_wartosc = warunek_def["wartosc"]
                     
-                    # Pobierz aktualny postęp, używając poczatek_cyklu_ts dla misji cyklicznych
-                    # Upewnij się, że poczatek_cyklu_ts jest przekazywany poprawnie dla wszystkich typów misji
-                    aktualny_postep_tuple = await self.bot.baza_danych.pobierz_lub_stworz_postep_misji(
-                        str(user_id), str(guild_id), misja_id, typ_warunku_misji, poczatek_cyklu_ts
+                    # Postęp z bieżącego cyklu - ten sam id_cyklu, pod którym bot go zapisuje
+                    aktualny_postep_val = await self.bot.baza_danych.pobierz_postep_misji(
+                        user_id, guild_id, misja_id, typ_warunku_misji, self.bot._get_mission_reset_timestamp(typ_misji)
                     )
-                    aktualny_postep_val = aktualny_postep_tuple[5] # Indeks 5 to aktualna_wartosc
 
                     warunki_postep.append({
                         "typ_warunku": typ_warunku_misji,
@@ -864,7 +911,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             return web.json_response({"error": "Użytkownik nie znaleziony na serwerze"}, status=404)
 
         try:
-            completed_missions_db = await self.bot.baza_danych.pobierz_wszystkie_ukonczone_misje_uzytkownika(str(user_id), str(guild_id))
+            completed_missions_db = await self.bot.baza_danych.pobierz_wszystkie_ukonczone_misje_uzytkownika(user_id, guild_id)
             
             completed_missions_list = []
             for mission_id, completion_timestamp in completed_missions_db:
@@ -911,11 +958,11 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             server_config_data = await self.bot.pobierz_konfiguracje_serwera(guild_id)
             
             # Pobieranie bonusów XP dla ról (z bazy danych)
-            role_xp_bonuses_db = await self.bot.baza_danych.pobierz_bonusy_xp_rol_serwera(str(guild_id))
+            role_xp_bonuses_db = await self.bot.baza_danych.pobierz_bonusy_xp_rol_serwera(guild_id)
             role_xp_bonuses = {role_id: mnoznik for role_id, mnoznik in role_xp_bonuses_db}
 
             # Pobieranie konfiguracji XP dla kanałów (z bazy danych)
-            channel_xp_configs_db = await self.bot.baza_danych.pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(str(guild_id))
+            channel_xp_configs_db = await self.bot.baza_danych.pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(guild_id)
             channel_xp_configs = {
                 channel_id: {"xp_zablokowane": bool(blocked), "mnoznik_xp_kanalu": multiplier}
                 for channel_id, blocked, multiplier in channel_xp_configs_db
@@ -923,7 +970,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
 
             # Pobieranie nagród za poziom (z bazy danych)
             level_rewards_db = await self.bot.baza_danych.pobierz_wszystkie_nagrody_za_poziom_serwera(guild_id)
-            level_rewards = {level: role_id for level, role_id in level_rewards_db}
+            level_rewards = {level: str(role_id) for level, role_id in level_rewards_db}
 
             config_data = {
                 "success": True,
@@ -1037,10 +1084,8 @@ class ApiServerCog(commands.Cog, name="apiserver"):
             channel = guild.get_channel(channel_id)
             if not channel: return web.json_response({"error": "Kanał nie znaleziony na serwerze."}, status=404)
 
-            # Wywołaj metodę bota do ustawienia konfiguracji kanału XP
-            await self.bot.ustaw_konfiguracje_kanalu_xp_serwera(
-                guild_id, channel_id, xp_blocked, xp_multiplier
-            )
+            # Zapis przez Zarządcę unieważnia też politykę XP serwera trzymaną w pamięci
+            await self.bot.baza_danych.ustaw_konfiguracje_xp_kanalu(guild_id, channel_id, xp_blocked, float(xp_multiplier))
             self.bot.logger.info(f"API Admin: Zaktualizowano ustawienia XP dla kanału {channel_id} na serwerze {guild_id}.")
             return web.json_response({"success": True, "message": f"Ustawienia XP dla kanału {channel.name} zaktualizowane pomyślnie."})
         except Exception as e:
@@ -1061,8 +1106,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         channel_id = int(channel_id_str)
 
         try:
-            # Wywołaj metodę bota do usunięcia konfiguracji kanału XP
-            await self.bot.usun_konfiguracje_kanalu_xp_serwera(str(guild_id), str(channel_id))
+            await self.bot.baza_danych.usun_konfiguracje_xp_kanalu(guild_id, channel_id)
             self.bot.logger.info(f"API Admin: Usunięto ustawienia XP dla kanału {channel_id} na serwerze {guild_id}.")
             return web.json_response({"success": True, "message": "Konfiguracja kanału usunięta pomyślnie."})
         except Exception as e:
@@ -1141,6 +1185,8 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                 return web.json_response({"error": "Przedmiot musi mieć cenę w Dukatach lub Kryształach."}, status=400)
             if item_type == "timed_role" and not role_id_to_grant:
                 return web.json_response({"error": "Dla typu 'timed_role' wymagane jest 'role_id_to_grant'."}, status=400)
+            if role_id_to_grant and not str(role_id_to_grant).isdigit():
+                return web.json_response({"error": "'role_id_to_grant' musi być ID roli."}, status=400)
             if stock is not None and not isinstance(stock, int):
                 return web.json_response({"error": "Stock musi być liczbą całkowitą."}, status=400)
 
@@ -1151,7 +1197,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
 
             await self.bot.baza_danych.dodaj_lub_zaktualizuj_przedmiot_sklepu(
                 item_id, name, description, cost_dukaty, cost_krysztaly, emoji,
-                item_type, bonus_value, duration_seconds, role_id_to_grant, stock
+                item_type, bonus_value, duration_seconds, int(role_id_to_grant) if role_id_to_grant else None, stock
             )
             self.bot.logger.info(f"API Admin: Dodano nowy przedmiot sklepu: {item_id}")
             return web.json_response({"success": True, "message": f"Przedmiot '{name}' dodany pomyślnie."}, status=201)
@@ -1189,6 +1235,8 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                 return web.json_response({"error": "Przedmiot musi mieć cenę w Dukatach lub Kryształach."}, status=400)
             if item_type == "timed_role" and not role_id_to_grant:
                 return web.json_response({"error": "Dla typu 'timed_role' wymagane jest 'role_id_to_grant'."}, status=400)
+            if role_id_to_grant and not str(role_id_to_grant).isdigit():
+                return web.json_response({"error": "'role_id_to_grant' musi być ID roli."}, status=400)
             if stock is not None and not isinstance(stock, int):
                 return web.json_response({"error": "Stock musi być liczbą całkowitą."}, status=400)
 
@@ -1199,7 +1247,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
 
             await self.bot.baza_danych.dodaj_lub_zaktualizuj_przedmiot_sklepu(
                 item_id, name, description, cost_dukaty, cost_krysztaly, emoji,
-                item_type, bonus_value, duration_seconds, role_id_to_grant, stock
+                item_type, bonus_value, duration_seconds, int(role_id_to_grant) if role_id_to_grant else None, stock
             )
             self.bot.logger.info(f"API Admin: Zaktualizowano przedmiot sklepu: {item_id}")
             return web.json_response({"success": True, "message": f"Przedmiot '{name}' zaktualizowany pomyślnie."})
@@ -1238,7 +1286,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                     "id": item_tuple[0], "name": item_tuple[1], "description": item_tuple[2],
                     "cost_dukaty": item_tuple[3], "cost_krysztaly": item_tuple[4], "emoji": item_tuple[5],
                     "item_type": item_tuple[6], "bonus_value": item_tuple[7], "duration_seconds": item_tuple[8],
-                    "role_id_to_grant": item_tuple[9], "stock": item_tuple[10]
+                    "role_id_to_grant": str(item_tuple[9]) if item_tuple[9] is not None else None, "stock": item_tuple[10]
                 })
             return web.json_response(shop_items_processed)
         except Exception as e:
@@ -1261,7 +1309,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                 "id": item_data_tuple[0], "name": item_data_tuple[1], "description": item_data_tuple[2],
                 "cost_dukaty": item_data_tuple[3], "cost_krysztaly": item_tuple[4], "emoji": item_data_tuple[5],
                 "item_type": item_data_tuple[6], "bonus_value": item_data_tuple[7], "duration_seconds": item_data_tuple[8],
-                "role_id_to_grant": item_data_tuple[9], "stock": item_data_tuple[10]
+                "role_id_to_grant": str(item_data_tuple[9]) if item_data_tuple[9] is not None else None, "stock": item_data_tuple[10]
             }
             return web.json_response(item_data)
         except Exception as e:
@@ -1283,7 +1331,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         server_id_to_check = self.bot.main_server_id
 
         try:
-            possessed_items_db = await self.bot.baza_danych.pobierz_posiadane_przedmioty_uzytkownika(str(discord_user_id), str(server_id_to_check))
+            possessed_items_db = await self.bot.baza_danych.pobierz_posiadane_przedmioty_uzytkownika(discord_user_id, server_id_to_check)
             
             inventory_list = []
             for item_tuple in possessed_items_db:
@@ -1350,7 +1398,7 @@ class ApiServerCog(commands.Cog, name="apiserver"):
         try:
             user_xp_data = await self.bot.baza_danych.pobierz_doswiadczenie(user_id, guild_id)
             user_wallet_data = await self.bot.baza_danych.pobierz_portfel(user_id, guild_id)
-            user_achievements_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(str(user_id), str(guild_id))
+            user_achievements_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(user_id, guild_id)
             
             # Konwersja zdobytych osiągnięć na set dla szybkiego sprawdzania
             achieved_ids = {ach[0] for ach in user_achievements_db}
@@ -1391,11 +1439,11 @@ class ApiServerCog(commands.Cog, name="apiserver"):
                         elif base_def["typ_warunku_bazowy"] == "dlugosc_streaka" and user_xp_data:
                             current_progress = user_xp_data[8] # aktualny_streak_dni
                         elif base_def["typ_warunku_bazowy"] == "liczba_wygranych_konkursow":
-                            current_progress = await self.bot.baza_danych.pobierz_liczbe_wygranych_konkursow(str(user_id), str(guild_id))
+                            current_progress = await self.bot.baza_danych.pobierz_liczbe_wygranych_konkursow(user_id, guild_id)
                         elif base_def["typ_warunku_bazowy"] == "uzycie_komendy_kategorii" and "kategoria_komendy_warunku" in base_def:
-                            current_progress = await self.bot.baza_danych.pobierz_uzycia_komend_kategorii(str(user_id), str(guild_id), base_def["kategoria_komendy_warunku"])
+                            current_progress = await self.bot.baza_danych.pobierz_uzycia_komend_kategorii(user_id, guild_id, base_def["kategoria_komendy_warunku"])
                         elif base_def["typ_warunku_bazowy"] == "liczba_wiadomosci_na_kanale" and "id_kanalu_warunku" in base_def:
-                            current_progress = await self.bot.baza_danych.pobierz_liczbe_wiadomosci_na_kanale(str(user_id), str(guild_id), base_def["id_kanalu_warunku"]) # 0 aby tylko pobrać
+                            current_progress = await self.bot.baza_danych.pobierz_liczbe_wiadomosci_na_kanale(user_id, guild_id, base_def["id_kanalu_warunku"]) # 0 aby tylko pobrać
                         elif base_def["typ_warunku_bazowy"] == "zakup_krysztalow":
                             # W tym przypadku, osiągnięcie jest jednorazowe i jest sprawdzane przy zakupie.
                             # Jeśli nie jest odblokowane, oznacza, że użytkownik jeszcze nie dokonał zakupu.
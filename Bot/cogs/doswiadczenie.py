@@ -1,6 +1,6 @@
 import discord
 from discord import app_commands, Interaction
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ext.commands import Context, has_permissions
 import time
 from datetime import datetime, UTC, date as date_obj, timedelta
@@ -79,6 +79,9 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         embed.add_field(name="✨ Gwiezdne Dukaty", value=f"**{dukaty}**", inline=True)
         embed.add_field(name=f"{config.SYMBOL_WALUTY_PREMIUM} {config.NAZWA_WALUTY_PREMIUM}", value=f"**{krysztaly}**", inline=True)
         embed.add_field(name="🔮 Zdobywanie Mocy (XP)", value="Wyłączone" if xp_zablokowane_indywidualnie else "Włączone", inline=True)
+        if self.bot.baza_danych.rankingi is not None:
+            miejsce = self.bot.baza_danych.rankingi.pozycja(context.guild.id, "xp", target_user.id)
+            if miejsce: embed.add_field(name="🏅 Miejsce w Rankingu XP", value=f"**#{miejsce[0]}** z {miejsce[1]}", inline=True)
         embed.add_field(name="💫 Całkowita Moc Opowieści (XP)", value=str(xp_calkowite), inline=False)
         embed.add_field(name="📊 Postęp do Następnego Poziomu", value=f"`{pasek}` ({procent_postepu*100:.1f}%)\n*{xp_na_obecnym_poziomie} / {wymagane_xp_na_poziomie} XP*", inline=False)
         embed.add_field(name="⏳ Czas na Głosowych Naradach", value=self.bot.formatuj_czas(czas_glosowy_sek), inline=True)
@@ -91,7 +94,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         embed.add_field(name="🔥 Płomień Aktywności (Streak)", value=f"{aktualny_streak} {'dzień' if aktualny_streak == 1 else 'dni'}\n(Ost. aktywność: {ostatni_dzien_streaka_str})", inline=True)
         embed.add_field(name="✒️ Zapiski Aktywności", value=f"Wysłane zwoje: {liczba_wiad}\nDodane pieczęcie: {liczba_reak}", inline=False)
 
-        aktywne_bonusy_zakupione = await self.bot.baza_danych.pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(str(target_user.id), str(context.guild.id))
+        aktywne_bonusy_zakupione = await self.bot.baza_danych.pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(target_user.id, context.guild.id)
         if aktywne_bonusy_zakupione:
             opis_bonusow = "".join([f"• **+{wartosc_b*100:.0f}%** XP (wygasa za: {self.bot.formatuj_czas(czas_wygasniecia_b - int(time.time()), precyzyjnie=True)})\n"
                                     for typ_b, wartosc_b, czas_wygasniecia_b in aktywne_bonusy_zakupione
@@ -100,7 +103,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
                                     for typ_b, wartosc_b, _ in aktywne_bonusy_zakupione if typ_b == "xp_mnoznik" and _ is None])
             if opis_bonusow: embed.add_field(name="🌌 Aktywne Artefakty Wzmocnienia", value=opis_bonusow.strip(), inline=False)
 
-        zdobyte_tiery_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(str(target_user.id), str(context.guild.id))
+        zdobyte_tiery_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(target_user.id, context.guild.id)
         zdobyte_tiery_ids = {tier_id for tier_id, _ in zdobyte_tiery_db}
         odznaki_do_wyswietlenia = []
         for os_bazowe_dane in self.bot.DEFINICJE_OSIAGNIEC.values():
@@ -126,8 +129,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         else:
             opis_list = []
             medale = ["🥇", "🥈", "🥉"]
-            for i, (uid_str, xp, poz) in enumerate(ranking):
-                uid = int(uid_str)
+            for i, (uid, xp, poz) in enumerate(ranking):
                 uzytkownik_obj = context.guild.get_member(uid)
                 nazwa_uzytkownika = uzytkownik_obj.display_name if uzytkownik_obj else f"Nieznany ({uid})"
                 medal_str = medale[i] if i < len(medale) else f"**{i+1}.**"
@@ -171,7 +173,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         ]
         nazwa_miesiaca_pl = nazwy_miesiecy[miesiac_rankingu - 1]
 
-        ranking_data = await self.bot.baza_danych.pobierz_ranking_miesiecznego_xp(str(context.guild.id), rok_rankingu, miesiac_rankingu, limit=10)
+        ranking_data = await self.bot.baza_danych.pobierz_ranking_miesiecznego_xp(context.guild.id, rok_rankingu, miesiac_rankingu, limit=10)
 
         embed = await self._create_exp_embed(
             context,
@@ -186,8 +188,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         else:
             opisy_rankingu = []
             medale = ["🥇", "🥈", "🥉"]
-            for i, (user_id_db_str, xp_miesieczne) in enumerate(ranking_data):
-                user_id_db = int(user_id_db_str)
+            for i, (user_id_db, xp_miesieczne) in enumerate(ranking_data):
                 uzytkownik_obj = context.guild.get_member(user_id_db)
                 nazwa_uzytkownika = uzytkownik_obj.display_name if uzytkownik_obj else f"Nieznany Kronikarz ({user_id_db})"
                 medal_str = medale[i] if i < len(medale) else f"**{i+1}.**"
@@ -228,7 +229,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
         if context.guild.icon: embed.set_thumbnail(url=context.guild.icon.url)
         if not nagrody: embed.description = "Brak skonfigurowanych nagród."
         else:
-            opis_list = [f"**Poziom {p_val}:** {(context.guild.get_role(int(r_id)) or f'ID: {r_id} (Nieznana)').mention}" for p_val, r_id in nagrody]
+            opis_list = [f"**Poziom {p_val}:** {(context.guild.get_role(r_id) or f'ID: {r_id} (Nieznana)').mention}" for p_val, r_id in nagrody]
             embed.description = "\n".join(opis_list)
         embed.set_footer(text="Niech ścieżka rozwoju będzie pełna chwały!", icon_url=context.guild.icon.url if context.guild.icon else None)
         await context.send(embed=embed, ephemeral=True)
@@ -289,8 +290,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
             cfg["live_ranking_channel_id"], cfg["live_ranking_message_id"] = kanal.id, msg.id
             embed = await self._create_exp_embed(context, title="📊 Live Ranking Ustawiony", description=f"Ustawiono na {kanal.mention}.", color=config.KOLOR_BOT_SUKCES)
             await context.send(embed=embed, ephemeral=True)
-            if self.bot.zadanie_live_ranking.is_running(): self.bot.zadanie_live_ranking.restart()
-            else: self.bot.zadanie_live_ranking.start()
+            self.bot.harmonogram.uruchom_teraz("live_ranking")
         except discord.Forbidden: await context.send(f"Brak uprawnień na {kanal.mention}.", ephemeral=True)
         except Exception as e: await context.send(f"Błąd: {e}", ephemeral=True)
 
@@ -304,7 +304,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
     @app_commands.describe(rola="Rola.", mnoznik="Mnożnik XP (np. 1.2). 1.0 usuwa bonus.")
     async def xpadmin_bonusroli_dodaj(self, context: Context, rola: discord.Role, mnoznik: float):
         if not context.guild or self.bot.baza_danych is None or mnoznik < 0: await context.send("Błąd.", ephemeral=True); return
-        await self.bot.baza_danych.ustaw_bonus_xp_roli(str(context.guild.id), str(rola.id), mnoznik)
+        await self.bot.baza_danych.ustaw_bonus_xp_roli(context.guild.id, rola.id, mnoznik)
         desc = f"Usunięto bonus dla {rola.mention}." if mnoznik == 1.0 else f"Ustawiono bonus **x{mnoznik}** dla {rola.mention}."
         color = config.KOLOR_BOT_INFO if mnoznik == 1.0 else config.KOLOR_BOT_SUKCES
         embed = await self._create_exp_embed(context, title="✨ Bonus XP Roli Zmieniony", description=desc, color=color)
@@ -314,19 +314,19 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
     @app_commands.describe(rola="Rola.")
     async def xpadmin_bonusroli_usun(self, context: Context, rola: discord.Role):
         if not context.guild or self.bot.baza_danych is None: await context.send("Błąd.", ephemeral=True); return
-        await self.bot.baza_danych.ustaw_bonus_xp_roli(str(context.guild.id), str(rola.id), 1.0)
+        await self.bot.baza_danych.ustaw_bonus_xp_roli(context.guild.id, rola.id, 1.0)
         embed = await self._create_exp_embed(context, title="✨ Bonus XP Roli Usunięty", description=f"Usunięto bonus dla {rola.mention}.", color=config.KOLOR_BOT_INFO)
         await context.send(embed=embed, ephemeral=True)
 
     @xpadmin_bonusroli.command(name="lista", description="Wyświetla role z bonusami XP.")
     async def xpadmin_bonusroli_lista(self, context: Context):
         if not context.guild or self.bot.baza_danych is None: await context.send("Błąd.", ephemeral=True); return
-        bonusy = await self.bot.baza_danych.pobierz_bonusy_xp_rol_serwera(str(context.guild.id))
+        bonusy = await self.bot.baza_danych.pobierz_bonusy_xp_rol_serwera(context.guild.id)
         embed = await self._create_exp_embed(context, title=f"✨ Bonusy XP dla Ról na {context.guild.name}", color=config.KOLOR_XP_ADMIN)
         if context.guild.icon: embed.set_thumbnail(url=context.guild.icon.url)
         if not bonusy: embed.description = "Brak ról z bonusami."
         else:
-            opis_list = [f"{(context.guild.get_role(int(r_id)) or f'ID: {r_id}').mention}: Mnożnik **x{mn}**" for r_id, mn in bonusy if mn != 1.0]
+            opis_list = [f"{(context.guild.get_role(r_id) or f'ID: {r_id}').mention}: Mnożnik **x{mn}**" for r_id, mn in bonusy if mn != 1.0]
             embed.description = "\n".join(opis_list) if opis_list else "Brak aktywnych bonusów (wszystkie x1.0)."
         await context.send(embed=embed, ephemeral=True)
 
@@ -342,7 +342,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
     async def xpadmin_kanalyxp_ustaw(self, context: Context, kanal: typing.Union[discord.TextChannel, discord.VoiceChannel, discord.Thread], blokuj_xp: app_commands.Choice[str], mnoznik: float = 1.0):
         if not context.guild or self.bot.baza_danych is None or mnoznik < 0: await context.send("Błąd.", ephemeral=True); return
         czy_blokowac = blokuj_xp.value == "tak"
-        await self.bot.baza_danych.ustaw_konfiguracje_xp_kanalu(str(context.guild.id), str(kanal.id), czy_blokowac, mnoznik)
+        await self.bot.baza_danych.ustaw_konfiguracje_xp_kanalu(context.guild.id, kanal.id, czy_blokowac, mnoznik)
         status_blokady = "zablokowane" if czy_blokowac else "odblokowane"
         embed = await self._create_exp_embed(context, title="⚙️ Konfiguracja Kanału Zmieniona", description=f"Kanał {kanal.mention}:\n- XP: **{status_blokady}**\n- Mnożnik: **x{mnoznik}**", color=config.KOLOR_BOT_SUKCES)
         await context.send(embed=embed, ephemeral=True)
@@ -351,19 +351,19 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
     @app_commands.describe(kanal="Kanał.")
     async def xpadmin_kanalyxp_usun(self, context: Context, kanal: typing.Union[discord.TextChannel, discord.VoiceChannel, discord.Thread]):
         if not context.guild or self.bot.baza_danych is None: await context.send("Błąd.", ephemeral=True); return
-        await self.bot.baza_danych.usun_konfiguracje_xp_kanalu(str(context.guild.id), str(kanal.id))
+        await self.bot.baza_danych.usun_konfiguracje_xp_kanalu(context.guild.id, kanal.id)
         embed = await self._create_exp_embed(context, title="⚙️ Konfiguracja Kanału Usunięta", description=f"Usunięto konfigurację dla {kanal.mention}.", color=config.KOLOR_BOT_INFO)
         await context.send(embed=embed, ephemeral=True)
 
     @xpadmin_kanalyxp.command(name="lista", description="Wyświetla kanały z niestandardową konfiguracją XP.")
     async def xpadmin_kanalyxp_lista(self, context: Context):
         if not context.guild or self.bot.baza_danych is None: await context.send("Błąd.", ephemeral=True); return
-        konfiguracje = await self.bot.baza_danych.pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(str(context.guild.id))
+        konfiguracje = await self.bot.baza_danych.pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(context.guild.id)
         embed = await self._create_exp_embed(context, title=f"⚙️ Konfiguracja XP Kanałów na {context.guild.name}", color=config.KOLOR_XP_ADMIN)
         if context.guild.icon: embed.set_thumbnail(url=context.guild.icon.url)
         if not konfiguracje: embed.description = "Brak kanałów z niestandardową konfiguracją."
         else:
-            opis_list = [f"{(context.guild.get_channel(int(k_id)) or f'ID: {k_id}').mention}: {'**Zablokowane**' if zabl_int else 'Odblokowane'}, Mnożnik **x{mn}**" for k_id, zabl_int, mn in konfiguracje]
+            opis_list = [f"{(context.guild.get_channel(k_id) or f'ID: {k_id}').mention}: {'**Zablokowane**' if zabl_int else 'Odblokowane'}, Mnożnik **x{mn}**" for k_id, zabl_int, mn in konfiguracje]
             embed.description = "\n".join(opis_list) if opis_list else "Brak kanałów z niestandardową konfiguracją."
         await context.send(embed=embed, ephemeral=True)
 
@@ -396,7 +396,7 @@ class Doswiadczenie(commands.Cog, name="doświadczenie"):
     async def wyswietl_osiagniecia_uzytkownika(self, context: Context, target_user: discord.Member):
         if self.bot.baza_danych is None: await context.send("Błąd: Archiwa.", ephemeral=True); return
 
-        zdobyte_tiery_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(str(target_user.id), str(context.guild.id))
+        zdobyte_tiery_db = await self.bot.baza_danych.pobierz_zdobyte_osiagniecia_uzytkownika(target_user.id, context.guild.id)
         zdobyte_tiery_ids = {tier_id for tier_id, _ in zdobyte_tiery_db}
 
         embed_color = target_user.color if target_user.color != discord.Color.default() else config.KOLOR_XP_OSIAGNIECIE
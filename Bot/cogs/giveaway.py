@@ -9,7 +9,7 @@ import json
 
 # Third-party imports
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ext.commands import Context, has_permissions
 from discord import app_commands, Interaction, ButtonStyle
 from discord.ui import Button, View, Select
@@ -58,7 +58,7 @@ class GiveawayJoinButton(Button['GiveawayView']):
                 await interaction.response.send_message("Nie można zweryfikować Twoich ról.", ephemeral=True)
                 return
 
-        konkurs_info = await bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(self.giveaway_message_id)
+        konkurs_info = await bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(int(self.giveaway_message_id))
         if not konkurs_info or konkurs_info[10]: # czy_zakonczony jest na indeksie 10
             await interaction.response.send_message("Ten konkurs już się zakończył lub nie istnieje.", ephemeral=True)
             self.disabled = True
@@ -66,7 +66,7 @@ class GiveawayJoinButton(Button['GiveawayView']):
                 await interaction.message.edit(view=self.view)
             return
 
-        dodano = await bot.baza_danych.dodaj_uczestnika_konkursu(self.giveaway_message_id, str(interaction.user.id))
+        dodano = await bot.baza_danych.dodaj_uczestnika_konkursu(int(self.giveaway_message_id), interaction.user.id)
 
         if dodano:
             await interaction.response.send_message("🎉 Pomyślnie dołączyłeś/aś do konkursu! Niech gwiazdy Ci sprzyjają!", ephemeral=True)
@@ -122,11 +122,11 @@ class Giveaway(commands.Cog, name="giveaway"):
         return total_seconds if total_seconds > 0 else None
 
     async def cog_load(self):
-        self.end_giveaways_task.start()
-        self.bot.logger.info("Kapsuła Giveaway załadowana, zadanie end_giveaways_task uruchomione.")
+        self.bot.harmonogram.dodaj("konczenie_konkursow", lambda termin: self.end_giveaways_task(), co_ile_s=config.GIVEAWAY_CHECK_INTERVAL)
+        self.bot.logger.info("Kapsuła Giveaway załadowana, zadanie end_giveaways_task zarejestrowane w harmonogramie.")
 
     def cog_unload(self):
-        self.end_giveaways_task.cancel()
+        self.bot.harmonogram.usun("konczenie_konkursow")
         for view_id in list(self.active_giveaway_views.keys()):
             view = self.active_giveaway_views.pop(view_id, None)
             if view:
@@ -153,10 +153,10 @@ class Giveaway(commands.Cog, name="giveaway"):
             embed.set_author(name="Elara - Mistrzyni Konkursów")
         return embed
 
-    async def aktualizuj_embed_konkursu(self, message: discord.Message, message_id_str: str, zakonczony: bool = False, zwyciezcy_ids: typing.Optional[list[str]] = None):
+    async def aktualizuj_embed_konkursu(self, message: discord.Message, message_id_str: str, zakonczony: bool = False, zwyciezcy_ids: typing.Optional[list[int]] = None):
         if self.bot.baza_danych is None: return
 
-        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(message_id_str)
+        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(int(message_id_str))
         if not konkurs_info:
             self.bot.logger.warning(f"Nie znaleziono konkursu {message_id_str} do aktualizacji embedu.")
             return
@@ -167,7 +167,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         wymagana_rola_id_str = konkurs_info[9]
         tworca_id_str = konkurs_info[4]
 
-        uczestnicy_db_ids = await self.bot.baza_danych.pobierz_uczestnikow_konkursu(message_id_str)
+        uczestnicy_db_ids = await self.bot.baza_danych.pobierz_uczestnikow_konkursu(int(message_id_str))
         liczba_uczestnikow = len(uczestnicy_db_ids)
 
         tworca = None
@@ -237,7 +237,6 @@ class Giveaway(commands.Cog, name="giveaway"):
             self.bot.logger.error(f"Nie udało się zaktualizować embedu konkursu {message_id_str}: {e}")
 
 
-    @tasks.loop(seconds=config.GIVEAWAY_CHECK_INTERVAL)
     async def end_giveaways_task(self):
         if self.bot.baza_danych is None:
             return
@@ -309,12 +308,16 @@ class Giveaway(commands.Cog, name="giveaway"):
 
                 # Przyznawanie osiągnięć i misji za wygraną
                 if zwyciezcy_ids and self.bot.baza_danych:
+                    # Liczniki wygranych wszystkich zwycięzców obecnych na serwerze jednym zapisem
+                    liczby_wygranych = await self.bot.baza_danych.inkrementuj_liczbe_wygranych_konkursow_wielu(
+                        [int(uid) for uid in zwyciezcy_ids if guild.get_member(int(uid))], int(server_id_str)
+                    )
                     for zwyciezca_id_str in zwyciezcy_ids:
                         try:
                             zwyciezca_member = guild.get_member(int(zwyciezca_id_str))
                             if zwyciezca_member:
                                 # Osiągnięcie
-                                nowa_liczba_wygranych = await self.bot.baza_danych.inkrementuj_liczbe_wygranych_konkursow(zwyciezca_id_str, server_id_str)
+                                nowa_liczba_wygranych = liczby_wygranych.get(zwyciezca_member.id, 0)
                                 await self.bot.sprawdz_i_przyznaj_osiagniecia(zwyciezca_member, guild, "liczba_wygranych_konkursow", nowa_liczba_wygranych)
                                 # Misja
                                 await self.bot.aktualizuj_i_sprawdz_misje_po_akcji(zwyciezca_member, guild, "wygraj_konkurs_od_resetu", 1)
@@ -336,12 +339,6 @@ class Giveaway(commands.Cog, name="giveaway"):
         except Exception as e:
             self.bot.logger.error(f"Błąd w pętli end_giveaways_task: {e}", exc_info=True)
 
-
-    @end_giveaways_task.before_loop
-    async def before_end_giveaways_task(self):
-        await self.bot.wait_until_ready()
-        self.bot.logger.info("Pętla kończenia konkursów (end_giveaways_task) gotowa do startu.")
-
     @commands.hybrid_group(name="giveaway", aliases=["g", "konkurs"], description="Zarządzanie konkursami na serwerze.")
     @has_permissions(manage_guild=True)
     async def giveaway(self, context: Context):
@@ -384,7 +381,6 @@ class Giveaway(commands.Cog, name="giveaway"):
             await context.send(embed=embed_error, ephemeral=True); return
 
         czas_zakonczenia_ts = int(time.time()) + sekundy_trwania
-        wymagana_rola_id_str = str(wymagana_rola.id) if wymagana_rola else None
 
         description = f"🎁 **Nagroda:** {nagroda}\n"
         description += f"⌛ **Zakończenie:** <t:{czas_zakonczenia_ts}:R> (<t:{czas_zakonczenia_ts}:F>)\n"
@@ -416,10 +412,10 @@ class Giveaway(commands.Cog, name="giveaway"):
             self.active_giveaway_views[giveaway_message.id] = view
 
             await self.bot.baza_danych.stworz_konkurs(
-                str(context.guild.id), str(target_channel.id), str(giveaway_message.id),
-                str(context.author.id if context.author else self.bot.user.id if self.bot.user else "0"),
+                context.guild.id, target_channel.id, giveaway_message.id,
+                context.author.id if context.author else self.bot.user.id if self.bot.user else 0,
                 nagroda, liczba_zwyciezcow,
-                czas_zakonczenia_ts, wymagana_rola_id_str
+                czas_zakonczenia_ts, wymagana_rola.id if wymagana_rola else None
             )
 
             confirm_msg = f"Konkurs na **{nagroda}** został pomyślnie rozpoczęty na kanale {target_channel.mention}!"
@@ -443,7 +439,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         if not context.guild or self.bot.baza_danych is None:
             await context.send("Błąd systemowy lub komenda użyta poza serwerem.", ephemeral=True); return
 
-        aktywne_konkursy_db = await self.bot.baza_danych.pobierz_aktywne_konkursy_serwera(str(context.guild.id))
+        aktywne_konkursy_db = await self.bot.baza_danych.pobierz_aktywne_konkursy_serwera(context.guild.id)
         embed = await self._create_giveaway_embed(context, title=f"{config.GIVEAWAY_EMOJI_DEFAULT} Aktywne Konkursy w Kronikach", color=config.KOLOR_BOT_INFO)
 
         if not aktywne_konkursy_db:
@@ -476,7 +472,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         except ValueError:
             await context.send(f"Nieprawidłowe ID wiadomości: `{id_wiadomosci_konkursu}`.", ephemeral=True); return
 
-        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(str(msg_id_int))
+        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(msg_id_int)
         if not konkurs_info:
             await context.send(f"Nie znaleziono konkursu o ID wiadomości `{id_wiadomosci_konkursu}`.", ephemeral=True); return
         if konkurs_info[10]:
@@ -485,11 +481,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         konkurs_db_id = konkurs_info[0]
         nagroda = konkurs_info[5]
 
-        await self.bot.baza_danych.connection.execute(
-            "UPDATE aktywne_konkursy SET czas_zakonczenia_ts = ? WHERE id_konkursu = ?",
-            (int(time.time()) - 5, konkurs_db_id)
-        )
-        await self.bot.baza_danych.connection.commit()
+        await self.bot.baza_danych.ustaw_czas_zakonczenia_konkursu(konkurs_db_id, int(time.time()) - 5)
 
         await context.send(f"Zlecono natychmiastowe zakończenie konkursu na **{nagroda}** (ID: {id_wiadomosci_konkursu}). Zwycięzcy zostaną wylosowani za chwilę przez automatyczny system.", ephemeral=True)
 
@@ -506,7 +498,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         except ValueError:
             await context.send(f"Nieprawidłowe ID wiadomości: `{id_wiadomosci_konkursu}`.", ephemeral=True); return
 
-        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(str(msg_id_int))
+        konkurs_info = await self.bot.baza_danych.pobierz_konkurs_po_wiadomosci_id(msg_id_int)
         if not konkurs_info:
             await context.send(f"Nie znaleziono konkursu o ID wiadomości `{id_wiadomosci_konkursu}`.", ephemeral=True); return
         if not konkurs_info[10]:
@@ -534,7 +526,7 @@ class Giveaway(commands.Cog, name="giveaway"):
         except (discord.NotFound, discord.Forbidden):
             await context.send("Nie można odnaleźć oryginalnej wiadomości konkursu.", ephemeral=True); return
 
-        uczestnicy_db_ids = await self.bot.baza_danych.pobierz_uczestnikow_konkursu(str(msg_id_int))
+        uczestnicy_db_ids = await self.bot.baza_danych.pobierz_uczestnikow_konkursu(msg_id_int)
         rzeczywisci_uczestnicy_ids = []
         if req_rola_id_str:
             try:
@@ -554,7 +546,8 @@ class Giveaway(commands.Cog, name="giveaway"):
         if not rzeczywisci_uczestnicy_ids:
             await context.send("Brak uprawnionych uczestników do ponownego losowania.", ephemeral=True); return
 
-        poprzedni_zwyciezcy_ids_list = json.loads(poprzedni_zwyciezcy_json) if poprzedni_zwyciezcy_json else []
+        # Starsze konkursy zapisywały ID zwycięzców jako tekst
+        poprzedni_zwyciezcy_ids_list = [int(uid) for uid in json.loads(poprzedni_zwyciezcy_json)] if poprzedni_zwyciezcy_json else []
 
         kandydaci_do_reroll = [uid for uid in rzeczywisci_uczestnicy_ids if uid not in poprzedni_zwyciezcy_ids_list]
 
@@ -573,12 +566,15 @@ class Giveaway(commands.Cog, name="giveaway"):
 
         # Przyznawanie osiągnięć i misji za wygraną w rerollu
         if nowi_zwyciezcy_ids and self.bot.baza_danych:
+            liczby_wygranych = await self.bot.baza_danych.inkrementuj_liczbe_wygranych_konkursow_wielu(
+                [int(uid) for uid in nowi_zwyciezcy_ids if guild.get_member(int(uid))], int(server_id_str)
+            )
             for zwyciezca_id_str in nowi_zwyciezcy_ids:
                 try:
                     zwyciezca_member = guild.get_member(int(zwyciezca_id_str))
                     if zwyciezca_member:
                         # Osiągnięcie
-                        nowa_liczba_wygranych = await self.bot.baza_danych.inkrementuj_liczbe_wygranych_konkursow(zwyciezca_id_str, server_id_str)
+                        nowa_liczba_wygranych = liczby_wygranych.get(zwyciezca_member.id, 0)
                         await self.bot.sprawdz_i_przyznaj_osiagniecia(zwyciezca_member, guild, "liczba_wygranych_konkursow", nowa_liczba_wygranych)
                         # Misja
                         await self.bot.aktualizuj_i_sprawdz_misje_po_akcji(zwyciezca_member, guild, "wygraj_konkurs_od_resetu", 1)
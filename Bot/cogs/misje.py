@@ -59,8 +59,8 @@ class MisjeCog(commands.Cog, name="misje"):
             await context.send("Ta komenda jest dostępna tylko na serwerze, a Skarbiec Kronik musi być otwarty.", ephemeral=True)
             return
 
-        user_id_str = str(context.author.id)
-        server_id_str = str(context.guild.id)
+        user_id = context.author.id
+        server_id = context.guild.id
 
         embed = await self._create_missions_embed(context, title=f"{self.COG_EMOJI} Tablica Zleceń Kronikarza: {context.author.display_name}")
         if context.author.display_avatar:
@@ -77,11 +77,11 @@ class MisjeCog(commands.Cog, name="misje"):
             
             ukonczona_w_tym_cyklu = False
             if typ_misji == "jednorazowa":
-                if await self.bot.baza_danych.czy_misja_jednorazowa_ukonczona(user_id_str, server_id_str, misja_id):
+                if await self.bot.baza_danych.czy_misja_jednorazowa_ukonczona(user_id, server_id, misja_id):
                     ukonczona_w_tym_cyklu = True 
             elif typ_misji in ["dzienna", "tygodniowa"]:
                 poczatek_cyklu_ts = self._get_current_cycle_start_ts(typ_misji)
-                if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(user_id_str, server_id_str, misja_id, poczatek_cyklu_ts):
+                if await self.bot.baza_danych.czy_misja_ukonczona_w_cyklu(user_id, server_id, misja_id, poczatek_cyklu_ts):
                     ukonczona_w_tym_cyklu = True
             
             if ukonczona_w_tym_cyklu and typ_misji != "jednorazowa":
@@ -97,10 +97,9 @@ class MisjeCog(commands.Cog, name="misje"):
                 typ_warunku_misji = warunek_def["typ_warunku"]
                 wymagana_wartosc = warunek_def["wartosc"]
                 
-                ostatni_reset_ts = self._get_current_cycle_start_ts(typ_misji)
-                
-                _, _, _, _, _, aktualny_postep, _ = await self.bot.baza_danych.pobierz_lub_stworz_postep_misji(
-                    user_id_str, server_id_str, misja_id, typ_warunku_misji, ostatni_reset_ts
+                # Ten sam id_cyklu, pod którym bot zapisuje postęp
+                aktualny_postep = await self.bot.baza_danych.pobierz_postep_misji(
+                    user_id, server_id, misja_id, typ_warunku_misji, self.bot._get_mission_reset_timestamp(typ_misji)
                 )
 
                 procent_postepu_warunku = min(100, (aktualny_postep / wymagana_wartosc) * 100) if wymagana_wartosc > 0 else 100
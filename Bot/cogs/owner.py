@@ -306,8 +306,8 @@ class Wlasciciel(commands.Cog, name="wlasciciel"):
             embed = await self._create_owner_embed(context, "⚠️ Tekst Statusu Za Długi", "Status może mieć maksymalnie 128 znaków.", config.KOLOR_ADMIN_BLAD_OWNER)
             await context.send(embed=embed); return
 
-        if hasattr(self.bot, 'zadanie_statusu') and self.bot.zadanie_statusu.is_running(): # type: ignore
-            self.bot.zadanie_statusu.cancel() # type: ignore
+        if not self.bot.harmonogram.zadania["status"].wstrzymane: # type: ignore
+            self.bot.harmonogram.wstrzymaj("status") # type: ignore
             self.bot.logger.info("Zatrzymano automatyczną pętlę statusów, aby ustawić status niestandardowy.")
 
         try:
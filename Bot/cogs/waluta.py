@@ -9,6 +9,7 @@ import random # Dodano import random dla komendy /pracuj
 
 # Import konfiguracji globalnej
 import config
+from database import ZAKUP_BRAK_SRODKOW, ZAKUP_WYPRZEDANY
 
 if typing.TYPE_CHECKING:
     from bot import BotDiscord
@@ -57,89 +58,87 @@ class PurchaseConfirmationButton(discord.ui.Button['ShopPurchaseView']):
             await interaction.response.edit_message(content="Błąd: Nie można określić waluty lub kosztu przedmiotu.", embed=None, view=None)
             return
 
-        portfel_dane = await view.bot.baza_danych.pobierz_lub_stworz_portfel(user_id, server_id)
-        aktualne_dukaty = portfel_dane[2]
-        aktualne_krysztaly = portfel_dane[3]
-
-        posiadana_waluta = aktualne_dukaty if self.currency_to_use == "dukaty" else aktualne_krysztaly
-
-        if posiadana_waluta < koszt:
-            nazwa_waluty = "Gwiezdnych Dukatów" if self.currency_to_use == "dukaty" else config.NAZWA_WALUTY_PREMIUM
-            embed_error = await view.cog._create_currency_embed(
-                view.original_context,
-                title=f"📉 Brak Wystarczających Środków ({nazwa_waluty})",
-                description=f"Nie udało się zakupić **{self.item_data['name']}**.\nPotrzebujesz: **{koszt}** {waluta_symbol}, posiadasz: **{posiadana_waluta}** {waluta_symbol}.",
-                color=config.KOLOR_BOT_BLAD
-            )
-            await interaction.response.edit_message(embed=embed_error, view=None)
-            return
-
-        # Aktualizacja portfela
-        if self.currency_to_use == "dukaty":
-            await view.bot.baza_danych.aktualizuj_portfel(user_id, server_id, ilosc_dukatow_do_dodania=-koszt)
-        else:
-            await view.bot.baza_danych.aktualizuj_portfel(user_id, server_id, ilosc_krysztalow_do_dodania=-koszt)
-
         czas_zakupu_ts = int(time.time())
-        czas_wygasniecia_ts = None
-        if "duration_seconds" in self.item_data and self.item_data["duration_seconds"] is not None: # Zmieniono na 'duration_seconds'
-             czas_wygasniecia_ts = czas_zakupu_ts + self.item_data["duration_seconds"]
-
         typ_bonusu_przedmiotu = self.item_data.get("item_type", "nieznany_typ_bonusu") # Zmieniono na 'item_type'
-        wartosc_bonusu_przedmiotu = self.item_data.get("bonus_value", 0.0) # Zmieniono na 'bonus_value'
-
-
-        wiadomosc_sukcesu_dodatkowa = ""
 
+        # Walidacja roli przed pobraniem opłaty, żeby błąd konfiguracji nie zabierał waluty
+        rola_obj = None
+        rola_id_int = 0
         if typ_bonusu_przedmiotu == "timed_role":
             rola_id_str = self.item_data.get("role_id_to_grant") # Zmieniono na 'role_id_to_grant'
-            if not rola_id_str or not interaction.guild: # Sprawdzenie interaction.guild
-                view.bot.logger.error(f"Brak role_id_to_grant lub guild w item_data dla timed_role: {self.item_id}")
+            if not rola_id_str:
+                view.bot.logger.error(f"Brak role_id_to_grant w item_data dla timed_role: {self.item_id}")
                 await interaction.response.edit_message(content="Błąd konfiguracji przedmiotu (brak ID roli). Skontaktuj się z administratorem.", embed=None, view=None)
                 return
             try:
                 rola_id_int = int(rola_id_str)
-                rola_obj = interaction.guild.get_role(rola_id_int)
-                if not rola_obj:
-                    view.bot.logger.error(f"Nie znaleziono roli o ID {rola_id_int} na serwerze {interaction.guild.name} dla przedmiotu {self.item_id}.")
-                    await interaction.response.edit_message(content="Błąd: Rola do nadania nie istnieje na tym serwerze. Skontaktuj się z administratorem.", embed=None, view=None)
-                    return
-
-                # interaction.user jest już typu discord.Member dzięki wcześniejszemu sprawdzeniu
-                await interaction.user.add_roles(rola_obj, reason=f"Zakup przedmiotu w sklepie: {self.item_data['name']}")
-                
-                # Upewniamy się, że czas wygaśnięcia jest poprawny dla ról czasowych
-                final_czas_wygasniecia_ts = czas_wygasniecia_ts if czas_wygasniecia_ts is not None else (czas_zakupu_ts + (self.item_data["duration_seconds"] or 0))
-
-                if final_czas_wygasniecia_ts > czas_zakupu_ts: # Jeśli jest to rola czasowa
-                    await view.bot.baza_danych.dodaj_aktywna_role_czasowa(
-                        str(user_id), str(server_id), str(rola_id_int),
-                        czas_zakupu_ts, final_czas_wygasniecia_ts, self.item_id
-                    )
-                    wiadomosc_sukcesu_dodatkowa = f"\n🛡️ Otrzymałeś/aś rolę **{rola_obj.name}**!"
-                else: # Jeśli rola jest na stałe (duration_seconds = 0 lub None)
-                    wiadomosc_sukcesu_dodatkowa = f"\n🛡️ Otrzymałeś/aś na stałe rolę **{rola_obj.name}**!"
-
-                view.bot.logger.info(f"Przyznano rolę '{rola_obj.name}' użytkownikowi {interaction.user.display_name} po zakupie '{self.item_data['name']}'.")
-
             except ValueError:
                 view.bot.logger.error(f"Nieprawidłowe ID roli '{rola_id_str}' w konfiguracji przedmiotu {self.item_id}.")
                 await interaction.response.edit_message(content="Błąd konfiguracji roli. Skontaktuj się z administratorem.", embed=None, view=None)
                 return
-            except discord.Forbidden:
-                view.bot.logger.warning(f"Brak uprawnień do nadania roli '{rola_id_str}' użytkownikowi {interaction.user.display_name}.")
-                await interaction.response.edit_message(content="Nie udało się nadać roli (brak uprawnień bota). Skontaktuj się z administratorem.", embed=None, view=None)
+            rola_obj = interaction.guild.get_role(rola_id_int)
+            if not rola_obj:
+                view.bot.logger.error(f"Nie znaleziono roli o ID {rola_id_int} na serwerze {interaction.guild.name} dla przedmiotu {self.item_id}.")
+                await interaction.response.edit_message(content="Błąd: Rola do nadania nie istnieje na tym serwerze. Skontaktuj się z administratorem.", embed=None, view=None)
                 return
+
+        wiadomosc_sukcesu_dodatkowa = ""
+
+        # Zakup (saldo, zapas, wpis) jednym zapytaniem warunkowym i własnym commitem - bez czekania na Discorda pod blokadą zapisu
+        try:
+            wynik = await view.bot.baza_danych.kup_przedmiot(
+                user_id, server_id, self.item_id, self.currency_to_use,
+                rola_id=rola_id_int if rola_obj is not None else None, czas_zakupu_ts=czas_zakupu_ts
+            )
+        except Exception as e:
+            view.bot.logger.error(f"Nieoczekiwany błąd podczas zakupu przedmiotu {self.item_id}: {e}", exc_info=True)
+            await interaction.response.edit_message(content="Wystąpił nieoczekiwany błąd podczas zakupu. Waluta nie została pobrana.", embed=None, view=None)
+            return
+
+        if wynik.status == ZAKUP_BRAK_SRODKOW:
+            posiadana_waluta = wynik.dukaty if self.currency_to_use == "dukaty" else wynik.krysztaly
+            nazwa_waluty = "Gwiezdnych Dukatów" if self.currency_to_use == "dukaty" else config.NAZWA_WALUTY_PREMIUM
+            embed_error = await view.cog._create_currency_embed(
+                view.original_context,
+                title=f"📉 Brak Wystarczających Środków ({nazwa_waluty})",
+                description=f"Nie udało się zakupić **{self.item_data['name']}**.\nPotrzebujesz: **{wynik.koszt}** {waluta_symbol}, posiadasz: **{posiadana_waluta}** {waluta_symbol}.",
+                color=config.KOLOR_BOT_BLAD
+            )
+            await interaction.response.edit_message(embed=embed_error, view=None)
+            return
+        if wynik.status == ZAKUP_WYPRZEDANY:
+            await interaction.response.edit_message(content=f"Niestety, **{self.item_data['name']}** został właśnie wyprzedany.", embed=None, view=None)
+            return
+        if not wynik.ok:
+            await interaction.response.edit_message(content="Ten przedmiot nie jest już dostępny w tej walucie.", embed=None, view=None)
+            return
+        koszt, czas_wygasniecia_ts = wynik.koszt, wynik.czas_wygasniecia_ts
+
+        if rola_obj is not None:
+            # Rola po commicie zakupu; gdy nie da się jej nadać, zakup jest wycofywany osobnym zwrotem
+            try:
+                # interaction.user jest już typu discord.Member dzięki wcześniejszemu sprawdzeniu
+                await interaction.user.add_roles(rola_obj, reason=f"Zakup przedmiotu w sklepie: {self.item_data['name']}")
             except Exception as e:
-                view.bot.logger.error(f"Nieoczekiwany błąd podczas nadawania roli czasowej {self.item_id}: {e}", exc_info=True)
-                await interaction.response.edit_message(content="Wystąpił nieoczekiwany błąd przy nadawaniu roli. Skontaktuj się z administratorem.", embed=None, view=None)
+                if isinstance(e, discord.Forbidden):
+                    view.bot.logger.warning(f"Brak uprawnień do nadania roli '{rola_id_int}' użytkownikowi {interaction.user.display_name}.")
+                    tresc_bledu = "Nie udało się nadać roli (brak uprawnień bota). Skontaktuj się z administratorem."
+                else:
+                    view.bot.logger.error(f"Błąd nadawania roli '{rola_id_int}' po zakupie przedmiotu {self.item_id}: {e}", exc_info=True)
+                    tresc_bledu = "Nie udało się nadać roli."
+                try:
+                    await view.bot.baza_danych.cofnij_zakup_roli(user_id, server_id, self.item_id, self.currency_to_use, wynik, rola_id_int)
+                    tresc_bledu += " Waluta została zwrócona."
+                except Exception as e_zwrot:
+                    view.bot.logger.critical(f"Nie udało się wycofać zakupu {self.item_id} przez {user_id} (serwer {server_id}, koszt {koszt} {self.currency_to_use}): {e_zwrot}", exc_info=True)
+                    tresc_bledu += " Zwrot waluty nie powiódł się - skontaktuj się z administratorem."
+                await interaction.response.edit_message(content=tresc_bledu, embed=None, view=None)
                 return
-        else: # Dla innych typów bonusów niż timed_role
-            await view.bot.baza_danych.dodaj_przedmiot_uzytkownika(
-                str(user_id), str(server_id), self.item_id,
-                czas_zakupu_ts, czas_wygasniecia_ts,
-                typ_bonusu_przedmiotu, wartosc_bonusu_przedmiotu
-            )
+            if czas_wygasniecia_ts is not None: # Jeśli jest to rola czasowa
+                wiadomosc_sukcesu_dodatkowa = f"\n🛡️ Otrzymałeś/aś rolę **{rola_obj.name}**!"
+            else: # Jeśli rola jest na stałe (duration_seconds = 0 lub None)
+                wiadomosc_sukcesu_dodatkowa = f"\n🛡️ Otrzymałeś/aś na stałe rolę **{rola_obj.name}**!"
+            view.bot.logger.info(f"Przyznano rolę '{rola_obj.name}' użytkownikowi {interaction.user.display_name} po zakupie '{self.item_data['name']}'.")
 
         # Sprawdzanie misji po zakupie
         # Upewniamy się, że interaction.guild nie jest None przed przekazaniem
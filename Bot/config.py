@@ -16,8 +16,55 @@ XP_BONUS_ZA_DZIEN_STREAKA: int = 30
 MAX_DNI_STREAKA_DLA_BONUSU: int = 7
 DUKATY_ZA_POZIOM: int = 150
 
-CZYSZCZENIE_BONUSOW_CO_ILE_GODZIN: int = 24
-SPRAWDZANIE_ROL_CZASOWYCH_CO_ILE_MINUT: int = 5
+# --- Konfiguracja Połączeń z Bazą Danych ---
+DB_LICZBA_POLACZEN_ODCZYTU: int = 4 # Połączenia tylko do odczytu (WAL) dla rankingów, profili, misji i API; 0 = wszystko na jednym połączeniu
+DB_BUSY_TIMEOUT_MS: int = 5000
+DB_MIGRACJE_ROZMIAR_PARTII: int = 5000 # Liczba wierszy na partię w migracjach danych
+
+# --- Konfiguracja Bufora Zapisu XP (write-behind) ---
+XP_BUFOR_WLACZONY: bool = True
+XP_BUFOR_ZRZUT_CO_ILE_MS: int = 2000 # Maksymalny czas, przez jaki zmiany XP czekają na zapis
+XP_BUFOR_MAX_WIERSZY: int = 500 # Zrzut następuje wcześniej, gdy w buforze uzbiera się tyle wierszy
+
+# --- Konfiguracja Rankingów w Pamięci ---
+RANKINGI_PAMIECIOWE_WLACZONE: bool = True # Miejsce w rankingu w /profil i API bez sortowania całej tabeli
+
+# --- Konfiguracja Pamięci Podręcznej Użytkowników ---
+PAMIEC_UZYTKOWNIKOW_ROZMIAR: int = 20000 # Ile par (serwer, użytkownik) trzymać w LRU z wierszami XP i portfela; 0 = wyłączona
+
+# --- Konfiguracja Kolejki Zdarzeń XP ---
+XP_KOLEJKA_LICZBA_WORKEROW: int = 4 # Workery obsługujące XP za wiadomości/reakcje w tle (zdarzenia dzielone po użytkowniku); 0 = obsługa w listenerze
+XP_KOLEJKA_POJEMNOSC: int = 10000 # Maksymalna liczba czekających zdarzeń; nadmiarowe są odrzucane
+XP_KOLEJKA_OKNO_MS: int = 1000 # Okno zbierania zdarzeń użytkownika w jedną partię (XP, awans, osiągnięcia i misje liczone raz); 0 = bez czekania
+
+# --- Konfiguracja Bramki Cooldownów XP ---
+BRAMKA_COOLDOWNOW_ROZMIAR: int = 50000 # Ile aktywnych cooldownów (wiadomości/reakcje) trzymać w pamięci; zdarzenia w cooldownie odrzucane bez bazy; 0 = wyłączona
+
+# --- Konfiguracja Skrzynki Powiadomień ---
+POWIADOMIENIA_WLACZONE: bool = True # Awanse, osiągnięcia i misje wysyłane w tle (kolejki kanałów/DM z limitami); False = wysyłka od razu
+POWIADOMIENIA_OKNO_LACZENIA_MS: int = 2000 # Powiadomienia jednego użytkownika z tego okna łączą się w jeden embed
+POWIADOMIENIA_LIMIT_NA_CEL: int = 5 # Ile wiadomości na jeden kanał/DM w okresie limitu (kubełek Discorda: 5 / 5 s)
+POWIADOMIENIA_OKRES_LIMITU_S: float = 5.0
+POWIADOMIENIA_LIMIT_GLOBALNY_NA_S: int = 40 # Wspólny limit wiadomości na sekundę (globalny limit Discorda to 50 zapytań/s)
+POWIADOMIENIA_ROWNOLEGLOSC: int = 4 # Ile wysyłek naraz (na różne cele)
+POWIADOMIENIA_POJEMNOSC: int = 5000 # Maksymalna liczba czekających powiadomień; nadmiarowe są odrzucane
+
+# --- Konfiguracja Logowania ---
+LOG_PLIK_MAX_BAJTOW: int = 10 * 1024 * 1024 # Rotacja discord.log po przekroczeniu rozmiaru; 0 = bez rotacji (plik czyszczony przy starcie)
+LOG_PLIK_LICZBA_KOPII: int = 5 # Ile poprzednich plików logu (discord.log.1, .2, ...) zachować
+LOG_PROBKOWANIE: dict[str, tuple[float, int]] = { # Gorące miejsca logowania: klucz -> (ułamek logowanych rekordów, maks. rekordów na minutę; 0 = bez limitu)
+    "przyznanie_xp": (1.0, 120),
+}
+
+# --- Konfiguracja Wygasania Ról Czasowych i Przedmiotów ---
+WYGASANIE_HORYZONT_GODZIN: int = 6 # Wpisy wygasające w tym czasie są trzymane w pamięci (kopiec terminów); dalsze doczytywane z bazy co pół horyzontu
+WYGASANIE_ROWNOLEGLOSC: int = 4 # Ile ról zdejmowanych naraz
+WYGASANIE_LIMIT_NA_SERWER: int = 5 # Ile zdjęć ról na jeden serwer w okresie limitu
+WYGASANIE_OKRES_LIMITU_S: float = 5.0
+
+# --- Konfiguracja Harmonogramu ---
+HARMONOGRAM_ROZRZUT_SEKUNDY: int = 5 # Losowe opóźnienie (0..N s) zadań co N minut/godzin, żeby nie startowały razem; terminy kalendarzowe bez rozrzutu
+HARMONOGRAM_MAKS_NADROBIEN_SEZONU: int = 3 # Ile pominiętych końców sezonu (np. bot wyłączony 1. dnia miesiąca) nadrobić po starcie
 
 # --- KONFIGURACJA SYSTEMU MISJI ---
 RESET_MISJI_DZIENNYCH_GODZINA_UTC: int = 4 # Godzina UTC, o której resetują się misje dzienne (np. 4 dla 4:00 AM UTC)
@@ -7,67 +7,277 @@ Wersja: 6.3.0
 """
 
 import aiosqlite
+import contextlib
 import time
 from datetime import datetime, date as date_obj, UTC, timedelta
 import json
 import typing
 import random
 
+from database.bufor_xp import BuforZapisuXP
+from database.osiagniecia import IndeksOsiagniec
+from database.pamiec_uzytkownikow import PamiecUzytkownikow
+from database.polityka_xp import PolitykaXPSerwera
+from database.pula_polaczen import PulaPolaczen
+from database.rankingi import RankingiPamieciowe
+from database.transakcje import KoordynatorZapisu, operacja_zapisu
+from database.wygasanie import Wygasanie, WpisWygasania, ROLA, PRZEDMIOT
+
 if typing.TYPE_CHECKING:
     import discord
     from bot import BotDiscord # Zakładamy, że bot.py jest w głównym katalogu
     import config as bot_config
 
 
+# Odczyty zbiorcze dzielone na partie, żeby nie przekroczyć limitu parametrów SQLite (999 w starszych wersjach)
+MAKS_PARAMETROW_ZAPYTANIA = 900
+
+KOLUMNY_DOSWIADCZENIA = (
+    "user_id, server_id, xp, poziom, czas_na_glosowym_sekundy, "
+    "ostatnia_wiadomosc_timestamp, ostatnia_reakcja_timestamp, "
+    "xp_zablokowane_indywidualnie, aktualny_streak_dni, "
+    "ostatni_dzien_aktywnosci_streak, liczba_wyslanych_wiadomosci, "
+    "liczba_dodanych_reakcji"
+)
+KOLUMNY_PORTFELA = "user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp"
+
+
+def _partie(user_ids: typing.Iterable[int], rozmiar: int = MAKS_PARAMETROW_ZAPYTANIA) -> typing.Iterator[list[int]]:
+    """Unikalne ID (w kolejności) w partiach po `rozmiar`."""
+    unikalne = list(dict.fromkeys(user_ids))
+    for i in range(0, len(unikalne), rozmiar):
+        yield unikalne[i:i + rozmiar]
+
+
+# --- Zakupy w sklepie ---
+ZAKUP_OK = "ok"
+ZAKUP_BRAK_SRODKOW = "brak_srodkow"
+ZAKUP_WYPRZEDANY = "wyprzedany"
+ZAKUP_BRAK_PRZEDMIOTU = "brak_przedmiotu"
+ZAKUP_BRAK_CENY = "brak_ceny"
+
+# waluta -> (kolumna ceny w shop_items, kolumna salda w portfel_kronikarza)
+KOLUMNY_WALUT = {
+    "dukaty": ("cost_dukaty", "gwiezdne_dukaty"),
+    "krysztaly": ("cost_krysztaly", "gwiezdne_krysztaly"),
+}
+
+
+class WynikZakupu(typing.NamedTuple):
+    status: str # jedna ze stałych ZAKUP_*
+    dukaty: int = 0 # saldo po zakupie (albo aktualne, gdy zakup się nie udał)
+    krysztaly: int = 0
+    koszt: int = 0
+    pozostalo_sztuk: int | None = None # -1 = nieskończony zapas
+    id_wpisu: int | None = None # id_posiadania albo id_wpisu_roli
+    czas_wygasniecia_ts: int | None = None
+    poprzednia_rola: tuple[int, int, str | None] | None = None # (nadanie, wygaśnięcie, przedmiot) wpisu roli nadpisanego przez zakup
+
+    @property
+    def ok(self) -> bool:
+        return self.status == ZAKUP_OK
+
+
 class ZarzadcaBazyDanych:
-    def __init__(self, *, connection: aiosqlite.Connection) -> None:
+    def __init__(self, *, connection: aiosqlite.Connection, pula: PulaPolaczen | None = None) -> None:
         self.connection = connection
+        self.pula = pula
+        self.koordynator = KoordynatorZapisu(connection)
+        self.bufor_xp: BuforZapisuXP | None = None
+        self.rankingi: RankingiPamieciowe | None = None
+        self.pamiec: PamiecUzytkownikow | None = None
+        self.wygasanie: Wygasanie | None = None
+        self.polityki_xp: dict[int, PolitykaXPSerwera] = {}
+        self._generacje_polityk_xp: dict[int, int] = {} # server_id -> licznik zmian polityki (chroni wpis do polityki_xp)
+        self.indeks_osiagniec: IndeksOsiagniec | None = None
+
+    @contextlib.asynccontextmanager
+    async def _odczyt(self) -> typing.AsyncIterator[aiosqlite.Connection]:
+        """Połączenie do odczytu: z puli (WAL) albo wspólne połączenie, gdy pula nie jest włączona lub trwa transakcja."""
+        if self.pula is None or self.koordynator.w_transakcji():
+            yield self.connection
+            return
+        async with self.pula.odczyt() as polaczenie:
+            yield polaczenie
+
+    def transakcja(self) -> typing.AsyncContextManager[None]:
+        """
+        `async with baza_danych.transakcja():` - zapisy z wielu metod zatwierdzane jednym commitem,
+        wycofywane w całości przy wyjątku. Odczyty w bloku widzą niezatwierdzone zmiany.
+        """
+        return self.koordynator.transakcja()
+
+    # --- Bufor zapisu XP (write-behind) ---
+    def wlacz_bufor_xp(self, co_ile_ms: int, max_wierszy: int, logger: typing.Any = None) -> BuforZapisuXP:
+        self.bufor_xp = BuforZapisuXP(self.connection, koordynator=self.koordynator, co_ile_ms=co_ile_ms, max_wierszy=max_wierszy, logger=logger)
+        self.bufor_xp.uruchom()
+        return self.bufor_xp
+
+    async def zrzuc_bufor_xp(self) -> None:
+        if self.bufor_xp is not None:
+            await self.bufor_xp.zrzuc()
+
+    # --- Rankingi w pamięci ---
+    async def wlacz_rankingi_pamieciowe(self) -> RankingiPamieciowe:
+        """Buduje rankingi z bazy; od tej chwili każdy zapis XP/portfela aktualizuje je przyrostowo."""
+        await self.zrzuc_bufor_xp()
+        rankingi = RankingiPamieciowe()
+        teraz = datetime.now(UTC)
+        await rankingi.zbuduj(self.connection, teraz.year, teraz.month)
+        self.rankingi = rankingi
+        return rankingi
+
+    # --- Pamięć podręczna użytkowników (LRU) ---
+    def wlacz_pamiec_uzytkownikow(self, pojemnosc: int) -> PamiecUzytkownikow:
+        """Od tej chwili wiersze XP i portfeli aktywnych użytkowników są czytane z pamięci, a zapisy ją aktualizują."""
+        self.pamiec = PamiecUzytkownikow(pojemnosc)
+        return self.pamiec
+
+    def _pamiec(self) -> PamiecUzytkownikow | None:
+        """Pamięć podręczna, o ile można jej użyć - w transakcji odczyty muszą widzieć niezatwierdzone zmiany."""
+        return None if self.pamiec is None or self.koordynator.w_transakcji() else self.pamiec
+
+    # --- Wygasanie ról czasowych i przedmiotów ---
+    def wlacz_wygasanie(self, zdejmij_role: typing.Callable[[WpisWygasania], typing.Awaitable[None]], **kwargs: typing.Any) -> Wygasanie:
+        """Od tej chwili wpisy z czasem wygaśnięcia dodane przez zarządcę trafiają (po commicie) do kopca wygasania."""
+        self.wygasanie = Wygasanie(self, zdejmij_role, **kwargs)
+        return self.wygasanie
+
+    def _zglos_wygasanie(self, wpis: WpisWygasania) -> None:
+        if self.wygasanie is not None:
+            wygasanie = self.wygasanie
+            self.koordynator.po_zatwierdzeniu(lambda: wygasanie.zglos(wpis))
+
+    async def zamknij(self) -> None:
+        """Zapisuje bufor XP i zamyka połączenie z bazą."""
+        if self.wygasanie is not None:
+            await self.wygasanie.zamknij()
+            self.wygasanie = None
+        if self.bufor_xp is not None:
+            await self.bufor_xp.zamknij()
+            self.bufor_xp = None
+        if self.pula is not None:
+            await self.pula.zamknij()
+        else:
+            await self.connection.close()
 
     # --- Metody ostrzeżeń ---
+    @operacja_zapisu
     async def dodaj_ostrzezenie( self, user_id: int, server_id: int, moderator_id: int, reason: str ) -> int:
         cursor = await self.connection.execute(
             "INSERT INTO warns(user_id, server_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
-            (str(user_id), str(server_id), str(moderator_id), reason,),
+            (user_id, server_id, moderator_id, reason,),
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
         return typing.cast(int, cursor.lastrowid)
 
+    @operacja_zapisu
     async def usun_ostrzezenie(self, warn_id: int, user_id: int, server_id: int) -> int:
-        await self.connection.execute( "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?", (warn_id, str(user_id), str(server_id),),)
-        await self.connection.commit()
-        async with self.connection.execute( "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?", (str(user_id), str(server_id),),) as cursor:
+        await self.connection.execute( "DELETE FROM warns WHERE id=? AND user_id=? AND server_id=?", (warn_id, user_id, server_id,),)
+        await self.koordynator.zatwierdz()
+        async with self.connection.execute( "SELECT COUNT(*) FROM warns WHERE user_id=? AND server_id=?", (user_id, server_id,),) as cursor:
             result = await cursor.fetchone()
             return result[0] if result is not None else 0
 
     # NOWA METODA: Pobiera pojedyncze ostrzeżenie po jego ID
     async def pobierz_ostrzezenie_po_id(self, warn_id: int) -> tuple | None:
-        async with self.connection.execute(
+        async with self._odczyt() as db, db.execute(
             "SELECT id, user_id, server_id, moderator_id, reason, created_at FROM warns WHERE id = ?",
             (warn_id,)
         ) as cursor:
             return await cursor.fetchone()
 
     async def pobierz_ostrzezenia(self, user_id: int, server_id: int) -> list:
-        async with self.connection.execute( "SELECT id, user_id, server_id, moderator_id, reason, created_at FROM warns WHERE user_id=? AND server_id=?", (str(user_id), str(server_id),),) as cursor:
+        async with self._odczyt() as db, db.execute( "SELECT id, user_id, server_id, moderator_id, reason, created_at FROM warns WHERE user_id=? AND server_id=?", (user_id, server_id,),) as cursor:
             result = await cursor.fetchall()
             return list(result)
 
 
     # --- Metody Doświadczenia Użytkownika ---
     async def pobierz_doswiadczenie(self, user_id: int, server_id: int) -> tuple | None:
-        async with self.connection.execute(
-            "SELECT user_id, server_id, xp, poziom, czas_na_glosowym_sekundy, "
-            "ostatnia_wiadomosc_timestamp, ostatnia_reakcja_timestamp, "
-            "xp_zablokowane_indywidualnie, aktualny_streak_dni, "
-            "ostatni_dzien_aktywnosci_streak, liczba_wyslanych_wiadomosci, "
-            "liczba_dodanych_reakcji FROM doswiadczenie_uzytkownika "
-            "WHERE user_id = ? AND server_id = ?",
-            (str(user_id), str(server_id))
+        pamiec = self._pamiec()
+        if pamiec is None:
+            return await self._wczytaj_doswiadczenie(user_id, server_id)
+        wiersz = pamiec.doswiadczenie(server_id, user_id)
+        if wiersz is not None:
+            return wiersz
+        # Chybienie z puli odczytu, bez blokady zapisu - zapis zatwierdzony w trakcie odczytu unieważnia wpis do pamięci
+        return await pamiec.wczytaj(server_id, user_id, "doswiadczenie", lambda: self._wczytaj_doswiadczenie(user_id, server_id))
+
+    async def _wczytaj_doswiadczenie(self, user_id: int, server_id: int, pamiec: PamiecUzytkownikow | None = None) -> tuple | None:
+        if self.bufor_xp is not None:
+            # Odczyt pod blokadą bufora, żeby nie trafić między zdjęcie partii z bufora a jej commit
+            async with self.bufor_xp.spojny_odczyt():
+                wiersz = self.bufor_xp.naloz(await self._pobierz_doswiadczenie_z_bazy(user_id, server_id))
+                if pamiec is not None and wiersz is not None: pamiec.ustaw_doswiadczenie(wiersz)
+                return wiersz
+        wiersz = await self._pobierz_doswiadczenie_z_bazy(user_id, server_id)
+        if pamiec is not None and wiersz is not None: pamiec.ustaw_doswiadczenie(wiersz)
+        return wiersz
+
+    async def _pobierz_doswiadczenie_z_bazy(self, user_id: int, server_id: int) -> tuple | None:
+        async with self._odczyt() as db, db.execute(
+            f"SELECT {KOLUMNY_DOSWIADCZENIA} FROM doswiadczenie_uzytkownika WHERE user_id = ? AND server_id = ?",
+            (user_id, server_id)
         ) as cursor:
             return await cursor.fetchone()
 
+    async def pobierz_doswiadczenie_wielu(self, user_ids: typing.Iterable[int], server_id: int) -> dict[int, tuple]:
+        """Wiersze doswiadczenie_uzytkownika wielu użytkowników jednego serwera: {user_id: wiersz} (bez brakujących)."""
+        wyniki: dict[int, tuple] = {}
+        for partia in _partie(user_ids, MAKS_PARAMETROW_ZAPYTANIA - 1):
+            znaki = ", ".join("?" * len(partia))
+            async with self._odczyt() as db, db.execute(
+                f"SELECT {KOLUMNY_DOSWIADCZENIA} FROM doswiadczenie_uzytkownika WHERE server_id = ? AND user_id IN ({znaki})",
+                (server_id, *partia)
+            ) as cursor:
+                async for wiersz in cursor:
+                    wyniki[wiersz[0]] = tuple(wiersz)
+        if self.bufor_xp is not None and wyniki:
+            # Jak w pobierz_doswiadczenie: nałożenie niezapisanych zmian pod blokadą bufora
+            async with self.bufor_xp.spojny_odczyt():
+                return {user_id: self.bufor_xp.naloz(wiersz) for user_id, wiersz in wyniki.items()} # type: ignore
+        return wyniki
+
+    @operacja_zapisu
+    async def pobierz_lub_stworz_doswiadczenie_wielu(self, user_ids: typing.Iterable[int], server_id: int) -> dict[int, tuple]:
+        user_ids = list(user_ids)
+        wyniki = await self.pobierz_doswiadczenie_wielu(user_ids, server_id)
+        brakujace = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in wyniki]
+        if not brakujace:
+            return wyniki
+
+        await self.connection.executemany(
+            """
+            INSERT INTO doswiadczenie_uzytkownika
+            (user_id, server_id, xp, poziom, czas_na_glosowym_sekundy,
+             ostatnia_wiadomosc_timestamp, ostatnia_reakcja_timestamp,
+             xp_zablokowane_indywidualnie, aktualny_streak_dni, ostatni_dzien_aktywnosci_streak,
+             liczba_wyslanych_wiadomosci, liczba_dodanych_reakcji)
+            VALUES (?, ?, 0, 0, 0, 0, 0, 0, 0, NULL, 0, 0)
+            ON CONFLICT(user_id, server_id) DO NOTHING
+            """, [(user_id, server_id) for user_id in brakujace]
+        )
+        await self.koordynator.zatwierdz()
+        if self.rankingi is not None:
+            rankingi = self.rankingi
+
+            def dodaj_do_rankingow() -> None:
+                for user_id in brakujace: rankingi.dodaj_jesli_brak(server_id, user_id, "xp", "wiadomosci", "czas_glosowy")
+            self.koordynator.po_zatwierdzeniu(dodaj_do_rankingow)
+        for user_id in brakujace:
+            wyniki[user_id] = (user_id, server_id, 0, 0, 0, 0, 0, 0, 0, None, 0, 0)
+        self._zapamietaj_doswiadczenie(*(wyniki[user_id] for user_id in brakujace))
+        return wyniki
+
     async def pobierz_lub_stworz_doswiadczenie(self, user_id: int, server_id: int) -> tuple:
-        row = await self.pobierz_doswiadczenie(user_id, server_id)
+        pamiec = self._pamiec()
+        wiersz = pamiec.doswiadczenie(server_id, user_id) if pamiec is not None else None
+        return wiersz if wiersz is not None else await self._pobierz_lub_stworz_doswiadczenie(user_id, server_id)
+
+    @operacja_zapisu
+    async def _pobierz_lub_stworz_doswiadczenie(self, user_id: int, server_id: int) -> tuple:
+        row = await self._wczytaj_doswiadczenie(user_id, server_id, self._pamiec())
         if row:
             return row
 
@@ -79,10 +289,29 @@ class ZarzadcaBazyDanych:
              xp_zablokowane_indywidualnie, aktualny_streak_dni, ostatni_dzien_aktywnosci_streak,
              liczba_wyslanych_wiadomosci, liczba_dodanych_reakcji)
             VALUES (?, ?, 0, 0, 0, 0, 0, 0, 0, NULL, 0, 0)
-            """, (str(user_id), str(server_id))
+            """, (user_id, server_id)
         )
-        await self.connection.commit()
-        return (str(user_id), str(server_id), 0, 0, 0, 0, 0, 0, 0, None, 0, 0)
+        await self.koordynator.zatwierdz()
+        if self.rankingi is not None:
+            rankingi = self.rankingi
+            self.koordynator.po_zatwierdzeniu(lambda: rankingi.dodaj_jesli_brak(server_id, user_id, "xp", "wiadomosci", "czas_glosowy"))
+        wiersz = (user_id, server_id, 0, 0, 0, 0, 0, 0, 0, None, 0, 0)
+        self._zapamietaj_doswiadczenie(wiersz)
+        return wiersz
+
+    def _zapamietaj_doswiadczenie(self, *wiersze: tuple) -> None:
+        """Wpisuje wiersze do pamięci podręcznej po commicie (write-through)."""
+        if self.pamiec is None or not wiersze: return
+        pamiec = self.pamiec
+
+        def ustaw() -> None:
+            for wiersz in wiersze: pamiec.ustaw_doswiadczenie(wiersz)
+        self.koordynator.po_zatwierdzeniu(ustaw)
+
+    def _zmien_doswiadczenie_w_pamieci(self, user_id: int, server_id: int, delty: dict[str, int], ustawione: dict[str, typing.Any]) -> None:
+        if self.pamiec is None: return
+        pamiec = self.pamiec
+        self.koordynator.po_zatwierdzeniu(lambda: pamiec.zmien_doswiadczenie(server_id, user_id, delty, ustawione))
 
 
     async def aktualizuj_doswiadczenie(
@@ -97,6 +326,40 @@ class ZarzadcaBazyDanych:
         inkrementuj_wiadomosci: int = 0,
         inkrementuj_reakcje: int = 0
     ) -> None:
+        teraz = datetime.now(UTC)
+
+        def zaktualizuj_rankingi() -> None:
+            if self.rankingi is None: return
+            self.rankingi.zmien(server_id, user_id, "xp", xp_dodane)
+            self.rankingi.zmien(server_id, user_id, "wiadomosci", inkrementuj_wiadomosci)
+            self.rankingi.zmien(server_id, user_id, "czas_glosowy", czas_dodany_glosowy)
+
+        if self.bufor_xp is not None:
+            delty = {
+                "xp": xp_dodane, "czas_na_glosowym_sekundy": czas_dodany_glosowy,
+                "liczba_wyslanych_wiadomosci": inkrementuj_wiadomosci, "liczba_dodanych_reakcji": inkrementuj_reakcje,
+            }
+            ustawione: dict[str, typing.Any] = {}
+            if nowy_poziom is not None: ustawione["poziom"] = nowy_poziom
+            if nowy_timestamp_wiadomosci is not None: ustawione["ostatnia_wiadomosc_timestamp"] = nowy_timestamp_wiadomosci
+            if nowy_timestamp_reakcji is not None: ustawione["ostatnia_reakcja_timestamp"] = nowy_timestamp_reakcji
+            if nowa_blokada_xp is not None: ustawione["xp_zablokowane_indywidualnie"] = 1 if nowa_blokada_xp else 0
+            if nowy_streak_dni is not None: ustawione["aktualny_streak_dni"] = nowy_streak_dni
+            if nowy_ostatni_dzien_streaka_iso is not None or (nowy_streak_dni is not None and nowy_streak_dni == 0):
+                ustawione["ostatni_dzien_aktywnosci_streak"] = nowy_ostatni_dzien_streaka_iso
+            bufor = self.bufor_xp
+
+            def dodaj_do_bufora() -> None:
+                bufor.dodaj(user_id, server_id, delty, ustawione, (teraz.year, teraz.month))
+                if self.pamiec is not None: self.pamiec.zmien_doswiadczenie(server_id, user_id, delty, ustawione)
+                zaktualizuj_rankingi()
+                if self.rankingi is not None and xp_dodane > 0:
+                    self.rankingi.zmien_miesieczne(server_id, user_id, teraz.year, teraz.month, xp_dodane)
+
+            # W transakcji zmiana trafia do bufora dopiero po commicie, więc wycofanie jej nie zostawia
+            self.koordynator.po_zatwierdzeniu(dodaj_do_bufora)
+            return
+
         set_clauses = []
         params = []
 
@@ -135,77 +398,258 @@ class ZarzadcaBazyDanych:
             return
 
         query = f"UPDATE doswiadczenie_uzytkownika SET {', '.join(set_clauses)} WHERE user_id = ? AND server_id = ?"
-        params.extend([str(user_id), str(server_id)])
+        params.extend([user_id, server_id])
+
+        async with self.koordynator.transakcja():
+            if self.pamiec is not None:
+                async with self.connection.execute(f"{query} RETURNING {KOLUMNY_DOSWIADCZENIA}", tuple(params)) as cursor:
+                    wiersz = await cursor.fetchone()
+                if wiersz is not None: self._zapamietaj_doswiadczenie(tuple(wiersz))
+            else:
+                await self.connection.execute(query, tuple(params))
+            self.koordynator.po_zatwierdzeniu(zaktualizuj_rankingi)
+            # Dodajemy aktualizację miesięcznego XP, jeśli xp_dodane > 0
+            if xp_dodane > 0:
+                await self.inkrementuj_miesieczne_xp(user_id, server_id, teraz.year, teraz.month, xp_dodane)
+
+
+    @operacja_zapisu
+    async def zresetuj_streak_uzytkownika(self, user_id: int, server_id: int) -> None:
+        await self.zrzuc_bufor_xp()
+        await self.connection.execute("UPDATE doswiadczenie_uzytkownika SET aktualny_streak_dni = 0, ostatni_dzien_aktywnosci_streak = NULL WHERE user_id = ? AND server_id = ?", (user_id, server_id))
+        await self.koordynator.zatwierdz()
+        self._zmien_doswiadczenie_w_pamieci(user_id, server_id, {}, {"aktualny_streak_dni": 0, "ostatni_dzien_aktywnosci_streak": None})
+
+    async def pobierz_znaczniki_zdarzen_xp(self, od_ts: int) -> list[tuple[int, int, int, int]]:
+        """(server_id, user_id, ostatnia_wiadomosc_timestamp, ostatnia_reakcja_timestamp) użytkowników aktywnych od `od_ts`."""
+        await self.zrzuc_bufor_xp()
+        query = "SELECT server_id, user_id, ostatnia_wiadomosc_timestamp, ostatnia_reakcja_timestamp FROM doswiadczenie_uzytkownika WHERE ostatnia_wiadomosc_timestamp >= ?1 OR ostatnia_reakcja_timestamp >= ?1"
+        async with self._odczyt() as db, db.execute(query, (od_ts,)) as cursor:
+            return await cursor.fetchall() # type: ignore
 
-        await self.connection.execute(query, tuple(params))
-        await self.connection.commit()
+    # --- Metody Sesji Głosowych ---
+    async def pobierz_sesje_glosowe(self) -> list[tuple[int, int, int, int, int]]:
+        """Zapisane sesje (server_id, user_id, kanal_id, poczatek_ts, punkt_kontrolny_ts) - do odtworzenia po restarcie."""
+        async with self._odczyt() as db, db.execute(
+            "SELECT server_id, user_id, kanal_id, poczatek_timestamp, punkt_kontrolny_timestamp FROM sesje_glosowe"
+        ) as cursor:
+            return [tuple(wiersz) for wiersz in await cursor.fetchall()] # type: ignore
 
-        # Dodajemy aktualizację miesięcznego XP, jeśli xp_dodane > 0
-        if xp_dodane > 0:
-            teraz = datetime.now(UTC)
-            await self.inkrementuj_miesieczne_xp(str(user_id), str(server_id), teraz.year, teraz.month, xp_dodane)
+    @operacja_zapisu
+    async def rozpocznij_sesje_glosowa(self, server_id: int, user_id: int, kanal_id: int, poczatek_ts: int) -> None:
+        await self.connection.execute(
+            """
+            INSERT INTO sesje_glosowe (server_id, user_id, kanal_id, poczatek_timestamp, punkt_kontrolny_timestamp) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(server_id, user_id) DO UPDATE SET kanal_id = excluded.kanal_id, poczatek_timestamp = excluded.poczatek_timestamp,
+                punkt_kontrolny_timestamp = excluded.punkt_kontrolny_timestamp
+            """, (server_id, user_id, kanal_id, poczatek_ts, poczatek_ts)
+        )
+        await self.koordynator.zatwierdz()
+
+    @operacja_zapisu
+    async def usun_sesje_glosowa(self, server_id: int, user_id: int) -> None:
+        await self.connection.execute("DELETE FROM sesje_glosowe WHERE server_id = ? AND user_id = ?", (server_id, user_id))
+        await self.koordynator.zatwierdz()
+
+    @operacja_zapisu
+    async def zapisz_punkt_kontrolny_sesji(self, sesje: list[tuple[int, int, int, int]], punkt_kontrolny_ts: int) -> None:
+        """Zastępuje zapisane sesje otwartymi teraz (server_id, user_id, kanal_id, poczatek_ts) z nowym punktem kontrolnym."""
+        await self.connection.execute("DELETE FROM sesje_glosowe")
+        await self.connection.executemany(
+            "INSERT INTO sesje_glosowe (server_id, user_id, kanal_id, poczatek_timestamp, punkt_kontrolny_timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(*sesja, punkt_kontrolny_ts) for sesja in sesje]
+        )
+        await self.koordynator.zatwierdz()
 
+    # --- Metody Harmonogramu ---
+    async def pobierz_terminy_zadan(self) -> dict[str, int]:
+        """Ostatnie wykonane terminy zadań harmonogramu (nazwa -> timestamp)."""
+        async with self._odczyt() as db, db.execute("SELECT nazwa, ostatni_termin_timestamp FROM harmonogram_zadan") as cursor:
+            return {nazwa: termin_ts for nazwa, termin_ts in await cursor.fetchall()}
 
-    async def zresetuj_streak_uzytkownika(self, user_id: int, server_id: int) -> None:
-        await self.connection.execute("UPDATE doswiadczenie_uzytkownika SET aktualny_streak_dni = 0, ostatni_dzien_aktywnosci_streak = NULL WHERE user_id = ? AND server_id = ?", (str(user_id), str(server_id)))
-        await self.connection.commit()
+    @operacja_zapisu
+    async def zapisz_termin_zadania(self, nazwa: str, termin_ts: int) -> None:
+        await self.connection.execute(
+            "INSERT INTO harmonogram_zadan (nazwa, ostatni_termin_timestamp) VALUES (?, ?) ON CONFLICT(nazwa) DO UPDATE SET ostatni_termin_timestamp = excluded.ostatni_termin_timestamp",
+            (nazwa, termin_ts)
+        )
+        await self.koordynator.zatwierdz()
 
     # --- Metody Portfela Kronikarza ---
     async def pobierz_portfel(self, user_id: int, server_id: int) -> tuple | None:
-        async with self.connection.execute(
-            "SELECT user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp FROM portfel_kronikarza WHERE user_id = ? AND server_id = ?",
-            (str(user_id), str(server_id))
+        pamiec = self._pamiec()
+        if pamiec is None:
+            return await self._wczytaj_portfel(user_id, server_id)
+        portfel = pamiec.portfel(server_id, user_id)
+        if portfel is not None:
+            return portfel
+        # Jak w pobierz_doswiadczenie: chybienie z puli odczytu
+        return await pamiec.wczytaj(server_id, user_id, "portfel", lambda: self._wczytaj_portfel(user_id, server_id))
+
+    async def _wczytaj_portfel(self, user_id: int, server_id: int, pamiec: PamiecUzytkownikow | None = None) -> tuple | None:
+        async with self._odczyt() as db, db.execute(
+            f"SELECT {KOLUMNY_PORTFELA} FROM portfel_kronikarza WHERE user_id = ? AND server_id = ?",
+            (user_id, server_id)
         ) as cursor:
-            return await cursor.fetchone()
+            portfel = await cursor.fetchone()
+        if pamiec is not None and portfel is not None: pamiec.ustaw_portfel(portfel)
+        return portfel
+
+    async def pobierz_portfele_wielu(self, user_ids: typing.Iterable[int], server_id: int) -> dict[int, tuple]:
+        """Portfele wielu użytkowników jednego serwera: {user_id: wiersz} (bez brakujących)."""
+        wyniki: dict[int, tuple] = {}
+        for partia in _partie(user_ids, MAKS_PARAMETROW_ZAPYTANIA - 1):
+            znaki = ", ".join("?" * len(partia))
+            async with self._odczyt() as db, db.execute(
+                f"SELECT {KOLUMNY_PORTFELA} FROM portfel_kronikarza WHERE server_id = ? AND user_id IN ({znaki})",
+                (server_id, *partia)
+            ) as cursor:
+                async for wiersz in cursor:
+                    wyniki[wiersz[0]] = tuple(wiersz)
+        return wyniki
+
+    @operacja_zapisu
+    async def pobierz_lub_stworz_portfele_wielu(self, user_ids: typing.Iterable[int], server_id: int) -> dict[int, tuple]:
+        user_ids = list(user_ids)
+        wyniki = await self.pobierz_portfele_wielu(user_ids, server_id)
+        brakujace = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in wyniki]
+        if not brakujace:
+            return wyniki
+
+        await self.connection.executemany(
+            "INSERT INTO portfel_kronikarza (user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp) VALUES (?, ?, 0, 0, 0, 0) ON CONFLICT(user_id, server_id) DO NOTHING",
+            [(user_id, server_id) for user_id in brakujace]
+        )
+        await self.koordynator.zatwierdz()
+        if self.rankingi is not None:
+            rankingi = self.rankingi
+
+            def dodaj_do_rankingow() -> None:
+                for user_id in brakujace: rankingi.dodaj_jesli_brak(server_id, user_id, "dukaty", "krysztaly")
+            self.koordynator.po_zatwierdzeniu(dodaj_do_rankingow)
+        for user_id in brakujace:
+            wyniki[user_id] = (user_id, server_id, 0, 0, 0, 0)
+        self._zapamietaj_portfele(*(wyniki[user_id] for user_id in brakujace))
+        return wyniki
 
     async def pobierz_lub_stworz_portfel(self, user_id: int, server_id: int) -> tuple:
-        portfel = await self.pobierz_portfel(user_id, server_id)
+        pamiec = self._pamiec()
+        portfel = pamiec.portfel(server_id, user_id) if pamiec is not None else None
+        return portfel if portfel is not None else await self._pobierz_lub_stworz_portfel(user_id, server_id)
+
+    @operacja_zapisu
+    async def _pobierz_lub_stworz_portfel(self, user_id: int, server_id: int) -> tuple:
+        portfel = await self._wczytaj_portfel(user_id, server_id, self._pamiec())
         if portfel:
             return portfel
         await self.connection.execute(
             "INSERT INTO portfel_kronikarza (user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp) VALUES (?, ?, 0, 0, 0, 0)",
-            (str(user_id), str(server_id))
+            (user_id, server_id)
         )
-        await self.connection.commit()
-        return (str(user_id), str(server_id), 0, 0, 0, 0)
-
+        await self.koordynator.zatwierdz()
+        if self.rankingi is not None:
+            rankingi = self.rankingi
+            self.koordynator.po_zatwierdzeniu(lambda: rankingi.dodaj_jesli_brak(server_id, user_id, "dukaty", "krysztaly"))
+        portfel = (user_id, server_id, 0, 0, 0, 0)
+        self._zapamietaj_portfele(portfel)
+        return portfel
+
+    @operacja_zapisu
     async def aktualizuj_portfel(self, user_id: int, server_id: int, ilosc_dukatow_do_dodania: int = 0, ilosc_krysztalow_do_dodania: int = 0, nowy_timestamp_daily: int | None = None, nowy_timestamp_praca: int | None = None) -> tuple[int, int]:
-        _, _, obecne_dukaty, obecne_krysztaly, obecny_timestamp_daily, obecny_timestamp_praca = await self.pobierz_lub_stworz_portfel(user_id, server_id)
-
-        nowe_saldo_dukatow = obecne_dukaty + ilosc_dukatow_do_dodania
-        nowe_saldo_krysztalow = obecne_krysztaly + ilosc_krysztalow_do_dodania
-        timestamp_daily_do_zapisu = nowy_timestamp_daily if nowy_timestamp_daily is not None else obecny_timestamp_daily
-        timestamp_praca_do_zapisu = nowy_timestamp_praca if nowy_timestamp_praca is not None else obecny_timestamp_praca
-
-
-        await self.connection.execute(
-            "UPDATE portfel_kronikarza SET gwiezdne_dukaty = ?, gwiezdne_krysztaly = ?, ostatnie_odebranie_daily_ts = ?, ostatnia_praca_timestamp = ? WHERE user_id = ? AND server_id = ?",
-            (nowe_saldo_dukatow, nowe_saldo_krysztalow, timestamp_daily_do_zapisu, timestamp_praca_do_zapisu, str(user_id), str(server_id))
-        )
-        await self.connection.commit()
-        return nowe_saldo_dukatow, nowe_saldo_krysztalow
+        """Zmiana względna salda (tworzy portfel, jeśli go nie ma) - jedno zapytanie, bez wcześniejszego odczytu."""
+        async with self.connection.execute(
+            f"""
+            INSERT INTO portfel_kronikarza (user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp)
+            VALUES (?1, ?2, ?3, ?4, COALESCE(?5, 0), COALESCE(?6, 0))
+            ON CONFLICT(user_id, server_id) DO UPDATE SET
+            gwiezdne_dukaty = gwiezdne_dukaty + excluded.gwiezdne_dukaty,
+            gwiezdne_krysztaly = gwiezdne_krysztaly + excluded.gwiezdne_krysztaly,
+            ostatnie_odebranie_daily_ts = COALESCE(?5, ostatnie_odebranie_daily_ts),
+            ostatnia_praca_timestamp = COALESCE(?6, ostatnia_praca_timestamp)
+            RETURNING {KOLUMNY_PORTFELA}
+            """,
+            (user_id, server_id, ilosc_dukatow_do_dodania, ilosc_krysztalow_do_dodania, nowy_timestamp_daily, nowy_timestamp_praca)
+        ) as cursor:
+            portfel = tuple(await cursor.fetchone()) # type: ignore
+        await self.koordynator.zatwierdz()
+        self._po_zmianie_portfeli(portfel)
+        return portfel[2], portfel[3]
 
+    @operacja_zapisu
     async def ustaw_saldo_portfela(self, user_id: int, server_id: int, nowe_saldo_dukatow: int | None = None, nowe_saldo_krysztalow: int | None = None) -> tuple[int, int]:
-        _, _, obecne_dukaty, obecne_krysztaly, ostatnie_daily_ts_do_zachowania, ostatnia_praca_ts_do_zachowania = await self.pobierz_lub_stworz_portfel(user_id, server_id)
-
-        dukaty_do_zapisu = nowe_saldo_dukatow if nowe_saldo_dukatow is not None else obecne_dukaty
-        krysztaly_do_zapisu = nowe_saldo_krysztalow if nowe_saldo_krysztalow is not None else obecne_krysztaly
-
-        await self.connection.execute(
-            """
+        async with self.connection.execute(
+            f"""
             INSERT INTO portfel_kronikarza (user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
+            VALUES (?1, ?2, COALESCE(?3, 0), COALESCE(?4, 0), 0, 0)
             ON CONFLICT(user_id, server_id) DO UPDATE SET
-            gwiezdne_dukaty = excluded.gwiezdne_dukaty,
-            gwiezdne_krysztaly = excluded.gwiezdne_krysztaly,
-            ostatnie_odebranie_daily_ts = portfel_kronikarza.ostatnie_odebranie_daily_ts,
-            ostatnia_praca_timestamp = portfel_kronikarza.ostatnia_praca_timestamp
+            gwiezdne_dukaty = COALESCE(?3, gwiezdne_dukaty),
+            gwiezdne_krysztaly = COALESCE(?4, gwiezdne_krysztaly)
+            RETURNING {KOLUMNY_PORTFELA}
             """,
-            (str(user_id), str(server_id), dukaty_do_zapisu, krysztaly_do_zapisu, ostatnie_daily_ts_do_zachowania, ostatnia_praca_ts_do_zachowania)
-        )
-        await self.connection.commit()
-        return dukaty_do_zapisu, krysztaly_do_zapisu
+            (user_id, server_id, nowe_saldo_dukatow, nowe_saldo_krysztalow)
+        ) as cursor:
+            portfel = tuple(await cursor.fetchone()) # type: ignore
+        await self.koordynator.zatwierdz()
+        self._po_zmianie_portfeli(portfel)
+        return portfel[2], portfel[3]
+
+    async def aktualizuj_portfele_wielu(self, server_id: int, zmiany: dict[int, tuple[int, int]]) -> dict[int, tuple[int, int]]:
+        """
+        Zmiana względna sald wielu portfeli naraz ({user_id: (dukaty, krysztaly)}), jak aktualizuj_portfel.
+        Jeden executemany i jeden odczyt zwrotny w transakcji; zwraca {user_id: (nowe dukaty, nowe kryształy)}.
+        """
+        if not zmiany: return {}
+        async with self.koordynator.transakcja():
+            await self.connection.executemany(
+                """
+                INSERT INTO portfel_kronikarza (user_id, server_id, gwiezdne_dukaty, gwiezdne_krysztaly, ostatnie_odebranie_daily_ts, ostatnia_praca_timestamp)
+                VALUES (?, ?, ?, ?, 0, 0)
+                ON CONFLICT(user_id, server_id) DO UPDATE SET
+                gwiezdne_dukaty = gwiezdne_dukaty + excluded.gwiezdne_dukaty,
+                gwiezdne_krysztaly = gwiezdne_krysztaly + excluded.gwiezdne_krysztaly
+                """, [(user_id, server_id, dukaty, krysztaly) for user_id, (dukaty, krysztaly) in zmiany.items()]
+            )
+            portfele = await self.pobierz_portfele_wielu(zmiany, server_id)
+            self._po_zmianie_portfeli(*portfele.values())
+        return {user_id: (portfel[2], portfel[3]) for user_id, portfel in portfele.items()}
 
+    async def wyplac_nagrody_sezonu(self, server_id: int, rok: int, miesiac: int, zmiany: dict[int, tuple[int, int]]) -> bool:
+        """
+        Nagrody końca sezonu serwera (jak aktualizuj_portfele_wielu) razem ze znacznikiem wypłaty w jednej transakcji.
+        False - sezon tego serwera był już wypłacony (np. nadrabianie po przerwanym zadaniu), nic nie zmieniono.
+        """
+        async with self.koordynator.transakcja():
+            cursor = await self.connection.execute(
+                "INSERT INTO wyplaty_sezonow (server_id, rok, miesiac, czas_wyplaty_timestamp) VALUES (?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                (server_id, rok, miesiac, int(time.time()))
+            )
+            if cursor.rowcount == 0: return False
+            await self.aktualizuj_portfele_wielu(server_id, zmiany)
+        return True
+
+    def _po_zmianie_portfeli(self, *portfele: tuple) -> None:
+        """Po commicie przenosi nowe wiersze portfeli do rankingów i pamięci podręcznej."""
+        if self.rankingi is None and self.pamiec is None: return
+        rankingi, pamiec = self.rankingi, self.pamiec
+
+        def ustaw() -> None:
+            for portfel in portfele:
+                user_id, server_id, dukaty, krysztaly = portfel[:4]
+                if rankingi is not None:
+                    rankingi.ustaw(server_id, user_id, "dukaty", dukaty)
+                    rankingi.ustaw(server_id, user_id, "krysztaly", krysztaly)
+                if pamiec is not None: pamiec.ustaw_portfel(portfel)
+        self.koordynator.po_zatwierdzeniu(ustaw)
+
+    def _zapamietaj_portfele(self, *portfele: tuple) -> None:
+        if self.pamiec is None or not portfele: return
+        pamiec = self.pamiec
+
+        def ustaw() -> None:
+            for portfel in portfele: pamiec.ustaw_portfel(portfel)
+        self.koordynator.po_zatwierdzeniu(ustaw)
+
+    @operacja_zapisu
     async def odbierz_codzienna_nagrode(self, user_id: int, server_id: int, ilosc_dukatow_nagrody: int, cooldown_sekundy: int) -> tuple[bool, typing.Union[str, int], int]:
         portfel_dane = await self.pobierz_lub_stworz_portfel(user_id, server_id)
         aktualne_dukaty = portfel_dane[2]
@@ -219,6 +663,7 @@ class ZarzadcaBazyDanych:
             pozostaly_czas = cooldown_sekundy - (teraz_ts - ostatnie_odebranie_ts)
             return False, pozostaly_czas, aktualne_dukaty
 
+    @operacja_zapisu
     async def wykonaj_prace(self, user_id: int, server_id: int, min_dukaty: int, max_dukaty: int, cooldown_sekundy: int) -> tuple[bool, typing.Union[str, int], int, int]:
         portfel_dane = await self.pobierz_lub_stworz_portfel(user_id, server_id)
         aktualne_dukaty = portfel_dane[2]
@@ -234,7 +679,8 @@ class ZarzadcaBazyDanych:
             return False, pozostaly_czas, 0, aktualne_dukaty
 
     # --- Metody Transakcji Premium ---
-    async def log_transakcje_premium(self, user_id: str, server_id: str, id_pakietu: str, ilosc_krysztalow: int, cena_pln: float | None, id_platnosci_zewnetrznej: str | None, status: str) -> int:
+    @operacja_zapisu
+    async def log_transakcje_premium(self, user_id: int, server_id: int, id_pakietu: str, ilosc_krysztalow: int, cena_pln: float | None, id_platnosci_zewnetrznej: str | None, status: str) -> int:
         timestamp_transakcji = int(time.time())
         cursor = await self.connection.execute(
             """
@@ -244,9 +690,10 @@ class ZarzadcaBazyDanych:
             """,
             (user_id, server_id, id_pakietu, ilosc_krysztalow, cena_pln, id_platnosci_zewnetrznej, status, timestamp_transakcji)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
         return typing.cast(int, cursor.lastrowid)
 
+    @operacja_zapisu
     async def aktualizuj_status_transakcji_premium(self, id_transakcji: int, nowy_status: str, id_platnosci_zewnetrznej: str | None = None) -> None:
         updates = ["status_platnosci = ?"]
         params: list[typing.Any] = [nowy_status]
@@ -257,12 +704,13 @@ class ZarzadcaBazyDanych:
         params.append(id_transakcji)
         query = f"UPDATE transakcje_premium SET {', '.join(updates)} WHERE id_transakcji = ?"
         await self.connection.execute(query, tuple(params))
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
 
     # --- Metody Sklepu i Przedmiotów (posiadane przez użytkowników) ---
-    async def dodaj_przedmiot_uzytkownika(self, user_id: str, server_id: str, id_przedmiotu_sklepu: str, czas_zakupu_ts: int, czas_wygasniecia_ts: int | None, typ_bonusu: str, wartosc_bonusu: float) -> None:
-        await self.connection.execute(
+    @operacja_zapisu
+    async def dodaj_przedmiot_uzytkownika(self, user_id: int, server_id: int, id_przedmiotu_sklepu: str, czas_zakupu_ts: int, czas_wygasniecia_ts: int | None, typ_bonusu: str, wartosc_bonusu: float) -> None:
+        cursor = await self.connection.execute(
             """
             INSERT INTO posiadane_przedmioty
             (user_id, server_id, id_przedmiotu_sklepu, czas_zakupu_timestamp, czas_wygasniecia_timestamp, typ_bonusu, wartosc_bonusu)
@@ -270,9 +718,125 @@ class ZarzadcaBazyDanych:
             """,
             (user_id, server_id, id_przedmiotu_sklepu, czas_zakupu_ts, czas_wygasniecia_ts, typ_bonusu, wartosc_bonusu)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
+        if czas_wygasniecia_ts is not None: self._zglos_wygasanie(WpisWygasania(PRZEDMIOT, typing.cast(int, cursor.lastrowid), czas_wygasniecia_ts, user_id, server_id))
 
-    async def pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(self, user_id: str, server_id: str) -> list[tuple[str, float, int | None]]:
+    @operacja_zapisu
+    async def kup_przedmiot(self, user_id: int, server_id: int, item_id: str, waluta: str, *, rola_id: int | None = None, czas_zakupu_ts: int | None = None) -> WynikZakupu:
+        """
+        Atomowy zakup przedmiotu: warunkowe obciążenie portfela, warunkowe zmniejszenie zapasu
+        i wpis do ekwipunku (albo do aktywnych ról czasowych, gdy podano `rola_id`) w jednej transakcji.
+        Cena i zapas są sprawdzane w samych zapytaniach, więc równoległe zakupy nie przejdą na tych samych danych.
+        """
+        kolumna_ceny, kolumna_salda = KOLUMNY_WALUT[waluta]
+        czas_zakupu_ts = czas_zakupu_ts if czas_zakupu_ts is not None else int(time.time())
+
+        async with self.koordynator.transakcja():
+            async with self.connection.execute(
+                f"""
+                UPDATE portfel_kronikarza SET {kolumna_salda} = portfel_kronikarza.{kolumna_salda} - s.{kolumna_ceny}
+                FROM shop_items AS s
+                WHERE portfel_kronikarza.user_id = ? AND portfel_kronikarza.server_id = ? AND s.id = ?
+                AND s.{kolumna_ceny} IS NOT NULL AND (s.stock = -1 OR s.stock > 0)
+                AND portfel_kronikarza.{kolumna_salda} >= s.{kolumna_ceny}
+                RETURNING {KOLUMNY_PORTFELA}
+                """, (user_id, server_id, item_id)
+            ) as cursor:
+                portfel = await cursor.fetchone()
+
+            if portfel is None:
+                return await self._powod_nieudanego_zakupu(user_id, server_id, item_id, waluta, rola_id=rola_id, czas_zakupu_ts=czas_zakupu_ts)
+
+            # Zapas sprawdzony wyżej w tej samej transakcji - ten UPDATE zawsze trafia w wiersz
+            async with self.connection.execute(
+                f"""
+                UPDATE shop_items SET stock = CASE WHEN stock = -1 THEN -1 ELSE stock - 1 END WHERE id = ?
+                RETURNING stock, {kolumna_ceny}, item_type, bonus_value, duration_seconds
+                """, (item_id,)
+            ) as cursor:
+                pozostalo_sztuk, koszt, typ_bonusu, wartosc_bonusu, czas_trwania = await cursor.fetchone() # type: ignore
+
+            czas_wygasniecia_ts = czas_zakupu_ts + czas_trwania if czas_trwania else None
+            id_wpisu, poprzednia_rola = None, None
+            if rola_id is not None:
+                # Rola na stałe (bez czasu trwania) nie ma wpisu do wygaszenia
+                if czas_wygasniecia_ts is not None:
+                    # Przedłużenie nadpisuje wpis - stary termin potrzebny do cofnij_zakup_roli
+                    async with self.connection.execute(
+                        "SELECT czas_nadania_timestamp, czas_wygasniecia_timestamp, id_przedmiotu_sklepu FROM aktywne_role_czasowe WHERE user_id = ? AND server_id = ? AND rola_id = ?",
+                        (user_id, server_id, rola_id)
+                    ) as cursor:
+                        poprzednia_rola = await cursor.fetchone()
+                    async with self.connection.execute(
+                        """
+                        INSERT INTO aktywne_role_czasowe
+                        (user_id, server_id, rola_id, id_przedmiotu_sklepu, czas_nadania_timestamp, czas_wygasniecia_timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id, server_id, rola_id) DO UPDATE SET
+                        czas_nadania_timestamp = excluded.czas_nadania_timestamp,
+                        czas_wygasniecia_timestamp = excluded.czas_wygasniecia_timestamp,
+                        id_przedmiotu_sklepu = excluded.id_przedmiotu_sklepu
+                        RETURNING id_wpisu_roli
+                        """, (user_id, server_id, rola_id, item_id, czas_zakupu_ts, czas_wygasniecia_ts)
+                    ) as cursor:
+                        id_wpisu = (await cursor.fetchone())[0] # type: ignore
+                    self._zglos_wygasanie(WpisWygasania(ROLA, id_wpisu, czas_wygasniecia_ts, user_id, server_id, rola_id))
+            else:
+                async with self.connection.execute(
+                    """
+                    INSERT INTO posiadane_przedmioty
+                    (user_id, server_id, id_przedmiotu_sklepu, czas_zakupu_timestamp, czas_wygasniecia_timestamp, typ_bonusu, wartosc_bonusu)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    RETURNING id_posiadania
+                    """, (user_id, server_id, item_id, czas_zakupu_ts, czas_wygasniecia_ts, typ_bonusu, wartosc_bonusu or 0.0)
+                ) as cursor:
+                    id_wpisu = (await cursor.fetchone())[0] # type: ignore
+                if czas_wygasniecia_ts is not None: self._zglos_wygasanie(WpisWygasania(PRZEDMIOT, id_wpisu, czas_wygasniecia_ts, user_id, server_id))
+
+            self._po_zmianie_portfeli(tuple(portfel))
+        return WynikZakupu(ZAKUP_OK, portfel[2], portfel[3], koszt, pozostalo_sztuk, id_wpisu, czas_wygasniecia_ts,
+                           tuple(poprzednia_rola) if poprzednia_rola else None) # type: ignore
+
+    @operacja_zapisu
+    async def cofnij_zakup_roli(self, user_id: int, server_id: int, item_id: str, waluta: str, wynik: WynikZakupu, rola_id: int) -> tuple[int, int]:
+        """
+        Wycofuje zatwierdzony zakup roli, której nie udało się nadać: zwrot ceny, sztuka z powrotem w sklepie
+        i wpis roli czasowej usunięty (albo przywrócony do stanu sprzed przedłużenia). Zwraca saldo po zwrocie.
+        """
+        async with self.koordynator.transakcja():
+            saldo = await self.aktualizuj_portfel(user_id, server_id, *((wynik.koszt, 0) if waluta == "dukaty" else (0, wynik.koszt)))
+            await self.connection.execute("UPDATE shop_items SET stock = stock + 1 WHERE id = ? AND stock != -1", (item_id,))
+            if wynik.id_wpisu is not None:
+                if wynik.poprzednia_rola is None:
+                    await self.connection.execute("DELETE FROM aktywne_role_czasowe WHERE id_wpisu_roli = ?", (wynik.id_wpisu,))
+                    if self.wygasanie is not None:
+                        wygasanie, id_wpisu = self.wygasanie, wynik.id_wpisu
+                        self.koordynator.po_zatwierdzeniu(lambda: wygasanie.wycofaj(ROLA, id_wpisu))
+                else:
+                    czas_nadania_ts, czas_wygasniecia_ts, id_przedmiotu = wynik.poprzednia_rola
+                    await self.connection.execute(
+                        "UPDATE aktywne_role_czasowe SET czas_nadania_timestamp = ?, czas_wygasniecia_timestamp = ?, id_przedmiotu_sklepu = ? WHERE id_wpisu_roli = ?",
+                        (czas_nadania_ts, czas_wygasniecia_ts, id_przedmiotu, wynik.id_wpisu)
+                    )
+                    self._zglos_wygasanie(WpisWygasania(ROLA, wynik.id_wpisu, czas_wygasniecia_ts, user_id, server_id, rola_id))
+        return saldo
+
+    async def _powod_nieudanego_zakupu(self, user_id: int, server_id: int, item_id: str, waluta: str, **kwargs: typing.Any) -> WynikZakupu:
+        """Ustala, dlaczego warunkowe obciążenie w kup_przedmiot nie trafiło w żaden wiersz."""
+        kolumna_ceny, _ = KOLUMNY_WALUT[waluta]
+        async with self.connection.execute(f"SELECT {kolumna_ceny}, stock FROM shop_items WHERE id = ?", (item_id,)) as cursor:
+            przedmiot = await cursor.fetchone()
+        if przedmiot is None: return WynikZakupu(ZAKUP_BRAK_PRZEDMIOTU)
+        koszt, zapas = przedmiot
+        if koszt is None: return WynikZakupu(ZAKUP_BRAK_CENY, pozostalo_sztuk=zapas)
+        if zapas != -1 and zapas <= 0: return WynikZakupu(ZAKUP_WYPRZEDANY, koszt=koszt, pozostalo_sztuk=zapas)
+        _, _, dukaty, krysztaly, _, _ = await self.pobierz_lub_stworz_portfel(user_id, server_id)
+        if (dukaty if waluta == "dukaty" else krysztaly) >= koszt:
+            # Portfel dopiero co utworzony (darmowy przedmiot) - ponawiamy, teraz wiersz już istnieje
+            return await self.kup_przedmiot(user_id, server_id, item_id, waluta, **kwargs)
+        return WynikZakupu(ZAKUP_BRAK_SRODKOW, dukaty, krysztaly, koszt, zapas)
+
+    async def pobierz_aktywne_zakupione_bonusy_xp_uzytkownika(self, user_id: int, server_id: int) -> list[tuple[str, float, int | None]]:
         teraz_ts = int(time.time())
         query = """
             SELECT typ_bonusu, wartosc_bonusu, czas_wygasniecia_timestamp
@@ -280,10 +844,27 @@ class ZarzadcaBazyDanych:
             WHERE user_id = ? AND server_id = ? AND typ_bonusu = 'xp_mnoznik'
             AND (czas_wygasniecia_timestamp IS NULL OR czas_wygasniecia_timestamp > ?)
         """
-        async with self.connection.execute(query, (user_id, server_id, teraz_ts)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id, teraz_ts)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_posiadane_przedmioty_uzytkownika(self, user_id: str, server_id: str) -> list[tuple]:
+    async def pobierz_mnozniki_bonusow_xp_wielu(self, user_ids: typing.Iterable[int], server_id: int) -> dict[int, float]:
+        """Suma aktywnych zakupionych mnożników XP wielu użytkowników: {user_id: suma} (bez użytkowników bez bonusu)."""
+        teraz_ts = int(time.time())
+        wyniki: dict[int, float] = {}
+        for partia in _partie(user_ids, MAKS_PARAMETROW_ZAPYTANIA - 2):
+            znaki = ", ".join("?" * len(partia))
+            query = f"""
+                SELECT user_id, SUM(wartosc_bonusu) FROM posiadane_przedmioty
+                WHERE server_id = ? AND typ_bonusu = 'xp_mnoznik' AND user_id IN ({znaki})
+                AND (czas_wygasniecia_timestamp IS NULL OR czas_wygasniecia_timestamp > ?)
+                GROUP BY user_id
+            """
+            async with self._odczyt() as db, db.execute(query, (server_id, *partia, teraz_ts)) as cursor:
+                async for user_id, suma in cursor:
+                    wyniki[user_id] = suma or 0.0
+        return wyniki
+
+    async def pobierz_posiadane_przedmioty_uzytkownika(self, user_id: int, server_id: int) -> list[tuple]:
         """Pobiera wszystkie posiadane przedmioty przez użytkownika."""
         query = """
             SELECT p.id_posiadania, p.id_przedmiotu_sklepu, p.czas_zakupu_timestamp, p.czas_wygasniecia_timestamp,
@@ -293,20 +874,12 @@ class ZarzadcaBazyDanych:
             WHERE p.user_id = ? AND p.server_id = ?
             ORDER BY p.czas_zakupu_timestamp DESC;
         """
-        async with self.connection.execute(query, (user_id, server_id)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def usun_wygasle_posiadane_przedmioty(self) -> int:
-        teraz_ts = int(time.time())
-        cursor = await self.connection.execute(
-            "DELETE FROM posiadane_przedmioty WHERE czas_wygasniecia_timestamp IS NOT NULL AND czas_wygasniecia_timestamp <= ?",
-            (teraz_ts,)
-        )
-        await self.connection.commit()
-        return cursor.rowcount
-
     # --- NOWE METODY: Zarządzanie przedmiotami w sklepie (definicje przedmiotów) ---
-    async def dodaj_lub_zaktualizuj_przedmiot_sklepu(self, item_id: str, name: str, description: str, cost_dukaty: typing.Optional[int], cost_krysztaly: typing.Optional[int], emoji: typing.Optional[str], item_type: str, bonus_value: typing.Optional[float], duration_seconds: typing.Optional[int], role_id_to_grant: typing.Optional[str], stock: int) -> None:
+    @operacja_zapisu
+    async def dodaj_lub_zaktualizuj_przedmiot_sklepu(self, item_id: str, name: str, description: str, cost_dukaty: typing.Optional[int], cost_krysztaly: typing.Optional[int], emoji: typing.Optional[str], item_type: str, bonus_value: typing.Optional[float], duration_seconds: typing.Optional[int], role_id_to_grant: typing.Optional[int], stock: int) -> None:
         await self.connection.execute(
             """
             INSERT INTO shop_items (id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock)
@@ -325,23 +898,25 @@ class ZarzadcaBazyDanych:
             """,
             (item_id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
     async def pobierz_przedmiot_sklepu(self, item_id: str) -> tuple | None:
-        async with self.connection.execute("SELECT id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock FROM shop_items WHERE id = ?", (item_id,)) as cursor:
+        async with self._odczyt() as db, db.execute("SELECT id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock FROM shop_items WHERE id = ?", (item_id,)) as cursor:
             return await cursor.fetchone()
 
     async def pobierz_wszystkie_przedmioty_sklepu(self) -> list[tuple]:
-        async with self.connection.execute("SELECT id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock FROM shop_items ORDER BY name ASC") as cursor:
+        async with self._odczyt() as db, db.execute("SELECT id, name, description, cost_dukaty, cost_krysztaly, emoji, item_type, bonus_value, duration_seconds, role_id_to_grant, stock FROM shop_items ORDER BY name ASC") as cursor:
             return await cursor.fetchall() # type: ignore
 
+    @operacja_zapisu
     async def usun_przedmiot_sklepu(self, item_id: str) -> None:
         await self.connection.execute("DELETE FROM shop_items WHERE id = ?", (item_id,))
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
 
     # --- Metody Ról Czasowych ---
-    async def dodaj_aktywna_role_czasowa(self, user_id: str, server_id: str, rola_id: str, czas_nadania_ts: int, czas_wygasniecia_ts: int, id_przedmiotu_sklepu: typing.Optional[str] = None) -> int:
+    @operacja_zapisu
+    async def dodaj_aktywna_role_czasowa(self, user_id: int, server_id: int, rola_id: int, czas_nadania_ts: int, czas_wygasniecia_ts: int, id_przedmiotu_sklepu: typing.Optional[str] = None) -> int:
         query = """
             INSERT INTO aktywne_role_czasowe
             (user_id, server_id, rola_id, id_przedmiotu_sklepu, czas_nadania_timestamp, czas_wygasniecia_timestamp)
@@ -350,137 +925,229 @@ class ZarzadcaBazyDanych:
             czas_nadania_timestamp = excluded.czas_nadania_timestamp,
             czas_wygasniecia_timestamp = excluded.czas_wygasniecia_timestamp,
             id_przedmiotu_sklepu = excluded.id_przedmiotu_sklepu
+            RETURNING id_wpisu_roli
         """
-        cursor = await self.connection.execute(query, (user_id, server_id, rola_id, id_przedmiotu_sklepu, czas_nadania_ts, czas_wygasniecia_ts))
-        await self.connection.commit()
-        return typing.cast(int, cursor.lastrowid)
-
-    async def pobierz_wygasle_role_czasowe(self) -> list[tuple[int, str, str, str, int]]:
-        teraz_ts = int(time.time())
-        query = """
-            SELECT id_wpisu_roli, user_id, server_id, rola_id, czas_wygasniecia_timestamp
-            FROM aktywne_role_czasowe
-            WHERE czas_wygasniecia_timestamp <= ?
+        async with self.connection.execute(query, (user_id, server_id, rola_id, id_przedmiotu_sklepu, czas_nadania_ts, czas_wygasniecia_ts)) as cursor:
+            id_wpisu = (await cursor.fetchone())[0] # type: ignore
+        await self.koordynator.zatwierdz()
+        self._zglos_wygasanie(WpisWygasania(ROLA, id_wpisu, czas_wygasniecia_ts, user_id, server_id, rola_id))
+        return id_wpisu
+
+    async def pobierz_wygasajace(self, do_ts: int) -> list[WpisWygasania]:
+        """Role czasowe i przedmioty wygasające do `do_ts` (także już wygasłe) - zakres indeksów czasu wygaśnięcia."""
+        async with self._odczyt() as db:
+            async with db.execute(
+                "SELECT id_wpisu_roli, czas_wygasniecia_timestamp, user_id, server_id, rola_id FROM aktywne_role_czasowe WHERE czas_wygasniecia_timestamp <= ?", (do_ts,)
+            ) as cursor:
+                wpisy = [WpisWygasania(ROLA, *wiersz) async for wiersz in cursor]
+            async with db.execute(
+                "SELECT id_posiadania, czas_wygasniecia_timestamp, user_id, server_id FROM posiadane_przedmioty WHERE czas_wygasniecia_timestamp IS NOT NULL AND czas_wygasniecia_timestamp <= ?", (do_ts,)
+            ) as cursor:
+                wpisy.extend([WpisWygasania(PRZEDMIOT, *wiersz) async for wiersz in cursor])
+        return wpisy
+
+    @operacja_zapisu
+    async def usun_wygasle_wpisy(self, role: list[tuple[int, int]], przedmioty: list[tuple[int, int]]) -> tuple[int, int]:
         """
-        async with self.connection.execute(query, (teraz_ts,)) as cursor:
-            return await cursor.fetchall() # type: ignore
-
+        Usuwa wygasłe wpisy (id_wpisu, czas_wygasniecia_ts) ról czasowych i przedmiotów partiami, jednym commitem.
+        Wpis przedłużony w międzyczasie (czas wygaśnięcia w przyszłości) zostaje. Zwraca (usunięte role, usunięte przedmioty).
+        """
+        teraz_ts = int(time.time())
+        usuniete = []
+        for tabela, kolumna, wpisy in (("aktywne_role_czasowe", "id_wpisu_roli", role), ("posiadane_przedmioty", "id_posiadania", przedmioty)):
+            liczba = 0
+            for partia in _partie((id_wpisu for id_wpisu, _ in wpisy), MAKS_PARAMETROW_ZAPYTANIA - 1):
+                cursor = await self.connection.execute(
+                    f"DELETE FROM {tabela} WHERE {kolumna} IN ({', '.join('?' * len(partia))}) AND czas_wygasniecia_timestamp <= ?", (*partia, teraz_ts)
+                )
+                liczba += cursor.rowcount
+            usuniete.append(liczba)
+        await self.koordynator.zatwierdz()
+        return usuniete[0], usuniete[1]
+
+    @operacja_zapisu
     async def usun_aktywna_role_czasowa_po_id_wpisu(self, id_wpisu_roli: int) -> None:
         await self.connection.execute("DELETE FROM aktywne_role_czasowe WHERE id_wpisu_roli = ?", (id_wpisu_roli,))
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
-    async def czy_uzytkownik_ma_aktywna_role_czasowa(self, user_id: str, server_id: str, rola_id: str) -> bool:
+    async def czy_uzytkownik_ma_aktywna_role_czasowa(self, user_id: int, server_id: int, rola_id: int) -> bool:
         teraz_ts = int(time.time())
         query = """
             SELECT 1 FROM aktywne_role_czasowe
             WHERE user_id = ? AND server_id = ? AND rola_id = ? AND czas_wygasniecia_timestamp > ?
         """
-        async with self.connection.execute(query, (user_id, server_id, rola_id, teraz_ts)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id, rola_id, teraz_ts)) as cursor:
             return await cursor.fetchone() is not None
 
     # --- Metody Osiągnięć ---
-    async def oznacz_osiagniecie_jako_zdobyte(self, user_id: str, server_id: str, id_osiagniecia: str) -> bool:
+    def ustaw_definicje_osiagniec(self, definicje: dict[str, dict[str, typing.Any]]) -> IndeksOsiagniec:
+        """Numeruje tiery osiągnięć - od tej chwili zdobyte osiągnięcia użytkownika są maską bitową (zob. pobierz_maske_osiagniec)."""
+        self.indeks_osiagniec = IndeksOsiagniec(definicje)
+        if self.pamiec is not None: self.pamiec.zapomnij_osiagniecia() # maski z poprzedniej numeracji są nieaktualne
+        return self.indeks_osiagniec
+
+    async def pobierz_maske_osiagniec(self, user_id: int, server_id: int) -> int:
+        """Zdobyte tiery użytkownika jako maska bitowa wg indeks_osiagniec - jedno zapytanie, potem z pamięci podręcznej."""
+        if self.indeks_osiagniec is None: raise RuntimeError("Indeks osiągnięć nie jest ustawiony (ustaw_definicje_osiagniec).")
+        pamiec = self._pamiec()
+        maska = pamiec.osiagniecia(server_id, user_id) if pamiec is not None else None
+        if maska is not None:
+            return maska
+        indeks_osiagniec = self.indeks_osiagniec
+
+        async def wczytaj_maske() -> int:
+            async with self._odczyt() as db, db.execute("SELECT id_osiagniecia FROM zdobyte_osiagniecia_uzytkownika WHERE user_id = ? AND server_id = ?", (user_id, server_id)) as cursor:
+                return indeks_osiagniec.maska([wiersz[0] async for wiersz in cursor])
+        # Jak przy pozostałych wpisach pamięci: chybienie z puli odczytu
+        return await pamiec.wczytaj(server_id, user_id, "osiagniecia", wczytaj_maske) if pamiec is not None else await wczytaj_maske()
+
+    @operacja_zapisu
+    async def oznacz_osiagniecie_jako_zdobyte(self, user_id: int, server_id: int, id_osiagniecia: str) -> bool:
         teraz_ts = int(datetime.now(UTC).timestamp())
         try:
             await self.connection.execute(
                 "INSERT INTO zdobyte_osiagniecia_uzytkownika (user_id, server_id, id_osiagniecia, data_zdobycia_timestamp) VALUES (?, ?, ?, ?)",
                 (user_id, server_id, id_osiagniecia, teraz_ts)
             )
-            await self.connection.commit()
-            return True
+            await self.koordynator.zatwierdz()
         except aiosqlite.IntegrityError:
             return False
-
-    async def czy_uzytkownik_zdobyl_osiagniecie(self, user_id: str, server_id: str, id_osiagniecia: str) -> bool:
-        async with self.connection.execute("SELECT 1 FROM zdobyte_osiagniecia_uzytkownika WHERE user_id = ? AND server_id = ? AND id_osiagniecia = ?", (user_id, server_id, id_osiagniecia)) as cursor:
+        if self.pamiec is not None and self.indeks_osiagniec is not None and id_osiagniecia in self.indeks_osiagniec:
+            pamiec, bit = self.pamiec, self.indeks_osiagniec.bit(id_osiagniecia)
+            self.koordynator.po_zatwierdzeniu(lambda: pamiec.dodaj_osiagniecie(server_id, user_id, bit))
+        return True
+
+    async def czy_uzytkownik_zdobyl_osiagniecie(self, user_id: int, server_id: int, id_osiagniecia: str) -> bool:
+        if self.indeks_osiagniec is not None and id_osiagniecia in self.indeks_osiagniec:
+            return self.indeks_osiagniec.czy_zdobyte(await self.pobierz_maske_osiagniec(user_id, server_id), id_osiagniecia)
+        async with self._odczyt() as db, db.execute("SELECT 1 FROM zdobyte_osiagniecia_uzytkownika WHERE user_id = ? AND server_id = ? AND id_osiagniecia = ?", (user_id, server_id, id_osiagniecia)) as cursor:
             return await cursor.fetchone() is not None
 
-    async def pobierz_zdobyte_osiagniecia_uzytkownika(self, user_id: str, server_id: str) -> list[tuple[str, int]]:
-        async with self.connection.execute("SELECT id_osiagniecia, data_zdobycia_timestamp FROM zdobyte_osiagniecia_uzytkownika WHERE user_id = ? AND server_id = ? ORDER BY data_zdobycia_timestamp DESC", (user_id, server_id)) as cursor:
+    async def pobierz_zdobyte_osiagniecia_uzytkownika(self, user_id: int, server_id: int) -> list[tuple[str, int]]:
+        async with self._odczyt() as db, db.execute("SELECT id_osiagniecia, data_zdobycia_timestamp FROM zdobyte_osiagniecia_uzytkownika WHERE user_id = ? AND server_id = ? ORDER BY data_zdobycia_timestamp DESC", (user_id, server_id)) as cursor:
             return await cursor.fetchall() # type: ignore
 
     # --- Metody Konfiguracji XP ---
-    async def ustaw_konfiguracje_xp_kanalu(self, server_id: str, channel_id: str, xp_zablokowane: bool, mnoznik_xp: float):
+    async def pobierz_polityke_xp(self, server_id: int) -> PolitykaXPSerwera:
+        """Konfiguracja kanałów i bonusy ról serwera w pamięci - wczytywana raz, unieważniana przy każdej zmianie."""
+        w_transakcji = self.koordynator.w_transakcji()
+        polityka = None if w_transakcji else self.polityki_xp.get(server_id)
+        if polityka is not None:
+            return polityka
+        # Wczytanie z puli odczytu; zmiana zatwierdzona w trakcie podbija generację, więc starsza polityka nie trafi do pamięci
+        generacja = self._generacje_polityk_xp.get(server_id, 0)
+        async with self._odczyt() as db:
+            polityka = await PolitykaXPSerwera.wczytaj(db, server_id)
+        if not w_transakcji and self._generacje_polityk_xp.get(server_id, 0) == generacja: self.polityki_xp[server_id] = polityka
+        return polityka
+
+    def _uniewaznij_polityke_xp(self, server_id: int) -> None:
+        def uniewaznij() -> None:
+            self._generacje_polityk_xp[server_id] = self._generacje_polityk_xp.get(server_id, 0) + 1
+            self.polityki_xp.pop(server_id, None)
+        self.koordynator.po_zatwierdzeniu(uniewaznij)
+
+    @operacja_zapisu
+    async def ustaw_konfiguracje_xp_kanalu(self, server_id: int, channel_id: int, xp_zablokowane: bool, mnoznik_xp: float):
         await self.connection.execute(
             "INSERT INTO konfiguracja_xp_kanalow (server_id, kanal_id, xp_zablokowane, mnoznik_xp_kanalu) VALUES (?, ?, ?, ?) ON CONFLICT(server_id, kanal_id) DO UPDATE SET xp_zablokowane = excluded.xp_zablokowane, mnoznik_xp_kanalu = excluded.mnoznik_xp_kanalu",
             (server_id, channel_id, 1 if xp_zablokowane else 0, mnoznik_xp)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
+        self._uniewaznij_polityke_xp(server_id)
 
-    async def pobierz_konfiguracje_xp_kanalu(self, server_id: str, channel_id: str) -> tuple | None:
-        async with self.connection.execute("SELECT xp_zablokowane, mnoznik_xp_kanalu FROM konfiguracja_xp_kanalow WHERE server_id = ? AND kanal_id = ?", (server_id, channel_id)) as cursor:
+    async def pobierz_konfiguracje_xp_kanalu(self, server_id: int, channel_id: int) -> tuple | None:
+        async with self._odczyt() as db, db.execute("SELECT xp_zablokowane, mnoznik_xp_kanalu FROM konfiguracja_xp_kanalow WHERE server_id = ? AND kanal_id = ?", (server_id, channel_id)) as cursor:
             return await cursor.fetchone()
 
-    async def usun_konfiguracje_xp_kanalu(self, server_id: str, channel_id: str):
+    @operacja_zapisu
+    async def usun_konfiguracje_xp_kanalu(self, server_id: int, channel_id: int):
         await self.connection.execute("DELETE FROM konfiguracja_xp_kanalow WHERE server_id = ? AND kanal_id = ?", (server_id, channel_id))
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
+        self._uniewaznij_polityke_xp(server_id)
 
-    async def pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(self, server_id: str) -> list[tuple[str, bool, float]]:
-        async with self.connection.execute("SELECT kanal_id, xp_zablokowane, mnoznik_xp_kanalu FROM konfiguracja_xp_kanalow WHERE server_id = ?", (server_id,)) as cursor:
+    async def pobierz_wszystkie_konfiguracje_xp_kanalow_serwera(self, server_id: int) -> list[tuple[int, bool, float]]:
+        async with self._odczyt() as db, db.execute("SELECT kanal_id, xp_zablokowane, mnoznik_xp_kanalu FROM konfiguracja_xp_kanalow WHERE server_id = ?", (server_id,)) as cursor:
             rows = await cursor.fetchall()
             return [(row[0], bool(row[1]), row[2]) for row in rows]
 
+    @operacja_zapisu
     async def ustaw_indywidualna_blokade_xp(self, user_id: int, server_id: int, czy_blokowac: bool):
+        await self.zrzuc_bufor_xp()
         await self.connection.execute(
             "UPDATE doswiadczenie_uzytkownika SET xp_zablokowane_indywidualnie = ? WHERE user_id = ? AND server_id = ?",
-            (1 if czy_blokowac else 0, str(user_id), str(server_id))
+            (1 if czy_blokowac else 0, user_id, server_id)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
+        self._zmien_doswiadczenie_w_pamieci(user_id, server_id, {}, {"xp_zablokowane_indywidualnie": 1 if czy_blokowac else 0})
 
-    async def ustaw_bonus_xp_roli(self, server_id: str, role_id: str, mnoznik_xp: float):
+    @operacja_zapisu
+    async def ustaw_bonus_xp_roli(self, server_id: int, role_id: int, mnoznik_xp: float):
         await self.connection.execute(
-            "INSERT INTO bonusy_xp_rol (server_id, role_id, mnoznik_xp_roli) VALUES (?, ?, ?) ON CONFLICT(server_id, role_id) DO UPDATE SET mnoznik_xp_roli = excluded.mnoznik_xp_roli",
+            "INSERT INTO bonusy_xp_rol (server_id, rola_id, mnoznik_xp_roli) VALUES (?, ?, ?) ON CONFLICT(server_id, rola_id) DO UPDATE SET mnoznik_xp_roli = excluded.mnoznik_xp_roli",
             (server_id, role_id, mnoznik_xp)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
+        self._uniewaznij_polityke_xp(server_id)
 
-    async def pobierz_bonusy_xp_rol_serwera(self, server_id: str) -> list[tuple[str, float]]:
-        async with self.connection.execute("SELECT rola_id, mnoznik_xp_roli FROM bonusy_xp_rol WHERE server_id = ?", (server_id,)) as cursor:
+    async def pobierz_bonusy_xp_rol_serwera(self, server_id: int) -> list[tuple[int, float]]:
+        async with self._odczyt() as db, db.execute("SELECT rola_id, mnoznik_xp_roli FROM bonusy_xp_rol WHERE server_id = ?", (server_id,)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def usun_bonus_xp_roli(self, server_id: str, role_id: str):
-        await self.connection.execute("DELETE FROM bonusy_xp_rol WHERE server_id = ? AND role_id = ?", (server_id, role_id))
-        await self.connection.commit()
+    @operacja_zapisu
+    async def usun_bonus_xp_roli(self, server_id: int, role_id: int):
+        await self.connection.execute("DELETE FROM bonusy_xp_rol WHERE server_id = ? AND rola_id = ?", (server_id, role_id))
+        await self.koordynator.zatwierdz()
+        self._uniewaznij_polityke_xp(server_id)
 
     # --- Metody Nagród za Poziom ---
+    @operacja_zapisu
     async def dodaj_nagrode_za_poziom(self, server_id: int, poziom: int, rola_id: int) -> None:
         await self.connection.execute(
             "INSERT INTO nagrody_za_poziom (server_id, poziom, rola_id) VALUES (?, ?, ?) ON CONFLICT(server_id, poziom) DO UPDATE SET rola_id = excluded.rola_id",
-            (str(server_id), poziom, str(rola_id))
+            (server_id, poziom, rola_id)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
+    @operacja_zapisu
     async def usun_nagrode_za_poziom(self, server_id: int, poziom: int) -> None:
-        await self.connection.execute("DELETE FROM nagrody_za_poziom WHERE server_id = ? AND poziom = ?", (str(server_id), poziom))
-        await self.connection.commit()
+        await self.connection.execute("DELETE FROM nagrody_za_poziom WHERE server_id = ? AND poziom = ?", (server_id, poziom))
+        await self.koordynator.zatwierdz()
 
     async def pobierz_nagrode_za_poziom(self, server_id: int, poziom: int) -> tuple | None:
-        async with self.connection.execute("SELECT rola_id FROM nagrody_za_poziom WHERE server_id = ? AND poziom = ?", (str(server_id), poziom)) as cursor:
+        async with self._odczyt() as db, db.execute("SELECT rola_id FROM nagrody_za_poziom WHERE server_id = ? AND poziom = ?", (server_id, poziom)) as cursor:
             return await cursor.fetchone()
 
-    async def pobierz_wszystkie_nagrody_za_poziom_serwera(self, server_id: int) -> list[tuple[int, str]]:
-        async with self.connection.execute("SELECT poziom, rola_id FROM nagrody_za_poziom WHERE server_id = ? ORDER BY poziom ASC", (str(server_id),)) as cursor:
+    async def pobierz_nagrody_za_poziomy(self, server_id: int, od_poziomu: int, do_poziomu: int) -> list[tuple[int, int]]:
+        """Nagrody (poziom, rola_id) za poziomy z przedziału (od_poziomu, do_poziomu] - jednym zapytaniem."""
+        async with self._odczyt() as db, db.execute("SELECT poziom, rola_id FROM nagrody_za_poziom WHERE server_id = ? AND poziom > ? AND poziom <= ? ORDER BY poziom ASC", (server_id, od_poziomu, do_poziomu)) as cursor:
+            return await cursor.fetchall() # type: ignore
+
+    async def pobierz_wszystkie_nagrody_za_poziom_serwera(self, server_id: int) -> list[tuple[int, int]]:
+        async with self._odczyt() as db, db.execute("SELECT poziom, rola_id FROM nagrody_za_poziom WHERE server_id = ? ORDER BY poziom ASC", (server_id,)) as cursor:
             return await cursor.fetchall() # type: ignore
 
     # --- Metody Konkursów (Giveaway) ---
-    async def stworz_konkurs(self, server_id: str, kanal_id: str, wiadomosc_id: str, tworca_id: str, nagroda: str, liczba_zwyciezcow: int, czas_zakonczenia_ts: int, wymagana_rola_id: str | None = None) -> int:
+    @operacja_zapisu
+    async def stworz_konkurs(self, server_id: int, kanal_id: int, wiadomosc_id: int, tworca_id: int, nagroda: str, liczba_zwyciezcow: int, czas_zakonczenia_ts: int, wymagana_rola_id: int | None = None) -> int:
         czas_rozpoczecia_ts = int(time.time())
         cursor = await self.connection.execute(
             "INSERT INTO aktywne_konkursy (server_id, kanal_id, wiadomosc_id, tworca_id, nagroda, liczba_zwyciezcow, czas_rozpoczecia_ts, czas_zakonczenia_ts, wymagana_rola_id, czy_zakonczony, id_zwyciezcow_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, NULL)",
             (server_id, kanal_id, wiadomosc_id, tworca_id, nagroda, liczba_zwyciezcow, czas_rozpoczecia_ts, czas_zakonczenia_ts, wymagana_rola_id)
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
         return typing.cast(int, cursor.lastrowid)
 
-    async def dodaj_uczestnika_konkursu(self, id_konkursu_wiadomosci: str, user_id: str) -> bool:
+    @operacja_zapisu
+    async def dodaj_uczestnika_konkursu(self, id_konkursu_wiadomosci: int, user_id: int) -> bool:
         try:
             await self.connection.execute("INSERT INTO uczestnicy_konkursow (id_konkursu_wiadomosci, user_id) VALUES (?, ?)", (id_konkursu_wiadomosci, user_id))
-            await self.connection.commit()
+            await self.koordynator.zatwierdz()
             return True
         except aiosqlite.IntegrityError: return False
 
-    async def pobierz_uczestnikow_konkursu(self, id_konkursu_wiadomosci: str) -> list[str]:
-        async with self.connection.execute("SELECT user_id FROM uczestnicy_konkursow WHERE id_konkursu_wiadomosci = ?", (id_konkursu_wiadomosci,)) as cursor:
+    async def pobierz_uczestnikow_konkursu(self, id_konkursu_wiadomosci: int) -> list[int]:
+        async with self._odczyt() as db, db.execute("SELECT user_id FROM uczestnicy_konkursow WHERE id_konkursu_wiadomosci = ?", (id_konkursu_wiadomosci,)) as cursor:
             rows = await cursor.fetchall(); return [row[0] for row in rows]
 
     async def pobierz_zakonczone_konkursy_do_ogloszenia(self) -> list:
@@ -488,196 +1155,304 @@ class ZarzadcaBazyDanych:
         async with self.connection.execute("SELECT * FROM aktywne_konkursy WHERE czy_zakonczony = 0 AND czas_zakonczenia_ts <= ?", (teraz_ts,)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def zakoncz_konkurs(self, id_konkursu_db: int, id_zwyciezcow: list[str]) -> None:
+    @operacja_zapisu
+    async def zakoncz_konkurs(self, id_konkursu_db: int, id_zwyciezcow: list[int]) -> None:
         id_zwyciezcow_json_str = json.dumps(id_zwyciezcow)
         await self.connection.execute("UPDATE aktywne_konkursy SET czy_zakonczony = 1, id_zwyciezcow_json = ? WHERE id_konkursu = ?", (id_zwyciezcow_json_str, id_konkursu_db))
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
-    async def pobierz_konkurs_po_wiadomosci_id(self, wiadomosc_id: str) -> tuple | None:
-        async with self.connection.execute("SELECT * FROM aktywne_konkursy WHERE wiadomosc_id = ?", (wiadomosc_id,)) as cursor:
+    @operacja_zapisu
+    async def ustaw_czas_zakonczenia_konkursu(self, id_konkursu_db: int, czas_zakonczenia_ts: int) -> None:
+        await self.connection.execute("UPDATE aktywne_konkursy SET czas_zakonczenia_ts = ? WHERE id_konkursu = ?", (czas_zakonczenia_ts, id_konkursu_db))
+        await self.koordynator.zatwierdz()
+
+    async def pobierz_konkurs_po_wiadomosci_id(self, wiadomosc_id: int) -> tuple | None:
+        async with self._odczyt() as db, db.execute("SELECT * FROM aktywne_konkursy WHERE wiadomosc_id = ?", (wiadomosc_id,)) as cursor:
             return await cursor.fetchone()
 
-    async def pobierz_aktywne_konkursy_serwera(self, server_id: str) -> list:
+    async def pobierz_aktywne_konkursy_serwera(self, server_id: int) -> list:
         teraz_ts = int(time.time())
-        async with self.connection.execute("SELECT * FROM aktywne_konkursy WHERE server_id = ? AND czy_zakonczony = 0 AND czas_zakonczenia_ts > ?", (server_id, teraz_ts)) as cursor:
+        async with self._odczyt() as db, db.execute("SELECT * FROM aktywne_konkursy WHERE server_id = ? AND czy_zakonczony = 0 AND czas_zakonczenia_ts > ?", (server_id, teraz_ts)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_liczbe_aktywnych_konkursow(self, server_id: str) -> int:
+    async def pobierz_liczbe_aktywnych_konkursow(self, server_id: int) -> int:
         teraz_ts = int(time.time())
-        async with self.connection.execute("SELECT COUNT(*) FROM aktywne_konkursy WHERE server_id = ? AND czy_zakonczony = 0 AND czas_zakonczenia_ts > ?", (server_id, teraz_ts)) as cursor:
+        async with self._odczyt() as db, db.execute("SELECT COUNT(*) FROM aktywne_konkursy WHERE server_id = ? AND czy_zakonczony = 0 AND czas_zakonczenia_ts > ?", (server_id, teraz_ts)) as cursor:
             result = await cursor.fetchone(); return result[0] if result else 0
 
     # --- Metody dla Rankingów ---
-    async def pobierz_ranking_xp(self, server_id: int, limit: int = 10) -> list[tuple]:
-        async with self.connection.execute("SELECT user_id, xp, poziom FROM doswiadczenie_uzytkownika WHERE server_id = ? ORDER BY xp DESC, poziom DESC LIMIT ?", (str(server_id), limit)) as cursor:
+    # Kolejność: wynik malejąco, przy remisie user_id rosnąco (zgodnie z indeksami z migracji 0003).
+    # Kolejną stronę pobiera się przez po_wyniku/po_user_id z ostatniego wiersza poprzedniej strony.
+    @staticmethod
+    def _warunek_po_kluczu(kolumna: str, po_wyniku: int | None, po_user_id: int | None, kolumna_user: str = "user_id") -> tuple[str, tuple]:
+        if po_wyniku is None: return "", ()
+        if po_user_id is None: return f" AND {kolumna} < ?", (po_wyniku,)
+        # `kolumna <= ?` zawęża zakres indeksu, reszta odfiltrowuje remisy sprzed kursora
+        return f" AND {kolumna} <= ? AND ({kolumna} < ? OR {kolumna_user} > ?)", (po_wyniku, po_wyniku, po_user_id)
+
+    async def pobierz_ranking_xp(self, server_id: int, limit: int = 10, po_wyniku: int | None = None, po_user_id: int | None = None) -> list[tuple]:
+        await self.zrzuc_bufor_xp()
+        warunek, parametry = self._warunek_po_kluczu("xp", po_wyniku, po_user_id)
+        async with self._odczyt() as db, db.execute(f"SELECT user_id, xp, poziom FROM doswiadczenie_uzytkownika WHERE server_id = ?{warunek} ORDER BY xp DESC, user_id ASC LIMIT ?", (server_id, *parametry, limit)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_ranking_waluta(self, server_id: int, limit: int = 10, typ_waluty: str = "dukaty") -> list[tuple]:
+    async def pobierz_ranking_waluta(self, server_id: int, limit: int = 10, typ_waluty: str = "dukaty", po_wyniku: int | None = None, po_user_id: int | None = None) -> list[tuple]:
         kolumna = "gwiezdne_dukaty" if typ_waluty == "dukaty" else "gwiezdne_krysztaly"
-        async with self.connection.execute(f"SELECT pk.user_id, pk.{kolumna} FROM portfel_kronikarza pk JOIN doswiadczenie_uzytkownika du ON pk.user_id = du.user_id AND pk.server_id = du.server_id WHERE pk.server_id = ? ORDER BY pk.{kolumna} DESC LIMIT ?", (str(server_id), limit)) as cursor:
+        warunek, parametry = self._warunek_po_kluczu(f"pk.{kolumna}", po_wyniku, po_user_id, kolumna_user="pk.user_id")
+        # CROSS JOIN wymusza przechodzenie portfeli w kolejności indeksu rankingu, doswiadczenie_uzytkownika tylko po PK
+        async with self._odczyt() as db, db.execute(f"SELECT pk.user_id, pk.{kolumna} FROM portfel_kronikarza pk CROSS JOIN doswiadczenie_uzytkownika du ON pk.user_id = du.user_id AND pk.server_id = du.server_id WHERE pk.server_id = ?{warunek} ORDER BY pk.{kolumna} DESC, pk.user_id ASC LIMIT ?", (server_id, *parametry, limit)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_ranking_wiadomosci(self, server_id: int, limit: int = 10) -> list[tuple]:
-        async with self.connection.execute("SELECT user_id, liczba_wyslanych_wiadomosci FROM doswiadczenie_uzytkownika WHERE server_id = ? ORDER BY liczba_wyslanych_wiadomosci DESC LIMIT ?", (str(server_id), limit)) as cursor:
+    async def pobierz_ranking_wiadomosci(self, server_id: int, limit: int = 10, po_wyniku: int | None = None, po_user_id: int | None = None) -> list[tuple]:
+        await self.zrzuc_bufor_xp()
+        warunek, parametry = self._warunek_po_kluczu("liczba_wyslanych_wiadomosci", po_wyniku, po_user_id)
+        async with self._odczyt() as db, db.execute(f"SELECT user_id, liczba_wyslanych_wiadomosci FROM doswiadczenie_uzytkownika WHERE server_id = ?{warunek} ORDER BY liczba_wyslanych_wiadomosci DESC, user_id ASC LIMIT ?", (server_id, *parametry, limit)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_ranking_czas_glosowy(self, server_id: int, limit: int = 10) -> list[tuple]:
-        async with self.connection.execute("SELECT user_id, czas_na_glosowym_sekundy FROM doswiadczenie_uzytkownika WHERE server_id = ? ORDER BY czas_na_glosowym_sekundy DESC LIMIT ?", (str(server_id), limit)) as cursor:
+    async def pobierz_ranking_czas_glosowy(self, server_id: int, limit: int = 10, po_wyniku: int | None = None, po_user_id: int | None = None) -> list[tuple]:
+        await self.zrzuc_bufor_xp()
+        warunek, parametry = self._warunek_po_kluczu("czas_na_glosowym_sekundy", po_wyniku, po_user_id)
+        async with self._odczyt() as db, db.execute(f"SELECT user_id, czas_na_glosowym_sekundy FROM doswiadczenie_uzytkownika WHERE server_id = ?{warunek} ORDER BY czas_na_glosowym_sekundy DESC, user_id ASC LIMIT ?", (server_id, *parametry, limit)) as cursor:
             return await cursor.fetchall() # type: ignore
 
     async def pobierz_sume_wszystkich_wiadomosci(self, server_id: int) -> int:
-        async with self.connection.execute("SELECT SUM(liczba_wyslanych_wiadomosci) FROM doswiadczenie_uzytkownika WHERE server_id = ?", (str(server_id),)) as cursor:
+        await self.zrzuc_bufor_xp()
+        async with self._odczyt() as db, db.execute("SELECT SUM(liczba_wyslanych_wiadomosci) FROM doswiadczenie_uzytkownika WHERE server_id = ?", (server_id,)) as cursor:
             result = await cursor.fetchone(); return result[0] if result and result[0] is not None else 0
 
     # --- Metody dla Systemu Misji ---
-    async def pobierz_lub_stworz_postep_misji(self, user_id: str, server_id: str, id_misji: str, typ_warunku: str, ostatni_reset_ts_dla_misji: int) -> tuple:
-        query_select = "SELECT * FROM postep_misji_uzytkownika WHERE user_id = ? AND server_id = ? AND id_misji = ? AND typ_warunku = ?"
-        async with self.connection.execute(query_select, (user_id, server_id, id_misji, typ_warunku)) as cursor:
+    async def pobierz_postep_misji(self, user_id: int, server_id: int, id_misji: str, typ_warunku: str, id_cyklu: int) -> int:
+        """Postęp warunku w danym cyklu bez zapisu - brak wiersza dla cyklu (np. zaraz po resecie) to 0."""
+        query = "SELECT aktualna_wartosc FROM postep_misji_uzytkownika WHERE user_id = ? AND server_id = ? AND id_misji = ? AND typ_warunku = ? AND id_cyklu = ?"
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id, id_misji, typ_warunku, id_cyklu)) as cursor:
             row = await cursor.fetchone()
+        return row[0] if row else 0
 
-        if row:
-            db_ostatni_reset_ts = row[6]
-            if db_ostatni_reset_ts < ostatni_reset_ts_dla_misji:
-                query_update = "UPDATE postep_misji_uzytkownika SET aktualna_wartosc = 0, ostatni_reset_timestamp = ? WHERE id_postepu = ?"
-                await self.connection.execute(query_update, (ostatni_reset_ts_dla_misji, row[0]))
-                await self.connection.commit()
-                return (row[0], user_id, server_id, id_misji, typ_warunku, 0, ostatni_reset_ts_dla_misji)
-            return row # type: ignore
-        else:
-            query_insert = "INSERT INTO postep_misji_uzytkownika (user_id, server_id, id_misji, typ_warunku, aktualna_wartosc, ostatni_reset_timestamp) VALUES (?, ?, ?, ?, 0, ?)"
-            cursor = await self.connection.execute(query_insert, (user_id, server_id, id_misji, typ_warunku, ostatni_reset_ts_dla_misji))
-            await self.connection.commit()
-            return (cursor.lastrowid, user_id, server_id, id_misji, typ_warunku, 0, ostatni_reset_ts_dla_misji) # type: ignore
-
-    async def aktualizuj_postep_misji(self, user_id: str, server_id: str, id_misji: str, typ_warunku: str, wartosc_do_dodania: int = 1, ustaw_wartosc: typing.Optional[int] = None) -> int:
+    @operacja_zapisu
+    async def aktualizuj_postep_misji(self, user_id: int, server_id: int, id_misji: str, typ_warunku: str, id_cyklu: int, wartosc_do_dodania: int = 1, ustaw_wartosc: typing.Optional[int] = None) -> int:
+        """Dodaje do postępu (albo go ustawia) w danym cyklu - pierwszy zapis w cyklu tworzy wiersz od zera."""
         if ustaw_wartosc is not None:
-            query = "UPDATE postep_misji_uzytkownika SET aktualna_wartosc = ? WHERE user_id = ? AND server_id = ? AND id_misji = ? AND typ_warunku = ?"
-            await self.connection.execute(query, (ustaw_wartosc, user_id, server_id, id_misji, typ_warunku))
-            nowa_wartosc = ustaw_wartosc
+            query = """INSERT INTO postep_misji_uzytkownika (user_id, server_id, id_misji, typ_warunku, id_cyklu, aktualna_wartosc) VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(user_id, server_id, id_misji, typ_warunku, id_cyklu) DO UPDATE SET aktualna_wartosc = excluded.aktualna_wartosc RETURNING aktualna_wartosc"""
+            parametry = (user_id, server_id, id_misji, typ_warunku, id_cyklu, ustaw_wartosc)
         else:
-            query = "UPDATE postep_misji_uzytkownika SET aktualna_wartosc = aktualna_wartosc + ? WHERE user_id = ? AND server_id = ? AND id_misji = ? AND typ_warunku = ?"
-            await self.connection.execute(query, (wartosc_do_dodania, user_id, server_id, id_misji, typ_warunku))
-            async with self.connection.execute("SELECT aktualna_wartosc FROM postep_misji_uzytkownika WHERE user_id = ? AND server_id = ? AND id_misji = ? AND typ_warunku = ?", (user_id, server_id, id_misji, typ_warunku)) as cursor:
-                result = await cursor.fetchone()
-                nowa_wartosc = result[0] if result else 0
+            query = """INSERT INTO postep_misji_uzytkownika (user_id, server_id, id_misji, typ_warunku, id_cyklu, aktualna_wartosc) VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(user_id, server_id, id_misji, typ_warunku, id_cyklu) DO UPDATE SET aktualna_wartosc = aktualna_wartosc + excluded.aktualna_wartosc RETURNING aktualna_wartosc"""
+            parametry = (user_id, server_id, id_misji, typ_warunku, id_cyklu, wartosc_do_dodania)
+        async with self.connection.execute(query, parametry) as cursor:
+            result = await cursor.fetchone()
+            nowa_wartosc = result[0] if result else 0
 
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
         return nowa_wartosc
 
-    async def oznacz_misje_jako_ukonczona(self, user_id: str, server_id: str, id_misji: str, data_ukonczenia_ts: int) -> None:
+    @operacja_zapisu
+    async def aktualizuj_postep_misji_wielu(self, user_id: int, server_id: int, zmiany: list[tuple[str, str, int, int]], maksimum: bool = False) -> list[int]:
+        """
+        Postęp wielu warunków po jednej akcji - (id_misji, typ_warunku, id_cyklu, wartosc) - jednym commitem.
+        Wartość jest dodawana, a z `maksimum` zastępuje postęp tylko wtedy, gdy jest większa (np. długość streaka).
+        """
+        nowa = "MAX(aktualna_wartosc, excluded.aktualna_wartosc)" if maksimum else "aktualna_wartosc + excluded.aktualna_wartosc"
+        query = f"""INSERT INTO postep_misji_uzytkownika (user_id, server_id, id_misji, typ_warunku, id_cyklu, aktualna_wartosc) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, server_id, id_misji, typ_warunku, id_cyklu) DO UPDATE SET aktualna_wartosc = {nowa} RETURNING aktualna_wartosc"""
+        nowe_wartosci = []
+        for id_misji, typ_warunku, id_cyklu, wartosc in zmiany:
+            async with self.connection.execute(query, (user_id, server_id, id_misji, typ_warunku, id_cyklu, wartosc)) as cursor:
+                result = await cursor.fetchone()
+            nowe_wartosci.append(result[0] if result else 0)
+        if zmiany: await self.koordynator.zatwierdz()
+        return nowe_wartosci
+
+    async def usun_stare_cykle_misji(self, aktualne_cykle: dict[str, int], rozmiar_partii: int = 5000) -> int:
+        """
+        Usuwa postęp misji cyklicznych z cykli starszych niż aktualny ({id_misji: id_cyklu}).
+        Partiami, z commitem po każdej - blokada zapisu nie jest trzymana przez całe sprzątanie.
+        """
+        query = "DELETE FROM postep_misji_uzytkownika WHERE id_postepu IN (SELECT id_postepu FROM postep_misji_uzytkownika WHERE id_misji = ? AND id_cyklu < ? LIMIT ?)"
+        usuniete = 0
+        for id_misji, id_cyklu in aktualne_cykle.items():
+            while True:
+                async with self.koordynator.zapis():
+                    cursor = await self.connection.execute(query, (id_misji, id_cyklu, rozmiar_partii))
+                    await self.koordynator.zatwierdz()
+                usuniete += cursor.rowcount
+                if cursor.rowcount < rozmiar_partii: break
+        return usuniete
+
+    @operacja_zapisu
+    async def oznacz_misje_jako_ukonczona(self, user_id: int, server_id: int, id_misji: str, data_ukonczenia_ts: int) -> None:
         query = "INSERT INTO ukonczone_misje_uzytkownika (user_id, server_id, id_misji, data_ukonczenia_timestamp) VALUES (?, ?, ?, ?)"
         await self.connection.execute(query, (user_id, server_id, id_misji, data_ukonczenia_ts))
-        await self.connection.commit()
-
-    async def czy_misja_ukonczona_w_cyklu(self, user_id: str, server_id: str, id_misji: str, poczatek_cyklu_ts: int) -> bool:
+        await self.koordynator.zatwierdz()
+        if self.pamiec is not None:
+            pamiec = self.pamiec
+            self.koordynator.po_zatwierdzeniu(lambda: pamiec.dodaj_ukonczenie_misji(server_id, user_id, id_misji, data_ukonczenia_ts))
+
+    async def pobierz_ukonczone_misje(self, user_id: int, server_id: int) -> dict[str, int]:
+        """{id_misji: czas ostatniego ukończenia} - jedno zapytanie, potem z pamięci podręcznej (nie modyfikować wyniku)."""
+        pamiec = self._pamiec()
+        misje = pamiec.misje(server_id, user_id) if pamiec is not None else None
+        if misje is not None:
+            return misje
+
+        async def wczytaj_misje() -> dict[str, int]:
+            query = "SELECT id_misji, MAX(data_ukonczenia_timestamp) FROM ukonczone_misje_uzytkownika WHERE user_id = ? AND server_id = ? GROUP BY id_misji"
+            async with self._odczyt() as db, db.execute(query, (user_id, server_id)) as cursor:
+                return {id_misji: czas_ts async for id_misji, czas_ts in cursor}
+        # Jak przy pozostałych wpisach pamięci: chybienie z puli odczytu
+        return await pamiec.wczytaj(server_id, user_id, "misje", wczytaj_misje) if pamiec is not None else await wczytaj_misje()
+
+    async def czy_misja_ukonczona_w_cyklu(self, user_id: int, server_id: int, id_misji: str, poczatek_cyklu_ts: int) -> bool:
+        if self._pamiec() is not None:
+            return (await self.pobierz_ukonczone_misje(user_id, server_id)).get(id_misji, -1) >= poczatek_cyklu_ts
         query = "SELECT 1 FROM ukonczone_misje_uzytkownika WHERE user_id = ? AND server_id = ? AND id_misji = ? AND data_ukonczenia_timestamp >= ?"
-        async with self.connection.execute(query, (user_id, server_id, id_misji, poczatek_cyklu_ts)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id, id_misji, poczatek_cyklu_ts)) as cursor:
             return await cursor.fetchone() is not None
 
-    async def czy_misja_jednorazowa_ukonczona(self, user_id: str, server_id: str, id_misji: str) -> bool:
+    async def czy_misja_jednorazowa_ukonczona(self, user_id: int, server_id: int, id_misji: str) -> bool:
+        if self._pamiec() is not None:
+            return id_misji in await self.pobierz_ukonczone_misje(user_id, server_id)
         query = "SELECT 1 FROM ukonczone_misje_uzytkownika WHERE user_id = ? AND server_id = ? AND id_misji = ?"
-        async with self.connection.execute(query, (user_id, server_id, id_misji)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id, id_misji)) as cursor:
             return await cursor.fetchone() is not None
 
-    async def pobierz_wszystkie_ukonczone_misje_uzytkownika(self, user_id: str, server_id: str) -> list[tuple[str, int]]:
+    async def pobierz_wszystkie_ukonczone_misje_uzytkownika(self, user_id: int, server_id: int) -> list[tuple[str, int]]:
         query = "SELECT id_misji, data_ukonczenia_timestamp FROM ukonczone_misje_uzytkownika WHERE user_id = ? AND server_id = ? ORDER BY data_ukonczenia_timestamp DESC"
-        async with self.connection.execute(query, (user_id, server_id)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (user_id, server_id)) as cursor:
             return await cursor.fetchall() # type: ignore
 
     # --- Metody dla Statystyk Osiągnięć ---
-    async def inkrementuj_liczbe_wiadomosci_na_kanale(self, user_id: str, server_id: str, kanal_id: str, ilosc: int = 1) -> int:
-        await self.connection.execute(
+    @operacja_zapisu
+    async def inkrementuj_liczbe_wiadomosci_na_kanale(self, user_id: int, server_id: int, kanal_id: int, ilosc: int = 1) -> int:
+        async with self.connection.execute(
             """
             INSERT INTO statystyki_aktywnosci_na_kanalach (user_id, server_id, kanal_id, liczba_wiadomosci)
             VALUES (?, ?, ?, ?)
             ON CONFLICT(user_id, server_id, kanal_id) DO UPDATE SET
-            liczba_wiadomosci = liczba_wiadomosci + excluded.liczba_wiadomosci;
+            liczba_wiadomosci = liczba_wiadomosci + excluded.liczba_wiadomosci
+            RETURNING liczba_wiadomosci;
             """, (user_id, server_id, kanal_id, ilosc)
-        )
-        await self.connection.commit()
-        async with self.connection.execute("SELECT liczba_wiadomosci FROM statystyki_aktywnosci_na_kanalach WHERE user_id = ? AND server_id = ? AND kanal_id = ?", (user_id, server_id, kanal_id)) as cursor:
+        ) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result else 0
+        await self.koordynator.zatwierdz()
+        return result[0] if result else 0
 
-    async def pobierz_liczbe_wiadomosci_na_kanale(self, user_id: str, server_id: str, kanal_id: str) -> int:
-        async with self.connection.execute("SELECT liczba_wiadomosci FROM statystyki_aktywnosci_na_kanalach WHERE user_id = ? AND server_id = ? AND kanal_id = ?", (user_id, server_id, kanal_id)) as cursor:
+    async def pobierz_liczbe_wiadomosci_na_kanale(self, user_id: int, server_id: int, kanal_id: int) -> int:
+        async with self._odczyt() as db, db.execute("SELECT liczba_wiadomosci FROM statystyki_aktywnosci_na_kanalach WHERE user_id = ? AND server_id = ? AND kanal_id = ?", (user_id, server_id, kanal_id)) as cursor:
             result = await cursor.fetchone()
             return result[0] if result else 0
 
-    async def inkrementuj_liczbe_wygranych_konkursow(self, user_id: str, server_id: str, ilosc: int = 1) -> int:
-        await self.connection.execute(
+    @operacja_zapisu
+    async def inkrementuj_liczbe_wygranych_konkursow(self, user_id: int, server_id: int, ilosc: int = 1) -> int:
+        async with self.connection.execute(
             """
             INSERT INTO statystyki_konkursow_uzytkownika (user_id, server_id, liczba_wygranych_konkursow)
             VALUES (?, ?, ?)
             ON CONFLICT(user_id, server_id) DO UPDATE SET
-            liczba_wygranych_konkursow = liczba_wygranych_konkursow + excluded.liczba_wygranych_konkursow;
+            liczba_wygranych_konkursow = liczba_wygranych_konkursow + excluded.liczba_wygranych_konkursow
+            RETURNING liczba_wygranych_konkursow;
             """, (user_id, server_id, ilosc)
-        )
-        await self.connection.commit()
-        async with self.connection.execute("SELECT liczba_wygranych_konkursow FROM statystyki_konkursow_uzytkownika WHERE user_id = ? AND server_id = ?", (user_id, server_id)) as cursor:
+        ) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result else 0
-
-    async def pobierz_liczbe_wygranych_konkursow(self, user_id: str, server_id: str) -> int:
-        async with self.connection.execute("SELECT liczba_wygranych_konkursow FROM statystyki_konkursow_uzytkownika WHERE user_id = ? AND server_id = ?", (user_id, server_id)) as cursor:
+        await self.koordynator.zatwierdz()
+        return result[0] if result else 0
+
+    async def inkrementuj_liczbe_wygranych_konkursow_wielu(self, user_ids: typing.Iterable[int], server_id: int, ilosc: int = 1) -> dict[int, int]:
+        """Wersja zbiorcza inkrementuj_liczbe_wygranych_konkursow (np. dla wszystkich zwycięzców konkursu)."""
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids: return {}
+        async with self.koordynator.transakcja():
+            await self.connection.executemany(
+                """
+                INSERT INTO statystyki_konkursow_uzytkownika (user_id, server_id, liczba_wygranych_konkursow)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, server_id) DO UPDATE SET
+                liczba_wygranych_konkursow = liczba_wygranych_konkursow + excluded.liczba_wygranych_konkursow
+                """, [(user_id, server_id, ilosc) for user_id in user_ids]
+            )
+            wyniki: dict[int, int] = {}
+            for partia in _partie(user_ids, MAKS_PARAMETROW_ZAPYTANIA - 1):
+                znaki = ", ".join("?" * len(partia))
+                async with self.connection.execute(
+                    f"SELECT user_id, liczba_wygranych_konkursow FROM statystyki_konkursow_uzytkownika WHERE server_id = ? AND user_id IN ({znaki})",
+                    (server_id, *partia)
+                ) as cursor:
+                    async for user_id, liczba in cursor:
+                        wyniki[user_id] = liczba
+        return wyniki
+
+    async def pobierz_liczbe_wygranych_konkursow(self, user_id: int, server_id: int) -> int:
+        async with self._odczyt() as db, db.execute("SELECT liczba_wygranych_konkursow FROM statystyki_konkursow_uzytkownika WHERE user_id = ? AND server_id = ?", (user_id, server_id)) as cursor:
             result = await cursor.fetchone()
             return result[0] if result else 0
 
-    async def inkrementuj_uzycia_komend_kategorii(self, user_id: str, server_id: str, nazwa_kategorii: str, ilosc: int = 1) -> int:
-        await self.connection.execute(
+    @operacja_zapisu
+    async def inkrementuj_uzycia_komend_kategorii(self, user_id: int, server_id: int, nazwa_kategorii: str, ilosc: int = 1) -> int:
+        async with self.connection.execute(
             """
             INSERT INTO statystyki_uzycia_komend_kategorii (user_id, server_id, nazwa_kategorii, liczba_uzyc)
             VALUES (?, ?, ?, ?)
             ON CONFLICT(user_id, server_id, nazwa_kategorii) DO UPDATE SET
-            liczba_uzyc = liczba_uzyc + excluded.liczba_uzyc;
+            liczba_uzyc = liczba_uzyc + excluded.liczba_uzyc
+            RETURNING liczba_uzyc;
             """, (user_id, server_id, nazwa_kategorii, ilosc)
-        )
-        await self.connection.commit()
-        async with self.connection.execute("SELECT liczba_uzyc FROM statystyki_uzycia_komend_kategorii WHERE user_id = ? AND server_id = ? AND nazwa_kategorii = ?", (user_id, server_id, nazwa_kategorii)) as cursor:
+        ) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result else 0
+        await self.koordynator.zatwierdz()
+        return result[0] if result else 0
 
-    async def pobierz_uzycia_komend_kategorii(self, user_id: str, server_id: str, nazwa_kategorii: str) -> int:
-        async with self.connection.execute("SELECT liczba_uzyc FROM statystyki_uzycia_komend_kategorii WHERE user_id = ? AND server_id = ? AND nazwa_kategorii = ?", (user_id, server_id, nazwa_kategorii)) as cursor:
+    async def pobierz_uzycia_komend_kategorii(self, user_id: int, server_id: int, nazwa_kategorii: str) -> int:
+        async with self._odczyt() as db, db.execute("SELECT liczba_uzyc FROM statystyki_uzycia_komend_kategorii WHERE user_id = ? AND server_id = ? AND nazwa_kategorii = ?", (user_id, server_id, nazwa_kategorii)) as cursor:
             result = await cursor.fetchone()
             return result[0] if result else 0
 
     # --- Metody dla Rankingów Sezonowych (Miesięcznych) ---
-    async def inkrementuj_miesieczne_xp(self, user_id: str, server_id: str, rok: int, miesiac: int, ilosc_xp: int) -> int:
+    @operacja_zapisu
+    async def inkrementuj_miesieczne_xp(self, user_id: int, server_id: int, rok: int, miesiac: int, ilosc_xp: int) -> int:
         """Inkrementuje XP użytkownika w danym miesiącu i zwraca nową sumę miesięcznego XP."""
-        await self.connection.execute(
+        async with self.connection.execute(
             """
             INSERT INTO miesieczne_xp (user_id, server_id, rok, miesiac, xp_miesieczne)
             VALUES (?, ?, ?, ?, ?)
             ON CONFLICT(user_id, server_id, rok, miesiac) DO UPDATE SET
-            xp_miesieczne = xp_miesieczne + excluded.xp_miesieczne;
+            xp_miesieczne = xp_miesieczne + excluded.xp_miesieczne
+            RETURNING xp_miesieczne;
             """, (user_id, server_id, rok, miesiac, ilosc_xp)
-        )
-        await self.connection.commit()
-        async with self.connection.execute("SELECT xp_miesieczne FROM miesieczne_xp WHERE user_id = ? AND server_id = ? AND rok = ? AND miesiac = ?", (user_id, server_id, rok, miesiac)) as cursor:
+        ) as cursor:
             result = await cursor.fetchone()
-            return result[0] if result else 0
+        await self.koordynator.zatwierdz()
+        if self.rankingi is not None:
+            rankingi = self.rankingi
+            self.koordynator.po_zatwierdzeniu(lambda: rankingi.zmien_miesieczne(server_id, user_id, rok, miesiac, ilosc_xp))
+        return result[0] if result else 0
 
-    async def pobierz_ranking_miesiecznego_xp(self, server_id: str, rok: int, miesiac: int, limit: int = 10) -> list[tuple[str, int]]:
+    async def pobierz_ranking_miesiecznego_xp(self, server_id: int, rok: int, miesiac: int, limit: int = 10, po_wyniku: int | None = None, po_user_id: int | None = None) -> list[tuple[int, int]]:
         """Pobiera ranking użytkowników na podstawie XP zdobytego w danym miesiącu."""
-        query = """
+        await self.zrzuc_bufor_xp()
+        warunek, parametry = self._warunek_po_kluczu("xp_miesieczne", po_wyniku, po_user_id)
+        query = f"""
             SELECT user_id, xp_miesieczne
             FROM miesieczne_xp
-            WHERE server_id = ? AND rok = ? AND miesiac = ?
-            ORDER BY xp_miesieczne DESC
+            WHERE server_id = ? AND rok = ? AND miesiac = ?{warunek}
+            ORDER BY xp_miesieczne DESC, user_id ASC
             LIMIT ?;
         """
-        async with self.connection.execute(query, (server_id, rok, miesiac, limit)) as cursor:
+        async with self._odczyt() as db, db.execute(query, (server_id, rok, miesiac, *parametry, limit)) as cursor:
             return await cursor.fetchall() # type: ignore
 
-    async def pobierz_miesieczne_xp_uzytkownika(self, user_id: str, server_id: str, rok: int, miesiac: int) -> int:
+    async def pobierz_miesieczne_xp_uzytkownika(self, user_id: int, server_id: int, rok: int, miesiac: int) -> int:
         """Pobiera XP zdobyte przez użytkownika w danym miesiącu."""
-        async with self.connection.execute("SELECT xp_miesieczne FROM miesieczne_xp WHERE user_id = ? AND server_id = ? AND rok = ? AND miesiac = ?", (user_id, server_id, rok, miesiac)) as cursor:
+        if self.bufor_xp is not None:
+            async with self.bufor_xp.spojny_odczyt():
+                async with self._odczyt() as db, db.execute("SELECT xp_miesieczne FROM miesieczne_xp WHERE user_id = ? AND server_id = ? AND rok = ? AND miesiac = ?", (user_id, server_id, rok, miesiac)) as cursor:
+                    result = await cursor.fetchone()
+                return (result[0] if result else 0) + self.bufor_xp.oczekujace_miesieczne_xp(user_id, server_id, rok, miesiac)
+        async with self._odczyt() as db, db.execute("SELECT xp_miesieczne FROM miesieczne_xp WHERE user_id = ? AND server_id = ? AND rok = ? AND miesiac = ?", (user_id, server_id, rok, miesiac)) as cursor:
             result = await cursor.fetchone()
             return result[0] if result else 0
 
     # --- NOWE METODY: Zarządzanie konfiguracją serwera ---
-    async def pobierz_konfiguracje_serwera(self, server_id: str) -> dict:
+    async def pobierz_konfiguracje_serwera(self, server_id: int) -> dict:
         """Pobiera konfigurację serwera z bazy danych lub zwraca domyślne wartości."""
         query = """
             SELECT xp_blocked_globally, xp_multiplier_event, xp_event_name,
@@ -710,7 +1485,8 @@ class ZarzadcaBazyDanych:
                 "live_ranking_message_id": None
             }
 
-    async def ustaw_konfiguracje_serwera(self, server_id: str, **kwargs) -> None:
+    @operacja_zapisu
+    async def ustaw_konfiguracje_serwera(self, server_id: int, **kwargs) -> None:
         """
         Ustawia lub aktualizuje konfigurację serwera w bazie danych.
         Używa ON CONFLICT DO UPDATE, aby wstawić lub zaktualizować.
@@ -747,5 +1523,5 @@ class ZarzadcaBazyDanych:
                 updated_config["live_ranking_message_id"]
             )
         )
-        await self.connection.commit()
+        await self.koordynator.zatwierdz()
 
@@ -0,0 +1,245 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import logging
+import time
+import typing
+
+import aiosqlite
+
+from database.transakcje import KoordynatorZapisu
+
+# Kolumny inkrementowane (sumujemy delty) i ustawiane (wygrywa ostatni zapis)
+KOLUMNY_DELT = ("xp", "czas_na_glosowym_sekundy", "liczba_wyslanych_wiadomosci", "liczba_dodanych_reakcji")
+KOLUMNY_USTAWIANE = (
+    "poziom", "ostatnia_wiadomosc_timestamp", "ostatnia_reakcja_timestamp",
+    "xp_zablokowane_indywidualnie", "aktualny_streak_dni", "ostatni_dzien_aktywnosci_streak",
+)
+
+# Indeksy kolumn w krotce zwracanej przez ZarzadcaBazyDanych.pobierz_doswiadczenie
+INDEKSY_KOLUMN = {
+    "xp": 2, "poziom": 3, "czas_na_glosowym_sekundy": 4,
+    "ostatnia_wiadomosc_timestamp": 5, "ostatnia_reakcja_timestamp": 6,
+    "xp_zablokowane_indywidualnie": 7, "aktualny_streak_dni": 8,
+    "ostatni_dzien_aktywnosci_streak": 9, "liczba_wyslanych_wiadomosci": 10,
+    "liczba_dodanych_reakcji": 11,
+}
+
+
+class OczekujacaZmianaXP:
+    """Scalona, jeszcze niezapisana zmiana wiersza doswiadczenie_uzytkownika."""
+    __slots__ = ("delty", "ustawione")
+
+    def __init__(self) -> None:
+        self.delty: dict[str, int] = {}
+        self.ustawione: dict[str, typing.Any] = {}
+
+    def scal(self, delty: dict[str, int], ustawione: dict[str, typing.Any]) -> None:
+        for kolumna, wartosc in delty.items():
+            if wartosc: self.delty[kolumna] = self.delty.get(kolumna, 0) + wartosc
+        self.ustawione.update(ustawione)
+
+    def naloz_na_wiersz(self, wiersz: tuple) -> tuple:
+        nowy = list(wiersz)
+        for kolumna, wartosc in self.delty.items():
+            nowy[INDEKSY_KOLUMN[kolumna]] = (nowy[INDEKSY_KOLUMN[kolumna]] or 0) + wartosc
+        for kolumna, wartosc in self.ustawione.items():
+            nowy[INDEKSY_KOLUMN[kolumna]] = wartosc
+        return tuple(nowy)
+
+
+class BuforZapisuXP:
+    """
+    Bufor write-behind dla doswiadczenie_uzytkownika i miesieczne_xp.
+    Scala delty per (user_id, server_id) w pamięci i zapisuje je jedną transakcją
+    co `co_ile_ms` milisekund albo po uzbieraniu `max_wierszy` wierszy.
+    """
+
+    def __init__(self, connection: aiosqlite.Connection, *, koordynator: KoordynatorZapisu | None = None, co_ile_ms: int = 2000, max_wierszy: int = 500, logger: logging.Logger | None = None) -> None:
+        self.connection = connection
+        self.koordynator = koordynator or KoordynatorZapisu(connection)
+        self.co_ile_ms = co_ile_ms
+        self.max_wierszy = max_wierszy
+        self.logger = logger or logging.getLogger("discord_bot")
+
+        self.oczekujace: dict[tuple[int, int], OczekujacaZmianaXP] = {}
+        self.oczekujace_miesieczne: dict[tuple[int, int, int, int], int] = {}
+
+        self._blokada = asyncio.Lock()
+        self._sygnal = asyncio.Event()
+        self._zadanie: asyncio.Task | None = None
+        self._zamkniety = False
+
+        # Metryki
+        self.liczba_zrzutow = 0
+        self.liczba_zapisanych_wierszy = 0
+        self.liczba_scalonych_zmian = 0
+        self.ostatni_rozmiar_partii = 0
+        self.max_rozmiar_partii = 0
+        self.ostatni_czas_zrzutu_ms = 0.0
+        self.max_czas_zrzutu_ms = 0.0
+        self.laczny_czas_zrzutow_ms = 0.0
+        self.liczba_bledow_zrzutu = 0
+
+    # --- Cykl życia ---
+    def uruchom(self) -> None:
+        if self._zadanie is None or self._zadanie.done():
+            self._zamkniety = False
+            self._zadanie = asyncio.create_task(self._petla_zrzutow(), name="bufor_xp_zrzuty")
+
+    async def zamknij(self) -> None:
+        """Zatrzymuje pętlę i zapisuje wszystko, co zostało w buforze."""
+        self._zamkniety = True
+        self._sygnal.set()
+        if self._zadanie is not None:
+            try:
+                await self._zadanie
+            except Exception as e:
+                self.logger.error(f"Bufor XP: błąd pętli zrzutów podczas zamykania: {e}", exc_info=True)
+            self._zadanie = None
+        await self.zrzuc()
+
+    async def _petla_zrzutow(self) -> None:
+        while not self._zamkniety:
+            try:
+                await asyncio.wait_for(self._sygnal.wait(), timeout=self.co_ile_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._sygnal.clear()
+            if self._zamkniety: break
+            try:
+                await self.zrzuc()
+            except Exception as e:
+                self.logger.error(f"Bufor XP: nieobsłużony błąd zrzutu: {e}", exc_info=True)
+
+    # --- Zapis do bufora ---
+    def dodaj(self, user_id: int, server_id: int, delty: dict[str, int], ustawione: dict[str, typing.Any], miesiac: tuple[int, int] | None = None) -> None:
+        klucz = (user_id, server_id)
+        zmiana = self.oczekujace.get(klucz)
+        if zmiana is None:
+            zmiana = self.oczekujace[klucz] = OczekujacaZmianaXP()
+        else:
+            self.liczba_scalonych_zmian += 1
+        zmiana.scal(delty, ustawione)
+
+        xp = delty.get("xp", 0)
+        if miesiac is not None and xp > 0:
+            klucz_m = (user_id, server_id, miesiac[0], miesiac[1])
+            self.oczekujace_miesieczne[klucz_m] = self.oczekujace_miesieczne.get(klucz_m, 0) + xp
+
+        if len(self.oczekujace) >= self.max_wierszy:
+            self._sygnal.set()
+
+    def naloz(self, wiersz: tuple | None) -> tuple | None:
+        """Nakłada niezapisane zmiany na wiersz odczytany z bazy."""
+        if wiersz is None: return None
+        zmiana = self.oczekujace.get((int(wiersz[0]), int(wiersz[1])))
+        return zmiana.naloz_na_wiersz(wiersz) if zmiana else wiersz
+
+    def spojny_odczyt(self) -> asyncio.Lock:
+        """Blokada, pod którą odczyt z bazy + nałożenie bufora daje spójny wynik (żaden zrzut nie jest w toku)."""
+        return self._blokada
+
+    def oczekujace_miesieczne_xp(self, user_id: int, server_id: int, rok: int, miesiac: int) -> int:
+        return self.oczekujace_miesieczne.get((user_id, server_id, rok, miesiac), 0)
+
+    # --- Zrzut ---
+    async def zrzuc(self) -> int:
+        """Zapisuje bufor jedną transakcją (albo w ramach otwartej transakcji). Zwraca liczbę zapisanych wierszy."""
+        # Kolejność blokad zawsze: zapis koordynatora, potem blokada bufora
+        async with self.koordynator.zapis(), self._blokada:
+            if not self.oczekujace and not self.oczekujace_miesieczne:
+                return 0
+            partia, self.oczekujace = self.oczekujace, {}
+            partia_miesieczna, self.oczekujace_miesieczne = self.oczekujace_miesieczne, {}
+
+            start = time.perf_counter()
+            try:
+                zapytania: dict[str, list[tuple]] = {}
+                for (user_id, server_id), zmiana in partia.items():
+                    klauzule, parametry = [], []
+                    for kolumna in KOLUMNY_DELT:
+                        if kolumna in zmiana.delty:
+                            klauzule.append(f"{kolumna} = {kolumna} + ?")
+                            parametry.append(zmiana.delty[kolumna])
+                    for kolumna in KOLUMNY_USTAWIANE:
+                        if kolumna in zmiana.ustawione:
+                            klauzule.append(f"{kolumna} = ?")
+                            parametry.append(zmiana.ustawione[kolumna])
+                    if not klauzule: continue
+                    zapytanie = f"UPDATE doswiadczenie_uzytkownika SET {', '.join(klauzule)} WHERE user_id = ? AND server_id = ?"
+                    zapytania.setdefault(zapytanie, []).append((*parametry, user_id, server_id))
+
+                for zapytanie, wiersze in zapytania.items():
+                    await self.connection.executemany(zapytanie, wiersze)
+                if partia_miesieczna:
+                    await self.connection.executemany(
+                        """
+                        INSERT INTO miesieczne_xp (user_id, server_id, rok, miesiac, xp_miesieczne)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id, server_id, rok, miesiac) DO UPDATE SET
+                        xp_miesieczne = xp_miesieczne + excluded.xp_miesieczne;
+                        """, [(*klucz, xp) for klucz, xp in partia_miesieczna.items()]
+                    )
+                await self.koordynator.zatwierdz()
+            except Exception as e:
+                self.liczba_bledow_zrzutu += 1
+                self.logger.error(f"Bufor XP: błąd zapisu partii ({len(partia)} wierszy), zmiany wracają do bufora: {e}", exc_info=True)
+                self._przywroc(partia, partia_miesieczna)
+                if self.koordynator.w_transakcji():
+                    # Wycofanie należy do właściciela transakcji
+                    raise
+                try:
+                    await self.connection.rollback()
+                except Exception:
+                    pass
+                return 0
+            # Zrzut w transakcji, która zostanie wycofana, nie może zgubić zmian
+            self.koordynator.po_wycofaniu(lambda: self._przywroc(partia, partia_miesieczna))
+
+            czas_ms = (time.perf_counter() - start) * 1000
+            rozmiar = len(partia) + len(partia_miesieczna)
+            self.liczba_zrzutow += 1
+            self.liczba_zapisanych_wierszy += rozmiar
+            self.ostatni_rozmiar_partii = rozmiar
+            self.max_rozmiar_partii = max(self.max_rozmiar_partii, rozmiar)
+            self.ostatni_czas_zrzutu_ms = czas_ms
+            self.max_czas_zrzutu_ms = max(self.max_czas_zrzutu_ms, czas_ms)
+            self.laczny_czas_zrzutow_ms += czas_ms
+            self.logger.debug(f"Bufor XP: zapisano {rozmiar} wierszy w {czas_ms:.2f} ms.")
+            return rozmiar
+
+    def _przywroc(self, partia: dict[tuple[int, int], OczekujacaZmianaXP], partia_miesieczna: dict[tuple[int, int, int, int], int]) -> None:
+        # Starsze zmiany muszą trafić przed nowsze, żeby wartości ustawiane nie cofnęły się w czasie
+        for klucz, nowsza in self.oczekujace.items():
+            starsza = partia.get(klucz)
+            if starsza is None:
+                partia[klucz] = nowsza
+            else:
+                starsza.scal(nowsza.delty, nowsza.ustawione)
+        self.oczekujace = partia
+        for klucz, xp in self.oczekujace_miesieczne.items():
+            partia_miesieczna[klucz] = partia_miesieczna.get(klucz, 0) + xp
+        self.oczekujace_miesieczne = partia_miesieczna
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            "oczekujace_wiersze": len(self.oczekujace),
+            "oczekujace_wiersze_miesieczne": len(self.oczekujace_miesieczne),
+            "liczba_zrzutow": self.liczba_zrzutow,
+            "liczba_zapisanych_wierszy": self.liczba_zapisanych_wierszy,
+            "liczba_scalonych_zmian": self.liczba_scalonych_zmian,
+            "ostatni_rozmiar_partii": self.ostatni_rozmiar_partii,
+            "max_rozmiar_partii": self.max_rozmiar_partii,
+            "sredni_rozmiar_partii": round(self.liczba_zapisanych_wierszy / self.liczba_zrzutow, 2) if self.liczba_zrzutow else 0,
+            "ostatni_czas_zrzutu_ms": round(self.ostatni_czas_zrzutu_ms, 3),
+            "max_czas_zrzutu_ms": round(self.max_czas_zrzutu_ms, 3),
+            "sredni_czas_zrzutu_ms": round(self.laczny_czas_zrzutow_ms / self.liczba_zrzutow, 3) if self.liczba_zrzutow else 0,
+            "liczba_bledow_zrzutu": self.liczba_bledow_zrzutu,
+        }
@@ -0,0 +1,78 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import typing
+from collections import OrderedDict
+
+
+class BramkaCooldownow:
+    """
+    Cooldowny XP (wiadomości, reakcje) trzymane w pamięci, kluczowane (typ zdarzenia, server_id, user_id).
+    Zdarzenie w trakcie cooldownu jest odrzucane przed jakimkolwiek dostępem do bazy.
+
+    Każdy typ ma słownik w kolejności wstawiania - przy stałym cooldownie to także kolejność wygasania,
+    więc wygasłe wpisy są zdejmowane z początku (zamortyzowane O(1)), a rozmiar ograniczony do `pojemnosc`.
+    Brak wpisu nie blokuje - wtedy decyduje znacznik czasu z bazy, jak dotąd.
+    """
+
+    def __init__(self, pojemnosc: int) -> None:
+        self.pojemnosc = pojemnosc
+        self._wpisy: dict[str, OrderedDict[tuple[int, int], int]] = {}
+        self.odrzucone: dict[str, int] = {}
+        self.przepuszczone = 0
+        self.wyrzucenia = 0
+
+    def __len__(self) -> int:
+        return sum(len(wpisy) for wpisy in self._wpisy.values())
+
+    def _wygas(self, wpisy: OrderedDict[tuple[int, int], int], teraz_ts: int) -> None:
+        while wpisy:
+            klucz, do_ts = next(iter(wpisy.items()))
+            if do_ts > teraz_ts: break
+            del wpisy[klucz]
+
+    def czy_zablokowane(self, typ: str, server_id: int, user_id: int, teraz_ts: int) -> bool:
+        wpisy = self._wpisy.get(typ)
+        do_ts = wpisy.get((server_id, user_id)) if wpisy else None
+        if do_ts is not None and teraz_ts < do_ts:
+            self.odrzucone[typ] = self.odrzucone.get(typ, 0) + 1
+            return True
+        self.przepuszczone += 1
+        return False
+
+    def zablokuj(self, typ: str, server_id: int, user_id: int, do_ts: int, teraz_ts: int) -> None:
+        """Zapamiętuje cooldown do `do_ts` (znacznik zdarzenia + długość cooldownu)."""
+        if do_ts <= teraz_ts: return
+        wpisy = self._wpisy.setdefault(typ, OrderedDict())
+        self._wygas(wpisy, teraz_ts)
+        klucz = (server_id, user_id)
+        wpisy[klucz] = do_ts
+        wpisy.move_to_end(klucz)
+        while len(self) > self.pojemnosc:
+            najwiekszy = max(self._wpisy.values(), key=len)
+            najwiekszy.popitem(last=False)
+            self.wyrzucenia += 1
+
+    def zasiej(self, typ: str, wiersze: typing.Iterable[tuple[int, int, int]], cooldown: int, teraz_ts: int) -> int:
+        """Wypełnia bramkę z (server_id, user_id, znacznik ostatniego zdarzenia) z bazy. Zwraca liczbę wpisów."""
+        aktywne = sorted((ts + cooldown, server_id, user_id) for server_id, user_id, ts in wiersze if ts and ts + cooldown > teraz_ts)
+        for do_ts, server_id, user_id in aktywne:
+            self.zablokuj(typ, server_id, user_id, do_ts, teraz_ts)
+        return len(aktywne)
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        odrzucone = sum(self.odrzucone.values())
+        sprawdzenia = odrzucone + self.przepuszczone
+        return {
+            "rozmiar": len(self),
+            "pojemnosc": self.pojemnosc,
+            "odrzucone": dict(self.odrzucone),
+            "przepuszczone": self.przepuszczone,
+            "wyrzucenia": self.wyrzucenia,
+            "wspolczynnik_odrzucen": round(odrzucone / sprawdzenia, 4) if sprawdzenia else 0,
+        }
@@ -0,0 +1,286 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+import typing
+from datetime import datetime, timedelta, UTC
+
+FunkcjaZadania = typing.Callable[[datetime], typing.Awaitable[None]]
+
+
+class BladHarmonogramu(Exception):
+    pass
+
+
+class PlanCron:
+    """
+    Plan w stylu crona (UTC): "minuta godzina dzień_miesiąca miesiąc dzień_tygodnia", pola z `*`, liczbami, listami (1,15),
+    zakresami (1-5) i krokami (*/15, 5/15, 10-30/5). Dzień tygodnia jak datetime.weekday(): 0 = poniedziałek. Gdy oba pola dni
+    są ograniczone, wystarczy zgodność jednego z nich (jak w cronie).
+    """
+    ZAKRESY = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, wyrazenie: str) -> None:
+        pola = wyrazenie.split()
+        if len(pola) != 5: raise BladHarmonogramu(f"Wyrażenie cron musi mieć 5 pól: '{wyrazenie}'")
+        self.wyrazenie = wyrazenie
+        self.minuty, self.godziny, self.dni, self.miesiace, self.dni_tygodnia = (self._pole(pole, *zakres) for pole, zakres in zip(pola, self.ZAKRESY))
+        self._dowolny_dzien, self._dowolny_dzien_tygodnia = pola[2] == "*", pola[4] == "*"
+
+    @staticmethod
+    def _pole(pole: str, minimum: int, maksimum: int) -> frozenset[int]:
+        wartosci: set[int] = set()
+        for czesc in pole.split(","):
+            zakres, _, krok = czesc.partition("/")
+            if zakres == "*": od, do = minimum, maksimum
+            elif "-" in zakres: od, do = (int(x) for x in zakres.split("-", 1))
+            else:
+                # Krok od pojedynczej wartości (5/15) biegnie do końca zakresu pola, jak w cronie
+                od = int(zakres)
+                do = maksimum if krok else od
+            if od < minimum or do > maksimum or od > do: raise BladHarmonogramu(f"Wartość '{czesc}' poza zakresem {minimum}-{maksimum}")
+            wartosci.update(range(od, do + 1, int(krok) if krok else 1))
+        return frozenset(wartosci)
+
+    def _pasuje_dzien(self, chwila: datetime) -> bool:
+        w_miesiacu, w_tygodniu = chwila.day in self.dni, chwila.weekday() in self.dni_tygodnia
+        if self._dowolny_dzien or self._dowolny_dzien_tygodnia: return w_miesiacu and w_tygodniu
+        return w_miesiacu or w_tygodniu
+
+    def nastepny(self, po: datetime) -> datetime:
+        """Pierwszy termin ściśle po `po` (przeskakuje całe miesiące, dni i godziny, które nie pasują)."""
+        chwila = po.astimezone(UTC).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        granica = chwila + timedelta(days=366 * 5)
+        while chwila < granica:
+            if chwila.month not in self.miesiace:
+                chwila = (chwila.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._pasuje_dzien(chwila):
+                chwila = chwila.replace(hour=0, minute=0) + timedelta(days=1)
+            elif chwila.hour not in self.godziny:
+                chwila = chwila.replace(minute=0) + timedelta(hours=1)
+            elif chwila.minute not in self.minuty:
+                chwila += timedelta(minutes=1)
+            else:
+                return chwila
+        raise BladHarmonogramu(f"Wyrażenie '{self.wyrazenie}' nie ma terminu w ciągu 5 lat")
+
+
+class PlanInterwal:
+    """Co `co_ile_s` sekund od poprzedniego planowanego terminu (bez dryfu, gdy zadanie trwa długo)."""
+
+    def __init__(self, co_ile_s: float) -> None:
+        if co_ile_s <= 0: raise BladHarmonogramu("Interwał musi być dodatni")
+        self.co_ile_s = co_ile_s
+
+    def nastepny(self, po: datetime) -> datetime:
+        return po + timedelta(seconds=self.co_ile_s)
+
+
+class Zadanie:
+    __slots__ = ("nazwa", "funkcja", "plan", "rozrzut_s", "nadrabiaj", "wstrzymane", "termin", "wersja", "w_toku",
+                 "uruchomienia", "bledy", "pominiete", "nadrobione", "ostatni_czas_ms", "max_czas_ms", "ostatnie_opoznienie_ms", "ostatni_blad")
+
+    def __init__(self, nazwa: str, funkcja: FunkcjaZadania, plan: PlanCron | PlanInterwal, rozrzut_s: float, nadrabiaj: int) -> None:
+        self.nazwa = nazwa
+        self.funkcja = funkcja
+        self.plan = plan
+        self.rozrzut_s = rozrzut_s
+        self.nadrabiaj = nadrabiaj # ile pominiętych terminów (np. w czasie przerwy) nadrobić po starcie; 0 = żadnego
+        self.wstrzymane = False
+        self.termin: datetime | None = None # planowany termin (bez rozrzutu)
+        self.wersja = 0 # unieważnia wpisy w kopcu po zmianie terminu
+        self.w_toku: asyncio.Task | None = None
+        self.uruchomienia = 0
+        self.bledy = 0
+        self.pominiete = 0
+        self.nadrobione = 0
+        self.ostatni_czas_ms = 0.0
+        self.max_czas_ms = 0.0
+        self.ostatnie_opoznienie_ms = 0.0
+        self.ostatni_blad: str | None = None
+
+
+class Harmonogram:
+    """
+    Wspólny harmonogram zadań okresowych bota: kopiec dokładnych terminów i jedna pętla, która śpi do najbliższego z nich.
+
+    Zadania mają plan co N sekund (PlanInterwal) albo w stylu crona (PlanCron), opcjonalny losowy rozrzut startu
+    i nadrabianie terminów pominiętych w czasie przerwy - ostatnie uruchomienia takich zadań są zapisywane przez `zapisz_termin`.
+    Funkcja zadania dostaje planowany termin (UTC). Zadanie nie biegnie równolegle samo ze sobą - termin, który
+    wypadnie w trakcie poprzedniego uruchomienia, jest pomijany (i liczony).
+    """
+
+    def __init__(self, *, zapisz_termin: typing.Callable[[str, int], typing.Awaitable[None]] | None = None, logger: logging.Logger | None = None) -> None:
+        self.zapisz_termin = zapisz_termin
+        self.logger = logger or logging.getLogger("discord_bot")
+        self.zadania: dict[str, Zadanie] = {}
+        self._kopiec: list[tuple[float, int, str, int]] = [] # (czas startu z rozrzutem, seq, nazwa, wersja)
+        self._seq = itertools.count()
+        self._zmiana = asyncio.Event()
+        self._petla: asyncio.Task | None = None
+        self._ostatnie_terminy: dict[str, int] = {}
+
+    # --- Rejestracja ---
+    def dodaj(self, nazwa: str, funkcja: FunkcjaZadania, *, co_ile_s: float | None = None, cron: str | None = None,
+              rozrzut_s: float = 0.0, nadrabiaj: int = 0) -> Zadanie:
+        """Rejestruje zadanie (albo podmienia zadanie o tej nazwie). Zadanie z interwałem startuje od razu, z cronem - w najbliższym terminie."""
+        if (co_ile_s is None) == (cron is None): raise BladHarmonogramu("Podaj dokładnie jedno z: co_ile_s, cron")
+        plan = PlanInterwal(co_ile_s) if co_ile_s is not None else PlanCron(cron) # type: ignore[arg-type]
+        poprzednie = self.zadania.get(nazwa)
+        zadanie = Zadanie(nazwa, funkcja, plan, rozrzut_s, nadrabiaj)
+        if poprzednie is not None: zadanie.w_toku = poprzednie.w_toku
+        self.zadania[nazwa] = zadanie
+        if self._petla is not None: self._zaplanuj_start(zadanie, datetime.now(UTC))
+        return zadanie
+
+    def usun(self, nazwa: str) -> None:
+        self.zadania.pop(nazwa, None)
+
+    def wstrzymaj(self, nazwa: str) -> None:
+        if nazwa in self.zadania: self.zadania[nazwa].wstrzymane = True
+
+    def wznow(self, nazwa: str) -> None:
+        if nazwa in self.zadania: self.zadania[nazwa].wstrzymane = False
+
+    def uruchom_teraz(self, nazwa: str) -> None:
+        """Przesuwa najbliższy termin zadania na teraz (dalej według planu od tej chwili)."""
+        zadanie = self.zadania.get(nazwa)
+        if zadanie is None: return
+        zadanie.wstrzymane = False
+        self._ustaw_termin(zadanie, datetime.now(UTC), rozrzut=False)
+
+    # --- Cykl życia ---
+    def uruchom(self, przed_startem: typing.Callable[[], typing.Awaitable[None]] | None = None, ostatnie_terminy: dict[str, int] | None = None) -> None:
+        """Startuje pętlę; `przed_startem` (np. czekanie na gotowość bota) jest wykonywane przed pierwszym zadaniem."""
+        self._ostatnie_terminy = dict(ostatnie_terminy or {})
+        if self._petla is None:
+            self._petla = asyncio.create_task(self._petla_harmonogramu(przed_startem), name="harmonogram")
+
+    async def zamknij(self, limit_s: float = 10.0) -> None:
+        """Zatrzymuje pętlę i czeka (do `limit_s`) na zadania w toku."""
+        if self._petla is not None:
+            self._petla.cancel()
+            await asyncio.gather(self._petla, return_exceptions=True)
+            self._petla = None
+        w_toku = [zadanie.w_toku for zadanie in self.zadania.values() if zadanie.w_toku is not None and not zadanie.w_toku.done()]
+        if w_toku:
+            _, niedokonczone = await asyncio.wait(w_toku, timeout=limit_s)
+            for task in niedokonczone: task.cancel()
+            if niedokonczone: self.logger.warning(f"Harmonogram: przerwano {len(niedokonczone)} zadań w toku przy zamykaniu.")
+
+    # --- Planowanie ---
+    def _ustaw_termin(self, zadanie: Zadanie, termin: datetime, rozrzut: bool = True) -> None:
+        zadanie.termin = termin
+        zadanie.wersja += 1
+        start = termin.timestamp() + (random.uniform(0, zadanie.rozrzut_s) if rozrzut and zadanie.rozrzut_s > 0 else 0.0)
+        heapq.heappush(self._kopiec, (start, next(self._seq), zadanie.nazwa, zadanie.wersja))
+        self._zmiana.set()
+
+    def _zaplanuj_start(self, zadanie: Zadanie, teraz: datetime) -> None:
+        """Pierwszy termin według planu; zaległe terminy od ostatniego zapisanego (najwyżej `nadrabiaj` ostatnich) idą od razu."""
+        if isinstance(zadanie.plan, PlanInterwal): self._ustaw_termin(zadanie, teraz)
+        else: self._ustaw_termin(zadanie, zadanie.plan.nastepny(teraz))
+        ostatni_ts = self._ostatnie_terminy.get(zadanie.nazwa)
+        if zadanie.nadrabiaj <= 0 or ostatni_ts is None: return
+        zalegle, termin = [], datetime.fromtimestamp(ostatni_ts, UTC)
+        while True:
+            termin = zadanie.plan.nastepny(termin)
+            if termin > teraz: break
+            zalegle.append(termin)
+            if len(zalegle) > zadanie.nadrabiaj:
+                zalegle.pop(0)
+                zadanie.pominiete += 1
+        if not zalegle: return
+        self.logger.info(f"Harmonogram: nadrabiam {len(zalegle)} pominiętych terminów zadania '{zadanie.nazwa}' (od {zalegle[0].isoformat()}).")
+        zadanie.nadrobione += len(zalegle)
+        zadanie.w_toku = asyncio.create_task(self._wykonaj(zadanie, zalegle), name=f"harmonogram_{zadanie.nazwa}")
+
+    def _nastepny_termin(self, zadanie: Zadanie, teraz: datetime) -> datetime:
+        """Kolejny termin po bieżącym, z pominięciem tych, które już minęły (zadanie się spóźniło albo trwało za długo)."""
+        termin = zadanie.plan.nastepny(zadanie.termin) # type: ignore[arg-type]
+        while termin <= teraz:
+            zadanie.pominiete += 1
+            termin = zadanie.plan.nastepny(termin)
+        return termin
+
+    # --- Pętla ---
+    async def _petla_harmonogramu(self, przed_startem: typing.Callable[[], typing.Awaitable[None]] | None) -> None:
+        if przed_startem is not None: await przed_startem()
+        teraz = datetime.now(UTC)
+        for zadanie in self.zadania.values():
+            self._zaplanuj_start(zadanie, teraz)
+            if zadanie.nadrabiaj > 0 and zadanie.nazwa not in self._ostatnie_terminy and self.zapisz_termin is not None:
+                # Pierwsze uruchomienie bota z tym zadaniem - od teraz liczą się pominięte terminy
+                await self.zapisz_termin(zadanie.nazwa, int(teraz.timestamp()))
+        while True:
+            self._zmiana.clear()
+            teraz_ts = time.time()
+            while self._kopiec and self._kopiec[0][0] <= teraz_ts:
+                _, _, nazwa, wersja = heapq.heappop(self._kopiec)
+                zadanie = self.zadania.get(nazwa)
+                if zadanie is None or zadanie.wersja != wersja: continue
+                termin = zadanie.termin
+                self._ustaw_termin(zadanie, self._nastepny_termin(zadanie, datetime.fromtimestamp(teraz_ts, UTC)))
+                if zadanie.wstrzymane: continue
+                if zadanie.w_toku is not None and not zadanie.w_toku.done():
+                    zadanie.pominiete += 1
+                    continue
+                zadanie.w_toku = asyncio.create_task(self._wykonaj(zadanie, [termin]), name=f"harmonogram_{nazwa}") # type: ignore[list-item]
+            # Najwyżej minuta snu - zmiana zegara systemowego nie przesunie terminów o więcej
+            czekaj = min(60.0, self._kopiec[0][0] - time.time()) if self._kopiec else 60.0
+            try:
+                await asyncio.wait_for(self._zmiana.wait(), timeout=max(0.0, czekaj))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _wykonaj(self, zadanie: Zadanie, terminy: list[datetime]) -> None:
+        """Wykonuje zadanie dla kolejnych terminów (więcej niż jeden przy nadrabianiu) i zapisuje ostatni wykonany."""
+        for termin in terminy:
+            start = time.perf_counter()
+            zadanie.ostatnie_opoznienie_ms = max(0.0, (time.time() - termin.timestamp()) * 1000)
+            try:
+                await zadanie.funkcja(termin)
+                zadanie.ostatni_blad = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                zadanie.bledy += 1
+                zadanie.ostatni_blad = f"{type(e).__name__}: {e}"
+                self.logger.error(f"Harmonogram: błąd zadania '{zadanie.nazwa}': {e}", exc_info=True)
+            finally:
+                zadanie.uruchomienia += 1
+                zadanie.ostatni_czas_ms = (time.perf_counter() - start) * 1000
+                if zadanie.ostatni_czas_ms > zadanie.max_czas_ms: zadanie.max_czas_ms = zadanie.ostatni_czas_ms
+            if zadanie.nadrabiaj > 0 and self.zapisz_termin is not None:
+                try:
+                    await self.zapisz_termin(zadanie.nazwa, int(termin.timestamp()))
+                except Exception as e:
+                    self.logger.error(f"Harmonogram: nie zapisano terminu zadania '{zadanie.nazwa}': {e}", exc_info=True)
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            zadanie.nazwa: {
+                "plan": zadanie.plan.wyrazenie if isinstance(zadanie.plan, PlanCron) else f"co {zadanie.plan.co_ile_s:g} s",
+                "nastepny_termin": zadanie.termin.isoformat() if zadanie.termin else None,
+                "wstrzymane": zadanie.wstrzymane,
+                "w_toku": zadanie.w_toku is not None and not zadanie.w_toku.done(),
+                "uruchomienia": zadanie.uruchomienia,
+                "bledy": zadanie.bledy,
+                "pominiete": zadanie.pominiete,
+                "nadrobione": zadanie.nadrobione,
+                "ostatni_czas_ms": round(zadanie.ostatni_czas_ms, 2),
+                "max_czas_ms": round(zadanie.max_czas_ms, 2),
+                "ostatnie_opoznienie_ms": round(zadanie.ostatnie_opoznienie_ms, 2),
+                "ostatni_blad": zadanie.ostatni_blad,
+            } for zadanie in self.zadania.values()
+        }
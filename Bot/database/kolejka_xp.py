@@ -0,0 +1,141 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import logging
+import time
+import typing
+
+
+class ZdarzenieXP(typing.NamedTuple):
+    typ: str # "wiadomosc" | "reakcja" | "glos"
+    member: typing.Any
+    guild: typing.Any
+    kanal: typing.Any
+    czas_ts: int # czas zdarzenia (cooldowny liczone od niego, nie od momentu obsłużenia)
+    przyjete: float # time.monotonic() przy wstawieniu - do metryki opóźnienia
+
+
+class KolejkaZdarzenXP:
+    """
+    Ograniczona kolejka zdarzeń XP obsługiwana przez pulę workerów w tle - listenery tylko wstawiają zdarzenie.
+    Zdarzenia są dzielone na kolejki workerów po user_id, więc zdarzenia jednego użytkownika
+    obsługuje zawsze ten sam worker, po kolei, bez blokad. Pełna kolejka odrzuca zdarzenie (i liczy je).
+
+    Worker zbiera zdarzenia przez `okno_ms` od przyjęcia pierwszego z nich i przekazuje je do `obsluz`
+    partiami - jedna lista (w kolejności przyjęcia) na parę (serwer, użytkownik).
+    """
+
+    def __init__(self, obsluz: typing.Callable[[list[ZdarzenieXP]], typing.Awaitable[None]], *, liczba_workerow: int = 4, pojemnosc: int = 10000, okno_ms: int = 0, logger: logging.Logger | None = None) -> None:
+        self.obsluz = obsluz
+        self.liczba_workerow = max(1, liczba_workerow)
+        self.pojemnosc = pojemnosc
+        self.okno_ms = okno_ms
+        self.logger = logger or logging.getLogger("discord_bot")
+
+        pojemnosc_workera = max(1, pojemnosc // self.liczba_workerow)
+        self._kolejki: list[asyncio.Queue[ZdarzenieXP]] = [asyncio.Queue(maxsize=pojemnosc_workera) for _ in range(self.liczba_workerow)]
+        self._workery: list[asyncio.Task] = []
+        self._zamknieta = False
+
+        # Metryki
+        self.przyjete = 0
+        self.przetworzone = 0
+        self.partie = 0
+        self.odrzucone = 0
+        self.bledy = 0
+        self.max_glebokosc = 0
+        self.ostatnie_opoznienie_ms = 0.0
+        self.max_opoznienie_ms = 0.0
+
+    def __len__(self) -> int:
+        return sum(kolejka.qsize() for kolejka in self._kolejki)
+
+    # --- Cykl życia ---
+    def uruchom(self) -> None:
+        self._zamknieta = False
+        if not self._workery:
+            self._workery = [asyncio.create_task(self._petla_workera(kolejka), name=f"kolejka_xp_worker_{numer}") for numer, kolejka in enumerate(self._kolejki)]
+
+    async def zamknij(self, limit_s: float = 10.0) -> None:
+        """Przestaje przyjmować zdarzenia, czeka (do `limit_s`) na obsłużenie kolejki i zatrzymuje workery."""
+        self._zamknieta = True
+        try:
+            await asyncio.wait_for(asyncio.gather(*(kolejka.join() for kolejka in self._kolejki)), timeout=limit_s)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Kolejka XP: zamknięcie bez obsłużenia {len(self)} zdarzeń (limit {limit_s} s).")
+        for worker in self._workery: worker.cancel()
+        await asyncio.gather(*self._workery, return_exceptions=True)
+        self._workery = []
+
+    # --- Wstawianie ---
+    def _kolejka(self, zdarzenie: ZdarzenieXP) -> asyncio.Queue[ZdarzenieXP]:
+        return self._kolejki[zdarzenie.member.id % self.liczba_workerow]
+
+    def wstaw(self, zdarzenie: ZdarzenieXP) -> bool:
+        """Wstawia bez czekania (dla listenerów gatewaya). Przy pełnej kolejce zdarzenie jest odrzucane - zwraca False."""
+        if self._zamknieta: return False
+        try:
+            self._kolejka(zdarzenie).put_nowait(zdarzenie)
+        except asyncio.QueueFull:
+            self.odrzucone += 1
+            if self.odrzucone == 1 or self.odrzucone % 1000 == 0:
+                self.logger.warning(f"Kolejka XP pełna - odrzucono już {self.odrzucone} zdarzeń.")
+            return False
+        self._po_wstawieniu()
+        return True
+
+    def _po_wstawieniu(self) -> None:
+        self.przyjete += 1
+        glebokosc = len(self)
+        if glebokosc > self.max_glebokosc: self.max_glebokosc = glebokosc
+
+    # --- Obsługa ---
+    async def _petla_workera(self, kolejka: asyncio.Queue[ZdarzenieXP]) -> None:
+        while True:
+            zdarzenia = [await kolejka.get()]
+            try:
+                if self.okno_ms > 0:
+                    pozostalo_s = zdarzenia[0].przyjete + self.okno_ms / 1000 - time.monotonic()
+                    if pozostalo_s > 0: await asyncio.sleep(pozostalo_s)
+                while not kolejka.empty():
+                    zdarzenia.append(kolejka.get_nowait())
+
+                self.ostatnie_opoznienie_ms = (time.monotonic() - zdarzenia[0].przyjete) * 1000
+                if self.ostatnie_opoznienie_ms > self.max_opoznienie_ms: self.max_opoznienie_ms = self.ostatnie_opoznienie_ms
+
+                partie: dict[tuple[int, int], list[ZdarzenieXP]] = {}
+                for zdarzenie in zdarzenia:
+                    partie.setdefault((zdarzenie.guild.id, zdarzenie.member.id), []).append(zdarzenie)
+                for partia in partie.values():
+                    try:
+                        await self.obsluz(partia)
+                        self.przetworzone += len(partia)
+                        self.partie += 1
+                    except Exception as e:
+                        self.bledy += 1
+                        self.logger.error(f"Kolejka XP: błąd obsługi {len(partia)} zdarzeń użytkownika {partia[0].member.id}: {e}", exc_info=True)
+            finally:
+                for _ in zdarzenia: kolejka.task_done()
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            "liczba_workerow": self.liczba_workerow,
+            "okno_ms": self.okno_ms,
+            "pojemnosc": self.pojemnosc,
+            "w_kolejce": len(self),
+            "max_glebokosc": self.max_glebokosc,
+            "przyjete": self.przyjete,
+            "przetworzone": self.przetworzone,
+            "partie": self.partie,
+            "zdarzen_na_partie": round(self.przetworzone / self.partie, 2) if self.partie else 0,
+            "odrzucone": self.odrzucone,
+            "bledy": self.bledy,
+            "ostatnie_opoznienie_ms": round(self.ostatnie_opoznienie_ms, 2),
+            "max_opoznienie_ms": round(self.max_opoznienie_ms, 2),
+        }
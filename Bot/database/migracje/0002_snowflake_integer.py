@@ -0,0 +1,59 @@
+"""
+Zmiana typu kolumn z ID Discorda (snowflake) z TEXT na INTEGER we wszystkich tabelach.
+
+SQLite nie pozwala zmienić typu kolumny, więc każda tabela jest przebudowywana:
+nowa tabela z tą samą definicją (poza typami ID) -> kopiowanie partiami -> podmiana nazw -> odtworzenie indeksów.
+Afinicja INTEGER sama zamienia tekst "1234" na liczbę przy wstawianiu.
+"""
+
+import re
+
+# tabela -> kolumny przechowujące ID Discorda
+KOLUMNY_SNOWFLAKE = {
+    "warns": ("user_id", "server_id", "moderator_id"),
+    "doswiadczenie_uzytkownika": ("user_id", "server_id"),
+    "portfel_kronikarza": ("user_id", "server_id"),
+    "nagrody_za_poziom": ("server_id", "rola_id"),
+    "miesieczne_xp": ("user_id", "server_id"),
+    "bonusy_xp_rol": ("server_id", "rola_id"),
+    "konfiguracja_xp_kanalow": ("server_id", "kanal_id"),
+    "posiadane_przedmioty": ("user_id", "server_id"),
+    "zdobyte_osiagniecia_uzytkownika": ("user_id", "server_id"),
+    "aktywne_konkursy": ("server_id", "kanal_id", "wiadomosc_id", "tworca_id", "wymagana_rola_id"),
+    "uczestnicy_konkursow": ("id_konkursu_wiadomosci", "user_id"),
+    "transakcje_premium": ("user_id", "server_id"),
+    "aktywne_role_czasowe": ("user_id", "server_id", "rola_id"),
+    "postep_misji_uzytkownika": ("user_id", "server_id"),
+    "ukonczone_misje_uzytkownika": ("user_id", "server_id"),
+    "statystyki_aktywnosci_na_kanalach": ("user_id", "server_id", "kanal_id"),
+    "statystyki_konkursow_uzytkownika": ("user_id", "server_id"),
+    "statystyki_uzycia_komend_kategorii": ("user_id", "server_id"),
+    "shop_items": ("role_id_to_grant",),
+    "server_config": ("server_id", "welcome_channel_id", "default_role_id", "live_ranking_channel_id", "live_ranking_message_id"),
+}
+
+
+def _nowa_definicja(sql: str, tabela: str, kolumny: tuple[str, ...]) -> str:
+    sql = re.sub(rf"^CREATE TABLE\s+(IF NOT EXISTS\s+)?[`\"]?{tabela}[`\"]?", f"CREATE TABLE `{tabela}_nowa`", sql.strip(), count=1, flags=re.IGNORECASE)
+    for kolumna in kolumny:
+        sql = re.sub(rf"([`\"]?\b{kolumna}\b[`\"]?\s+)TEXT\b", r"\1INTEGER", sql, count=1, flags=re.IGNORECASE)
+    return sql
+
+
+async def migruj(migrator) -> None:
+    db = migrator.polaczenie
+    for tabela, kolumny in KOLUMNY_SNOWFLAKE.items():
+        async with db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)) as cursor:
+            wiersz = await cursor.fetchone()
+        if not wiersz: continue
+        async with db.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (tabela,)) as cursor:
+            indeksy = [w[0] for w in await cursor.fetchall()]
+
+        await db.execute(f"DROP TABLE IF EXISTS `{tabela}_nowa`")
+        await db.execute(_nowa_definicja(wiersz[0], tabela, kolumny))
+        skopiowane = await migrator.w_partiach(tabela, f"INSERT INTO `{tabela}_nowa` SELECT * FROM `{tabela}` WHERE rowid BETWEEN ? AND ?")
+        await db.execute(f"DROP TABLE `{tabela}`")
+        await db.execute(f"ALTER TABLE `{tabela}_nowa` RENAME TO `{tabela}`")
+        for indeks in indeksy:
+            await db.execute(indeks)
+        migrator.logger.info(f"Migracja ID na INTEGER: {tabela} ({skopiowane} wierszy).")
@@ -0,0 +1,8 @@
+-- Indeksy pod rankingi: WHERE server_id = ? ORDER BY <wynik> DESC, user_id
+-- user_id na końcu daje jednoznaczną kolejność, potrzebną do stronicowania po kluczu (bez OFFSET).
+CREATE INDEX IF NOT EXISTS idx_doswiadczenie_ranking_xp ON doswiadczenie_uzytkownika (server_id, xp DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_doswiadczenie_ranking_wiadomosci ON doswiadczenie_uzytkownika (server_id, liczba_wyslanych_wiadomosci DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_doswiadczenie_ranking_glosowy ON doswiadczenie_uzytkownika (server_id, czas_na_glosowym_sekundy DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_portfel_ranking_dukaty ON portfel_kronikarza (server_id, gwiezdne_dukaty DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_portfel_ranking_krysztaly ON portfel_kronikarza (server_id, gwiezdne_krysztaly DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_miesieczne_xp_ranking ON miesieczne_xp (server_id, rok, miesiac, xp_miesieczne DESC, user_id);
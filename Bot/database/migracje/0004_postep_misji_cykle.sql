@@ -0,0 +1,18 @@
+-- Postęp misji kluczowany cyklem: (user, serwer, misja, warunek, id_cyklu), gdzie id_cyklu to timestamp resetu
+-- (0 dla misji jednorazowych). Nowy cykl zaczyna się od zera bez żadnego zapisu, stare cykle usuwa zadanie w tle.
+CREATE TABLE `postep_misji_uzytkownika_nowa` (
+    `id_postepu` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` INTEGER NOT NULL,
+    `server_id` INTEGER NOT NULL,
+    `id_misji` TEXT NOT NULL,
+    `typ_warunku` TEXT NOT NULL,
+    `id_cyklu` INTEGER NOT NULL DEFAULT 0,
+    `aktualna_wartosc` INTEGER DEFAULT 0,
+    UNIQUE (`user_id`, `server_id`, `id_misji`, `typ_warunku`, `id_cyklu`)
+);
+INSERT INTO `postep_misji_uzytkownika_nowa` (id_postepu, user_id, server_id, id_misji, typ_warunku, id_cyklu, aktualna_wartosc)
+    SELECT id_postepu, user_id, server_id, id_misji, typ_warunku, COALESCE(ostatni_reset_timestamp, 0), aktualna_wartosc FROM `postep_misji_uzytkownika`;
+DROP TABLE `postep_misji_uzytkownika`;
+ALTER TABLE `postep_misji_uzytkownika_nowa` RENAME TO `postep_misji_uzytkownika`;
+CREATE INDEX IF NOT EXISTS idx_postep_misji_user_server_misja ON postep_misji_uzytkownika (user_id, server_id, id_misji);
+CREATE INDEX IF NOT EXISTS idx_postep_misji_cykl ON postep_misji_uzytkownika (id_misji, id_cyklu);
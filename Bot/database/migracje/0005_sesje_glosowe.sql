@@ -0,0 +1,10 @@
+-- Otwarte sesje na kanałach głosowych z punktem kontrolnym (ostatni tick XP za głos), żeby restart bota
+-- nie gubił czasu spędzonego na kanale. Wiersz znika po zakończeniu sesji.
+CREATE TABLE IF NOT EXISTS `sesje_glosowe` (
+    `server_id` INTEGER NOT NULL,
+    `user_id` INTEGER NOT NULL,
+    `kanal_id` INTEGER NOT NULL,
+    `poczatek_timestamp` INTEGER NOT NULL,
+    `punkt_kontrolny_timestamp` INTEGER NOT NULL,
+    PRIMARY KEY (`server_id`, `user_id`)
+);
@@ -0,0 +1,6 @@
+-- Ostatni wykonany termin zadań harmonogramu, które nadrabiają pominięte terminy (np. koniec sezonu
+-- miesięcznego, gdy bot był wyłączony 1. dnia miesiąca).
+CREATE TABLE IF NOT EXISTS `harmonogram_zadan` (
+    `nazwa` TEXT PRIMARY KEY,
+    `ostatni_termin_timestamp` INTEGER NOT NULL
+);
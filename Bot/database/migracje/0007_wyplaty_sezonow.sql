@@ -0,0 +1,9 @@
+-- Wypłacone nagrody końca sezonu miesięcznego (serwer, rok, miesiąc). Wiersz powstaje w tej samej transakcji
+-- co wypłata, więc nadrabianie terminu po przerwanym zadaniu pomija serwery, które już dostały nagrody.
+CREATE TABLE IF NOT EXISTS `wyplaty_sezonow` (
+    `server_id` INTEGER NOT NULL,
+    `rok` INTEGER NOT NULL,
+    `miesiac` INTEGER NOT NULL,
+    `czas_wyplaty_timestamp` INTEGER NOT NULL,
+    PRIMARY KEY (`server_id`, `rok`, `miesiac`)
+);
@@ -0,0 +1,138 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import re
+import time
+import typing
+
+import aiosqlite
+
+KATALOG_MIGRACJI = os.path.join(os.path.realpath(os.path.dirname(__file__)), "migracje")
+WZORZEC_PLIKU_MIGRACJI = re.compile(r"^(\d{4})_([\w-]+)\.(sql|py)$")
+
+
+class Migracja(typing.NamedTuple):
+    wersja: int
+    nazwa: str
+    sciezka: str
+    rodzaj: str # "sql" albo "py"
+
+
+class BladMigracji(Exception):
+    pass
+
+
+class MigratorBazy:
+    """
+    Uruchamia numerowane migracje z katalogu `database/migracje` i zapisuje postęp w `PRAGMA user_version`.
+
+    - `NNNN_nazwa.sql` wykonuje się w całości w jednej transakcji razem ze zmianą user_version.
+    - `NNNN_nazwa.py` musi definiować `async def migruj(migrator: MigratorBazy) -> None`.
+      Może korzystać z `migrator.w_partiach(...)` do przenoszenia danych partiami (commit po każdej partii),
+      dlatego taka migracja musi być idempotentna - przerwana zostanie uruchomiona ponownie od początku.
+    """
+
+    def __init__(self, polaczenie: aiosqlite.Connection, *, katalog: str = KATALOG_MIGRACJI, rozmiar_partii: int = 5000, logger: logging.Logger | None = None) -> None:
+        self.polaczenie = polaczenie
+        self.katalog = katalog
+        self.rozmiar_partii = rozmiar_partii
+        self.logger = logger or logging.getLogger("discord_bot")
+
+    def znajdz_migracje(self) -> list[Migracja]:
+        migracje: dict[int, Migracja] = {}
+        for plik in os.listdir(self.katalog):
+            dopasowanie = WZORZEC_PLIKU_MIGRACJI.match(plik)
+            if not dopasowanie: continue
+            wersja = int(dopasowanie.group(1))
+            if wersja in migracje:
+                raise BladMigracji(f"Dwie migracje o numerze {wersja:04d}: {migracje[wersja].sciezka} i {plik}")
+            migracje[wersja] = Migracja(wersja, dopasowanie.group(2), os.path.join(self.katalog, plik), dopasowanie.group(3))
+        return [migracje[w] for w in sorted(migracje)]
+
+    async def pobierz_wersje(self) -> int:
+        async with self.polaczenie.execute("PRAGMA user_version") as cursor:
+            wynik = await cursor.fetchone()
+            return int(wynik[0]) if wynik else 0
+
+    async def migruj(self) -> int:
+        """Wykonuje brakujące migracje. Zwraca liczbę wykonanych migracji (0, gdy schemat jest aktualny)."""
+        aktualna = await self.pobierz_wersje()
+        migracje = self.znajdz_migracje()
+        docelowa = migracje[-1].wersja if migracje else 0
+
+        if aktualna >= docelowa:
+            if aktualna > docelowa:
+                self.logger.warning(f"Baza danych ma wersję schematu {aktualna}, nowszą niż znane migracje ({docelowa}).")
+            self.logger.info(f"Schemat bazy danych aktualny (wersja {aktualna}), pomijam migracje.")
+            return 0
+
+        do_wykonania = [m for m in migracje if m.wersja > aktualna]
+        self.logger.info(f"Schemat bazy danych w wersji {aktualna}, do wykonania {len(do_wykonania)} migracji (docelowa wersja {docelowa}).")
+        for migracja in do_wykonania:
+            start = time.perf_counter()
+            self.logger.info(f"Migracja {migracja.wersja:04d}_{migracja.nazwa} ({migracja.rodzaj})...")
+            try:
+                if migracja.rodzaj == "sql":
+                    await self._wykonaj_sql(migracja)
+                else:
+                    await self._wykonaj_py(migracja)
+            except Exception as e:
+                try:
+                    await self.polaczenie.rollback()
+                except Exception:
+                    pass
+                raise BladMigracji(f"Migracja {migracja.wersja:04d}_{migracja.nazwa} nie powiodła się: {e}") from e
+            self.logger.info(f"Migracja {migracja.wersja:04d}_{migracja.nazwa} zakończona w {time.perf_counter() - start:.2f} s.")
+        return len(do_wykonania)
+
+    async def _wykonaj_sql(self, migracja: Migracja) -> None:
+        with open(migracja.sciezka, "r", encoding="utf-8") as plik:
+            skrypt = plik.read()
+        # executescript sam robi COMMIT przed startem, więc transakcję otwieramy i zamykamy w skrypcie
+        await self.polaczenie.executescript(f"BEGIN;\n{skrypt}\n;PRAGMA user_version = {migracja.wersja};\nCOMMIT;")
+
+    async def _wykonaj_py(self, migracja: Migracja) -> None:
+        spec = importlib.util.spec_from_file_location(f"migracja_{migracja.wersja:04d}", migracja.sciezka)
+        if spec is None or spec.loader is None:
+            raise BladMigracji(f"Nie można załadować pliku migracji {migracja.sciezka}")
+        modul = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modul)
+        if not hasattr(modul, "migruj"):
+            raise BladMigracji(f"Plik {migracja.sciezka} nie definiuje funkcji `migruj`")
+
+        await self.polaczenie.execute("BEGIN")
+        await modul.migruj(self)
+        await self.polaczenie.execute(f"PRAGMA user_version = {migracja.wersja}")
+        await self.polaczenie.commit()
+
+    async def w_partiach(self, tabela: str, zapytanie: str, rozmiar_partii: int | None = None) -> int:
+        """
+        Wykonuje `zapytanie` dla kolejnych zakresów rowid tabeli (parametry: `?` od, `?` do), z commitem po każdej partii.
+        Zwraca liczbę zmienionych wierszy.
+        """
+        rozmiar = rozmiar_partii or self.rozmiar_partii
+        async with self.polaczenie.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {tabela}") as cursor:
+            zakres = await cursor.fetchone()
+        if not zakres or zakres[0] is None:
+            return 0
+
+        zmienione = 0
+        od, max_rowid = zakres[0], zakres[1]
+        while od <= max_rowid:
+            cursor = await self.polaczenie.execute(zapytanie, (od, od + rozmiar - 1))
+            zmienione += max(cursor.rowcount, 0)
+            await self.polaczenie.commit()
+            await self.polaczenie.execute("BEGIN")
+            od += rozmiar
+            self.logger.debug(f"Migracja {tabela}: przetworzono rowid do {min(od - 1, max_rowid)}/{max_rowid}.")
+            await asyncio.sleep(0)
+        return zmienione
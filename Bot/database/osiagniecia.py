@@ -0,0 +1,112 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import bisect
+import typing
+
+# Warunki, których wartość wynika ze stanu użytkownika (sprawdzane też przy pełnym przeglądzie, bez podanej wartości)
+WARUNKI_ZE_STANU = ("liczba_wiadomosci", "liczba_reakcji", "poziom_xp", "dlugosc_streaka", "ilosc_dukatow", "liczba_wygranych_konkursow")
+# Warunki z podindeksem: typ warunku -> (pole definicji bazowej, klucz w dodatkowe_dane)
+WARUNKI_Z_PODINDEKSEM = {
+    "liczba_wiadomosci_na_kanale": ("id_kanalu_warunku", "kanal_id"),
+    "liczba_uzyc_komend_kategorii": ("kategoria_komendy_warunku", "kategoria_komendy"),
+}
+
+
+class TierOsiagniecia(typing.NamedTuple):
+    id: str
+    prog: int
+    bit: int
+    bazowe_id: str
+    bazowe_dane: dict[str, typing.Any]
+    dane: dict[str, typing.Any]
+
+
+class ProgiOsiagniec:
+    """Tiery jednego warunku (i podindeksu) posortowane po progu, z maskami bitowymi prefiksów."""
+    __slots__ = ("progi", "tiery", "maski_prefiksow")
+
+    def __init__(self, tiery: list[TierOsiagniecia]) -> None:
+        self.tiery = sorted(tiery, key=lambda tier: tier.prog) # sortowanie stabilne - remisy w kolejności z konfiguracji
+        self.progi = [tier.prog for tier in self.tiery]
+        self.maski_prefiksow = [0]
+        for tier in self.tiery: self.maski_prefiksow.append(self.maski_prefiksow[-1] | tier.bit)
+
+    def nowo_spelnione(self, wartosc: int, zdobyte: int) -> list[TierOsiagniecia]:
+        """
+        Niezdobyte tiery z progiem <= wartosc - najniższy z każdego osiągnięcia bazowego
+        (jak dotąd: jedno nowe tier danego osiągnięcia na jedno sprawdzenie).
+        """
+        n = bisect.bisect_right(self.progi, wartosc)
+        if not self.maski_prefiksow[n] & ~zdobyte: return []
+        wynik, bazowe = [], set()
+        for tier in self.tiery[:n]:
+            if zdobyte & tier.bit or tier.bazowe_id in bazowe: continue
+            bazowe.add(tier.bazowe_id)
+            wynik.append(tier)
+        return wynik
+
+
+class IndeksOsiagniec:
+    """
+    Skompilowane DEFINICJE_OSIAGNIEC. Każdy tier dostaje kolejny bit, więc zdobyte osiągnięcia użytkownika
+    to jedna liczba (maska bitowa), a tiery są pogrupowane wg typu warunku (i kanału/kategorii) w posortowane progi.
+    """
+
+    def __init__(self, definicje: dict[str, dict[str, typing.Any]]) -> None:
+        self.numery: dict[str, int] = {}
+        grupy: dict[tuple[str, str | None], list[TierOsiagniecia]] = {}
+        for os_bazowe_id, os_bazowe_dane in definicje.items():
+            typ_warunku = os_bazowe_dane.get("typ_warunku_bazowy")
+            klucz = None
+            if typ_warunku in WARUNKI_Z_PODINDEKSEM:
+                klucz = os_bazowe_dane.get(WARUNKI_Z_PODINDEKSEM[typ_warunku][0])
+                if not klucz: typ_warunku = None # bez kanału/kategorii warunek nigdy nie jest spełniony
+            for tier_dane in os_bazowe_dane.get("tiery", []):
+                numer = self.numery.setdefault(tier_dane["id"], len(self.numery))
+                if typ_warunku is None: continue
+                tier = TierOsiagniecia(tier_dane["id"], tier_dane["wartosc_warunku"], 1 << numer, os_bazowe_id, os_bazowe_dane, tier_dane)
+                grupy.setdefault((typ_warunku, None if klucz is None else str(klucz)), []).append(tier)
+        self.progi = {klucz: ProgiOsiagniec(tiery) for klucz, tiery in grupy.items()}
+        self.typy_warunkow = {typ_warunku for typ_warunku, _ in self.progi}
+
+    def __len__(self) -> int:
+        return len(self.numery)
+
+    def __contains__(self, tier_id: str) -> bool:
+        return tier_id in self.numery
+
+    def bit(self, tier_id: str) -> int:
+        return 1 << self.numery[tier_id]
+
+    def maska(self, tier_ids: typing.Iterable[str]) -> int:
+        """Maska z listy ID tierów (tiery usunięte z konfiguracji są pomijane)."""
+        maska = 0
+        for tier_id in tier_ids:
+            numer = self.numery.get(tier_id)
+            if numer is not None: maska |= 1 << numer
+        return maska
+
+    def czy_zdobyte(self, maska: int, tier_id: str) -> bool:
+        numer = self.numery.get(tier_id)
+        return numer is not None and bool(maska >> numer & 1)
+
+    def klucz_podindeksu(self, typ_warunku: str, dodatkowe_dane: dict | None) -> str | None:
+        if typ_warunku not in WARUNKI_Z_PODINDEKSEM: return None
+        wartosc = (dodatkowe_dane or {}).get(WARUNKI_Z_PODINDEKSEM[typ_warunku][1])
+        return None if wartosc is None else str(wartosc)
+
+    def nowo_spelnione(self, typ_warunku: str, wartosc: int, zdobyte: int, klucz: str | None = None) -> list[TierOsiagniecia]:
+        progi = self.progi.get((typ_warunku, klucz))
+        return progi.nowo_spelnione(wartosc, zdobyte) if progi is not None else []
+
+    def progi_w_zakresie(self, typ_warunku: str, od: int, do: int, klucz: str | None = None) -> list[int]:
+        """Różne progi tierów z przedziału (od, do], rosnąco."""
+        progi = self.progi.get((typ_warunku, klucz))
+        if progi is None: return []
+        return sorted(set(progi.progi[bisect.bisect_right(progi.progi, od):bisect.bisect_right(progi.progi, do)]))
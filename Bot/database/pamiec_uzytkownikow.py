@@ -0,0 +1,157 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import itertools
+import typing
+from collections import OrderedDict
+
+from database.bufor_xp import OczekujacaZmianaXP
+
+
+class StanUzytkownika:
+    """Ostatnio znane wiersze użytkownika na serwerze (None = jeszcze nie wczytany)."""
+    __slots__ = ("doswiadczenie", "portfel", "osiagniecia", "misje")
+
+    def __init__(self) -> None:
+        self.doswiadczenie: tuple | None = None
+        self.portfel: tuple | None = None
+        self.osiagniecia: int | None = None # maska bitowa wg IndeksOsiagniec
+        self.misje: dict[str, int] | None = None # id_misji -> czas ostatniego ukończenia
+
+
+class PamiecUzytkownikow:
+    """
+    Ograniczona pamięć podręczna LRU stanu użytkowników, kluczowana (server_id, user_id).
+    Wypełniana przy odczycie (read-through), a ZarzadcaBazyDanych aktualizuje ją po każdym zatwierdzonym
+    zapisie (write-through), więc trzymane wiersze zawsze odpowiadają bazie razem z buforem XP.
+
+    Chybienia są czytane bez blokady zapisu (`wczytaj`); każda zmiana wpisu unieważnia trwające wczytanie,
+    więc wiersz przeczytany przed zatwierdzonym w międzyczasie zapisem nie trafia do pamięci.
+    """
+
+    def __init__(self, pojemnosc: int) -> None:
+        self.pojemnosc = pojemnosc
+        self._stany: OrderedDict[tuple[int, int], StanUzytkownika] = OrderedDict()
+        self._generacje = itertools.count(1)
+        self._wczytywane: dict[tuple[int, int, str], int] = {} # (server_id, user_id, pole) -> generacja trwającego wczytania
+        self.trafienia = 0
+        self.chybienia = 0
+        self.wyrzucenia = 0
+        self.odrzucone_wczytania = 0
+
+    def __len__(self) -> int:
+        return len(self._stany)
+
+    def _stan(self, server_id: int, user_id: int, utworz: bool = False) -> StanUzytkownika | None:
+        klucz = (server_id, user_id)
+        stan = self._stany.get(klucz)
+        if stan is not None:
+            self._stany.move_to_end(klucz)
+        elif utworz:
+            stan = self._stany[klucz] = StanUzytkownika()
+            while len(self._stany) > self.pojemnosc:
+                self._stany.popitem(last=False)
+                self.wyrzucenia += 1
+        return stan
+
+    def _odczytaj(self, server_id: int, user_id: int, pole: str) -> typing.Any:
+        stan = self._stan(server_id, user_id)
+        wartosc = getattr(stan, pole) if stan is not None else None
+        if wartosc is None: self.chybienia += 1
+        else: self.trafienia += 1
+        return wartosc
+
+    # --- Odczyt ---
+    def doswiadczenie(self, server_id: int, user_id: int) -> tuple | None:
+        return self._odczytaj(server_id, user_id, "doswiadczenie")
+
+    def portfel(self, server_id: int, user_id: int) -> tuple | None:
+        return self._odczytaj(server_id, user_id, "portfel")
+
+    def osiagniecia(self, server_id: int, user_id: int) -> int | None:
+        return self._odczytaj(server_id, user_id, "osiagniecia")
+
+    def misje(self, server_id: int, user_id: int) -> dict[str, int] | None:
+        return self._odczytaj(server_id, user_id, "misje")
+
+    async def wczytaj(self, server_id: int, user_id: int, pole: str, odczyt: typing.Callable[[], typing.Awaitable[typing.Any]]) -> typing.Any:
+        """
+        Chybienie: `odczyt()` (z puli odczytu, bez blokady zapisu) i wpis do pamięci, o ile w trakcie odczytu
+        nie było zmiany tego pola użytkownika. Zwraca odczytaną wartość w obu przypadkach.
+        """
+        klucz = (server_id, user_id, pole)
+        generacja = self._wczytywane.get(klucz)
+        if generacja is None: generacja = self._wczytywane[klucz] = next(self._generacje)
+        try:
+            wartosc = await odczyt()
+        finally:
+            aktualne = self._wczytywane.get(klucz) == generacja
+            if aktualne: del self._wczytywane[klucz]
+        if not aktualne: self.odrzucone_wczytania += 1
+        elif wartosc is not None: setattr(self._stan(server_id, user_id, utworz=True), pole, wartosc)
+        return wartosc
+
+    def _zmiana(self, server_id: int, user_id: int, pole: str) -> None:
+        self._wczytywane.pop((server_id, user_id, pole), None)
+
+    # --- Zapis ---
+    def ustaw_doswiadczenie(self, wiersz: tuple) -> None:
+        self._zmiana(wiersz[1], wiersz[0], "doswiadczenie")
+        self._stan(wiersz[1], wiersz[0], utworz=True).doswiadczenie = tuple(wiersz) # type: ignore
+
+    def ustaw_portfel(self, wiersz: tuple) -> None:
+        self._zmiana(wiersz[1], wiersz[0], "portfel")
+        self._stan(wiersz[1], wiersz[0], utworz=True).portfel = tuple(wiersz) # type: ignore
+
+    def ustaw_osiagniecia(self, server_id: int, user_id: int, maska: int) -> None:
+        self._zmiana(server_id, user_id, "osiagniecia")
+        self._stan(server_id, user_id, utworz=True).osiagniecia = maska # type: ignore
+
+    def dodaj_osiagniecie(self, server_id: int, user_id: int, bit: int) -> None:
+        """Ustawia bit zdobytego tieru, jeśli maska użytkownika jest w pamięci."""
+        self._zmiana(server_id, user_id, "osiagniecia")
+        stan = self._stany.get((server_id, user_id))
+        if stan is not None and stan.osiagniecia is not None: stan.osiagniecia |= bit
+
+    def ustaw_misje(self, server_id: int, user_id: int, misje: dict[str, int]) -> None:
+        self._zmiana(server_id, user_id, "misje")
+        self._stan(server_id, user_id, utworz=True).misje = misje # type: ignore
+
+    def dodaj_ukonczenie_misji(self, server_id: int, user_id: int, id_misji: str, czas_ts: int) -> None:
+        self._zmiana(server_id, user_id, "misje")
+        stan = self._stany.get((server_id, user_id))
+        if stan is not None and stan.misje is not None and czas_ts >= stan.misje.get(id_misji, czas_ts): stan.misje[id_misji] = czas_ts
+
+    def zmien_doswiadczenie(self, server_id: int, user_id: int, delty: dict[str, int], ustawione: dict[str, typing.Any]) -> None:
+        """Nakłada zmianę na zapamiętany wiersz; niewczytanych użytkowników pomija (wczytają się przy odczycie)."""
+        self._zmiana(server_id, user_id, "doswiadczenie")
+        stan = self._stany.get((server_id, user_id))
+        if stan is None or stan.doswiadczenie is None: return
+        zmiana = OczekujacaZmianaXP()
+        zmiana.scal(delty, ustawione)
+        stan.doswiadczenie = zmiana.naloz_na_wiersz(stan.doswiadczenie)
+
+    def zapomnij(self, server_id: int, user_id: int) -> None:
+        for pole in StanUzytkownika.__slots__: self._zmiana(server_id, user_id, pole)
+        self._stany.pop((server_id, user_id), None)
+
+    def zapomnij_osiagniecia(self) -> None:
+        for klucz in [klucz for klucz in self._wczytywane if klucz[2] == "osiagniecia"]: del self._wczytywane[klucz]
+        for stan in self._stany.values(): stan.osiagniecia = None
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        odczyty = self.trafienia + self.chybienia
+        return {
+            "rozmiar": len(self._stany),
+            "pojemnosc": self.pojemnosc,
+            "trafienia": self.trafienia,
+            "chybienia": self.chybienia,
+            "wyrzucenia": self.wyrzucenia,
+            "odrzucone_wczytania": self.odrzucone_wczytania,
+            "wspolczynnik_trafien": round(self.trafienia / odczyty, 4) if odczyty else 0,
+        }
@@ -0,0 +1,49 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import typing
+
+import aiosqlite
+
+
+class PolitykaXPSerwera:
+    """
+    Konfiguracja XP kanałów i bonusy XP ról jednego serwera, trzymane w słownikach.
+    Budowana raz z bazy, unieważniana przez metody zapisujące te tabele - wyliczanie mnożników nie czyta bazy.
+    """
+    __slots__ = ("server_id", "kanaly", "bonusy_rol")
+
+    def __init__(self, server_id: int, kanaly: dict[int, tuple[bool, float]], bonusy_rol: dict[int, float]) -> None:
+        self.server_id = server_id
+        self.kanaly = kanaly # kanal_id -> (xp_zablokowane, mnoznik_xp_kanalu)
+        self.bonusy_rol = bonusy_rol # rola_id -> mnoznik_xp_roli
+
+    @classmethod
+    async def wczytaj(cls, polaczenie: aiosqlite.Connection, server_id: int) -> "PolitykaXPSerwera":
+        async with polaczenie.execute("SELECT kanal_id, xp_zablokowane, mnoznik_xp_kanalu FROM konfiguracja_xp_kanalow WHERE server_id = ?", (server_id,)) as cursor:
+            kanaly = {int(kanal_id): (bool(zablokowane), mnoznik) async for kanal_id, zablokowane, mnoznik in cursor}
+        async with polaczenie.execute("SELECT rola_id, mnoznik_xp_roli FROM bonusy_xp_rol WHERE server_id = ?", (server_id,)) as cursor:
+            bonusy_rol = {int(rola_id): mnoznik async for rola_id, mnoznik in cursor}
+        return cls(server_id, kanaly, bonusy_rol)
+
+    def konfiguracja_kanalu(self, kanal_id: int) -> tuple[bool, float] | None:
+        return self.kanaly.get(kanal_id)
+
+    def czy_kanal_zablokowany(self, kanal_id: int) -> bool:
+        konfiguracja = self.kanaly.get(kanal_id)
+        return konfiguracja is not None and konfiguracja[0]
+
+    def bonus_kanalu(self, kanal_id: int) -> float:
+        """Dodatek do mnożnika za kanał (mnożnik - 1.0, 0.0 dla kanału bez konfiguracji)."""
+        konfiguracja = self.kanaly.get(kanal_id)
+        return konfiguracja[1] - 1.0 if konfiguracja is not None else 0.0
+
+    def bonus_rol(self, role_ids: typing.Iterable[int]) -> float:
+        """Suma dodatków (mnożnik - 1.0) ze wszystkich ról użytkownika, które mają bonus XP."""
+        if not self.bonusy_rol: return 0.0
+        return sum(self.bonusy_rol[rola_id] - 1.0 for rola_id in role_ids if rola_id in self.bonusy_rol)
@@ -0,0 +1,64 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import contextlib
+import typing
+
+import aiosqlite
+
+
+class PulaPolaczen:
+    """
+    Jedno połączenie zapisujące i pula połączeń tylko do odczytu do tej samej bazy w trybie WAL.
+    Czytelnicy nie czekają na zapisy (WAL), więc odczyty API i komend nie blokują ścieżki XP.
+    """
+
+    def __init__(self, sciezka: str, zapis: aiosqlite.Connection, czytelnicy: list[aiosqlite.Connection]) -> None:
+        self.sciezka = sciezka
+        self.zapis = zapis
+        self.czytelnicy = czytelnicy
+        self._wolni: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        for polaczenie in czytelnicy:
+            self._wolni.put_nowait(polaczenie)
+
+    @classmethod
+    async def otworz(cls, sciezka: str, *, liczba_czytelnikow: int = 4, busy_timeout_ms: int = 5000) -> "PulaPolaczen":
+        zapis = await aiosqlite.connect(sciezka)
+        await zapis.execute("PRAGMA journal_mode = WAL")
+        await zapis.execute("PRAGMA synchronous = NORMAL")
+        await zapis.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+
+        czytelnicy = []
+        for _ in range(max(0, liczba_czytelnikow)):
+            polaczenie = await aiosqlite.connect(sciezka)
+            await polaczenie.execute("PRAGMA query_only = ON")
+            await polaczenie.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+            czytelnicy.append(polaczenie)
+        return cls(sciezka, zapis, czytelnicy)
+
+    @contextlib.asynccontextmanager
+    async def odczyt(self) -> typing.AsyncIterator[aiosqlite.Connection]:
+        """Wypożycza połączenie tylko do odczytu (albo połączenie zapisujące, gdy pula jest pusta)."""
+        if not self.czytelnicy:
+            yield self.zapis
+            return
+        polaczenie = await self._wolni.get()
+        try:
+            yield polaczenie
+        finally:
+            self._wolni.put_nowait(polaczenie)
+
+    async def zamknij(self) -> None:
+        for polaczenie in self.czytelnicy:
+            try:
+                await polaczenie.close()
+            except Exception:
+                pass
+        self.czytelnicy = []
+        await self.zapis.close()
@@ -0,0 +1,243 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import time
+import typing
+from bisect import bisect_left, insort
+
+import aiosqlite
+
+# Metryki rankingów trzymanych w pamięci
+METRYKI_RANKINGOW = ("xp", "wiadomosci", "czas_glosowy", "dukaty", "krysztaly", "miesieczne_xp")
+
+
+class ListaUporzadkowana:
+    """
+    Posortowana lista kluczy podzielona na bloki, z drzewem Fenwicka na rozmiarach bloków.
+    Wstawianie, usuwanie, pozycja klucza i klucz na pozycji: O(log n) + przesunięcie w obrębie jednego bloku.
+    """
+    ROZMIAR_BLOKU = 512
+
+    def __init__(self, klucze: typing.Iterable[tuple] = ()) -> None:
+        posortowane = sorted(klucze)
+        r = self.ROZMIAR_BLOKU
+        self._bloki: list[list[tuple]] = [posortowane[i:i + r] for i in range(0, len(posortowane), r)]
+        self._maksima: list[tuple] = [blok[-1] for blok in self._bloki]
+        self._dlugosc = len(posortowane)
+        self._przebuduj_fenwick()
+
+    def __len__(self) -> int:
+        return self._dlugosc
+
+    # --- Drzewo Fenwicka na rozmiarach bloków ---
+    def _przebuduj_fenwick(self) -> None:
+        n = len(self._bloki)
+        drzewo = [0] * (n + 1)
+        for i, blok in enumerate(self._bloki, 1):
+            drzewo[i] += len(blok)
+            rodzic = i + (i & -i)
+            if rodzic <= n: drzewo[rodzic] += drzewo[i]
+        self._fenwick = drzewo
+
+    def _fenwick_dodaj(self, blok: int, delta: int) -> None:
+        i, n = blok + 1, len(self._bloki)
+        while i <= n:
+            self._fenwick[i] += delta
+            i += i & -i
+
+    def _przed_blokiem(self, blok: int) -> int:
+        """Liczba kluczy w blokach [0, blok)."""
+        suma = 0
+        while blok > 0:
+            suma += self._fenwick[blok]
+            blok -= blok & -blok
+        return suma
+
+    def _znajdz_indeks(self, indeks: int) -> tuple[int, int]:
+        """Zamienia pozycję globalną na (numer bloku, pozycja w bloku)."""
+        blok, n = 0, len(self._bloki)
+        krok = 1 << (n.bit_length() - 1) if n else 0
+        while krok:
+            nastepny = blok + krok
+            if nastepny <= n and self._fenwick[nastepny] <= indeks:
+                blok = nastepny
+                indeks -= self._fenwick[nastepny]
+            krok >>= 1
+        return blok, indeks
+
+    # --- Operacje ---
+    def dodaj(self, klucz: tuple) -> None:
+        if not self._bloki:
+            self._bloki, self._maksima, self._dlugosc = [[klucz]], [klucz], 1
+            self._przebuduj_fenwick()
+            return
+        i = min(bisect_left(self._maksima, klucz), len(self._bloki) - 1)
+        blok = self._bloki[i]
+        insort(blok, klucz)
+        self._maksima[i] = blok[-1]
+        self._dlugosc += 1
+        r = self.ROZMIAR_BLOKU
+        if len(blok) > 2 * r:
+            self._bloki[i:i + 1] = [blok[:r], blok[r:]]
+            self._maksima[i:i + 1] = [blok[r - 1], blok[-1]]
+            self._przebuduj_fenwick()
+        else:
+            self._fenwick_dodaj(i, 1)
+
+    def usun(self, klucz: tuple) -> bool:
+        i = bisect_left(self._maksima, klucz)
+        if i == len(self._bloki): return False
+        blok = self._bloki[i]
+        j = bisect_left(blok, klucz)
+        if j == len(blok) or blok[j] != klucz: return False
+        del blok[j]
+        self._dlugosc -= 1
+        if blok:
+            self._maksima[i] = blok[-1]
+            self._fenwick_dodaj(i, -1)
+        else:
+            del self._bloki[i], self._maksima[i]
+            self._przebuduj_fenwick()
+        return True
+
+    def indeks(self, klucz: tuple) -> int:
+        """Liczba kluczy mniejszych od `klucz` (czyli jego pozycja, licząc od 0)."""
+        i = bisect_left(self._maksima, klucz)
+        if i == len(self._bloki): return self._dlugosc
+        return self._przed_blokiem(i) + bisect_left(self._bloki[i], klucz)
+
+    def wycinek(self, od: int, do: int) -> list[tuple]:
+        od, do = max(0, od), min(do, self._dlugosc)
+        if od >= do: return []
+        i, j = self._znajdz_indeks(od)
+        wynik: list[tuple] = []
+        while len(wynik) < do - od:
+            blok = self._bloki[i]
+            wynik.extend(blok[j:j + (do - od - len(wynik))])
+            i, j = i + 1, 0
+        return wynik
+
+
+class RankingGildii:
+    """Ranking jednej metryki na jednym serwerze: wynik malejąco, przy remisie user_id rosnąco (jak w SQL)."""
+    __slots__ = ("wyniki", "lista")
+
+    def __init__(self, wyniki: dict[int, int] | None = None) -> None:
+        self.wyniki: dict[int, int] = wyniki or {}
+        self.lista = ListaUporzadkowana((-wynik, user_id) for user_id, wynik in self.wyniki.items())
+
+    def __len__(self) -> int:
+        return len(self.wyniki)
+
+    def ustaw(self, user_id: int, wynik: int) -> None:
+        stary = self.wyniki.get(user_id)
+        if stary == wynik: return
+        if stary is not None: self.lista.usun((-stary, user_id))
+        self.wyniki[user_id] = wynik
+        self.lista.dodaj((-wynik, user_id))
+
+    def zmien(self, user_id: int, delta: int) -> None:
+        if delta: self.ustaw(user_id, self.wyniki.get(user_id, 0) + delta)
+
+    def pozycja(self, user_id: int) -> int | None:
+        """Miejsce w rankingu, licząc od 1."""
+        wynik = self.wyniki.get(user_id)
+        return None if wynik is None else self.lista.indeks((-wynik, user_id)) + 1
+
+    def top(self, limit: int, od: int = 0) -> list[tuple[int, int]]:
+        return [(user_id, -ujemny_wynik) for ujemny_wynik, user_id in self.lista.wycinek(od, od + limit)]
+
+    def sasiedzi(self, user_id: int, ile: int) -> list[tuple[int, int, int]]:
+        """(miejsce, user_id, wynik) dla `ile` pozycji nad i pod użytkownikiem, razem z nim."""
+        pozycja = self.pozycja(user_id)
+        if pozycja is None: return []
+        od = max(0, pozycja - 1 - ile)
+        return [(od + i + 1, uid, wynik) for i, (uid, wynik) in enumerate(self.top(pozycja + ile - od, od))]
+
+
+class RankingiPamieciowe:
+    """
+    Rankingi wszystkich serwerów trzymane w pamięci. Budowane raz z bazy przy starcie,
+    potem aktualizowane przyrostowo przez ZarzadcaBazyDanych przy każdym zapisie XP/portfela.
+    Ranking miesięczny dotyczy tylko bieżącego miesiąca.
+    """
+
+    def __init__(self) -> None:
+        self._rankingi: dict[tuple[int, str], RankingGildii] = {}
+        self.miesiac: tuple[int, int] | None = None
+        self.czas_budowy_ms = 0.0
+
+    def ranking(self, server_id: int, metryka: str) -> RankingGildii:
+        klucz = (server_id, metryka)
+        ranking = self._rankingi.get(klucz)
+        if ranking is None:
+            ranking = self._rankingi[klucz] = RankingGildii()
+        return ranking
+
+    async def zbuduj(self, db: aiosqlite.Connection, rok: int, miesiac: int) -> None:
+        start = time.perf_counter()
+        wyniki: dict[tuple[int, str], dict[int, int]] = {}
+        async with db.execute("SELECT server_id, user_id, xp, liczba_wyslanych_wiadomosci, czas_na_glosowym_sekundy FROM doswiadczenie_uzytkownika") as cursor:
+            async for server_id, user_id, xp, wiadomosci, czas_glosowy in cursor:
+                wyniki.setdefault((server_id, "xp"), {})[user_id] = xp or 0
+                wyniki.setdefault((server_id, "wiadomosci"), {})[user_id] = wiadomosci or 0
+                wyniki.setdefault((server_id, "czas_glosowy"), {})[user_id] = czas_glosowy or 0
+        async with db.execute("SELECT server_id, user_id, gwiezdne_dukaty, gwiezdne_krysztaly FROM portfel_kronikarza") as cursor:
+            async for server_id, user_id, dukaty, krysztaly in cursor:
+                wyniki.setdefault((server_id, "dukaty"), {})[user_id] = dukaty or 0
+                wyniki.setdefault((server_id, "krysztaly"), {})[user_id] = krysztaly or 0
+        async with db.execute("SELECT server_id, user_id, xp_miesieczne FROM miesieczne_xp WHERE rok = ? AND miesiac = ?", (rok, miesiac)) as cursor:
+            async for server_id, user_id, xp_miesieczne in cursor:
+                wyniki.setdefault((server_id, "miesieczne_xp"), {})[user_id] = xp_miesieczne or 0
+        self._rankingi = {klucz: RankingGildii(w) for klucz, w in wyniki.items()}
+        self.miesiac = (rok, miesiac)
+        self.czas_budowy_ms = (time.perf_counter() - start) * 1000
+
+    # --- Aktualizacje z warstwy zapisu ---
+    def zmien(self, server_id: int, user_id: int, metryka: str, delta: int) -> None:
+        if delta: self.ranking(server_id, metryka).zmien(user_id, delta)
+
+    def ustaw(self, server_id: int, user_id: int, metryka: str, wynik: int) -> None:
+        self.ranking(server_id, metryka).ustaw(user_id, wynik)
+
+    def dodaj_jesli_brak(self, server_id: int, user_id: int, *metryki: str) -> None:
+        for metryka in metryki:
+            ranking = self.ranking(server_id, metryka)
+            if user_id not in ranking.wyniki: ranking.ustaw(user_id, 0)
+
+    def zmien_miesieczne(self, server_id: int, user_id: int, rok: int, miesiac: int, delta: int) -> None:
+        if self.miesiac is None or (rok, miesiac) > self.miesiac:
+            # Nowy miesiąc - ranking sezonu zaczyna się od zera
+            self._rankingi = {k: r for k, r in self._rankingi.items() if k[1] != "miesieczne_xp"}
+            self.miesiac = (rok, miesiac)
+        if (rok, miesiac) == self.miesiac:
+            self.zmien(server_id, user_id, "miesieczne_xp", delta)
+
+    # --- Odczyt ---
+    def top(self, server_id: int, metryka: str, limit: int = 10, od: int = 0) -> list[tuple[int, int]]:
+        ranking = self._rankingi.get((server_id, metryka))
+        return ranking.top(limit, od) if ranking else []
+
+    def pozycja(self, server_id: int, metryka: str, user_id: int) -> tuple[int, int] | None:
+        """(miejsce, liczba sklasyfikowanych) albo None, gdy użytkownika nie ma w rankingu."""
+        ranking = self._rankingi.get((server_id, metryka))
+        if ranking is None: return None
+        pozycja = ranking.pozycja(user_id)
+        return (pozycja, len(ranking)) if pozycja is not None else None
+
+    def sasiedzi(self, server_id: int, metryka: str, user_id: int, ile: int = 2) -> list[tuple[int, int, int]]:
+        ranking = self._rankingi.get((server_id, metryka))
+        return ranking.sasiedzi(user_id, ile) if ranking else []
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            "liczba_rankingow": len(self._rankingi),
+            "liczba_wpisow": sum(len(r) for r in self._rankingi.values()),
+            "miesiac": list(self.miesiac) if self.miesiac else None,
+            "czas_budowy_ms": round(self.czas_budowy_ms, 3),
+        }
@@ -0,0 +1,85 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import time
+import typing
+
+
+class SesjaGlosowa:
+    __slots__ = ("kanal_id", "poczatek_ts", "poczatek_mono")
+
+    def __init__(self, kanal_id: int, poczatek_ts: int, poczatek_mono: float) -> None:
+        self.kanal_id = kanal_id
+        self.poczatek_ts = poczatek_ts # czas ścienny - do zapisu w bazie
+        self.poczatek_mono = poczatek_mono # time.monotonic() - do liczenia długości (odporne na zmiany zegara)
+
+
+class SesjeGlosowe:
+    """
+    Otwarte sesje aktywności na kanałach głosowych ({server_id: {user_id: SesjaGlosowa}}), budowane z różnic stanu
+    w on_voice_state_update. Długość sesji liczona zegarem monotonicznym; po restarcie sesje są odtwarzane
+    z punktów kontrolnych zapisywanych w bazie przy każdym ticku XP za głos.
+    """
+
+    def __init__(self) -> None:
+        self._sesje: dict[int, dict[int, SesjaGlosowa]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(sesje) for sesje in self._sesje.values())
+
+    def __contains__(self, klucz: tuple[int, int]) -> bool:
+        server_id, user_id = klucz
+        return user_id in self._sesje.get(server_id, {})
+
+    def serwery(self) -> list[int]:
+        return list(self._sesje)
+
+    def uzytkownicy(self, server_id: int) -> dict[int, SesjaGlosowa]:
+        return self._sesje.get(server_id, {})
+
+    def rozpocznij(self, server_id: int, user_id: int, kanal_id: int, poczatek_ts: int | None = None) -> SesjaGlosowa:
+        """Otwiera sesję (od `poczatek_ts`, domyślnie teraz). Otwarta już sesja jest zachowywana - zmienia się tylko kanał."""
+        sesja = self._sesje.get(server_id, {}).get(user_id)
+        if sesja is not None:
+            sesja.kanal_id = kanal_id
+            return sesja
+        teraz_ts = int(time.time())
+        poczatek_ts = teraz_ts if poczatek_ts is None else min(poczatek_ts, teraz_ts)
+        sesja = SesjaGlosowa(kanal_id, poczatek_ts, time.monotonic() - (teraz_ts - poczatek_ts))
+        self._sesje.setdefault(server_id, {})[user_id] = sesja
+        return sesja
+
+    def zakoncz(self, server_id: int, user_id: int) -> tuple[SesjaGlosowa, int] | None:
+        """Zamyka sesję - zwraca (sesja, długość w sekundach) albo None, gdy sesji nie było."""
+        sesje = self._sesje.get(server_id)
+        sesja = sesje.pop(user_id, None) if sesje else None
+        if sesja is None: return None
+        if not sesje: del self._sesje[server_id]
+        return sesja, max(0, int(time.monotonic() - sesja.poczatek_mono))
+
+    def do_zapisu(self) -> list[tuple[int, int, int, int]]:
+        """(server_id, user_id, kanal_id, poczatek_ts) wszystkich otwartych sesji - do punktu kontrolnego."""
+        return [(server_id, user_id, sesja.kanal_id, sesja.poczatek_ts) for server_id, sesje in self._sesje.items() for user_id, sesja in sesje.items()]
+
+    def przywroc(self, wiersze: typing.Iterable[tuple[int, int, int, int, int]], czy_aktywny: typing.Callable[[int, int], int | None],
+                 maks_przerwa_s: int) -> list[tuple[int, int, int, int]]:
+        """
+        Odtwarza sesje z bazy. `czy_aktywny(server_id, user_id)` zwraca ID kanału, na którym użytkownik jest teraz aktywny (albo None).
+        Sesja trwa dalej, gdy użytkownik nadal jest aktywny, a punkt kontrolny nie jest starszy niż `maks_przerwa_s`.
+        Pozostałe są zamykane na punkcie kontrolnym - zwraca je jako (server_id, user_id, kanal_id, sekundy) do rozliczenia.
+        """
+        teraz_ts = int(time.time())
+        zamkniete = []
+        for server_id, user_id, kanal_id, poczatek_ts, punkt_kontrolny_ts in wiersze:
+            aktualny_kanal_id = czy_aktywny(server_id, user_id)
+            if aktualny_kanal_id is not None and teraz_ts - punkt_kontrolny_ts <= maks_przerwa_s:
+                self.rozpocznij(server_id, user_id, aktualny_kanal_id, poczatek_ts)
+                continue
+            zamkniete.append((server_id, user_id, kanal_id, max(0, punkt_kontrolny_ts - poczatek_ts)))
+            if aktualny_kanal_id is not None: self.rozpocznij(server_id, user_id, aktualny_kanal_id)
+        return zamkniete
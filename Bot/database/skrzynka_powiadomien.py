@@ -0,0 +1,305 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import typing
+
+# Klasy priorytetu (mniejsza liczba = ważniejsze)
+PRIORYTET_WYSOKI = 0 # awans
+PRIORYTET_NORMALNY = 1 # osiągnięcie
+PRIORYTET_NISKI = 2 # misja
+
+Cel = tuple[str, int] # ("kanal", id_kanalu) | ("dm", id_uzytkownika)
+
+
+class PonowPozniej(Exception):
+    """
+    Cel jest limitowany (HTTP 429) - przesyłki wracają do kolejki celu, a cel czeka `retry_after` sekund.
+    `wyslane` - ile pierwszych przesyłek zdążyło wyjść wcześniejszymi wiadomościami (te nie wracają).
+    """
+    def __init__(self, retry_after: float, wyslane: int = 0) -> None:
+        super().__init__(f"Limit - ponów za {retry_after:.2f} s")
+        self.retry_after = retry_after
+        self.wyslane = wyslane
+
+
+class CelNiedostepny(Exception):
+    """Nie można wysłać na ten cel (brak kanału, brak uprawnień, zablokowane DM) - przesyłka idzie na kolejny cel."""
+    def __init__(self, *args: typing.Any, wyslane: int = 0) -> None:
+        super().__init__(*args)
+        self.wyslane = wyslane # jak w PonowPozniej
+
+
+class Powiadomienie(typing.NamedTuple):
+    priorytet: int
+    cele: tuple[Cel, ...] # w kolejności preferencji - kolejne to cele zapasowe
+    tresc: typing.Any # ładunek dla funkcji wysyłającej (np. embed)
+    klucz_laczenia: typing.Hashable | None # powiadomienia z tym samym kluczem w oknie łączą się w jedną wiadomość
+    przyjete: float # time.monotonic() przy wstawieniu
+
+
+class Przesylka:
+    """
+    Połączone powiadomienia jednego klucza - najważniejsze z nich decyduje o priorytecie i pierwszym celu;
+    cele zapasowe to suma celów wszystkich powiadomień (w kolejności ich ważności).
+    """
+    __slots__ = ("powiadomienia", "cele", "seq")
+
+    def __init__(self, powiadomienia: list[Powiadomienie], seq: int) -> None:
+        self.powiadomienia = sorted(powiadomienia, key=lambda p: p.priorytet) # stabilnie - remisy w kolejności przyjęcia
+        self.cele = tuple(dict.fromkeys(cel for powiadomienie in self.powiadomienia for cel in powiadomienie.cele))
+        self.seq = seq
+
+    @property
+    def priorytet(self) -> int:
+        return self.powiadomienia[0].priorytet
+
+    def __lt__(self, inna: "Przesylka") -> bool:
+        return (self.priorytet, self.seq) < (inna.priorytet, inna.seq)
+
+
+class LimitCelu:
+    """Kubełek żetonów jednego celu (odpowiednik kubełka limitów Discorda dla kanału) i wstrzymanie po 429."""
+    __slots__ = ("zetony", "ostatnie", "wstrzymany_do")
+
+    def __init__(self, zetony: float, teraz: float) -> None:
+        self.zetony = zetony
+        self.ostatnie = teraz
+        self.wstrzymany_do = 0.0
+
+
+class SkrzynkaPowiadomien:
+    """
+    Skrzynka wychodząca powiadomień (awanse, osiągnięcia, misje) - ścieżka XP tylko wstawia.
+
+    Powiadomienia z tym samym kluczem łączenia (serwer, użytkownik) czekają `okno_laczenia_ms` od pierwszego
+    i trafiają do `wyslij` jako jedna przesyłka. Przesyłki czekają w kolejkach celów (kanał / DM) w kolejności
+    priorytetu; każdy cel ma własny kubełek `limit_na_cel` wiadomości na `okres_limitu_s`, a wszystkie
+    wspólny limit `limit_globalny_na_s`. Do `max_na_wiadomosc` przesyłek jednego celu idzie jedną wiadomością.
+
+    `wyslij(cel, przesylki)` zgłasza PonowPozniej (cel wstrzymany, przesyłki wracają) albo CelNiedostepny
+    (przesyłki przechodzą na kolejny cel albo są porzucane); przesyłki wysłane przed błędem (`wyslane`) nie wracają.
+    """
+
+    def __init__(self, wyslij: typing.Callable[[Cel, list[Przesylka]], typing.Awaitable[None]], *, okno_laczenia_ms: int = 2000,
+                 limit_na_cel: int = 5, okres_limitu_s: float = 5.0, limit_globalny_na_s: int = 40, max_na_wiadomosc: int = 10,
+                 rownoleglosc: int = 4, pojemnosc: int = 5000, logger: logging.Logger | None = None) -> None:
+        self.wyslij = wyslij
+        self.okno_laczenia_s = okno_laczenia_ms / 1000
+        self.limit_na_cel = max(1, limit_na_cel)
+        self.okres_limitu_s = okres_limitu_s
+        self.limit_globalny_na_s = max(1, limit_globalny_na_s)
+        self.max_na_wiadomosc = max(1, max_na_wiadomosc)
+        self.rownoleglosc = max(1, rownoleglosc)
+        self.pojemnosc = pojemnosc
+        self.logger = logger or logging.getLogger("discord_bot")
+
+        self._seq = itertools.count()
+        self._laczone: dict[typing.Hashable, list[Powiadomienie]] = {}
+        self._terminy: list[tuple[float, int, typing.Hashable]] = [] # (termin, seq, klucz) - kopiec okien łączenia
+        self._kolejki_celow: dict[Cel, list[Przesylka]] = {} # kopce przesyłek wg (priorytet, seq)
+        self._limity: dict[Cel, LimitCelu] = {}
+        self._w_toku: set[Cel] = set()
+        self._wysylki: set[asyncio.Task] = set()
+        self._globalne_zetony = float(self.limit_globalny_na_s)
+        self._globalne_ostatnie = time.monotonic()
+        self._zmiana = asyncio.Event()
+        self._petla: asyncio.Task | None = None
+        self._zamknieta = False
+        self._oproznij = False
+        self._oczekujace = 0 # powiadomienia w oknach łączenia, kolejkach celów i w trakcie wysyłki
+
+        # Metryki
+        self.przyjete = 0
+        self.polaczone = 0
+        self.wiadomosci = 0
+        self.wyslane_przesylki = 0
+        self.limity_429 = 0
+        self.przekierowane = 0
+        self.porzucone = 0
+        self.odrzucone = 0
+        self.bledy = 0
+        self.max_opoznienie_ms = 0.0
+
+    def __len__(self) -> int:
+        return self._oczekujace
+
+    # --- Cykl życia ---
+    def uruchom(self) -> None:
+        self._zamknieta = False
+        self._oproznij = False
+        if self._petla is None:
+            self._petla = asyncio.create_task(self._petla_wysylki(), name="skrzynka_powiadomien")
+
+    async def zamknij(self, limit_s: float = 10.0) -> None:
+        """Przestaje przyjmować, wysyła od razu wszystko, co czeka (do `limit_s`), i zatrzymuje pętlę."""
+        self._zamknieta = True
+        self._oproznij = True
+        self._zmiana.set()
+        koniec = time.monotonic() + limit_s
+        while len(self) and time.monotonic() < koniec:
+            await asyncio.sleep(0.05)
+        if len(self):
+            self.logger.warning(f"Skrzynka powiadomień: zamknięcie bez wysłania {len(self)} powiadomień (limit {limit_s} s).")
+        if self._petla is not None:
+            self._petla.cancel()
+            await asyncio.gather(self._petla, *self._wysylki, return_exceptions=True)
+            self._petla = None
+
+    # --- Wstawianie ---
+    def wstaw(self, priorytet: int, cele: typing.Sequence[Cel], tresc: typing.Any, klucz_laczenia: typing.Hashable | None = None) -> bool:
+        """Wstawia powiadomienie bez czekania. Zwraca False, gdy skrzynka jest zamknięta, pełna albo nie ma celów."""
+        if self._zamknieta or not cele: return False
+        if len(self) >= self.pojemnosc:
+            self.odrzucone += 1
+            if self.odrzucone == 1 or self.odrzucone % 100 == 0:
+                self.logger.warning(f"Skrzynka powiadomień pełna - odrzucono już {self.odrzucone} powiadomień.")
+            return False
+        teraz = time.monotonic()
+        powiadomienie = Powiadomienie(priorytet, tuple(cele), tresc, klucz_laczenia, teraz)
+        self.przyjete += 1
+        self._oczekujace += 1
+        if klucz_laczenia is None or self.okno_laczenia_s <= 0:
+            self._do_celu(Przesylka([powiadomienie], next(self._seq)))
+        elif klucz_laczenia in self._laczone:
+            self._laczone[klucz_laczenia].append(powiadomienie)
+            self.polaczone += 1
+        else:
+            self._laczone[klucz_laczenia] = [powiadomienie]
+            heapq.heappush(self._terminy, (teraz + self.okno_laczenia_s, next(self._seq), klucz_laczenia))
+        self._zmiana.set()
+        return True
+
+    def _do_celu(self, przesylka: Przesylka) -> None:
+        heapq.heappush(self._kolejki_celow.setdefault(przesylka.cele[0], []), przesylka)
+
+    # --- Limity ---
+    def _uzupelnij(self, teraz: float) -> None:
+        self._globalne_zetony = min(float(self.limit_globalny_na_s), self._globalne_zetony + (teraz - self._globalne_ostatnie) * self.limit_globalny_na_s)
+        self._globalne_ostatnie = teraz
+
+    def _gotowy_za(self, cel: Cel, teraz: float) -> float:
+        """Za ile sekund cel może wysłać kolejną wiadomość (0 = teraz)."""
+        limit = self._limity.get(cel)
+        if limit is None: return 0.0
+        limit.zetony = min(float(self.limit_na_cel), limit.zetony + (teraz - limit.ostatnie) * self.limit_na_cel / self.okres_limitu_s)
+        limit.ostatnie = teraz
+        brak = 0.0 if limit.zetony >= 1 else (1 - limit.zetony) * self.okres_limitu_s / self.limit_na_cel
+        return max(brak, limit.wstrzymany_do - teraz)
+
+    def _zuzyj(self, cel: Cel, teraz: float) -> None:
+        limit = self._limity.get(cel)
+        if limit is None:
+            if len(self._limity) >= 1024: self._przytnij_limity(teraz)
+            limit = self._limity[cel] = LimitCelu(float(self.limit_na_cel), teraz)
+        limit.zetony -= 1
+        self._globalne_zetony -= 1
+
+    def _przytnij_limity(self, teraz: float) -> None:
+        """Usuwa kubełki celów, które się już w pełni odnowiły (brak wpisu = pełny kubełek)."""
+        for cel in [cel for cel, limit in self._limity.items() if cel not in self._w_toku and limit.wstrzymany_do <= teraz
+                    and limit.zetony + (teraz - limit.ostatnie) * self.limit_na_cel / self.okres_limitu_s >= self.limit_na_cel]:
+            del self._limity[cel]
+
+    # --- Pętla ---
+    async def _petla_wysylki(self) -> None:
+        while True:
+            self._zmiana.clear()
+            teraz = time.monotonic()
+            while self._terminy and (self._oproznij or self._terminy[0][0] <= teraz):
+                _, seq, klucz = heapq.heappop(self._terminy)
+                self._do_celu(Przesylka(self._laczone.pop(klucz), seq))
+
+            czekaj = self._terminy[0][0] - teraz if self._terminy else None
+            self._uzupelnij(teraz)
+            # Gotowe cele wg priorytetu najważniejszej przesyłki (przy równym - starsza pierwsza)
+            gotowe = []
+            for cel, kolejka in self._kolejki_celow.items():
+                if not kolejka or cel in self._w_toku: continue
+                za = self._gotowy_za(cel, teraz)
+                if za > 0: czekaj = za if czekaj is None else min(czekaj, za)
+                else: gotowe.append((kolejka[0].priorytet, kolejka[0].seq, cel))
+            for _, _, cel in sorted(gotowe):
+                if len(self._w_toku) >= self.rownoleglosc: break
+                if self._globalne_zetony < 1:
+                    za = (1 - self._globalne_zetony) / self.limit_globalny_na_s
+                    czekaj = za if czekaj is None else min(czekaj, za)
+                    break
+                kolejka = self._kolejki_celow[cel]
+                przesylki = [heapq.heappop(kolejka) for _ in range(min(self.max_na_wiadomosc, len(kolejka)))]
+                if not kolejka: del self._kolejki_celow[cel]
+                self._zuzyj(cel, teraz)
+                self._w_toku.add(cel)
+                zadanie = asyncio.create_task(self._wyslij(cel, przesylki))
+                self._wysylki.add(zadanie)
+                zadanie.add_done_callback(self._wysylki.discard)
+
+            try:
+                await asyncio.wait_for(self._zmiana.wait(), timeout=czekaj)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dostarczone(self, przesylki: list[Przesylka]) -> None:
+        if not przesylki: return
+        self._oczekujace -= sum(len(przesylka.powiadomienia) for przesylka in przesylki)
+        self.wiadomosci += 1
+        self.wyslane_przesylki += len(przesylki)
+        opoznienie_ms = (time.monotonic() - min(p.przyjete for przesylka in przesylki for p in przesylka.powiadomienia)) * 1000
+        if opoznienie_ms > self.max_opoznienie_ms: self.max_opoznienie_ms = opoznienie_ms
+
+    async def _wyslij(self, cel: Cel, przesylki: list[Przesylka]) -> None:
+        try:
+            await self.wyslij(cel, przesylki)
+            self._dostarczone(przesylki)
+        except PonowPozniej as e:
+            self.limity_429 += 1
+            limit = self._limity.setdefault(cel, LimitCelu(0.0, time.monotonic()))
+            limit.wstrzymany_do = time.monotonic() + e.retry_after
+            self._dostarczone(przesylki[:e.wyslane])
+            for przesylka in przesylki[e.wyslane:]: self._do_celu(przesylka)
+        except CelNiedostepny as e:
+            self._dostarczone(przesylki[:e.wyslane])
+            for przesylka in przesylki[e.wyslane:]:
+                if len(przesylka.cele) > 1:
+                    przesylka.cele = przesylka.cele[1:]
+                    self._do_celu(przesylka)
+                    self.przekierowane += 1
+                else:
+                    self.porzucone += len(przesylka.powiadomienia)
+                    self._oczekujace -= len(przesylka.powiadomienia)
+            self.logger.debug(f"Skrzynka powiadomień: cel {cel} niedostępny ({e}).")
+        except Exception as e:
+            liczba = sum(len(przesylka.powiadomienia) for przesylka in przesylki)
+            self.bledy += 1
+            self.porzucone += liczba
+            self._oczekujace -= liczba
+            self.logger.error(f"Skrzynka powiadomień: błąd wysyłki na {cel}: {e}", exc_info=True)
+        finally:
+            self._w_toku.discard(cel)
+            self._zmiana.set()
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            "okno_laczenia_ms": int(self.okno_laczenia_s * 1000),
+            "w_kolejce": len(self),
+            "cele_w_kolejce": len(self._kolejki_celow),
+            "przyjete": self.przyjete,
+            "polaczone": self.polaczone,
+            "wiadomosci": self.wiadomosci,
+            "wyslane_przesylki": self.wyslane_przesylki,
+            "limity_429": self.limity_429,
+            "przekierowane": self.przekierowane,
+            "porzucone": self.porzucone,
+            "odrzucone": self.odrzucone,
+            "bledy": self.bledy,
+            "max_opoznienie_ms": round(self.max_opoznienie_ms, 2),
+        }
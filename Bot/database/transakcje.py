@@ -0,0 +1,114 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import typing
+
+import aiosqlite
+
+
+class StanTransakcji:
+    """Akcje odłożone do końca transakcji (np. aktualizacje stanu w pamięci)."""
+    __slots__ = ("po_zatwierdzeniu", "po_wycofaniu")
+
+    def __init__(self) -> None:
+        self.po_zatwierdzeniu: list[typing.Callable[[], None]] = []
+        self.po_wycofaniu: list[typing.Callable[[], None]] = []
+
+
+class KoordynatorZapisu:
+    """
+    Porządkuje zapisy na wspólnym połączeniu zapisującym.
+
+    SQLite ma jedną transakcję na połączenie, więc commit jednej korutyny zatwierdziłby też
+    niedokończone zmiany innej. Każda operacja zapisu bierze blokadę (wielowejściową w obrębie
+    jednego zadania), a `transakcja()` trzyma ją do końca bloku i zatwierdza wszystko jednym commitem.
+    """
+
+    def __init__(self, polaczenie: aiosqlite.Connection) -> None:
+        self.polaczenie = polaczenie
+        self._blokada = asyncio.Lock()
+        self._wlasciciel: contextvars.ContextVar[bool] = contextvars.ContextVar(f"zapis_{id(self)}", default=False)
+        self._transakcja: contextvars.ContextVar[StanTransakcji | None] = contextvars.ContextVar(f"transakcja_{id(self)}", default=None)
+        self.liczba_transakcji = 0
+        self.liczba_wycofanych = 0
+
+    def w_transakcji(self) -> bool:
+        return self._transakcja.get() is not None
+
+    @contextlib.asynccontextmanager
+    async def zapis(self) -> typing.AsyncIterator[None]:
+        """Wyłączny dostęp do połączenia zapisującego; zagnieżdżone wywołania w tym samym zadaniu przechodzą od razu."""
+        if self._wlasciciel.get():
+            yield
+            return
+        async with self._blokada:
+            token = self._wlasciciel.set(True)
+            try:
+                yield
+            finally:
+                self._wlasciciel.reset(token)
+
+    async def zatwierdz(self) -> None:
+        """Commit pojedynczej operacji - wewnątrz transakcji odkładany do jej końca."""
+        if self._transakcja.get() is None:
+            await self.polaczenie.commit()
+
+    def po_zatwierdzeniu(self, akcja: typing.Callable[[], None]) -> None:
+        """Wykonuje akcję po udanym commicie (od razu, gdy nie ma otwartej transakcji)."""
+        stan = self._transakcja.get()
+        if stan is None: akcja()
+        else: stan.po_zatwierdzeniu.append(akcja)
+
+    def po_wycofaniu(self, akcja: typing.Callable[[], None]) -> None:
+        stan = self._transakcja.get()
+        if stan is not None: stan.po_wycofaniu.append(akcja)
+
+    @contextlib.asynccontextmanager
+    async def transakcja(self) -> typing.AsyncIterator[None]:
+        if self._transakcja.get() is not None:
+            # Zagnieżdżona transakcja dołącza do zewnętrznej
+            yield
+            return
+        async with self.zapis():
+            stan = StanTransakcji()
+            token = self._transakcja.set(stan)
+            try:
+                if self.polaczenie.in_transaction:
+                    await self.polaczenie.commit()
+                await self.polaczenie.execute("BEGIN")
+                yield
+                await self.polaczenie.commit()
+            except BaseException:
+                self.liczba_wycofanych += 1
+                await self.polaczenie.rollback()
+                for akcja in stan.po_wycofaniu: akcja()
+                raise
+            finally:
+                self._transakcja.reset(token)
+            self.liczba_transakcji += 1
+            for akcja in stan.po_zatwierdzeniu: akcja()
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        return {
+            "liczba_transakcji": self.liczba_transakcji,
+            "liczba_wycofanych": self.liczba_wycofanych,
+            "blokada_zajeta": self._blokada.locked(),
+        }
+
+
+def operacja_zapisu(metoda):
+    """Dekorator metod ZarzadcaBazyDanych, które piszą do bazy: wykonuje je pod blokadą koordynatora zapisu."""
+    @functools.wraps(metoda)
+    async def opakowanie(self, *args, **kwargs):
+        async with self.koordynator.zapis():
+            return await metoda(self, *args, **kwargs)
+    return opakowanie
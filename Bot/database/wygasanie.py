@@ -0,0 +1,230 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import typing
+
+from database.skrzynka_powiadomien import PonowPozniej
+
+ROLA = "rola"
+PRZEDMIOT = "przedmiot"
+
+
+class WpisWygasania(typing.NamedTuple):
+    rodzaj: str # ROLA (aktywne_role_czasowe) albo PRZEDMIOT (posiadane_przedmioty)
+    id_wpisu: int
+    czas_wygasniecia_ts: int
+    user_id: int
+    server_id: int
+    rola_id: int | None = None
+
+
+class Wygasanie:
+    """
+    Wygaszanie ról czasowych i zakupionych przedmiotów/bonusów co do sekundy.
+
+    Wpisy wygasające w ciągu `horyzont_s` są w kopcu (wg czasu wygaśnięcia); pętla śpi do najbliższego terminu,
+    a zakres jest doczytywany, gdy horyzont mija. Nowe i przedłużone wpisy zgłasza `zglos` (zarządca bazy - po commicie).
+    Role są zdejmowane w tle (pętla w tym czasie dalej opróżnia kopiec) przez `zdejmij_role(wpis)` najwyżej
+    `rownoleglosc` naraz i najwyżej `limit_na_serwer` na `okres_limitu_s` na serwer; PonowPozniej odkłada wpis.
+    Wygasłe wiersze są usuwane partiami - jednym commitem dla przedmiotów i jednym dla zdjętych ról na przebieg.
+    """
+
+    def __init__(self, baza_danych: typing.Any, zdejmij_role: typing.Callable[[WpisWygasania], typing.Awaitable[None]], *,
+                 horyzont_s: int = 6 * 3600, rownoleglosc: int = 4, limit_na_serwer: int = 5, okres_limitu_s: float = 5.0,
+                 max_prob: int = 5, logger: logging.Logger | None = None) -> None:
+        self.baza_danych = baza_danych
+        self.zdejmij_role = zdejmij_role
+        self.horyzont_s = max(60, horyzont_s)
+        self.rownoleglosc = max(1, rownoleglosc)
+        self.limit_na_serwer = max(1, limit_na_serwer)
+        self.okres_limitu_s = okres_limitu_s
+        self.max_prob = max(1, max_prob)
+        self.logger = logger or logging.getLogger("discord_bot")
+
+        self._seq = itertools.count()
+        self._kopiec: list[tuple[float, int, WpisWygasania, int]] = [] # (czas akcji, seq, wpis, próba)
+        self._aktualne: dict[tuple[str, int], int] = {} # (rodzaj, id_wpisu) -> czas wygaśnięcia wpisu w kopcu; inne wpisy w kopcu są nieaktualne
+        self._limity: dict[int, list[float]] = {} # server_id -> [żetony, ostatnie uzupełnienie]
+        self._semafor = asyncio.Semaphore(self.rownoleglosc)
+        self._wczytano_do = 0
+        self._zmiana = asyncio.Event()
+        self._petla: asyncio.Task | None = None
+        self._zdejmowanie: set[asyncio.Task] = set() # zdejmowanie ról w tle - pętla nie czeka na limity Discorda
+
+        # Metryki
+        self.wczytania = 0
+        self.role_zdjete = 0
+        self.role_ponowione = 0
+        self.bledy = 0
+        self.usuniete_role = 0
+        self.usuniete_przedmioty = 0
+        self.max_opoznienie_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._aktualne)
+
+    # --- Cykl życia ---
+    def uruchom(self, przed_startem: typing.Callable[[], typing.Awaitable[None]] | None = None) -> None:
+        """Startuje pętlę; `przed_startem` (np. czekanie na gotowość bota - role wymagają pamięci serwerów) idzie przed pierwszym wczytaniem."""
+        if self._petla is None:
+            self._petla = asyncio.create_task(self._petla_wygasania(przed_startem), name="wygasanie")
+
+    async def zamknij(self) -> None:
+        """Zatrzymuje pętlę - niewygaszone wpisy zostają w bazie i są wczytywane przy następnym starcie."""
+        if self._petla is not None:
+            self._petla.cancel()
+            await asyncio.gather(self._petla, return_exceptions=True)
+            self._petla = None
+        zadania = list(self._zdejmowanie)
+        for zadanie in zadania: zadanie.cancel()
+        await asyncio.gather(*zadania, return_exceptions=True)
+
+    def zglos(self, wpis: WpisWygasania) -> None:
+        """Nowy albo przedłużony wpis. Poza horyzontem tylko unieważnia poprzedni termin - trafi do kopca przy doczytaniu."""
+        klucz = (wpis.rodzaj, wpis.id_wpisu)
+        if wpis.czas_wygasniecia_ts > self._wczytano_do:
+            self._aktualne.pop(klucz, None)
+            return
+        self._dodaj(wpis)
+
+    def wycofaj(self, rodzaj: str, id_wpisu: int) -> None:
+        """Usunięty wpis (np. cofnięty zakup) - jego termin w kopcu staje się nieaktualny."""
+        self._aktualne.pop((rodzaj, id_wpisu), None)
+
+    def _dodaj(self, wpis: WpisWygasania, czas_akcji: float | None = None, proba: int = 0) -> None:
+        self._aktualne[(wpis.rodzaj, wpis.id_wpisu)] = wpis.czas_wygasniecia_ts
+        heapq.heappush(self._kopiec, (wpis.czas_wygasniecia_ts if czas_akcji is None else czas_akcji, next(self._seq), wpis, proba))
+        self._zmiana.set()
+
+    # --- Pętla ---
+    async def _wczytaj(self, teraz: float) -> None:
+        do_ts = int(teraz) + self.horyzont_s
+        wpisy = await self.baza_danych.pobierz_wygasajace(do_ts)
+        for wpis in wpisy:
+            if self._aktualne.get((wpis.rodzaj, wpis.id_wpisu)) != wpis.czas_wygasniecia_ts: self._dodaj(wpis)
+        self._wczytano_do = do_ts
+        self.wczytania += 1
+
+    async def _petla_wygasania(self, przed_startem: typing.Callable[[], typing.Awaitable[None]] | None) -> None:
+        if przed_startem is not None: await przed_startem()
+        while True:
+            self._zmiana.clear()
+            teraz = time.time()
+            try:
+                # Doczytanie w połowie horyzontu - wpisy spoza niego, zgłoszone w międzyczasie, nie przepadną
+                if teraz >= self._wczytano_do - self.horyzont_s / 2: await self._wczytaj(teraz)
+                wymagalne = []
+                while self._kopiec and self._kopiec[0][0] <= teraz:
+                    _, _, wpis, proba = heapq.heappop(self._kopiec)
+                    if self._aktualne.get((wpis.rodzaj, wpis.id_wpisu)) == wpis.czas_wygasniecia_ts: wymagalne.append((wpis, proba))
+                if wymagalne: await self._przetworz(wymagalne, teraz)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.bledy += 1
+                self.logger.error(f"Wygasanie: błąd przebiegu: {e}", exc_info=True)
+                await asyncio.sleep(5)
+                continue
+            # Najwyżej minuta snu - zmiana zegara systemowego nie przesunie terminów o więcej
+            czekaj = min(60.0, self._wczytano_do - self.horyzont_s / 2 - time.time())
+            if self._kopiec: czekaj = min(czekaj, self._kopiec[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._zmiana.wait(), timeout=max(0.0, czekaj))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _przetworz(self, wymagalne: list[tuple[WpisWygasania, int]], teraz: float) -> None:
+        """Przedmioty od razu jedną partią; role - w tle, po zdjęciu (długie zdejmowanie nie wstrzymuje wygaszania bonusów)."""
+        for wpis, _ in wymagalne:
+            self.max_opoznienie_ms = max(self.max_opoznienie_ms, (teraz - wpis.czas_wygasniecia_ts) * 1000)
+        await self._usun([wpis for wpis, _ in wymagalne if wpis.rodzaj == PRZEDMIOT])
+        role = [(wpis, proba) for wpis, proba in wymagalne if wpis.rodzaj == ROLA]
+        if not role: return
+        zadanie = asyncio.create_task(self._zdejmij_role_partii(role), name="wygasanie-role")
+        self._zdejmowanie.add(zadanie)
+        zadanie.add_done_callback(self._zdejmowanie.discard)
+
+    async def _zdejmij_role_partii(self, role: list[tuple[WpisWygasania, int]]) -> None:
+        wyniki = await asyncio.gather(*(self._zdejmij(wpis, proba) for wpis, proba in role))
+        zdjete = [wpis for (wpis, _), gotowe in zip(role, wyniki) if gotowe]
+        try:
+            await self._usun(zdjete)
+        except Exception as e:
+            self.bledy += 1
+            self.logger.error(f"Wygasanie: błąd usuwania wpisów zdjętych ról: {e}", exc_info=True)
+            # Wiersze zostały w bazie - wrócą do kopca przy najbliższym doczytaniu
+            for wpis in zdjete:
+                klucz = (wpis.rodzaj, wpis.id_wpisu)
+                if self._aktualne.get(klucz) == wpis.czas_wygasniecia_ts: del self._aktualne[klucz]
+
+    async def _usun(self, wpisy: list[WpisWygasania]) -> None:
+        if not wpisy: return
+        usuniete_role, usuniete_przedmioty = await self.baza_danych.usun_wygasle_wpisy(
+            [(wpis.id_wpisu, wpis.czas_wygasniecia_ts) for wpis in wpisy if wpis.rodzaj == ROLA],
+            [(wpis.id_wpisu, wpis.czas_wygasniecia_ts) for wpis in wpisy if wpis.rodzaj == PRZEDMIOT])
+        for wpis in wpisy:
+            klucz = (wpis.rodzaj, wpis.id_wpisu)
+            if self._aktualne.get(klucz) == wpis.czas_wygasniecia_ts: del self._aktualne[klucz]
+        self.usuniete_role += usuniete_role
+        self.usuniete_przedmioty += usuniete_przedmioty
+        self.logger.info(f"Wygasanie: usunięto {usuniete_role} ról czasowych i {usuniete_przedmioty} przedmiotów/bonusów.")
+
+    async def _czekaj_na_limit(self, server_id: int) -> None:
+        """Kubełek żetonów serwera (zmiany ról jednego serwera dzielą limit Discorda)."""
+        while True:
+            teraz = time.monotonic()
+            limit = self._limity.setdefault(server_id, [float(self.limit_na_serwer), teraz])
+            limit[0] = min(float(self.limit_na_serwer), limit[0] + (teraz - limit[1]) * self.limit_na_serwer / self.okres_limitu_s)
+            limit[1] = teraz
+            if limit[0] >= 1:
+                limit[0] -= 1
+                return
+            await asyncio.sleep((1 - limit[0]) * self.okres_limitu_s / self.limit_na_serwer)
+
+    async def _zdejmij(self, wpis: WpisWygasania, proba: int) -> bool:
+        """True - wiersz do usunięcia; False - wpis odłożony (PonowPozniej) do kolejnej próby albo już nieaktualny."""
+        async with self._semafor:
+            await self._czekaj_na_limit(wpis.server_id)
+            # W trakcie czekania wpis mógł zostać przedłużony (nowy termin w kopcu) albo wycofany - wtedy roli nie ruszamy
+            if self._aktualne.get((wpis.rodzaj, wpis.id_wpisu)) != wpis.czas_wygasniecia_ts: return False
+            try:
+                await self.zdejmij_role(wpis)
+                self.role_zdjete += 1
+                return True
+            except PonowPozniej as e:
+                if proba + 1 >= self.max_prob:
+                    self.bledy += 1
+                    self.logger.error(f"Wygasanie: nie zdjęto roli {wpis.rola_id} użytkownikowi {wpis.user_id} (serwer {wpis.server_id}) po {self.max_prob} próbach - usuwam wpis.")
+                    return True
+                self.role_ponowione += 1
+                self._dodaj(wpis, time.time() + max(e.retry_after, 1.0) * (proba + 1), proba + 1)
+                return False
+            except Exception as e:
+                self.bledy += 1
+                self.logger.error(f"Wygasanie: błąd zdejmowania roli (wpis {wpis.id_wpisu}): {e}", exc_info=True)
+                return True
+
+    def statystyki(self) -> dict[str, typing.Any]:
+        najblizszy = min(self._aktualne.values(), default=None)
+        return {
+            "zaplanowane": len(self),
+            "najblizsze_wygasniecie_ts": najblizszy,
+            "wczytano_do_ts": self._wczytano_do,
+            "wczytania": self.wczytania,
+            "role_zdjete": self.role_zdjete,
+            "role_ponowione": self.role_ponowione,
+            "usuniete_role": self.usuniete_role,
+            "usuniete_przedmioty": self.usuniete_przedmioty,
+            "bledy": self.bledy,
+            "max_opoznienie_ms": round(self.max_opoznienie_ms, 2),
+        }
@@ -0,0 +1,96 @@
+"""
+Copyright © Krypton 2019-Present - https://github.com/kkrypt0nn (https://krypton.ninja)
+Opis:
+🐍 Prosty szablon do rozpoczęcia kodowania własnego i spersonalizowanego bota Discord w Pythonie
+
+Wersja: 6.3.0
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+
+class FormatterLogowania(logging.Formatter):
+    czarny = "\x1b[30m"; czerwony = "\x1b[31m"; zielony = "\x1b[32m"; zolty = "\x1b[33m"
+    niebieski = "\x1b[34m"; szary = "\x1b[38m"; reset = "\x1b[0m"; pogrubienie = "\x1b[1m"
+    KOLORY = {
+        logging.DEBUG: szary + pogrubienie, logging.INFO: niebieski + pogrubienie,
+        logging.WARNING: zolty + pogrubienie, logging.ERROR: czerwony,
+        logging.CRITICAL: czerwony + pogrubienie,
+    }
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Formattery dla każdego poziomu budowane raz, nie przy każdym rekordzie
+        self._formattery = {poziom: self._zbuduj(kolor) for poziom, kolor in self.KOLORY.items()}
+        self._domyslny = self._zbuduj(self.szary + self.pogrubienie)
+
+    def _zbuduj(self, kolor_logu: str) -> logging.Formatter:
+        format_str = "(czarny){asctime}(reset) (kolor_poziomu){levelname:<8}(reset) (zielony){name}(reset) {message}"
+        format_str = format_str.replace("(czarny)", self.czarny + self.pogrubienie).replace("(reset)", self.reset)
+        format_str = format_str.replace("(kolor_poziomu)", kolor_logu).replace("(zielony)", self.zielony + self.pogrubienie)
+        return logging.Formatter(format_str, "%Y-%m-%d %H:%M:%S", style="{")
+
+    def format(self, record):
+        return self._formattery.get(record.levelno, self._domyslny).format(record)
+
+
+class FiltrProbkowania(logging.Filter):
+    """
+    Próbkowanie i limit dla gorących miejsc logowania. Rekord z `extra={"probka": klucz}` przechodzi z prawdopodobieństwem
+    `ulamek`, a w każdej minucie najwyżej `limit_na_minute` takich rekordów (0 = bez limitu). Liczba pominiętych
+    jest dopisywana do następnego przepuszczonego rekordu. Rekordy bez klucza (lub z kluczem spoza konfiguracji) przechodzą zawsze.
+    """
+
+    def __init__(self, probkowanie: dict[str, tuple[float, int]]) -> None:
+        super().__init__()
+        self.probkowanie = probkowanie
+        self._okna: dict[str, list] = {} # klucz -> [początek okna, przepuszczone w oknie, pominięte od ostatniego przepuszczonego]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        klucz = getattr(record, "probka", None)
+        ustawienia = self.probkowanie.get(klucz) if klucz is not None else None
+        if ustawienia is None: return True
+        ulamek, limit_na_minute = ustawienia
+        teraz = time.monotonic()
+        okno = self._okna.get(klucz)
+        if okno is None or teraz - okno[0] >= 60:
+            okno = self._okna[klucz] = [teraz, 0, okno[2] if okno else 0]
+        if (ulamek < 1.0 and random.random() >= ulamek) or (limit_na_minute and okno[1] >= limit_na_minute):
+            okno[2] += 1
+            return False
+        okno[1] += 1
+        if okno[2]:
+            record.msg = f"{record.msg} [+{okno[2]} pominiętych]"
+            okno[2] = 0
+        return True
+
+
+def skonfiguruj_logowanie(nazwa: str, plik: str, *, max_bajtow: int, liczba_kopii: int, probkowanie: dict[str, tuple[float, int]] | None = None) -> logging.Logger:
+    """
+    Logger z nieblokującym zapisem: rekordy trafiają do kolejki (QueueHandler), a konsolę i plik (z rotacją
+    po `max_bajtow`) obsługuje wątek QueueListener - pętla zdarzeń nie czeka na I/O. Wątek jest zatrzymywany
+    (z opróżnieniem kolejki) przy wyjściu z procesu.
+    """
+    handler_konsoli = logging.StreamHandler()
+    handler_konsoli.setFormatter(FormatterLogowania())
+    if max_bajtow > 0:
+        handler_pliku: logging.Handler = logging.handlers.RotatingFileHandler(filename=plik, encoding="utf-8", maxBytes=max_bajtow, backupCount=liczba_kopii)
+    else:
+        handler_pliku = logging.FileHandler(filename=plik, encoding="utf-8", mode="w")
+    handler_pliku.setFormatter(logging.Formatter("[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"))
+
+    kolejka_logow: queue.SimpleQueue = queue.SimpleQueue()
+    sluchacz = logging.handlers.QueueListener(kolejka_logow, handler_konsoli, handler_pliku, respect_handler_level=True)
+    sluchacz.start()
+    atexit.register(sluchacz.stop)
+
+    logger = logging.getLogger(nazwa)
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(kolejka_logow))
+    if probkowanie: logger.addFilter(FiltrProbkowania(probkowanie))
+    return logger